@@ -6,6 +6,7 @@ import torch
 import re
 import logging
 from datetime import datetime
+from app.services.text_rewriter import rewrite_text
 
 app = Flask(__name__)
 CORS(app)
@@ -162,34 +163,8 @@ def format_persona_answer(answer, persona, confidence):
 
 def simplify_text(text):
     """Simplifica o texto para o Gá, deixando mais natural e próximo do cotidiano"""
-    replacements = {
-        "dispensação": "entrega do remédio na farmácia",
-        "farmacêutico": "farmacêutico (quem trabalha na farmácia)",
-        "medicamentos": "remédios",
-        "tratamento": "tratamento (o que a pessoa faz para melhorar)",
-        "hanseníase": "hanseníase (doença de pele)",
-        "protocolo": "guia de cuidados",
-        "orientação": "explicação",
-        "paciente": "pessoa que está tratando",
-        "adesão": "seguir direitinho o tratamento",
-        "posologia": "como tomar o remédio",
-        "administração": "como usar o remédio",
-        "via de administração": "jeito de tomar o remédio",
-        "reação adversa": "efeito colateral (coisa ruim que pode acontecer)",
-        "interação medicamentosa": "mistura de remédios que pode dar problema",
-        "supervisionada": "com alguém olhando junto",
-        "autoadministrada": "a própria pessoa toma sozinha",
-        "prescrição": "receita do médico",
-        "dose": "quantidade do remédio",
-        "contraindicação": "quando não pode usar",
-        "indicação": "quando é recomendado usar"
-    }
-    simplified = text
-    for technical, simple in replacements.items():
-        simplified = simplified.replace(technical, simple)
-    # Deixar frases mais curtas e naturais
-    simplified = simplified.replace(". ", ".\n")
-    return simplified
+    # Termos técnicos e quebra de frases em data/rewrite_rules/ga_explicativo.json
+    return rewrite_text(text, "ga_explicativo")
 
 def enhanced_fallback_response(question, persona, context):
     """Fallback aprimorado que retorna trecho relevante do PDF"""
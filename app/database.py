@@ -2,16 +2,34 @@
 Módulo de conexão e operações com Astra DB
 """
 
+import atexit
 import logging
+import threading
 import time
-from typing import Any, Dict, List
+import uuid
+from typing import Any, Dict, List, Optional
 
 from astrapy import DataAPIClient
 from config.settings import settings
 
+from app.services.session_history import decode_cursor, encode_cursor
+from app.services.write_behind import WriteBehindBuffer
+
+# Maior página de histórico devolvida por consulta
+MAX_HISTORY_PAGE = 100
+
+# Código do Data API para insert de um _id que já existe
+DUPLICATE_ID_ERROR = "DOCUMENT_ALREADY_EXISTS"
+
 logger = logging.getLogger(__name__)
 
 
+def is_duplicate_id_error(error: Exception) -> bool:
+    """Se todas as falhas de um insert do Data API forem de _id já existente (documentos já gravados)"""
+    descriptors = getattr(error, "error_descriptors", None) or []
+    return bool(descriptors) and all(getattr(d, "error_code", None) == DUPLICATE_ID_ERROR for d in descriptors)
+
+
 class AstraDBConnection:
     """Classe para gerenciar conexão com Astra DB"""
 
@@ -48,6 +66,28 @@ class AstraDBConnection:
             logger.error(f"Erro ao conectar com Astra DB: {e}")
             raise
 
+    @staticmethod
+    def chat_document(
+        session_id: str,
+        message: str,
+        response: str,
+        persona: str = "Dr. Gasnelio",
+    ) -> Dict[str, Any]:
+        """Documento de histórico de chat, com id próprio e o timestamp do momento da resposta"""
+        ts = int(time.time() * 1000)
+        return {
+            # Id definido aqui, não pelo banco: reenviar o documento (transbordo) não duplica o histórico.
+            "_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "message": message,
+            "response": response,
+            "persona": persona,
+            # Persistência de timestamp em formato compatível com Astra DB.
+            "timestamp": {"$date": {"$numberLong": str(ts)}},
+            # Mesmo instante em milissegundos, chave da paginação por cursor.
+            "ts": ts,
+        }
+
     def save_chat_message(
         self,
         session_id: str,
@@ -57,14 +97,7 @@ class AstraDBConnection:
     ) -> bool:
         """Salva uma mensagem de chat no banco"""
         try:
-            document = {
-                "session_id": session_id,
-                "message": message,
-                "response": response,
-                "persona": persona,
-                # Persistência de timestamp em formato compatível com Astra DB.
-                "timestamp": {"$date": {"$numberLong": str(int(time.time() * 1000))}},
-            }
+            document = self.chat_document(session_id, message, response, persona)
 
             result = self.collection.insert_one(document)
             return result.acknowledged
@@ -73,22 +106,56 @@ class AstraDBConnection:
             logger.error(f"Erro ao salvar mensagem: {e}")
             return False
 
+    def save_chat_messages(self, documents: List[Dict[str, Any]]) -> None:
+        """Grava um lote de documentos de histórico numa única chamada; lança exceção se falhar"""
+        # Sem try/except: quem chama (o buffer write-behind) decide entre repetir e transbordar.
+        # Não ordenado: um _id já gravado não impede a gravação dos demais documentos do lote.
+        self.collection.insert_many(documents, ordered=False)
+
     def get_chat_history(
         self, session_id: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
-        """Recupera histórico de chat de uma sessão"""
+        """Recupera histórico de chat de uma sessão (mais recentes primeiro)"""
         try:
-            # Busca por session_id, ordenando por timestamp decrescente.
-            cursor = self.collection.find(
-                {"session_id": session_id}, sort={"timestamp": -1}, limit=limit
-            )
-
-            return list(cursor)
+            return self.get_chat_history_page(session_id, limit=limit)["items"]
 
         except Exception as e:
             logger.error(f"Erro ao recuperar histórico: {e}")
             return []
 
+    def get_chat_history_page(
+        self, session_id: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Página do histórico de uma sessão, da mais recente para a mais antiga.
+
+        Parâmetros:
+            session_id (str): Sessão.
+            cursor (str, opcional): `next_cursor` da página anterior.
+            limit (int): Itens por página (no máximo MAX_HISTORY_PAGE).
+
+        Retorna:
+            Dict[str, Any]: `items` e `next_cursor` (None na última página).
+
+        Lança:
+            ValueError: Se o cursor for inválido.
+        """
+        limit = max(1, min(limit, MAX_HISTORY_PAGE))
+        query: Dict[str, Any] = {"session_id": session_id}
+        if cursor:
+            # Keyset: estritamente antes do último item visto, em (ts, _id)
+            ts, item_id = decode_cursor(cursor)
+            query["$or"] = [{"ts": {"$lt": ts}}, {"ts": ts, "_id": {"$lt": item_id}}]
+        # Um item a mais só para saber se há próxima página.
+        items = list(self.collection.find(query, sort={"ts": -1, "_id": -1}, limit=limit + 1))
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            # Documentos gravados antes do campo ts encerram a paginação
+            next_cursor = encode_cursor(last.get("ts", 0), last["_id"])
+        return {"items": items, "next_cursor": next_cursor}
+
     def save_document_chunk(
         self,
         chunk_id: str,
@@ -108,15 +175,43 @@ class AstraDBConnection:
             }
 
             # Usar coleção específica para documentos (separação de responsabilidades).
+            # O chunk_id (hash do conteúdo) é a chave: regravar o mesmo chunk não duplica.
             docs_collection = self.database.get_collection("document_chunks")
-            result = docs_collection.insert_one(document)
+            docs_collection.replace_one({"_id": chunk_id}, {"_id": chunk_id, **document}, upsert=True)
 
-            return result.acknowledged
+            return True
 
         except Exception as e:
             logger.error(f"Erro ao salvar chunk: {e}")
             return False
 
+    def save_document_chunks(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Salva um lote de chunks com embedding numa única chamada.
+
+        Parâmetros:
+            records (List[Dict[str, Any]]): Chunks {'chunk_id', 'content', 'embedding', 'metadata'}.
+
+        Retorna:
+            int: Quantos chunks foram salvos.
+        """
+        created_at = {"$date": {"$numberLong": str(int(time.time() * 1000))}}
+        documents = [
+            {"_id": record["chunk_id"], **record, "created_at": created_at}
+            for record in records
+        ]
+        docs_collection = self.database.get_collection("document_chunks")
+        try:
+            docs_collection.insert_many(documents, ordered=False)
+            return len(documents)
+        except Exception as e:
+            # Ids já existentes (reprocessamento) falham no insert: regrava um a um, com upsert.
+            logger.warning(f"insert_many de {len(documents)} chunks falhou ({e}); regravando individualmente")
+        return sum(
+            self.save_document_chunk(r["chunk_id"], r["content"], r["embedding"], r["metadata"])
+            for r in records
+        )
+
     def search_similar_chunks(
         self, query_embedding: List[float], limit: int = 5
     ) -> List[Dict[str, Any]]:
@@ -145,3 +240,28 @@ def get_db_connection() -> AstraDBConnection:
     if db_connection is None:
         db_connection = AstraDBConnection()
     return db_connection
+
+
+# Buffer global do histórico de chat
+chat_history_buffer = None
+_chat_history_buffer_lock = threading.Lock()
+
+
+def get_chat_history_buffer() -> WriteBehindBuffer:
+    """Retorna o buffer write-behind do histórico de chat (esvaziado ao encerrar o processo)"""
+    global chat_history_buffer
+    if chat_history_buffer is None:
+        with _chat_history_buffer_lock:
+            if chat_history_buffer is None:
+                buffer = WriteBehindBuffer(
+                    get_db_connection().save_chat_messages,
+                    spill_path=settings.CHAT_HISTORY_SPILL_PATH,
+                    name="chat_history",
+                    max_batch=settings.CHAT_HISTORY_BATCH_SIZE,
+                    flush_interval=settings.CHAT_HISTORY_FLUSH_SECONDS,
+                    already_written=is_duplicate_id_error,
+                )
+                atexit.register(buffer.close)
+                chat_history_buffer = buffer
+    return chat_history_buffer
+
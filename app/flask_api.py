@@ -2,17 +2,21 @@
 API Flask para o sistema de chatbot de dispersão
 """
 
+import json
 import logging
 import time
 import uuid
 
 from config.settings import settings
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 from app.langflow_integration import get_flow_manager
 from app.rag_system import get_rag_system
 from app.services.answer_service import answer_question
+from app.services import dispersion
+from app.services.ingestion_jobs import IngestionJobQueue, UnsupportedUploadError
+from app.services.metrics import instrument_flask_app
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,13 @@ def create_app() -> Flask:
     rag_system = get_rag_system()
     flow_manager = get_flow_manager()
 
+    # Contagem e latência por rota/persona, expostas em /metrics (formato Prometheus).
+    instrument_flask_app(
+        app,
+        persona_getter=lambda: (request.get_json(silent=True) or {}).get("persona"),
+        known_personas=["Dr. Gasnelio", "Gá"],
+    )
+
     @app.route("/")
     def index():
         """Página inicial da API"""
@@ -45,6 +56,8 @@ def create_app() -> Flask:
                     "health": "/api/health",
                     "flows": "/api/flows",
                     "calculate": "/api/calculate",
+                    "calculate_batch": "/api/calculate/batch",
+                    "metrics": "/metrics",
                 },
             }
         )
@@ -139,33 +152,81 @@ def create_app() -> Flask:
                 return jsonify({"error": "Parâmetros são obrigatórios"}), 400
 
             parameters = data["parameters"]
+            backend = data.get("backend", settings.DISPERSION_BACKEND)
+            if backend not in dispersion.BACKENDS:
+                return jsonify({"error": f"backend deve ser um de: {', '.join(dispersion.BACKENDS)}"}), 400
+
+            try:
+                dispersion.validate_params(parameters)
+            except dispersion.DispersionParameterError as e:
+                return jsonify({"error": str(e)}), 400
+
+            if backend == "langflow":
+                # Backend opcional: o mesmo cálculo num fluxo remoto do LangFlow.
+                result = flow_manager.calculate_dispersion_parameters(parameters)
+                if result:
+                    return jsonify({"result": result, "parameters": parameters, "backend": backend, "status": "calculated"})
+                return jsonify({"error": "Falha no cálculo"}), 500
+
+            # Pluma gaussiana calculada no próprio processo (vetorizada em NumPy, sem ida à rede).
+            result = dispersion.calculate_dispersion(parameters)
 
-            # Validar parâmetros básicos
-            required_params = ["wind_speed", "temperature", "emission_rate"]
-            missing_params = [p for p in required_params if p not in parameters]
+            return jsonify({"result": result, "parameters": parameters, "backend": "local", "status": "calculated"})
+
+        except Exception as e:
+            logger.error(f"Erro no cálculo: {e}")
+            return jsonify({"error": "Erro interno do servidor"}), 500
 
-            if missing_params:
-                return (
-                    jsonify({"error": f'Parâmetros faltando: {", ".join(missing_params)}'}),
-                    400,
+    @app.route("/api/calculate/batch", methods=["POST"])
+    def calculate_dispersion_batch():
+        """Calcula lotes de cenários de dispersão, devolvendo um resultado por linha (NDJSON)"""
+        try:
+            data = request.get_json(silent=True)
+
+            if not isinstance(data, dict) or not any(key in data for key in ("parameters", "scenarios", "sweep")):
+                return jsonify({"error": "Informe parameters, scenarios e/ou sweep"}), 400
+
+            # Toda a validação acontece antes do primeiro byte: erro é 400, nunca resposta pela metade.
+            try:
+                records = dispersion.expand_scenarios(data.get("parameters"), data.get("scenarios"), data.get("sweep"))
+                results = dispersion.calculate_batch(
+                    records,
+                    grid=(data.get("parameters") or {}).get("grid", data.get("grid")),
+                    receptors=data.get("receptors"),
                 )
+            except dispersion.DispersionParameterError as e:
+                return jsonify({"error": str(e)}), 400
 
-            # Calcular parâmetros de dispersão usando fluxo avançado do LangFlow.
-            # Decisão de design: delegar cálculos complexos para o LangFlow, facilitando manutenção e evolução.
-            result = flow_manager.calculate_dispersion_parameters(parameters)
+            logger.info(f"Lote de dispersão: {len(records)} cenários")
 
-            if result:
-                return jsonify({"result": result, "parameters": parameters, "status": "calculated"})
-            else:
-                return jsonify({"error": "Falha no cálculo"}), 500
+            def generate():
+                for result in results:
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+
+            return Response(
+                stream_with_context(generate()),
+                mimetype="application/x-ndjson",
+                headers={"X-Scenario-Count": str(len(records))},
+            )
 
         except Exception as e:
-            logger.error(f"Erro no cálculo: {e}")
+            logger.error(f"Erro no cálculo em lote: {e}")
             return jsonify({"error": "Erro interno do servidor"}), 500
 
+    # Uploads viram jobs: o request só grava o arquivo; chunking, embeddings e gravação em lote
+    # rodam no pool de ingestão, sem prender o worker nem estourar o timeout do gunicorn.
+    ingestion_jobs = IngestionJobQueue(
+        lambda batch: rag_system.add_chunks(batch, save=False),
+        upload_dir=settings.UPLOAD_DIR,
+        finalize=rag_system.save_index,
+        max_workers=settings.INGESTION_WORKERS,
+        batch_size=settings.INGESTION_BATCH_SIZE,
+        max_tokens=max(settings.CHUNK_SIZE // 4, 64),
+    )
+
     @app.route("/api/upload", methods=["POST"])
     def upload_document():
-        """Upload de documentos para o sistema RAG"""
+        """Upload de documentos (PDF, .txt ou .md) para o sistema RAG, processado em segundo plano"""
         try:
             if "file" not in request.files:
                 return jsonify({"error": "Nenhum arquivo enviado"}), 400
@@ -175,27 +236,34 @@ def create_app() -> Flask:
             if file.filename == "":
                 return jsonify({"error": "Nome do arquivo vazio"}), 400
 
-            # Processar upload de documentos para o sistema RAG.
-            # Decisão: leitura e processamento do conteúdo é feita aqui, mas pode ser delegada para um serviço externo no futuro.
-            content = file.read().decode("utf-8")
-
-            # Adicionar ao sistema RAG
-            success = rag_system.process_documents([content], [{"source": file.filename}])
+            job_id = ingestion_jobs.submit(file, file.filename)
 
-            if success:
-                return jsonify(
+            return (
+                jsonify(
                     {
-                        "message": "Documento processado com sucesso",
+                        "message": "Documento recebido; processamento em andamento",
                         "filename": file.filename,
+                        "job_id": job_id,
+                        "status_url": f"/api/upload/{job_id}",
                     }
-                )
-            else:
-                return jsonify({"error": "Falha ao processar documento"}), 500
+                ),
+                202,
+            )
 
+        except UnsupportedUploadError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             logger.error(f"Erro no upload: {e}")
             return jsonify({"error": "Erro interno do servidor"}), 500
 
+    @app.route("/api/upload/<job_id>", methods=["GET"])
+    def upload_status(job_id):
+        """Progresso de um job de ingestão"""
+        job = ingestion_jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job não encontrado"}), 404
+        return jsonify(job)
+
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({"error": "Endpoint não encontrado"}), 404
@@ -2,12 +2,15 @@
 Integração com LangFlow para processamento avançado de fluxos
 """
 
+import inspect
 import logging
 from typing import Any, Dict, List, Optional
 
 import requests
 from config.settings import settings
 
+from app.services import dispersion
+
 logger = logging.getLogger(__name__)
 
 
@@ -172,38 +175,14 @@ class DispersionFlowManager:
                             }
                         },
                     },
-                    {
-                        "id": "validation_node",
-                        "type": "PythonFunction",
-                        "data": {
-                            "template": {
-                                "code": """
-def validate_params(params):
-    required = ['wind_speed', 'temperature', 'emission_rate']
-    for param in required:
-                        if param not in params:
-                            raise ValueError(f'Parâmetro {param} é obrigatório')
-                    return params
-                """
-                            }
-                        },
-                    },
                     {
                         "id": "calculation_node",
                         "type": "PythonFunction",
                         "data": {
                             "template": {
-                                "code": """
-def calculate_dispersion(params):
-                        # Implementar cálculos de dispersão
-                        wind_speed = params['wind_speed']
-                        temp = params['temperature']
-                        emission = params['emission_rate']
-                        
-                        # Fórmula simplificada de Gaussian
-                        concentration = emission / (wind_speed * temp)
-                        return {'concentration': concentration, 'status': 'calculated'}
-                """
+                                # Mesmo modelo do backend local (app/services/dispersion.py);
+                                # calculate_dispersion já valida os parâmetros com validate_params.
+                                "code": inspect.getsource(dispersion)
                             }
                         },
                     },
@@ -3,15 +3,21 @@ Sistema RAG (Retrieval-Augmented Generation) para o chatbot
 """
 
 import logging
+import threading
 from typing import Any, Dict, List
 
-import faiss
 import openai
 from config.settings import settings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
 
-from app.database import get_db_connection
+from app.database import AstraDBConnection, get_chat_history_buffer, get_db_connection
+from app.services.context_packer import pack_context
+from app.services.reindex import content_hash_id
+from app.services.reranker import get_reranker
+from app.services.session_history import get_session_history
+from app.services.token_utils import get_token_counter
+from app.services.vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +30,18 @@ class RAGSystem:
 
     def __init__(self):
         self.embedding_model = None
-        self.faiss_index = None
-        self.document_store = []
+        self.vector_index = None
+        # Uploads indexam em threads de fundo enquanto as perguntas consultam o índice
+        self._index_lock = threading.RLock()
         self.db_connection = get_db_connection()
+        self.chat_history = get_chat_history_buffer()
+        # Histórico por sessão em memória, na frente do banco (lido só para sessões fora da memória)
+        self.session_history = get_session_history(
+            load_recent=self.db_connection.get_chat_history,
+            max_turns=settings.HISTORY_MAX_TURNS,
+            max_bytes=settings.HISTORY_MAX_BYTES,
+            max_sessions=settings.HISTORY_MAX_SESSIONS,
+        )
         self._initialize_models()
 
     def _initialize_models(self):
@@ -41,10 +56,13 @@ class RAGSystem:
             openai.api_key = settings.OPENROUTER_API_KEY
             openai.api_base = settings.OPENROUTER_BASE_URL
 
-            # Inicializar índice FAISS para busca vetorial eficiente.
-            # Decisão: Inner Product (IP) para similaridade, compatível com embeddings normalizados.
+            # Carregar o índice vetorial salvo (ou criar um vazio).
+            # Decisão: embeddings normalizados (cosseno), ids estáveis e persistência em disco,
+            # para não reconstruir o índice a cada início de processo.
             embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
-            self.faiss_index = faiss.IndexFlatIP(embedding_dim)
+            self.vector_index = VectorIndex.load_or_create(
+                settings.VECTOR_INDEX_DIR, embedding_dim, index_type=settings.VECTOR_INDEX_TYPE
+            )
 
             logger.info("Modelos RAG inicializados com sucesso")
 
@@ -66,83 +84,126 @@ class RAGSystem:
                 length_function=len,
             )
 
-            all_chunks = []
-            all_metadata = []
-
+            records = []
             for doc, metadata in zip(documents, metadata_list):
-                chunks = text_splitter.split_text(doc)
-                for i, chunk in enumerate(chunks):
-                    all_chunks.append(chunk)
+                for i, chunk in enumerate(text_splitter.split_text(doc)):
                     chunk_metadata = metadata.copy()
                     chunk_metadata["chunk_index"] = i
-                    all_metadata.append(chunk_metadata)
-
-            # Gerar embeddings para todos os chunks.
-            embeddings = self.embedding_model.encode(all_chunks)
-
-            # Adicionar ao índice FAISS para busca vetorial.
-            self.faiss_index.add(embeddings.astype("float32"))
-
-            # Armazenar chunks e metadados localmente e no banco de dados.
-            # Decisão: manter histórico local para performance e persistir no banco para resiliência.
-            for chunk, embedding, metadata in zip(all_chunks, embeddings, all_metadata):
-                chunk_id = f"chunk_{len(self.document_store)}"
-                self.document_store.append({"id": chunk_id, "content": chunk, "metadata": metadata})
-
-                # Salvar no banco de dados (Astra DB)
-                self.db_connection.save_document_chunk(
-                    chunk_id=chunk_id,
-                    content=chunk,
-                    embedding=embedding.tolist(),
-                    metadata=metadata,
-                )
+                    records.append({"content": chunk, "metadata": chunk_metadata})
 
-            logger.info(f"Processados {len(all_chunks)} chunks de {len(documents)} documentos")
+            added = self.add_chunks(records)
+            logger.info(f"Processados {added} chunks novos de {len(documents)} documentos")
             return True
 
         except Exception as e:
             logger.error(f"Erro ao processar documentos: {e}")
             return False
 
+    def add_chunks(self, chunks: List[Dict[str, Any]], save: bool = True) -> int:
+        """
+        Indexa chunks já divididos ({'content', 'metadata'}) e os persiste no banco em lote.
+
+        Parâmetros:
+            chunks (List[Dict[str, Any]]): Chunks com o texto e os metadados (com 'source').
+            save (bool): Grava o índice vetorial em disco ao final (False em lotes de um mesmo job).
+
+        Retorna:
+            int: Quantos chunks eram novos.
+        """
+        records = []
+        seen = set()
+        for chunk in chunks:
+            # Id derivado do conteúdo: reprocessar o mesmo texto não duplica o índice.
+            # Filtro prévio, fora do lock, só para não calcular embeddings de chunks já indexados.
+            chunk_id = content_hash_id(chunk["content"], chunk["metadata"].get("source", ""))
+            if chunk_id in self.vector_index or chunk_id in seen:
+                continue
+            seen.add(chunk_id)
+            records.append({"id": chunk_id, "content": chunk["content"], "metadata": chunk["metadata"]})
+
+        if not records:
+            return 0
+
+        # Gerar embeddings apenas para os chunks novos (fora do lock: é a etapa cara).
+        embeddings = self.embedding_model.encode([record["content"] for record in records])
+
+        # Adicionar ao índice vetorial (chunks e metadados ficam junto dos vetores) e persistir.
+        # A checagem definitiva é sob o lock: outro job pode ter indexado o mesmo arquivo enquanto isso.
+        with self._index_lock:
+            accepted = [i for i, record in enumerate(records) if record["id"] not in self.vector_index]
+            if not accepted:
+                return 0
+            added = self.vector_index.add([records[i] for i in accepted], embeddings[accepted])
+            if save:
+                self.vector_index.save(settings.VECTOR_INDEX_DIR)
+
+        # Persistir também no banco para resiliência, numa única chamada por lote (só o que entrou no índice).
+        self.db_connection.save_document_chunks(
+            [
+                {
+                    "chunk_id": records[i]["id"],
+                    "content": records[i]["content"],
+                    "embedding": embeddings[i].tolist(),
+                    "metadata": records[i]["metadata"],
+                }
+                for i in accepted
+            ]
+        )
+        return added
+
+    def save_index(self):
+        """Grava o índice vetorial em disco"""
+        with self._index_lock:
+            self.vector_index.save(settings.VECTOR_INDEX_DIR)
+
     def search_relevant_chunks(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Busca chunks relevantes para uma query"""
         try:
-            if self.faiss_index.ntotal == 0:
-                logger.warning("Índice FAISS vazio")
+            if len(self.vector_index) == 0:
+                logger.warning("Índice vetorial vazio")
                 return []
 
-            # Gerar embedding da query para busca vetorial.
+            # Gerar embedding da query e buscar os k chunks mais similares (cosseno).
             query_embedding = self.embedding_model.encode([query])
-
-            # Buscar no índice FAISS os k chunks mais similares.
-            scores, indices = self.faiss_index.search(query_embedding.astype("float32"), k)
-
-            # Recuperar chunks relevantes
-            relevant_chunks = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.document_store):
-                    chunk = self.document_store[idx].copy()
-                    chunk["similarity_score"] = float(score)
-                    relevant_chunks.append(chunk)
-
-            return relevant_chunks
+            with self._index_lock:
+                return self.vector_index.search(query_embedding, k)
 
         except Exception as e:
             logger.error(f"Erro na busca de chunks: {e}")
             return []
 
+    def delete_documents(self, chunk_ids: List[str]) -> int:
+        """Remove chunks do índice vetorial pelo id; retorna quantos foram removidos"""
+        with self._index_lock:
+            removed = self.vector_index.remove(chunk_ids)
+            if removed:
+                self.vector_index.save(settings.VECTOR_INDEX_DIR)
+            logger.info(f"Removidos {removed} chunks do índice vetorial")
+        return removed
+
     def generate_response(
         self, query: str, persona: str = "Dr. Gasnelio", session_id: str = None
     ) -> str:
         """Gera resposta usando RAG"""
         try:
             # Buscar chunks relevantes para compor o contexto da resposta.
-            relevant_chunks = self.search_relevant_chunks(query, k=3)
-
-            # Construir contexto concatenando os chunks mais relevantes.
-            context = ""
-            if relevant_chunks:
-                context = "\n\n".join([chunk["content"] for chunk in relevant_chunks])
+            if settings.RERANK_ENABLED:
+                # Muitos candidatos baratos -> top-k pelo cross-encoder (ou a ordem da busca, se pulado).
+                candidates = self.search_relevant_chunks(query, k=settings.RERANK_CANDIDATES)
+                reranker = get_reranker(
+                    model_name=settings.RERANK_MODEL, latency_budget_ms=settings.RERANK_LATENCY_BUDGET_MS
+                )
+                relevant_chunks = [chunk["content"] for chunk in reranker.rerank(query, candidates, settings.RAG_TOP_K)]
+            else:
+                relevant_chunks = self.search_relevant_chunks(query, k=settings.RAG_TOP_K)
+
+            # Montar o contexto pelo orçamento de tokens do modelo: mais relevantes primeiro,
+            # sem o texto repetido pelo overlap dos chunks e sem cortar frases.
+            context = pack_context(
+                relevant_chunks,
+                settings.CONTEXT_TOKEN_BUDGET,
+                count=get_token_counter(settings.DEFAULT_MODEL),
+            )
 
             # Definir prompt da persona (técnica ou amigável).
             # Decisão: prompts customizados para cada persona, facilitando adaptação do tom da resposta.
@@ -155,11 +216,8 @@ class RAGSystem:
 
             system_prompt = persona_prompts.get(persona, persona_prompts["Dr. Gasnelio"])
 
-            # Construir prompt final para o LLM.
-            prompt = f"""
-{system_prompt}
-
-Contexto relevante:
+            # Construir mensagem do usuário (o prompt da persona já vai como mensagem de sistema).
+            prompt = f"""Contexto relevante:
 {context}
 
 Pergunta do usuário: {query}
@@ -168,11 +226,22 @@ Responda baseando-se no contexto fornecido. Se o contexto não contiver informa
 indique isso claramente e forneça uma resposta geral sobre o tópico.
 """
 
+            # Turnos anteriores da sessão (da memória; o banco só é lido se a sessão não estiver nela),
+            # limitados por orçamento de tokens.
+            history = []
+            if session_id:
+                history = self.session_history.window(
+                    session_id,
+                    settings.HISTORY_TOKEN_BUDGET,
+                    count=get_token_counter(settings.DEFAULT_MODEL),
+                )
+
             # Gerar resposta via OpenRouter (LLM externo).
             response = openai.ChatCompletion.create(
                 model=settings.DEFAULT_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
+                    *history,
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=settings.MAX_TOKENS,
@@ -182,14 +251,17 @@ indique isso claramente e forneça uma resposta geral sobre o tópico.
             answer = response.choices[0].message.content
 
             # Salvar no histórico se session_id fornecido.
-            # Decisão: persistir interações para auditoria e melhoria contínua.
+            # Decisão: persistir interações para auditoria e melhoria contínua, em lotes
+            # gravados em segundo plano (a resposta não espera o insert no Astra DB).
             if session_id:
-                self.db_connection.save_chat_message(
+                document = AstraDBConnection.chat_document(
                     session_id=session_id,
                     message=query,
                     response=answer,
                     persona=persona,
                 )
+                self.session_history.record(session_id, query, answer, persona, ts=document["ts"])
+                self.chat_history.add(document)
 
             return answer
 
@@ -259,7 +331,8 @@ def get_rag_system() -> RAGSystem:
     global rag_system
     if rag_system is None:
         rag_system = RAGSystem()
-        # Carregar documentos padrão ao inicializar o sistema.
+        # Carregar documentos padrão só se o índice salvo estiver vazio.
         # Decisão: garantir que o sistema sempre tenha conhecimento mínimo para responder perguntas.
-        rag_system.load_default_documents()
+        if len(rag_system.vector_index) == 0:
+            rag_system.load_default_documents()
     return rag_system
@@ -0,0 +1,212 @@
+"""
+Banco de respostas pré-computadas para perguntas recorrentes.
+
+Um passo offline (scripts/build_answer_bank.py) responde as perguntas de
+exemplo da interface e as mais frequentes dos logs, para cada persona, e
+grava um artefato JSON versionado. Em produção o artefato é carregado em
+memória e consultado antes de qualquer modelo ou chamada de LLM.
+
+O artefato guarda a impressão digital (hash) do corpus e dos prompts com que
+foi gerado; se o corpus ou os prompts mudarem, ele é considerado desatualizado
+e ignorado até ser regenerado.
+
+Formato:
+
+    {
+      "format": 1,
+      "version": "<hash curto>",
+      "built_at": "2024-01-01T00:00:00",
+      "fingerprint": {"corpus": "<sha256>", "prompts": "<sha256>"},
+      "personas": {"ga": {"<pergunta normalizada>": {"question": "...", "response": ...}}}
+    }
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BANK_FORMAT = 1
+DEFAULT_EXAMPLES_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "example_questions.json")
+
+
+def normalize_question(question: str) -> str:
+    """Forma canônica da pergunta para cache e consulta (caixa e espaços não importam)"""
+    return re.sub(r"\s+", " ", question).strip().lower()
+
+
+def _sha256(value: Any) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def compute_fingerprint(corpus: str, prompts: Any) -> Dict[str, str]:
+    """
+    Impressão digital do que determina as respostas.
+
+    Parâmetros:
+        corpus (str): Texto do corpus (ex.: a tese em Markdown).
+        prompts (Any): Prompts e regras de formatação (qualquer valor serializável em JSON).
+
+    Retorna:
+        Dict[str, str]: Hashes `corpus` e `prompts`.
+    """
+    return {"corpus": _sha256(corpus), "prompts": _sha256(prompts)}
+
+
+def load_example_questions(interface: Optional[str] = None, path: str = DEFAULT_EXAMPLES_PATH) -> List[Dict[str, str]]:
+    """Perguntas de exemplo de uma interface (ou de todas) em data/example_questions.json"""
+    with open(path, "r", encoding="utf-8") as f:
+        interfaces = json.load(f)["interfaces"]
+    if interface is not None:
+        return list(interfaces.get(interface, []))
+    return [example for examples in interfaces.values() for example in examples]
+
+
+def mine_frequent_questions(questions: Iterable[str], top_n: int = 20, min_count: int = 2) -> List[str]:
+    """
+    Perguntas mais frequentes de um log, agrupadas pela forma normalizada.
+
+    Parâmetros:
+        questions (Iterable[str]): Perguntas como foram digitadas.
+        top_n (int): Quantidade máxima de perguntas retornadas.
+        min_count (int): Ocorrências mínimas para uma pergunta entrar.
+
+    Retorna:
+        List[str]: Perguntas (na grafia mais comum), da mais para a menos frequente.
+    """
+    counts: Counter = Counter()
+    spellings: Dict[str, Counter] = {}
+    for question in questions:
+        if not question or not question.strip():
+            continue
+        key = normalize_question(question)
+        counts[key] += 1
+        spellings.setdefault(key, Counter())[question.strip()] += 1
+    return [
+        spellings[key].most_common(1)[0][0]
+        for key, count in counts.most_common()
+        if count >= min_count
+    ][:top_n]
+
+
+def build_answer_bank(
+    questions: Iterable[str],
+    personas: Iterable[str],
+    answer: Callable[[str, str], Any],
+    fingerprint: Dict[str, str],
+) -> Dict[str, Any]:
+    """
+    Responde cada pergunta para cada persona e monta o artefato.
+
+    Parâmetros:
+        questions (Iterable[str]): Perguntas a pré-computar (duplicatas normalizadas são ignoradas).
+        personas (Iterable[str]): Personas a responder.
+        answer (Callable): Função `(pergunta, persona) -> resposta` do pipeline real; None deixa
+            a pergunta fora do banco para a persona (ela segue respondida ao vivo).
+        fingerprint (Dict[str, str]): Resultado de `compute_fingerprint`.
+
+    Retorna:
+        Dict[str, Any]: Artefato pronto para `save_answer_bank`.
+    """
+    unique: Dict[str, str] = {}
+    for question in questions:
+        unique.setdefault(normalize_question(question), question.strip())
+
+    bank: Dict[str, Dict[str, Any]] = {}
+    for persona in personas:
+        entries = bank.setdefault(persona, {})
+        for key, question in unique.items():
+            response = answer(question, persona)
+            if response is not None:
+                entries[key] = {"question": question, "response": response}
+        logger.info(f"Banco de respostas: {len(entries)} de {len(unique)} perguntas pré-computadas para {persona}")
+
+    version = _sha256({"fingerprint": fingerprint, "questions": sorted(unique)})[:12]
+    return {
+        "format": BANK_FORMAT,
+        "version": version,
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "fingerprint": fingerprint,
+        "personas": bank,
+    }
+
+
+def save_answer_bank(artifact: Dict[str, Any], path: str) -> None:
+    """Grava o artefato atomicamente (servidores nunca leem um arquivo pela metade)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class AnswerBank:
+    """Respostas pré-computadas servidas da memória"""
+
+    def __init__(self, artifact: Optional[Dict[str, Any]] = None):
+        artifact = artifact or {}
+        self.version: Optional[str] = artifact.get("version")
+        self.fingerprint: Dict[str, str] = artifact.get("fingerprint", {})
+        self._entries: Dict[str, Dict[str, Any]] = artifact.get("personas", {})
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def lookup(self, question: str, persona: str) -> Optional[Any]:
+        """Resposta pré-computada para a pergunta e persona, ou None"""
+        entry = self._entries.get(persona, {}).get(normalize_question(question))
+        return entry["response"] if entry else None
+
+    def questions(self, persona: str) -> List[str]:
+        return [entry["question"] for entry in self._entries.get(persona, {}).values()]
+
+
+def load_answer_bank(path: str, expected_fingerprint: Optional[Dict[str, str]] = None) -> AnswerBank:
+    """
+    Carrega o artefato; devolve um banco vazio se ele faltar ou estiver desatualizado.
+
+    Parâmetros:
+        path (str): Caminho do artefato JSON.
+        expected_fingerprint (Dict[str, str], opcional): Impressão digital do corpus
+            e prompts atuais; se diferente da gravada, o banco é ignorado.
+
+    Retorna:
+        AnswerBank: Banco pronto para consulta (possivelmente vazio).
+    """
+    if not os.path.exists(path):
+        logger.info(f"Banco de respostas não encontrado em {path}")
+        return AnswerBank()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Erro ao ler banco de respostas {path}: {e}")
+        return AnswerBank()
+
+    if artifact.get("format") != BANK_FORMAT:
+        logger.warning(f"Banco de respostas {path} em formato desconhecido; ignorando")
+        return AnswerBank()
+    if expected_fingerprint is not None and artifact.get("fingerprint") != expected_fingerprint:
+        logger.warning(
+            f"Banco de respostas {path} (versão {artifact.get('version')}) foi gerado com outro corpus "
+            f"ou outros prompts; ignorando até ser regenerado (scripts/build_answer_bank.py)"
+        )
+        return AnswerBank()
+
+    bank = AnswerBank(artifact)
+    logger.info(f"Banco de respostas versão {bank.version} carregado: {len(bank)} respostas")
+    return bank
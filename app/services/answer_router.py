@@ -0,0 +1,121 @@
+"""
+Roteamento por confiança entre o QA extrativo local e o LLM remoto.
+
+O QA local (roberta) é barato e roda sempre primeiro; o LLM remoto
+(OpenRouter) custa latência e tokens e só entra quando a resposta local não
+é confiável:
+
+- `local`: o QA achou um span com confiança >= `qa_threshold` e a busca
+  cobriu pelo menos `retrieval_threshold` dos termos da pergunta.
+- `llm`: confiança do QA baixa, span vazio ou busca fraca — a pergunta
+  provavelmente pede síntese, não extração.
+- `fallback`: seria `llm`, mas o LLM está desativado ou todos os modelos
+  falharam; o app usa a resposta local ou o trecho da tese.
+
+Cada resposta registra a rota, o motivo, a latência e o custo estimado
+(tokens de uso informados pelo provedor x preço por mil tokens).
+"""
+
+import logging
+from typing import Iterable, Optional, Tuple
+
+from app.services.metrics import get_metrics_registry
+from app.services.sentence_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+ROUTE_LOCAL = "local"
+ROUTE_LLM = "llm"
+ROUTE_FALLBACK = "fallback"
+
+# Palavras menores que isso (artigos, preposições) e interrogativas não contam na cobertura da busca
+MIN_TERM_LENGTH = 4
+QUESTION_WORDS = frozenset({
+    "qual", "quais", "quando", "como", "onde", "quanto", "quanta", "quantos", "quantas",
+    "porque", "porquê", "para", "pode", "posso", "devo", "deve", "sobre", "existe", "você",
+})
+
+_metrics = get_metrics_registry()
+answer_route_total = _metrics.counter("answer_route_total", "Respostas por rota (local, llm, fallback) e motivo", ["route", "reason"])
+answer_route_duration = _metrics.histogram("answer_route_duration_seconds", "Latência das respostas por rota", ["route"])
+answer_route_tokens_total = _metrics.counter("answer_route_tokens_total", "Tokens de LLM consumidos por rota", ["route"])
+answer_route_cost_total = _metrics.counter("answer_route_cost_total", "Custo estimado (USD) das respostas por rota", ["route"])
+
+
+def retrieval_coverage(question: str, passages: Iterable[str]) -> float:
+    """Fração dos termos relevantes da pergunta que aparecem nos trechos recuperados"""
+    terms = {term for term in tokenize(question) if len(term) >= MIN_TERM_LENGTH and term not in QUESTION_WORDS}
+    if not terms:
+        return 1.0
+    found = set()
+    for passage in passages:
+        found.update(terms.intersection(tokenize(passage)))
+        if len(found) == len(terms):
+            break
+    return len(found) / len(terms)
+
+
+def usage_tokens(usage: Optional[dict]) -> int:
+    """Total de tokens no bloco `usage` de uma resposta compatível com a API da OpenAI"""
+    if not usage:
+        return 0
+    total = usage.get("total_tokens")
+    if total is None:
+        total = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    return int(total)
+
+
+class AnswerRouter:
+    """Decide entre QA local e LLM remoto e contabiliza latência e custo por rota"""
+
+    def __init__(
+        self,
+        qa_threshold: float = 0.5,
+        retrieval_threshold: float = 0.5,
+        llm_enabled: bool = True,
+        cost_per_1k_tokens: float = 0.0,
+    ):
+        """
+        Parâmetros:
+            qa_threshold (float): Confiança mínima do QA para responder localmente.
+            retrieval_threshold (float): Cobertura mínima da pergunta pelos trechos recuperados.
+            llm_enabled (bool): Se False, perguntas que iriam ao LLM ficam na rota `fallback`.
+            cost_per_1k_tokens (float): Preço (USD) por mil tokens do LLM, para o custo estimado.
+        """
+        self.qa_threshold = qa_threshold
+        self.retrieval_threshold = retrieval_threshold
+        self.llm_enabled = llm_enabled
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+
+    def decide(self, qa_confidence: float, retrieval_confidence: float, has_answer: bool = True) -> Tuple[str, str]:
+        """
+        Rota de uma pergunta a partir dos sinais já calculados localmente.
+
+        Parâmetros:
+            qa_confidence (float): Score do melhor span do QA extrativo.
+            retrieval_confidence (float): Cobertura da pergunta pelos trechos (ver retrieval_coverage).
+            has_answer (bool): Se o QA devolveu algum span.
+
+        Retorna:
+            Tuple[str, str]: Rota (`local`, `llm` ou `fallback`) e motivo.
+        """
+        if not has_answer:
+            reason = "no_span"
+        elif qa_confidence < self.qa_threshold:
+            reason = "low_qa_confidence"
+        elif retrieval_confidence < self.retrieval_threshold:
+            reason = "low_retrieval"
+        else:
+            return ROUTE_LOCAL, "confident"
+        if not self.llm_enabled:
+            return ROUTE_FALLBACK, "llm_disabled"
+        return ROUTE_LLM, reason
+
+    def record(self, route: str, reason: str, seconds: float, tokens: int = 0) -> None:
+        """Registra uma resposta servida pela rota (latência total e tokens de LLM consumidos)"""
+        answer_route_total.inc(route=route, reason=reason)
+        answer_route_duration.observe(seconds, route=route)
+        if tokens:
+            answer_route_tokens_total.inc(tokens, route=route)
+            answer_route_cost_total.inc(tokens / 1000.0 * self.cost_per_1k_tokens, route=route)
+        logger.debug(f"Rota {route} ({reason}): {seconds * 1000:.0f} ms, {tokens} tokens")
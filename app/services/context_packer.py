@@ -0,0 +1,168 @@
+"""
+Montagem do contexto de prompts dentro de um orçamento de tokens.
+
+Recebe os trechos recuperados (em ordem de relevância ou com score), remove
+texto repetido — trechos idênticos ou contidos em outro já escolhido — e
+preenche o orçamento do mais para o menos relevante. Chunks vizinhos com
+sobreposição de borda (como os de chunk_text com `overlap`) são costurados
+num só trecho, sem repetir a parte comum. Um trecho que não cabe
+inteiro só entra cortado em fim de frase, nunca no meio de uma.
+"""
+
+import logging
+import re
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from app.services.token_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Fronteiras aceitáveis para cortar um trecho: fim de frase ou quebra de linha
+_CUT_POINT = re.compile(r"[.!?;](?=\s|$)|\n")
+
+Passage = Union[str, dict, Tuple[str, float]]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _as_scored(passages: Iterable[Passage]) -> List[Tuple[str, float]]:
+    """Aceita textos (ordem = relevância), pares (texto, score) ou dicts com content/score"""
+    scored = []
+    for position, passage in enumerate(passages):
+        if isinstance(passage, str):
+            text, score = passage, -float(position)
+        elif isinstance(passage, dict):
+            text = passage.get("content", "")
+            score = passage.get("similarity_score", passage.get("score", -float(position)))
+        else:
+            text, score = passage
+        if text and text.strip():
+            scored.append((text.strip(), float(score)))
+    # Ordenação estável: empates mantêm a ordem de entrada
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+
+def _edge_overlap(left: str, right: str, min_overlap: int) -> int:
+    """Tamanho do maior sufixo de `left` que é prefixo de `right` (0 se menor que min_overlap)"""
+    limit = min(len(left), len(right))
+    if limit < min_overlap:
+        return 0
+    probe = right[:min_overlap]
+    start = left.find(probe, len(left) - limit)
+    while start != -1:
+        size = len(left) - start
+        if right.startswith(left[start:]):
+            return size
+        start = left.find(probe, start + 1)
+    return 0
+
+
+def _is_contained(text: str, selected: Sequence[str]) -> bool:
+    normalized = _normalize(text)
+    return any(normalized in _normalize(chosen) for chosen in selected)
+
+
+def _find_stitch(text: str, selected: Sequence[str], min_overlap: int) -> Optional[Tuple[int, str, str]]:
+    """
+    Procura um trecho escolhido cuja borda coincide com a de `text` (chunks vizinhos).
+
+    Retorna (índice do trecho, texto novo, lado) — lado "after" se o texto novo
+    continua o escolhido, "before" se o antecede — ou None.
+    """
+    for index, chosen in enumerate(selected):
+        head = _edge_overlap(chosen, text, min_overlap)
+        if head:
+            return index, text[head:], "after"
+        tail = _edge_overlap(text, chosen, min_overlap)
+        if tail:
+            return index, text[:-tail], "before"
+    return None
+
+
+def _truncate_at_sentence(text: str, budget: int, count: Callable[[str], int]) -> str:
+    """Maior prefixo de `text` terminado em fim de frase que cabe em `budget` tokens"""
+    cuts = [match.end() for match in _CUT_POINT.finditer(text)]
+    best = ""
+    low, high = 0, len(cuts) - 1
+    while low <= high:
+        middle = (low + high) // 2
+        candidate = text[:cuts[middle]].rstrip()
+        if count(candidate) <= budget:
+            best = candidate
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def pack_context(
+    passages: Iterable[Passage],
+    max_tokens: int,
+    count: Optional[Callable[[str], int]] = None,
+    separator: str = "\n\n",
+    min_overlap: int = 40,
+    min_fragment_tokens: int = 24,
+) -> str:
+    """
+    Monta o contexto com os trechos mais relevantes que cabem no orçamento.
+
+    Parâmetros:
+        passages (Iterable): Trechos recuperados — textos em ordem de relevância,
+            pares (texto, score) ou dicts {'content', 'similarity_score'|'score'}.
+        max_tokens (int): Orçamento de tokens do contexto (separadores incluídos).
+        count (Callable, opcional): Contador de tokens do modelo de destino
+            (ver token_utils.get_token_counter); padrão count_tokens.
+        separator (str): Separador entre trechos.
+        min_overlap (int): Caracteres mínimos para tratar bordas iguais como sobreposição.
+        min_fragment_tokens (int): Sobra mínima do orçamento para incluir um trecho cortado.
+
+    Retorna:
+        str: Contexto montado, do trecho mais para o menos relevante.
+    """
+    count = count or count_tokens
+    separator_tokens = count(separator) if separator.strip() else 0
+    selected: List[str] = []
+    used = 0
+    skipped = 0
+
+    for text, _ in _as_scored(passages):
+        remaining = max_tokens - used
+        if remaining <= 0:
+            break
+        if _is_contained(text, selected):
+            skipped += 1
+            continue
+
+        # Chunk vizinho de um já escolhido: costura só a parte nova, sem separador
+        stitch = _find_stitch(text, selected, min_overlap)
+        if stitch is not None:
+            index, extra, side = stitch
+            chosen = selected[index]
+            merged = chosen + extra if side == "after" else extra + chosen
+            added = count(merged) - count(chosen)
+            if added > remaining and side == "after" and remaining >= min_fragment_tokens:
+                merged = chosen + _truncate_at_sentence(extra, remaining, count)
+                added = count(merged) - count(chosen)
+            if added <= remaining:
+                selected[index] = merged
+                used += added
+            continue
+
+        cost = separator_tokens if selected else 0
+        tokens = count(text)
+        if tokens + cost > remaining:
+            if remaining - cost < min_fragment_tokens:
+                continue
+            text = _truncate_at_sentence(text, remaining - cost, count)
+            if not text:
+                continue
+            tokens = count(text)
+        used += tokens + cost
+        selected.append(text)
+
+    if skipped:
+        logger.debug(f"Contexto: {skipped} trecho(s) repetido(s) descartado(s)")
+    return separator.join(selected)
@@ -0,0 +1,268 @@
+"""
+Registro de doenças baseado em arquivos.
+
+Cada doença é um manifesto JSON em um diretório (um arquivo por doença,
+`<id>.json`) com o PDF, as palavras-chave, as personalidades e os parâmetros
+de chunking:
+
+    {
+      "name": "Hanseníase",
+      "pdf_path": "PDFs/hanseniase.pdf",
+      "description": "...",
+      "keywords": ["hanseníase", "lepra"],
+      "chunking": {"chunk_size": 1500, "overlap": 300},
+      "personalities": {"dr_gasnelio": {"name": "...", "style": "...", "greeting": "...", "fallback": "..."}}
+    }
+
+O registro relê o diretório quando algum manifesto é criado, alterado ou
+removido (verificação por mtime, no máximo a cada `refresh_interval`
+segundos), então cada worker enxerga doenças novas sem reinício. Os corpora
+ficam num LRUCache limitado, carregados só quando alguém pergunta sobre a
+doença.
+"""
+
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNKING = {"chunk_size": 1500, "overlap": 300}
+REQUIRED_FIELDS = ("name", "pdf_path", "personalities")
+PERSONALITY_FIELDS = ("name", "greeting", "fallback")
+
+
+class DiseaseManifestError(ValueError):
+    """Manifesto de doença inválido"""
+
+
+def default_personalities(disease_name: str) -> Dict[str, Dict[str, str]]:
+    """Personalidades padrão (Dr. Gasnelio e Gá) para uma doença nova"""
+    name = disease_name.lower()
+    return {
+        "dr_gasnelio": {
+            "name": "Dr. Gasnelio",
+            "style": "sério e técnico",
+            "greeting": f"Olá! Sou o Dr. Gasnelio, especialista em {name}. Como posso ajudá-lo hoje?",
+            "fallback": f"Baseado na literatura médica sobre {name}, posso orientar que esta condição requer avaliação médica especializada. Recomendo consultar um médico para diagnóstico adequado."
+        },
+        "ga": {
+            "name": "Gá",
+            "style": "descontraído e simples",
+            "greeting": f"Oi! Sou o Gá! 😊 Vou te ajudar a entender sobre {name} de um jeito bem simples!",
+            "fallback": "Olha, sobre isso eu não tenho certeza no material que tenho aqui. Mas posso te dizer que é sempre bom procurar um médico quando temos dúvidas sobre saúde, certo? 😊"
+        }
+    }
+
+
+def validate_manifest(manifest: Dict[str, Any], disease_id: str) -> Dict[str, Any]:
+    """
+    Confere os campos do manifesto e completa os opcionais.
+
+    Parâmetros:
+        manifest (Dict[str, Any]): Conteúdo do manifesto.
+        disease_id (str): Id da doença (nome do arquivo sem extensão).
+
+    Retorna:
+        Dict[str, Any]: Cópia do manifesto com description, keywords e chunking preenchidos.
+
+    Lança:
+        DiseaseManifestError: Se faltar campo obrigatório ou algum valor for inválido.
+    """
+    if not isinstance(manifest, dict):
+        raise DiseaseManifestError(f"{disease_id}: o manifesto deve ser um objeto JSON")
+    missing = [field for field in REQUIRED_FIELDS if not manifest.get(field)]
+    if missing:
+        raise DiseaseManifestError(f"{disease_id}: campos obrigatórios ausentes: {', '.join(missing)}")
+
+    personalities = manifest["personalities"]
+    if not isinstance(personalities, dict):
+        raise DiseaseManifestError(f"{disease_id}: 'personalities' deve ser um objeto")
+    for personality_id, personality in personalities.items():
+        absent = [field for field in PERSONALITY_FIELDS if not isinstance(personality, dict) or not personality.get(field)]
+        if absent:
+            raise DiseaseManifestError(f"{disease_id}: personalidade '{personality_id}' sem {', '.join(absent)}")
+
+    keywords = manifest.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+        raise DiseaseManifestError(f"{disease_id}: 'keywords' deve ser uma lista de textos")
+
+    chunking = manifest.get("chunking", {})
+    if not isinstance(chunking, dict):
+        raise DiseaseManifestError(f"{disease_id}: 'chunking' deve ser um objeto")
+    unknown = sorted(set(chunking) - set(DEFAULT_CHUNKING))
+    if unknown:
+        raise DiseaseManifestError(f"{disease_id}: chunking com campos desconhecidos: {', '.join(unknown)}")
+    chunking = dict(DEFAULT_CHUNKING, **chunking)
+    chunk_size, overlap = chunking["chunk_size"], chunking["overlap"]
+    # bool é subclasse de int: "chunk_size": true não pode virar 1
+    if any(not isinstance(value, int) or isinstance(value, bool) for value in (chunk_size, overlap)) \
+            or chunk_size <= 0 or not 0 <= overlap < chunk_size:
+        raise DiseaseManifestError(f"{disease_id}: chunking inválido (chunk_size > overlap >= 0)")
+
+    normalized = copy.deepcopy(manifest)
+    normalized["description"] = manifest.get("description", "")
+    normalized["keywords"] = [keyword.strip() for keyword in keywords if keyword.strip()]
+    normalized["chunking"] = chunking
+    return normalized
+
+
+def write_manifest(disease_id: str, manifest: Dict[str, Any], directory: str) -> str:
+    """Valida e grava o manifesto atomicamente em `<directory>/<disease_id>.json`; retorna o caminho"""
+    if not disease_id or os.sep in disease_id or disease_id.startswith("."):
+        raise DiseaseManifestError(f"Id de doença inválido: {disease_id!r}")
+    validate_manifest(manifest, disease_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{disease_id}.json")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def load_manifests(directory: str, base_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Lê todos os manifestos do diretório; inválidos são registrados no log e ignorados.
+
+    Parâmetros:
+        directory (str): Diretório com os arquivos `<id>.json`.
+        base_dir (str, opcional): Base para `pdf_path` relativos (padrão: mantidos como estão).
+
+    Retorna:
+        Dict[str, Dict[str, Any]]: Id da doença -> manifesto validado.
+    """
+    diseases: Dict[str, Dict[str, Any]] = {}
+    if not os.path.isdir(directory):
+        logger.warning(f"Diretório de doenças não encontrado: {directory}")
+        return diseases
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        disease_id = filename[:-len(".json")]
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = validate_manifest(json.load(f), disease_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Manifesto de doença ignorado ({path}): {e}")
+            continue
+        if base_dir and not os.path.isabs(manifest["pdf_path"]):
+            manifest["pdf_path"] = os.path.join(base_dir, manifest["pdf_path"])
+        diseases[disease_id] = manifest
+    return diseases
+
+
+class DiseaseRegistry:
+    """Doenças cadastradas no diretório de manifestos, recarregadas quando ele muda"""
+
+    def __init__(self, directory: str, base_dir: Optional[str] = None, refresh_interval: float = 5.0):
+        """
+        Parâmetros:
+            directory (str): Diretório dos manifestos.
+            base_dir (str, opcional): Base para `pdf_path` relativos.
+            refresh_interval (float): Intervalo mínimo, em segundos, entre verificações do diretório.
+        """
+        self.directory = directory
+        self.base_dir = base_dir
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._checked_at = float("-inf")
+        self._diseases: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def diseases(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot do registro vigente (não é alterado por recargas posteriores)"""
+        return self._diseases
+
+    def _scan(self) -> Tuple:
+        try:
+            entries = sorted(
+                (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json")
+            )
+        except FileNotFoundError:
+            entries = []
+        return tuple(entries)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Relê os manifestos se o diretório mudou desde a última leitura.
+
+        Parâmetros:
+            force (bool): Verifica agora, ignorando `refresh_interval`.
+
+        Retorna:
+            bool: True se o registro foi recarregado.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            signature = self._scan()
+            if signature == self._signature:
+                return False
+            diseases = load_manifests(self.directory, self.base_dir)
+            self._signature = signature
+            self._diseases = diseases
+        logger.info(f"Registro de doenças carregado de {self.directory}: {', '.join(diseases) or 'nenhuma'}")
+        return True
+
+
+class LRUCache:
+    """Mapa limitado que descarta o item usado há mais tempo"""
+
+    def __init__(self, max_items: int, on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        if max_items < 1:
+            raise ValueError("max_items deve ser >= 1")
+        self.max_items = max_items
+        self.on_evict = on_evict
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def keys(self) -> List[Hashable]:
+        """Chaves da menos para a mais recentemente usada"""
+        with self._lock:
+            return list(self._items)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        evicted = []
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                evicted.append(self._items.popitem(last=False))
+        for old_key, old_value in evicted:
+            logger.debug(f"LRU: {old_key} descartado da memória")
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._items.pop(key, default)
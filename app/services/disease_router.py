@@ -0,0 +1,160 @@
+"""
+Roteamento de perguntas para a(s) doença(s) certa(s) antes da busca.
+
+Combina dois sinais por doença:
+
+- palavras-chave do registro (nome + `keywords`), encontradas numa única
+  passada com o autômato Aho-Corasick dos sinônimos (sem acentos, respeitando
+  fronteiras de palavra) — uma menção explícita decide o roteamento;
+- similaridade de cosseno entre a pergunta e o centroide dos embeddings da
+  doença (média dos chunks do corpus, ou da descrição enquanto o corpus não
+  foi carregado).
+
+Assim cada pergunta consulta só um ou dois índices, independentemente de
+quantas doenças estejam cadastradas.
+"""
+
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.synonyms import AhoCorasick, fold_text, is_word_boundary
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class DiseaseRouter:
+    """Classifica perguntas entre as doenças cadastradas"""
+
+    def __init__(
+        self,
+        diseases: Dict[str, Dict],
+        embed: Optional[Embedder] = None,
+        max_diseases: int = 2,
+        margin: float = 0.05,
+        min_similarity: float = 0.15,
+    ):
+        """
+        Parâmetros:
+            diseases (Dict[str, Dict]): Registro id -> {'name', 'description', 'keywords', ...}.
+            embed (Callable, opcional): Função lista de textos -> matriz de embeddings.
+            max_diseases (int): Máximo de doenças retornadas por pergunta.
+            margin (float): Doenças a até `margin` da melhor similaridade também são incluídas.
+            min_similarity (float): Similaridade mínima para rotear sem palavra-chave.
+        """
+        self.embed = embed
+        self.max_diseases = max_diseases
+        self.margin = margin
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._centroids: Dict[str, np.ndarray] = {}
+        self._diseases: Dict[str, Dict] = {}
+        self._keyword_owner: Dict[str, List[str]] = {}
+        self._automaton = AhoCorasick([])
+        self.update_diseases(diseases)
+
+    @property
+    def disease_ids(self) -> List[str]:
+        return list(self._diseases)
+
+    def update_diseases(self, diseases: Dict[str, Dict]) -> None:
+        """Recompila palavras-chave (e centroides de descrição) para um novo registro"""
+        owners: Dict[str, List[str]] = {}
+        for disease_id, disease in diseases.items():
+            for keyword in [disease.get("name", "")] + list(disease.get("keywords", [])):
+                folded = fold_text(keyword).strip()
+                if folded and disease_id not in owners.get(folded, []):
+                    owners.setdefault(folded, []).append(disease_id)
+        automaton = AhoCorasick(owners.keys())
+
+        with self._lock:
+            self._diseases = dict(diseases)
+            self._keyword_owner = owners
+            self._automaton = automaton
+            self._centroids = {k: v for k, v in self._centroids.items() if k in diseases}
+
+        if self.embed is not None:
+            missing = [d for d in diseases if d not in self._centroids]
+            if missing:
+                vectors = np.asarray(self.embed([self._describe(diseases[d]) for d in missing]), dtype="float32")
+                with self._lock:
+                    for disease_id, vector in zip(missing, vectors):
+                        self._centroids.setdefault(disease_id, _unit(vector))
+
+    @staticmethod
+    def _describe(disease: Dict) -> str:
+        return ". ".join(
+            part for part in [disease.get("name", ""), disease.get("description", ""), ", ".join(disease.get("keywords", []))] if part
+        )
+
+    def set_centroid(self, disease_id: str, embeddings: np.ndarray) -> None:
+        """Usa a média dos embeddings (normalizados) do corpus da doença como centroide"""
+        matrix = np.asarray(embeddings, dtype="float32")
+        if matrix.ndim != 2 or not len(matrix):
+            return
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        with self._lock:
+            self._centroids[disease_id] = _unit((matrix / norms).mean(axis=0))
+
+    def keyword_matches(self, question: str) -> Dict[str, int]:
+        """Doença -> número de palavras-chave distintas dela citadas na pergunta"""
+        folded = fold_text(question)
+        found: Dict[str, set] = {}
+        for start, end, index in self._automaton.finditer(folded):
+            if is_word_boundary(folded, start, end):
+                keyword = self._automaton.patterns[index]
+                for disease_id in self._keyword_owner[keyword]:
+                    found.setdefault(disease_id, set()).add(keyword)
+        return {disease_id: len(keywords) for disease_id, keywords in found.items()}
+
+    def route(self, question: str, question_embedding: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        Doenças cujo índice deve ser consultado para a pergunta.
+
+        Parâmetros:
+            question (str): Pergunta do usuário.
+            question_embedding (np.ndarray, opcional): Embedding já calculado da pergunta.
+
+        Retorna:
+            List[Tuple[str, float]]: Pares (doença, score) do mais ao menos provável;
+            vazia se nenhuma doença for plausível.
+        """
+        diseases = self._diseases
+        if len(diseases) <= 1:
+            return [(disease_id, 1.0) for disease_id in diseases]
+
+        keywords = self.keyword_matches(question)
+        if len(keywords) == 1:
+            # Menção explícita a uma só doença: nem precisa de embedding
+            return [(next(iter(keywords)), 1.0)]
+
+        similarities: Dict[str, float] = {}
+        centroids = self._centroids
+        if centroids and (question_embedding is not None or self.embed is not None):
+            if question_embedding is None:
+                question_embedding = np.asarray(self.embed([question]), dtype="float32")[0]
+            query = _unit(np.asarray(question_embedding, dtype="float32").reshape(-1))
+            similarities = {d: float(np.dot(query, c)) for d, c in centroids.items() if d in diseases}
+
+        if keywords:
+            # Várias doenças citadas: mais palavras-chave primeiro, similaridade desempata
+            ranked = sorted(keywords, key=lambda d: (keywords[d], similarities.get(d, 0.0)), reverse=True)
+            return [(d, 1.0 + similarities.get(d, 0.0)) for d in ranked[: self.max_diseases]]
+
+        if not similarities:
+            return []
+        ranked = sorted(similarities.items(), key=lambda item: item[1], reverse=True)
+        best = ranked[0][1]
+        if best < self.min_similarity:
+            return []
+        return [(d, score) for d, score in ranked[: self.max_diseases] if score >= best - self.margin]
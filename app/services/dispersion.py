@@ -0,0 +1,614 @@
+"""
+Modelo de pluma gaussiana para dispersão atmosférica, calculado localmente.
+
+Fonte pontual contínua, vento ao longo do eixo x, reflexão total no solo:
+
+    C(x, y, z) = Q / (2π u σy σz) · exp(-y² / 2σy²)
+                 · [exp(-(z - H)² / 2σz²) + exp(-(z + H)² / 2σz²)]
+
+σy e σz seguem as curvas de Briggs (1973) para as classes de estabilidade de
+Pasquill-Gifford (A a F), em terreno aberto ou urbano. A classe pode ser
+informada ou derivada da velocidade do vento e da insolação/nebulosidade
+(tabela de Turner). O vento é extrapolado até a altura da chaminé pela lei de
+potência e, se a chaminé for descrita, a altura efetiva inclui a elevação da
+pluma de Briggs.
+
+Tudo é vetorizado em NumPy sobre a malha de receptores: uma malha de
+milhares de pontos é calculada em milissegundos, sem chamadas de rede.
+Lotes de cenários (listas ou produto cartesiano de parâmetros) são validados
+coluna a coluna e avaliados em blocos de cenários × malha com memória
+limitada (ver `calculate_batch`).
+"""
+
+import itertools
+import logging
+import math
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STABILITY_CLASSES = ("A", "B", "C", "D", "E", "F")
+TERRAINS = ("rural", "urban")
+BACKENDS = ("local", "langflow")  # onde /api/calculate roda o modelo (ver DISPERSION_BACKEND)
+INSOLATION_LEVELS = ("strong", "moderate", "slight", "night_cloudy", "night_clear")
+GRAVITY = 9.81
+REFERENCE_HEIGHT = 10.0  # altura do anemômetro (m)
+MIN_WIND_SPEED = 0.5  # abaixo disso (calmaria) a pluma gaussiana não vale
+MAX_GRID_POINTS = 250_000
+MAX_BATCH_SCENARIOS = 100_000
+MAX_BATCH_CELLS = 2_000_000  # cenários × receptores avaliados de uma vez
+
+# Coeficientes de Briggs: σ = a·x·(1 + b·x)^c
+_SIGMA_COEFFICIENTS = {
+    "rural": {
+        "A": ((0.22, 0.0001, -0.5), (0.20, 0.0, 1.0)),
+        "B": ((0.16, 0.0001, -0.5), (0.12, 0.0, 1.0)),
+        "C": ((0.11, 0.0001, -0.5), (0.08, 0.0002, -0.5)),
+        "D": ((0.08, 0.0001, -0.5), (0.06, 0.0015, -0.5)),
+        "E": ((0.06, 0.0001, -0.5), (0.03, 0.0003, -1.0)),
+        "F": ((0.04, 0.0001, -0.5), (0.016, 0.0003, -1.0)),
+    },
+    "urban": {
+        "A": ((0.32, 0.0004, -0.5), (0.24, 0.001, 0.5)),
+        "B": ((0.32, 0.0004, -0.5), (0.24, 0.001, 0.5)),
+        "C": ((0.22, 0.0004, -0.5), (0.20, 0.0, 1.0)),
+        "D": ((0.16, 0.0004, -0.5), (0.14, 0.0003, -0.5)),
+        "E": ((0.11, 0.0004, -0.5), (0.08, 0.0015, -0.5)),
+        "F": ((0.11, 0.0004, -0.5), (0.08, 0.0015, -0.5)),
+    },
+}
+
+# Expoentes da lei de potência do perfil de vento (EPA)
+_WIND_PROFILE_EXPONENTS = {
+    "rural": {"A": 0.07, "B": 0.07, "C": 0.10, "D": 0.15, "E": 0.35, "F": 0.55},
+    "urban": {"A": 0.15, "B": 0.15, "C": 0.20, "D": 0.25, "E": 0.30, "F": 0.30},
+}
+
+# Tabela de Turner: (limite superior do vento a 10 m, classes por insolação)
+_TURNER_TABLE = (
+    (2.0, {"strong": "A", "moderate": "A", "slight": "B", "night_cloudy": "F", "night_clear": "F"}),
+    (3.0, {"strong": "A", "moderate": "B", "slight": "C", "night_cloudy": "E", "night_clear": "F"}),
+    (5.0, {"strong": "B", "moderate": "B", "slight": "C", "night_cloudy": "D", "night_clear": "E"}),
+    (6.0, {"strong": "C", "moderate": "C", "slight": "D", "night_cloudy": "D", "night_clear": "D"}),
+    (math.inf, {"strong": "C", "moderate": "D", "slight": "D", "night_cloudy": "D", "night_clear": "D"}),
+)
+
+# As mesmas tabelas como arrays, indexadas por [terreno, classe] e [faixa de vento, insolação]
+_SIGMA_TABLE = np.array([
+    [np.ravel(_SIGMA_COEFFICIENTS[terrain][cls]) for cls in STABILITY_CLASSES] for terrain in TERRAINS
+])
+_EXPONENT_TABLE = np.array([
+    [_WIND_PROFILE_EXPONENTS[terrain][cls] for cls in STABILITY_CLASSES] for terrain in TERRAINS
+])
+_TURNER_LIMITS = np.array([limit for limit, _ in _TURNER_TABLE[:-1]])
+_TURNER_INDEX = np.array([
+    [STABILITY_CLASSES.index(classes[level]) for level in INSOLATION_LEVELS] for _, classes in _TURNER_TABLE
+])
+
+DEFAULT_GRID = {"x_min": 10.0, "x_max": 5000.0, "y_max": 1000.0, "nx": 60, "ny": 41, "z": 0.0}
+
+# Parâmetros numéricos por cenário: (padrão, mínimo, estritamente positivo)
+_NUMERIC_FIELDS = {
+    "wind_speed": (None, MIN_WIND_SPEED, True),
+    "temperature": (None, -90.0, False),
+    "emission_rate": (None, 0.0, False),
+    "stack_height": (0.0, 0.0, False),
+    "stack_temperature": (math.nan, -90.0, False),
+    "stack_diameter": (1.0, None, True),
+    "exit_velocity": (10.0, 0.0, False),
+}
+REQUIRED_FIELDS = ("wind_speed", "temperature", "emission_rate")
+SCENARIO_FIELDS = tuple(_NUMERIC_FIELDS) + ("stability_class", "insolation", "terrain")
+
+
+class DispersionParameterError(ValueError):
+    """Parâmetros de dispersão ausentes ou fora do domínio do modelo"""
+
+
+def stability_class_for(wind_speed: float, insolation: str = "moderate") -> str:
+    """Classe de Pasquill-Gifford pela tabela de Turner (vento a 10 m e insolação/nebulosidade)"""
+    for upper_limit, classes in _TURNER_TABLE:
+        if wind_speed < upper_limit:
+            return classes[insolation]
+    raise AssertionError("tabela de Turner sem limite infinito")
+
+
+def dispersion_coefficients(x: np.ndarray, stability_class: str, terrain: str = "rural") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    σy e σz (m) de Briggs para distâncias a favor do vento.
+
+    Parâmetros:
+        x (np.ndarray): Distâncias a favor do vento (m), positivas.
+        stability_class (str): Classe de Pasquill-Gifford (A a F).
+        terrain (str): 'rural' (terreno aberto) ou 'urban'.
+
+    Retorna:
+        Tuple[np.ndarray, np.ndarray]: σy e σz com a forma de `x`.
+    """
+    (ay, by, cy), (az, bz, cz) = _SIGMA_COEFFICIENTS[terrain][stability_class]
+    x = np.asarray(x, dtype=float)
+    sigma_y = ay * x * (1.0 + by * x) ** cy
+    sigma_z = az * x * (1.0 + bz * x) ** cz
+    return sigma_y, sigma_z
+
+
+def wind_at_height(wind_speed: float, height: float, stability_class: str, terrain: str = "rural") -> float:
+    """Vento na altura da fonte pela lei de potência (medido a 10 m)"""
+    exponent = _WIND_PROFILE_EXPONENTS[terrain][stability_class]
+    return wind_speed * (max(height, REFERENCE_HEIGHT) / REFERENCE_HEIGHT) ** exponent
+
+
+def briggs_plume_rise(
+    wind_speed: Any,
+    ambient_temperature_k: Any,
+    stack_temperature_k: Any,
+    stack_diameter: Any,
+    exit_velocity: Any,
+) -> Any:
+    """Elevação final (m) de uma pluma com empuxo térmico (Briggs, condições neutras/instáveis); aceita arrays"""
+    buoyancy_flux = np.maximum(
+        GRAVITY * exit_velocity * np.square(stack_diameter)
+        * (stack_temperature_k - ambient_temperature_k) / (4.0 * stack_temperature_k),
+        0.0,
+    )
+    distance_final = np.where(
+        buoyancy_flux < 55.0, 3.5 * 14.0 * buoyancy_flux ** 0.625, 3.5 * 34.0 * buoyancy_flux ** 0.4
+    )
+    rise = 1.6 * np.cbrt(buoyancy_flux) * distance_final ** (2.0 / 3.0) / wind_speed
+    return float(rise) if np.ndim(rise) == 0 else rise
+
+
+def _field(x, y, z, emission_rate, wind_speed, effective_height, coefficients) -> np.ndarray:
+    """Núcleo da pluma com tudo em broadcasting; `coefficients` = (ay, by, cy, az, bz, cz)"""
+    ay, by, cy, az, bz, cz = coefficients
+    downwind = x > 0
+    xd = np.where(downwind, x, 1.0)
+    sigma_y = ay * xd * (1.0 + by * xd) ** cy
+    sigma_z = az * xd * (1.0 + bz * xd) ** cz
+    lateral = np.exp(-0.5 * (y / sigma_y) ** 2)
+    vertical = (
+        np.exp(-0.5 * ((z - effective_height) / sigma_z) ** 2)
+        + np.exp(-0.5 * ((z + effective_height) / sigma_z) ** 2)
+    )
+    concentration = emission_rate / (2.0 * np.pi * wind_speed * sigma_y * sigma_z) * lateral * vertical
+    return np.where(downwind, concentration, 0.0)
+
+
+def plume_concentration(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    emission_rate: float,
+    wind_speed: float,
+    effective_height: float,
+    stability_class: str,
+    terrain: str = "rural",
+) -> np.ndarray:
+    """
+    Concentração (g/m³) da pluma gaussiana nos receptores.
+
+    Parâmetros:
+        x, y, z (np.ndarray): Coordenadas dos receptores (m); x a favor do vento,
+            y transversal, z altura. Formas compatíveis por broadcasting.
+        emission_rate (float): Taxa de emissão Q (g/s).
+        wind_speed (float): Vento na altura da fonte (m/s).
+        effective_height (float): Altura efetiva H da pluma (m).
+        stability_class (str): Classe de Pasquill-Gifford.
+        terrain (str): 'rural' ou 'urban'.
+
+    Retorna:
+        np.ndarray: Concentrações; zero a montante da fonte (x <= 0).
+    """
+    x, y, z = np.broadcast_arrays(
+        np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float)
+    )
+    coefficients = _SIGMA_TABLE[TERRAINS.index(terrain), STABILITY_CLASSES.index(stability_class)]
+    with np.errstate(over="ignore", under="ignore"):
+        return _field(x, y, z, emission_rate, wind_speed, effective_height, coefficients)
+
+
+def _scenario_label(indices: np.ndarray, total: int) -> str:
+    if total == 1:
+        return ""
+    shown = ", ".join(str(int(i)) for i in indices[:5])
+    more = f" e mais {len(indices) - 5}" if len(indices) > 5 else ""
+    return f" (cenários {shown}{more})"
+
+
+def _numeric_column(values: Sequence[Any], name: str, total: int) -> np.ndarray:
+    default, minimum, strictly_positive = _NUMERIC_FIELDS[name]
+    raw = [default if value is None else value for value in values]
+    try:
+        column = np.array(raw, dtype=float)
+    except (TypeError, ValueError):
+        column = None
+    if column is None or column.ndim != 1:
+        # Listas aninhadas viram matrizes (ou falham) em vez de uma coluna
+        bad = np.array([np.ndim(value) != 0 or not _is_number(value) for value in raw]).nonzero()[0]
+        raise DispersionParameterError(f"Parâmetro {name} deve ser numérico{_scenario_label(bad, total)}")
+    present = ~np.isnan(column) if default is not None and math.isnan(default) else np.ones(total, dtype=bool)
+    checks = [
+        (np.isinf(column), "deve ser finito"),
+        (present & np.isnan(column), "deve ser finito"),
+    ]
+    if strictly_positive:
+        checks.append((present & (column <= 0), "deve ser maior que zero"))
+    if minimum is not None:
+        checks.append((present & (column < minimum), f"deve ser >= {minimum}"))
+    for invalid, message in checks:
+        if invalid.any():
+            raise DispersionParameterError(f"Parâmetro {name} {message}{_scenario_label(invalid.nonzero()[0], total)}")
+    return column
+
+
+def _is_number(value: Any) -> bool:
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _choice_column(values: Sequence[Any], name: str, choices: Sequence[str], total: int, upper: bool = False) -> np.ndarray:
+    """Índices de cada valor em `choices` (-1 para ausente)"""
+    lookup = {choice: index for index, choice in enumerate(choices)}
+    column = np.full(total, -1, dtype=np.int64)
+    bad = []
+    for position, value in enumerate(values):
+        if value is None:
+            continue
+        key = str(value).upper() if upper else str(value).lower()
+        if key not in lookup:
+            bad.append(position)
+        else:
+            column[position] = lookup[key]
+    if bad:
+        raise DispersionParameterError(
+            f"{name} deve ser um de: {', '.join(choices)}{_scenario_label(np.array(bad), total)}"
+        )
+    return column
+
+
+def validate_grid(grid: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Malha de receptores com padrões preenchidos e limites conferidos"""
+    if grid is not None and not isinstance(grid, dict):
+        raise DispersionParameterError("grid deve ser um objeto")
+    grid = dict(DEFAULT_GRID, **(grid or {}))
+    for name in ("x_min", "x_max", "y_max", "z"):
+        value = grid[name]
+        if not _is_number(value) or not math.isfinite(float(value)) or float(value) < 0:
+            raise DispersionParameterError(f"Parâmetro {name} deve ser numérico e >= 0")
+        grid[name] = float(value)
+    for name in ("nx", "ny"):
+        value = grid[name]
+        if not _is_number(value) or not math.isfinite(float(value)) or float(value) < 2:
+            raise DispersionParameterError(f"Parâmetro {name} deve ser numérico e >= 2")
+        grid[name] = int(value)
+    if grid["x_max"] <= grid["x_min"]:
+        raise DispersionParameterError("grid.x_max deve ser maior que grid.x_min")
+    if grid["nx"] * grid["ny"] > MAX_GRID_POINTS:
+        raise DispersionParameterError(f"Malha com mais de {MAX_GRID_POINTS} receptores")
+    return grid
+
+
+def validate_scenarios(records: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Valida todos os cenários de uma vez, coluna a coluna.
+
+    Parâmetros:
+        records (Sequence[Dict]): Um dicionário de parâmetros por cenário (mesmos
+            campos de validate_params, exceto grid).
+
+    Retorna:
+        Dict[str, np.ndarray]: Colunas normalizadas — campos numéricos (float),
+        `class_index` e `terrain_index` (int) resolvidos; stack_temperature é NaN
+        nos cenários sem chaminé descrita.
+
+    Lança:
+        DispersionParameterError: Primeiro problema encontrado, citando os cenários afetados.
+    """
+    total = len(records)
+    if not total:
+        raise DispersionParameterError("Nenhum cenário informado")
+    if any(not isinstance(record, dict) for record in records):
+        raise DispersionParameterError("Parâmetros devem ser um objeto JSON")
+
+    for name in REQUIRED_FIELDS:
+        missing = np.array([record.get(name) is None for record in records])
+        if missing.any():
+            if total == 1:
+                absent = [field for field in REQUIRED_FIELDS if records[0].get(field) is None]
+                raise DispersionParameterError(f"Parâmetros faltando: {', '.join(absent)}")
+            raise DispersionParameterError(f"Parâmetro {name} faltando{_scenario_label(missing.nonzero()[0], total)}")
+
+    wind = [record.get("wind_speed") for record in records]
+    if all(_is_number(value) for value in wind):
+        calm = (np.array(wind, dtype=float) < MIN_WIND_SPEED).nonzero()[0]
+        if len(calm):
+            raise DispersionParameterError(
+                f"wind_speed abaixo de {MIN_WIND_SPEED} m/s (calmaria): o modelo gaussiano não se aplica"
+                f"{_scenario_label(calm, total)}"
+            )
+
+    columns = {name: _numeric_column([record.get(name) for record in records], name, total) for name in _NUMERIC_FIELDS}
+    terrain = _choice_column([record.get("terrain", "rural") for record in records], "terrain", TERRAINS, total)
+    classes = _choice_column([record.get("stability_class") for record in records], "stability_class",
+                             STABILITY_CLASSES, total, upper=True)
+    insolation = _choice_column([record.get("insolation", "moderate") for record in records], "insolation",
+                                INSOLATION_LEVELS, total)
+
+    # Classe ausente: tabela de Turner pelo vento e pela insolação
+    turner = _TURNER_INDEX[np.searchsorted(_TURNER_LIMITS, columns["wind_speed"], side="right"), insolation]
+    columns["class_index"] = np.where(classes >= 0, classes, turner)
+    columns["terrain_index"] = terrain
+    return columns
+
+
+def validate_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida e normaliza os parâmetros de /api/calculate.
+
+    Obrigatórios: wind_speed (m/s, a 10 m), temperature (°C, ambiente) e
+    emission_rate (g/s). Opcionais: stack_height (m), stability_class (A-F) ou
+    insolation (strong, moderate, slight, night_cloudy, night_clear), terrain
+    (rural/urban), stack_temperature (°C), stack_diameter (m), exit_velocity
+    (m/s) e grid {x_min, x_max, y_max, nx, ny, z}.
+
+    Retorna:
+        Dict[str, Any]: Parâmetros normalizados, com classe de estabilidade resolvida.
+
+    Lança:
+        DispersionParameterError: Se algum parâmetro faltar ou for inválido.
+    """
+    if not isinstance(params, dict):
+        raise DispersionParameterError("Parâmetros devem ser um objeto JSON")
+    columns = validate_scenarios([params])
+    stack = None
+    if not math.isnan(columns["stack_temperature"][0]):
+        stack = {
+            "temperature": float(columns["stack_temperature"][0]),
+            "diameter": float(columns["stack_diameter"][0]),
+            "exit_velocity": float(columns["exit_velocity"][0]),
+        }
+    return {
+        "wind_speed": float(columns["wind_speed"][0]),
+        "temperature": float(columns["temperature"][0]),
+        "emission_rate": float(columns["emission_rate"][0]),
+        "stack_height": float(columns["stack_height"][0]),
+        "stability_class": STABILITY_CLASSES[columns["class_index"][0]],
+        "terrain": TERRAINS[columns["terrain_index"][0]],
+        "stack": stack,
+        "grid": validate_grid(params.get("grid")),
+    }
+
+
+def expand_scenarios(
+    base: Optional[Dict[str, Any]] = None,
+    scenarios: Optional[Any] = None,
+    sweep: Optional[Dict[str, Sequence[Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lista de cenários a partir de uma base comum, cenários explícitos e/ou uma varredura.
+
+    Parâmetros:
+        base (Dict, opcional): Valores comuns a todos os cenários.
+        scenarios (list | Dict[str, list], opcional): Lista de dicionários, ou
+            colunas de mesmo comprimento (ex.: {"wind_speed": [1, 2], "temperature": [20, 25]}).
+        sweep (Dict[str, list], opcional): Produto cartesiano dos valores de cada
+            parâmetro, aplicado sobre cada cenário explícito (ou sobre a base).
+
+    Retorna:
+        List[Dict[str, Any]]: Cenários completos, na ordem de avaliação.
+
+    Lança:
+        DispersionParameterError: Se base, scenarios ou sweep tiverem formato inválido
+            ou a combinação passar de MAX_BATCH_SCENARIOS.
+    """
+    if base is not None and not isinstance(base, dict):
+        raise DispersionParameterError("parameters deve ser um objeto JSON")
+    base = {k: v for k, v in (base or {}).items() if k in SCENARIO_FIELDS}
+    if isinstance(scenarios, dict):
+        bad = [name for name, values in scenarios.items() if not isinstance(values, (list, tuple))]
+        if bad:
+            raise DispersionParameterError(f"Colunas de scenarios devem ser listas: {', '.join(map(str, bad))}")
+        lengths = {len(values) for values in scenarios.values()}
+        if len(lengths) > 1:
+            raise DispersionParameterError("Colunas de scenarios devem ter o mesmo comprimento")
+        names = list(scenarios)
+        scenarios = [dict(zip(names, row)) for row in zip(*scenarios.values())]
+    elif scenarios is not None and (
+        not isinstance(scenarios, (list, tuple)) or any(not isinstance(scenario, dict) for scenario in scenarios)
+    ):
+        raise DispersionParameterError("scenarios deve ser uma lista de objetos ou um objeto de listas")
+    rows = [dict(base, **scenario) for scenario in scenarios] if scenarios else [base]
+
+    if sweep is not None and not isinstance(sweep, dict):
+        raise DispersionParameterError("sweep deve ser um objeto de listas")
+    if sweep:
+        unknown = [name for name in sweep if name not in SCENARIO_FIELDS]
+        if unknown:
+            raise DispersionParameterError(f"Parâmetros de varredura desconhecidos: {', '.join(unknown)}")
+        bad = [name for name, values in sweep.items() if not isinstance(values, (list, tuple))]
+        if bad:
+            raise DispersionParameterError(f"Valores de sweep devem ser listas: {', '.join(bad)}")
+        names = list(sweep)
+        values = [list(sweep[name]) for name in names]
+        combinations = math.prod(len(v) for v in values) * len(rows)
+        if combinations > MAX_BATCH_SCENARIOS:
+            raise DispersionParameterError(f"Mais de {MAX_BATCH_SCENARIOS} cenários na varredura ({combinations})")
+        rows = [dict(row, **dict(zip(names, combo))) for row in rows for combo in itertools.product(*values)]
+
+    if len(rows) > MAX_BATCH_SCENARIOS:
+        raise DispersionParameterError(f"Mais de {MAX_BATCH_SCENARIOS} cenários ({len(rows)})")
+    return rows
+
+
+def _source_terms(columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vento na fonte, elevação da pluma e altura efetiva de cada cenário"""
+    exponents = _EXPONENT_TABLE[columns["terrain_index"], columns["class_index"]]
+    height = np.maximum(columns["stack_height"], REFERENCE_HEIGHT)
+    source_wind = columns["wind_speed"] * (height / REFERENCE_HEIGHT) ** exponents
+    has_stack = ~np.isnan(columns["stack_temperature"])
+    plume_rise = np.zeros_like(source_wind)
+    if has_stack.any():
+        plume_rise[has_stack] = briggs_plume_rise(
+            source_wind[has_stack],
+            columns["temperature"][has_stack] + 273.15,
+            columns["stack_temperature"][has_stack] + 273.15,
+            columns["stack_diameter"][has_stack],
+            columns["exit_velocity"][has_stack],
+        )
+    return source_wind, plume_rise, columns["stack_height"] + plume_rise
+
+
+def _grid_axes(grid: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    xs = np.linspace(grid["x_min"], grid["x_max"], grid["nx"])
+    ys = np.linspace(-grid["y_max"], grid["y_max"], grid["ny"])
+    return xs, ys
+
+
+def calculate_dispersion(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Campo de concentração ao nível dos receptores para os parâmetros da API.
+
+    Parâmetros:
+        params (Dict[str, Any]): Parâmetros brutos de /api/calculate (ver validate_params).
+
+    Retorna:
+        Dict[str, Any]: Classe de estabilidade, altura efetiva, vento na fonte,
+        máximo e sua posição, linha central e a malha (x, y, concentração em g/m³).
+    """
+    p = validate_params(params)
+    stability_class, terrain = p["stability_class"], p["terrain"]
+    source_wind = wind_at_height(p["wind_speed"], p["stack_height"], stability_class, terrain)
+
+    plume_rise = 0.0
+    if p["stack"] is not None:
+        plume_rise = briggs_plume_rise(
+            source_wind,
+            p["temperature"] + 273.15,
+            p["stack"]["temperature"] + 273.15,
+            p["stack"]["diameter"],
+            p["stack"]["exit_velocity"],
+        )
+    effective_height = p["stack_height"] + plume_rise
+
+    grid = p["grid"]
+    xs, ys = _grid_axes(grid)
+    field = plume_concentration(
+        xs[np.newaxis, :], ys[:, np.newaxis], grid["z"],
+        p["emission_rate"], source_wind, effective_height, stability_class, terrain,
+    )
+    centerline = plume_concentration(
+        xs, 0.0, grid["z"], p["emission_rate"], source_wind, effective_height, stability_class, terrain
+    )
+
+    row, column = np.unravel_index(int(np.argmax(field)), field.shape)
+    return {
+        "model": "gaussian_plume",
+        "units": "g/m³",
+        "stability_class": stability_class,
+        "terrain": terrain,
+        "wind_speed_at_source": round(source_wind, 4),
+        "plume_rise": round(plume_rise, 3),
+        "effective_height": round(effective_height, 3),
+        "max_concentration": float(field[row, column]),
+        "max_location": {"x": float(xs[column]), "y": float(ys[row]), "z": grid["z"]},
+        "centerline": {"x": xs.tolist(), "concentration": centerline.tolist()},
+        "grid": {"x": xs.tolist(), "y": ys.tolist(), "z": grid["z"], "concentration": field.tolist()},
+    }
+
+
+def validate_receptors(receptors: Any) -> np.ndarray:
+    """Receptores [[x, y, z], ...] (z opcional) como matriz (R, 3)"""
+    try:
+        points = [list(point) + [0.0] * (3 - len(point)) for point in receptors]
+        matrix = np.array(points, dtype=float).reshape(-1, 3)
+    except (TypeError, ValueError):
+        raise DispersionParameterError("receptors deve ser uma lista de pontos [x, y] ou [x, y, z]")
+    if not np.isfinite(matrix).all():
+        raise DispersionParameterError("receptors deve conter apenas números finitos")
+    if len(matrix) > MAX_GRID_POINTS:
+        raise DispersionParameterError(f"Mais de {MAX_GRID_POINTS} receptores")
+    return matrix
+
+
+def calculate_batch(
+    records: Sequence[Dict[str, Any]],
+    grid: Optional[Dict[str, Any]] = None,
+    receptors: Optional[Any] = None,
+    max_cells: int = MAX_BATCH_CELLS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Avalia muitos cenários de uma vez, em blocos de memória limitada.
+
+    Todos os cenários são validados antes do primeiro resultado (erros saem
+    como DispersionParameterError, sem resposta parcial). Cada bloco calcula
+    uma matriz cenários × malha numa única passada vetorizada.
+
+    Parâmetros:
+        records (Sequence[Dict]): Cenários (ver expand_scenarios).
+        grid (Dict, opcional): Malha de receptores comum a todos os cenários.
+        receptors (list, opcional): Pontos [x, y, z] cujas concentrações são devolvidas.
+        max_cells (int): Máximo de cenários × receptores por bloco.
+
+    Retorna:
+        Iterator[Dict[str, Any]]: Um resumo por cenário, na ordem de entrada:
+        índice, parâmetros resolvidos, máximo na malha e sua posição e, se
+        pedido, as concentrações nos receptores.
+    """
+    columns = validate_scenarios(records)
+    grid = validate_grid(grid)
+    points = validate_receptors(receptors) if receptors is not None else None
+    return _iterate_batch(records, columns, grid, points, max_cells)
+
+
+def _iterate_batch(records, columns, grid, points, max_cells) -> Iterator[Dict[str, Any]]:
+    source_wind, plume_rise, effective_height = _source_terms(columns)
+    coefficients = _SIGMA_TABLE[columns["terrain_index"], columns["class_index"]]  # (S, 6)
+    xs, ys = _grid_axes(grid)
+    cells_per_scenario = xs.size * ys.size + (len(points) if points is not None else 0)
+    chunk = max(1, max_cells // cells_per_scenario)
+    total = len(records)
+
+    for start in range(0, total, chunk):
+        block = slice(start, min(start + chunk, total))
+
+        def per_scenario(values, extra_dims):
+            return values[block].reshape((-1,) + (1,) * extra_dims)
+
+        with np.errstate(over="ignore", under="ignore"):
+            field = _field(
+                xs[np.newaxis, np.newaxis, :], ys[np.newaxis, :, np.newaxis], grid["z"],
+                per_scenario(columns["emission_rate"], 2), per_scenario(source_wind, 2),
+                per_scenario(effective_height, 2),
+                [per_scenario(coefficients[:, i], 2) for i in range(6)],
+            )
+            at_receptors = None
+            if points is not None:
+                at_receptors = _field(
+                    points[np.newaxis, :, 0], points[np.newaxis, :, 1], points[np.newaxis, :, 2],
+                    per_scenario(columns["emission_rate"], 1), per_scenario(source_wind, 1),
+                    per_scenario(effective_height, 1),
+                    [per_scenario(coefficients[:, i], 1) for i in range(6)],
+                )
+
+        flat_max = field.reshape(field.shape[0], -1).argmax(axis=1)
+        rows, cols = np.unravel_index(flat_max, field.shape[1:])
+        for offset, index in enumerate(range(block.start, block.stop)):
+            result = {
+                "index": index,
+                "parameters": {k: v for k, v in records[index].items() if k in SCENARIO_FIELDS},
+                "stability_class": STABILITY_CLASSES[columns["class_index"][index]],
+                "terrain": TERRAINS[columns["terrain_index"][index]],
+                "wind_speed_at_source": round(float(source_wind[index]), 4),
+                "plume_rise": round(float(plume_rise[index]), 3),
+                "effective_height": round(float(effective_height[index]), 3),
+                "max_concentration": float(field[offset, rows[offset], cols[offset]]),
+                "max_location": {"x": float(xs[cols[offset]]), "y": float(ys[rows[offset]]), "z": grid["z"]},
+            }
+            if at_receptors is not None:
+                result["receptors"] = at_receptors[offset].tolist()
+            yield result
@@ -0,0 +1,157 @@
+"""
+Ingestão de PDFs em fluxo: extração paralela por página, limpeza e chunking
+incremental, com o número da página registrado nos metadados de cada chunk.
+
+Nenhum ponto do pipeline monta o texto completo do documento: cada página é
+limpa e dividida assim que chega, e os chunks são emitidos à medida que
+completam o orçamento de tokens.
+"""
+
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.services.pdf_utils import iter_pdf_pages_parallel
+from app.services.token_utils import count_tokens
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def clean_page_text(text: str) -> str:
+    """
+    Normaliza o texto extraído de uma página de PDF.
+
+    Junta palavras hifenizadas na quebra de linha, une linhas quebradas dentro
+    de um parágrafo e remove espaços repetidos, preservando linhas em branco
+    como separador de parágrafos.
+    """
+    text = text.replace("\r", "")
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = re.sub(r"\n\s*\n+", "\n\n", text)
+    return text.strip()
+
+
+def _sentences(text: str, max_tokens: int) -> Iterator[Tuple[str, int, bool]]:
+    """Gera (frase, tokens, fim de parágrafo); frases maiores que o limite são cortadas por palavras"""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        sentences = [s.strip() for s in _SENTENCE_END.split(paragraph) if s.strip()]
+        for position, sentence in enumerate(sentences):
+            last = position == len(sentences) - 1
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                yield sentence, tokens, last
+                continue
+            words = sentence.split(" ")
+            piece: List[str] = []
+            for word in words:
+                if piece and count_tokens(" ".join(piece + [word])) > max_tokens:
+                    part = " ".join(piece)
+                    yield part, count_tokens(part), False
+                    piece = []
+                piece.append(word)
+            if piece:
+                part = " ".join(piece)
+                yield part, count_tokens(part), last
+
+
+def iter_page_chunks(
+    pages: Iterable[Tuple[int, str]],
+    source: str,
+    max_tokens: int = 256,
+    clean: Callable[[str], str] = clean_page_text,
+) -> Iterator[Dict]:
+    """
+    Divide páginas (número, texto) em chunks, à medida que chegam.
+
+    Chunks respeitam frases e, quando possível, parágrafos; um chunk pode
+    continuar na página seguinte (parágrafo que atravessa a quebra), e nesse
+    caso `page` é a página inicial e `page_end` a final.
+
+    Parâmetros:
+        pages (Iterable[Tuple[int, str]]): Páginas em ordem.
+        source (str): Nome da fonte nos metadados.
+        max_tokens (int): Tamanho máximo de cada chunk em tokens.
+        clean (callable): Limpeza aplicada a cada página.
+
+    Retorna:
+        Iterator[Dict]: Chunks no formato {'content': str, 'metadata': {...}}.
+    """
+    # Fecha o chunk no fim de um parágrafo se já tiver ao menos 3/4 do orçamento
+    soft_limit = int(max_tokens * 0.75)
+
+    pending: List[Tuple[str, int, bool]] = []  # (frase, página, fim de parágrafo)
+    pending_tokens = 0
+    chunk_index = 0
+
+    def build_chunk() -> Dict:
+        parts = []
+        for sentence, _, paragraph_end in pending:
+            parts.append(sentence + ("\n\n" if paragraph_end else " "))
+        content = "".join(parts).strip()
+        return {
+            "content": content,
+            "metadata": {
+                "source": source,
+                "page": pending[0][1],
+                "page_end": pending[-1][1],
+                "chunk_index": chunk_index,
+                "tokens": count_tokens(content),
+            },
+        }
+
+    for page_number, page_text in pages:
+        text = clean(page_text)
+        if not text:
+            continue
+        sentences = list(_sentences(text, max_tokens))
+        if sentences and not sentences[-1][0].endswith((".", "!", "?", ":", ";")):
+            # Parágrafo interrompido pela quebra de página: continua na próxima
+            sentences[-1] = (sentences[-1][0], sentences[-1][1], False)
+        for sentence, tokens, paragraph_end in sentences:
+            if pending and pending_tokens + tokens > max_tokens:
+                yield build_chunk()
+                chunk_index += 1
+                pending, pending_tokens = [], 0
+            pending.append((sentence, page_number, paragraph_end))
+            pending_tokens += tokens
+            if paragraph_end and pending_tokens >= soft_limit:
+                yield build_chunk()
+                chunk_index += 1
+                pending, pending_tokens = [], 0
+
+    if pending:
+        yield build_chunk()
+
+
+def iter_pdf_chunks(
+    pdf_path: str,
+    max_tokens: int = 256,
+    max_workers: Optional[int] = None,
+    source: Optional[str] = None,
+    clean: Callable[[str], str] = clean_page_text,
+    extractor: str = "pypdf2",
+) -> Iterator[Dict]:
+    """
+    Extrai e divide um PDF em chunks, sem carregar o documento inteiro.
+
+    Parâmetros:
+        pdf_path (str): Caminho para o arquivo PDF.
+        max_tokens (int): Tamanho máximo de cada chunk em tokens.
+        max_workers (int, opcional): Processos usados na extração.
+        source (str, opcional): Nome da fonte nos metadados (padrão: nome do arquivo).
+        clean (callable): Limpeza aplicada a cada página.
+        extractor (str): "pypdf2" ou "pdfplumber".
+
+    Retorna:
+        Iterator[Dict]: Chunks no formato {'content': str, 'metadata': {...}} (ver iter_page_chunks).
+    """
+    pages = iter_pdf_pages_parallel(pdf_path, max_workers=max_workers, extractor=extractor)
+    return iter_page_chunks(pages, source or os.path.basename(pdf_path), max_tokens=max_tokens, clean=clean)
+
+
+def iter_text_chunks(text: str, source: str, max_tokens: int = 256) -> Iterator[Dict]:
+    """Divide um texto simples (.txt, .md) em chunks, como uma única página"""
+    return iter_page_chunks([(1, text)], source, max_tokens=max_tokens)
@@ -0,0 +1,241 @@
+"""
+Fila de jobs de ingestão para uploads de documentos.
+
+O endpoint de upload só grava o arquivo em disco, cria o job e devolve o id;
+um pool de threads extrai o texto (PDF página a página, ou texto simples),
+divide em chunks e entrega lotes de `batch_size` chunks a `ingest_batch`
+(embeddings + índice vetorial + banco). O progresso de cada job — páginas e
+chunks processados, chunks novos, erro — fica consultável pelo id enquanto
+o job estiver entre os `max_jobs` mais recentes.
+
+O estado dos jobs é do processo: com vários workers do gunicorn, a consulta
+precisa cair no mesmo worker (o deploy atual usa um único worker).
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.services.ingestion import iter_pdf_chunks, iter_text_chunks
+from app.services.metrics import get_metrics_registry
+from app.services.pdf_utils import count_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".pdf": "pdf", ".txt": "text", ".md": "text"}
+FINISHED_STATUSES = ("done", "failed")
+
+# Recebe um lote de chunks {'content', 'metadata'} e retorna quantos eram novos
+BatchIngester = Callable[[List[Dict[str, Any]]], int]
+
+_metrics = get_metrics_registry()
+ingestion_jobs_total = _metrics.counter("ingestion_jobs_total", "Jobs de ingestão finalizados por status", ["status"])
+ingestion_chunks_total = _metrics.counter("ingestion_chunks_total", "Chunks processados pelos jobs de ingestão")
+ingestion_job_duration = _metrics.histogram(
+    "ingestion_job_duration_seconds", "Duração dos jobs de ingestão",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+
+
+class UnsupportedUploadError(ValueError):
+    """Tipo de arquivo não suportado pela ingestão"""
+
+
+def upload_kind(filename: str) -> str:
+    """
+    Tipo do upload ('pdf' ou 'text') pela extensão.
+
+    Lança:
+        UnsupportedUploadError: Se a extensão não for suportada.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        supported = ", ".join(sorted(SUPPORTED_EXTENSIONS))
+        raise UnsupportedUploadError(f"Tipo de arquivo não suportado: {filename!r} (use {supported})")
+    return SUPPORTED_EXTENSIONS[extension]
+
+
+def iter_upload_chunks(path: str, filename: str, kind: str, max_tokens: int) -> Iterator[Dict[str, Any]]:
+    """Chunks de um arquivo enviado, em fluxo (PDF por página; texto como página única)"""
+    if kind == "pdf":
+        # Um processo de extração por job: o paralelismo fica entre jobs
+        return iter_pdf_chunks(path, max_tokens=max_tokens, max_workers=1, source=filename)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    return iter_text_chunks(text, filename, max_tokens=max_tokens)
+
+
+class IngestionJobQueue:
+    """Jobs de ingestão executados por um pool de threads, com progresso por id"""
+
+    def __init__(
+        self,
+        ingest_batch: BatchIngester,
+        upload_dir: str,
+        finalize: Optional[Callable[[], None]] = None,
+        max_workers: int = 2,
+        batch_size: int = 64,
+        max_tokens: int = 256,
+        max_jobs: int = 200,
+    ):
+        """
+        Parâmetros:
+            ingest_batch (Callable): Indexa um lote de chunks e retorna quantos eram novos.
+            upload_dir (str): Diretório onde os arquivos aguardam processamento.
+            finalize (Callable, opcional): Chamado ao fim de cada job com chunks novos (ex.: salvar o índice).
+            max_workers (int): Jobs processados em paralelo.
+            batch_size (int): Chunks por chamada a `ingest_batch`.
+            max_tokens (int): Tamanho máximo de cada chunk em tokens.
+            max_jobs (int): Jobs guardados para consulta (os finalizados mais antigos saem primeiro).
+        """
+        self.ingest_batch = ingest_batch
+        self.upload_dir = upload_dir
+        self.finalize = finalize
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Um job por vez chama finalize (ex.: gravação do índice em disco)
+        self._finalize_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        _metrics.register_queue("ingestion", self.pending)
+
+    def pending(self) -> int:
+        """Jobs aguardando ou em execução"""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] not in FINISHED_STATUSES)
+
+    def submit(self, stream, filename: str) -> str:
+        """
+        Grava o arquivo enviado e enfileira sua ingestão.
+
+        Parâmetros:
+            stream: Objeto com `save(path)` (ex.: FileStorage do Flask) ou `read()`.
+            filename (str): Nome original do arquivo (define o tipo e a fonte nos metadados).
+
+        Retorna:
+            str: Id do job.
+
+        Lança:
+            UnsupportedUploadError: Se o tipo de arquivo não for suportado.
+        """
+        kind = upload_kind(filename)
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, f"{job_id}{os.path.splitext(filename)[1].lower()}")
+        if hasattr(stream, "save"):
+            stream.save(path)
+        else:
+            with open(path, "wb") as f:
+                f.write(stream.read())
+
+        job = {
+            "id": job_id,
+            "filename": filename,
+            "kind": kind,
+            "status": "queued",
+            "pages_total": None,
+            "pages_processed": 0,
+            "chunks_processed": 0,
+            "chunks_added": 0,
+            "progress": 0.0,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job_id, path)
+        logger.info(f"Job de ingestão {job_id} enfileirado: {filename} ({kind})")
+        return job_id
+
+    def _evict_finished(self) -> None:
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES][:max(excess, 0)]:
+            del self._jobs[job_id]
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cópia do estado do job, ou None se o id não existir (ou já tiver saído do histórico)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _run(self, job_id: str, path: str) -> None:
+        started = time.monotonic()
+        job = self.get(job_id)
+        self._update(job_id, status="running", started_at=time.time())
+        processed = added = 0
+        try:
+            pages_total = count_pdf_pages(path) if job["kind"] == "pdf" else 1
+            self._update(job_id, pages_total=pages_total)
+            batch: List[Dict[str, Any]] = []
+            for chunk in iter_upload_chunks(path, job["filename"], job["kind"], self.max_tokens):
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    added += self.ingest_batch(batch)
+                    processed += len(batch)
+                    ingestion_chunks_total.inc(len(batch))
+                    pages_done = batch[-1]["metadata"]["page_end"]
+                    self._update(
+                        job_id,
+                        chunks_processed=processed,
+                        chunks_added=added,
+                        pages_processed=pages_done,
+                        progress=round(pages_done / pages_total, 4) if pages_total else 0.0,
+                    )
+                    batch = []
+            if batch:
+                added += self.ingest_batch(batch)
+                processed += len(batch)
+                ingestion_chunks_total.inc(len(batch))
+            self._finalize(added)
+            self._update(
+                job_id,
+                status="done",
+                chunks_processed=processed,
+                chunks_added=added,
+                pages_processed=pages_total,
+                progress=1.0,
+                finished_at=time.time(),
+            )
+            ingestion_jobs_total.inc(status="done")
+            logger.info(f"Job de ingestão {job_id} concluído: {processed} chunks, {added} novos")
+        except Exception as e:
+            logger.error(f"Job de ingestão {job_id} falhou: {e}")
+            # Os lotes já indexados continuam valendo
+            self._finalize(added)
+            self._update(
+                job_id, status="failed", error=str(e), chunks_processed=processed, chunks_added=added, finished_at=time.time()
+            )
+            ingestion_jobs_total.inc(status="failed")
+        finally:
+            ingestion_job_duration.observe(time.monotonic() - started)
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _finalize(self, added: int) -> None:
+        if not added or self.finalize is None:
+            return
+        try:
+            with self._finalize_lock:
+                self.finalize()
+        except Exception as e:
+            logger.error(f"Erro ao finalizar ingestão: {e}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Encerra o pool (aguardando os jobs em andamento, por padrão)"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,227 @@
+"""
+Pré-classificação de intenção: saudações e conversa fiada sem RAG.
+
+"Oi", "obrigado" ou "quem é você?" não precisam de busca, QA nem LLM — as
+personas já têm respostas prontas para isso. O classificador roda antes de
+tudo e, quando reconhece uma dessas intenções, o app responde com o template
+da persona.
+
+Duas etapas, da mais barata para a mais cara:
+
+1. Regras: a mensagem normalizada (sem acentos, caixa ou pontuação) precisa
+   ser formada só por frases conhecidas das intenções e palavras de
+   preenchimento ("doutor", "por favor", o nome da persona...). Qualquer outra
+   palavra — "oi, qual a dose da rifampicina?" — manda a pergunta para o
+   fluxo normal. Custa microssegundos.
+2. Vizinho mais próximo por embeddings (opcional): mensagens curtas que as
+   regras não cobriram são comparadas com os exemplos rotulados; acima do
+   limiar de similaridade, vale a intenção do exemplo mais próximo.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Exemplos rotulados: viram as frases das regras e a base do vizinho mais próximo
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "greeting": [
+        "oi", "olá", "ola", "oie", "opa", "e aí", "eai", "bom dia", "boa tarde", "boa noite",
+        "saudações", "tudo bem", "tudo bom", "tudo certo", "beleza", "como vai", "como você está",
+        "oi, tudo bem?", "olá, como vai você?",
+    ],
+    "thanks": [
+        "obrigado", "obrigada", "obg", "brigado", "brigada", "valeu", "vlw", "agradeço",
+        "muito obrigado", "obrigado pela ajuda", "obrigada pela explicação", "show", "ótimo", "perfeito",
+        "entendi", "ok", "certo",
+    ],
+    "farewell": [
+        "tchau", "até logo", "até mais", "até breve", "até a próxima", "adeus", "falou", "fui",
+        "tenha um bom dia", "boa noite, tchau",
+    ],
+    "identity": [
+        "quem é você", "quem é vc", "quem és tu", "qual é o seu nome", "qual o seu nome",
+        "como você se chama", "você é um robô", "você é humano", "você é uma pessoa",
+        "o que você é", "com quem estou falando", "você é real",
+    ],
+    "capabilities": [
+        "o que você faz", "o que você sabe fazer", "como você pode me ajudar", "no que você pode ajudar",
+        "o que posso perguntar", "sobre o que você fala", "para que você serve", "quais assuntos você conhece",
+    ],
+}
+
+# Palavras que não mudam a intenção ("oi doutor", "obrigado mesmo, gá")
+FILLER_WORDS = frozenset({
+    "dr", "doutor", "doutora", "gasnelio", "ga", "gah", "ai", "ae", "entao", "mesmo", "muito",
+    "mto", "bem", "por", "favor", "pf", "pfv", "pessoal", "amigo", "amiga", "querido", "querida",
+    "e", "a", "o", "voce", "vc", "ne", "hein", "rs", "kkk", "haha", "hehe", "sim", "tambem",
+})
+
+# Pedidos de ajuda podem ser urgentes ("socorro, tomei dois comprimidos"): nunca viram template,
+# nem pelo vizinho mais próximo
+URGENT_WORDS = frozenset({"socorro", "socorre", "ajuda", "ajudem", "urgente", "urgencia", "emergencia"})
+
+# Ao combinar intenções na mesma mensagem, a mais específica vence ("oi, quem é você?" -> identity)
+INTENT_PRIORITY = ("identity", "capabilities", "thanks", "farewell", "greeting")
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+_metrics = get_metrics_registry()
+intent_requests_total = _metrics.counter(
+    "intent_requests_total", "Mensagens pré-classificadas por intenção e etapa (intent=none segue para o RAG)", ["intent", "method"]
+)
+intent_duration = _metrics.histogram(
+    "intent_classification_seconds", "Duração da pré-classificação de intenção",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+
+
+def normalize_message(text: str) -> str:
+    """Minúsculas, sem acentos e só palavras separadas por espaço"""
+    stripped = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in stripped if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", stripped).strip()
+
+
+class IntentClassifier:
+    """Reconhece saudações, agradecimentos, despedidas e perguntas sobre o assistente"""
+
+    def __init__(
+        self,
+        examples: Optional[Dict[str, Sequence[str]]] = None,
+        embed: Optional[Embedder] = None,
+        threshold: float = 0.85,
+        max_tokens: int = 6,
+    ):
+        """
+        Parâmetros:
+            examples (Dict[str, Sequence[str]], opcional): Intenção -> exemplos (padrão: INTENT_EXAMPLES).
+            embed (Callable, opcional): Função lista de textos -> embeddings; sem ela, só regras.
+            threshold (float): Similaridade de cosseno mínima para o vizinho mais próximo.
+            max_tokens (int): Mensagens com mais palavras que isso não vão para os embeddings.
+        """
+        self.examples = {intent: list(texts) for intent, texts in (examples or INTENT_EXAMPLES).items()}
+        self.threshold = threshold
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._counts = {"short_circuit": 0, "total": 0}
+
+        # Frases por primeira palavra, das mais longas para as mais curtas
+        self._phrases: Dict[str, List[tuple]] = {}
+        for intent, texts in self.examples.items():
+            for text in texts:
+                tokens = tuple(normalize_message(text).split())
+                if tokens:
+                    self._phrases.setdefault(tokens[0], []).append((tokens, intent))
+        for candidates in self._phrases.values():
+            candidates.sort(key=lambda item: len(item[0]), reverse=True)
+
+        self._embed = embed
+        self._labels: List[str] = []
+        self._example_embeddings: Optional[np.ndarray] = None
+        if embed is not None:
+            texts = [text for texts in self.examples.values() for text in texts]
+            self._labels = [intent for intent, texts in self.examples.items() for _ in texts]
+            matrix = np.asarray(embed(texts), dtype="float32")
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._example_embeddings = matrix / norms
+
+    def match_rules(self, message: str) -> Optional[str]:
+        """Intenção se a mensagem for só frases conhecidas e preenchimento; None caso contrário"""
+        tokens = normalize_message(message).split()
+        found = set()
+        position = 0
+        while position < len(tokens):
+            token = tokens[position]
+            for phrase, intent in self._phrases.get(token, ()):
+                if tuple(tokens[position:position + len(phrase)]) == phrase:
+                    found.add(intent)
+                    position += len(phrase)
+                    break
+            else:
+                if token not in FILLER_WORDS:
+                    return None
+                position += 1
+        for intent in INTENT_PRIORITY:
+            if intent in found:
+                return intent
+        return next(iter(found), None)
+
+    def match_nearest(self, message: str) -> Optional[Dict[str, Any]]:
+        """Intenção do exemplo mais parecido, se a mensagem for curta e a similaridade passar do limiar"""
+        tokens = normalize_message(message).split()
+        if self._example_embeddings is None or len(tokens) > self.max_tokens or URGENT_WORDS.intersection(tokens):
+            return None
+        query = np.asarray(self._embed([message]), dtype="float32").reshape(-1)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return None
+        similarities = self._example_embeddings @ (query / norm)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return {"intent": self._labels[best], "score": float(similarities[best]), "method": "embedding"}
+
+    def classify(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Classifica a mensagem antes do RAG.
+
+        Parâmetros:
+            message (str): Mensagem do usuário.
+
+        Retorna:
+            Optional[Dict[str, Any]]: intent, score e method ('rule' ou 'embedding')
+            se a mensagem puder ser respondida por template; None se deve seguir
+            para a busca e o QA.
+        """
+        started = time.perf_counter()
+        intent = self.match_rules(message)
+        result = {"intent": intent, "score": 1.0, "method": "rule"} if intent else None
+        if result is None:
+            try:
+                result = self.match_nearest(message)
+            except Exception as e:
+                logger.warning(f"Classificação por embeddings indisponível: {e}")
+        intent_duration.observe(time.perf_counter() - started)
+
+        if result is None:
+            intent_requests_total.inc(intent="none", method="none")
+        else:
+            intent_requests_total.inc(intent=result["intent"], method=result["method"])
+            logger.debug(f"Intenção '{result['intent']}' ({result['method']}, {result['score']:.2f}): {message[:50]}")
+        with self._lock:
+            self._counts["total"] += 1
+            self._counts["short_circuit"] += result is not None
+        return result
+
+    def short_circuit_ratio(self) -> float:
+        """Proporção das mensagens classificadas que foram respondidas por template"""
+        with self._lock:
+            total = self._counts["total"]
+            return self._counts["short_circuit"] / total if total else 0.0
+
+
+# Instância global do classificador
+intent_classifier = None
+_intent_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier(**kwargs) -> IntentClassifier:
+    """Retorna o classificador do processo (criado com `kwargs` na primeira chamada)"""
+    global intent_classifier
+    if intent_classifier is None:
+        with _intent_classifier_lock:
+            if intent_classifier is None:
+                intent_classifier = IntentClassifier(**kwargs)
+    return intent_classifier
@@ -0,0 +1,268 @@
+"""
+Chunking estrutural de Markdown para a base de conhecimento.
+
+Em vez de cortar por número de caracteres, segue a hierarquia de títulos e
+respeita fronteiras de parágrafo, lista, tabela e bloco de código. Cada chunk
+carrega o caminho de títulos ("ETAPA 02 > POSOLOGIA") como metadado e no
+próprio texto, e o tamanho é medido em tokens.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.services.token_utils import count_tokens
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+# Espaço mínimo reservado ao corpo quando os títulos são longos (limitado a metade de max_tokens)
+MIN_BODY_TOKENS = 32
+
+# (nível, título, linha original)
+Heading = Tuple[int, str, str]
+
+
+def _parse_blocks(markdown: str) -> List[Tuple[Tuple[Heading, ...], str, str]]:
+    """Divide o Markdown em blocos (caminho de títulos, tipo, texto)"""
+    blocks = []
+    path: List[Heading] = []
+    current: List[str] = []
+    kind = "paragraph"
+    in_code = False
+
+    def flush():
+        nonlocal current, kind
+        text = "\n".join(current).strip("\n")
+        if text.strip():
+            blocks.append((tuple(path), kind, text))
+        current = []
+        kind = "paragraph"
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+
+        if in_code:
+            current.append(line)
+            if stripped.startswith("```"):
+                in_code = False
+                flush()
+            continue
+        if stripped.startswith("```"):
+            flush()
+            current.append(line)
+            kind = "code"
+            in_code = True
+            continue
+
+        heading = _HEADING.match(stripped)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            while path and path[-1][0] >= level:
+                path.pop()
+            path.append((level, heading.group(2).strip(), stripped))
+            continue
+
+        if not stripped:
+            flush()
+            continue
+
+        is_table_row = stripped.startswith("|")
+        if is_table_row != (kind == "table") and current:
+            flush()
+        if is_table_row:
+            kind = "table"
+        elif _LIST_ITEM.match(line):
+            kind = "list"
+        current.append(line)
+
+    flush()
+    return blocks
+
+
+def _pack(units: List[str], joiner: str, max_tokens: int, prefix: str = "") -> List[str]:
+    """Agrupa unidades em pedaços de até `max_tokens`, sem quebrar unidades"""
+    pieces = []
+    current: List[str] = []
+    for unit in units:
+        candidate = prefix + joiner.join(current + [unit])
+        if current and count_tokens(candidate) > max_tokens:
+            pieces.append(prefix + joiner.join(current))
+            current = [unit]
+        else:
+            current.append(unit)
+    if current:
+        pieces.append(prefix + joiner.join(current))
+    return pieces
+
+
+def _split_words(text: str, max_tokens: int) -> List[str]:
+    words: List[str] = []
+    for word in text.split(" "):
+        words.extend(_split_chars(word, max_tokens) if count_tokens(word) > max_tokens else [word])
+    return _pack(words, " ", max_tokens)
+
+
+def _split_chars(word: str, max_tokens: int) -> List[str]:
+    """Corta uma "palavra" maior que o limite (ex.: URL longa) no maior prefixo que cabe"""
+    pieces = []
+    while word:
+        low, high = 1, len(word)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(word[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(word[:low])
+        word = word[low:]
+    return pieces
+
+
+def _split_block(kind: str, text: str, max_tokens: int) -> List[str]:
+    """Quebra um bloco maior que o limite em fronteiras naturais"""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    lines = text.split("\n")
+    if kind == "table":
+        # Repete o cabeçalho da tabela em cada pedaço
+        header_size = 2 if len(lines) > 1 and _TABLE_SEPARATOR.match(lines[1].strip()) else 1
+        header = "\n".join(lines[:header_size]) + "\n"
+        pieces = _pack(lines[header_size:], "\n", max_tokens, prefix=header)
+    elif kind == "list":
+        indents = [len(m.group(1)) for m in (_LIST_ITEM.match(l) for l in lines) if m]
+        top = min(indents) if indents else 0
+        items: List[str] = []
+        for line in lines:
+            match = _LIST_ITEM.match(line)
+            if (match and len(match.group(1)) == top) or not items:
+                items.append(line)
+            else:
+                items[-1] += "\n" + line
+        pieces = _pack(items, "\n", max_tokens)
+    elif kind == "code":
+        pieces = _pack(lines, "\n", max_tokens)
+    else:
+        pieces = _pack(_SENTENCE_END.split(text), " ", max_tokens)
+
+    # Unidade isolada ainda grande demais (frase, item ou linha de tabela enorme): divide por palavras
+    result = []
+    for piece in pieces:
+        result.extend(_split_words(piece, max_tokens) if count_tokens(piece) > max_tokens else [piece])
+    return result
+
+
+def chunk_markdown(
+    markdown: str,
+    max_tokens: int = 256,
+    min_tokens: int = 48,
+    include_headings: bool = True,
+) -> List[Dict]:
+    """
+    Divide um documento Markdown em chunks alinhados às seções.
+
+    Blocos da mesma seção são agrupados até `max_tokens`; seções vizinhas
+    menores que `min_tokens` (irmãs sob o mesmo título pai) são unidas.
+    Nenhum chunk cruza uma tabela, item de lista ou frase, salvo quando a
+    unidade sozinha excede o limite.
+
+    Parâmetros:
+        markdown (str): Texto Markdown.
+        max_tokens (int): Tamanho máximo de cada chunk em tokens, linhas de título incluídas.
+        min_tokens (int): Seções menores que isso são unidas às irmãs.
+        include_headings (bool): Prefixa cada chunk com as linhas de título do seu caminho
+            (encurtadas para o título da seção se o caminho não couber no limite).
+
+    Retorna:
+        List[Dict]: Chunks no formato {'content': str, 'metadata': {...}}, com
+        `heading_path`, `section`, `tokens` e `chunk_index` nos metadados.
+    """
+    sections: List[Dict] = []
+    for path, kind, text in _parse_blocks(markdown):
+        if not sections or sections[-1]["path"] != path:
+            sections.append({"path": path, "blocks": []})
+        sections[-1]["blocks"].append((kind, text))
+
+    raw_chunks: List[Dict] = []
+    for section in sections:
+        path = section["path"]
+        header = _fit_header(path, max_tokens, include_headings)
+        budget = max_tokens - count_tokens(_content(header, ""))
+        units: List[str] = []
+        for kind, text in section["blocks"]:
+            units.extend(_split_block(kind, text, budget))
+        for body in _pack(units, "\n\n", budget):
+            raw_chunks.append(
+                {"path": path, "parent": path[:-1], "header": header, "body": body, "sections": [path[-1][1]] if path else []}
+            )
+
+    # Une seções pequenas consecutivas sob o mesmo pai (ex.: subtópicos curtos de uma etapa)
+    merged: List[Dict] = []
+    for chunk in raw_chunks:
+        last: Optional[Dict] = merged[-1] if merged else None
+        if (
+            last is not None
+            and last["path"] != chunk["path"]
+            and chunk["path"][:-1] == last["parent"]
+            and chunk["path"]
+            and last["sections"]
+            and (_body_tokens(last) < min_tokens or _body_tokens(chunk) < min_tokens)
+        ):
+            # Os títulos das seções entram no corpo unido e contam no limite
+            body = last["body"]
+            if last["path"] != last["parent"]:
+                body = _title_line(last["path"][-1], include_headings) + body
+            body += "\n\n" + _title_line(chunk["path"][-1], include_headings) + chunk["body"]
+            header = _fit_header(last["parent"], max_tokens, include_headings)
+            if count_tokens(_content(header, body)) <= max_tokens:
+                last.update(path=last["parent"], header=header, body=body)
+                last["sections"].extend(chunk["sections"])
+                continue
+        merged.append(chunk)
+
+    result = []
+    for chunk in merged:
+        content = _content(chunk["header"], chunk["body"])
+        titles = [h[1] for h in chunk["path"]]
+        result.append(
+            {
+                "content": content,
+                "metadata": {
+                    "heading_path": titles,
+                    "section": " > ".join(titles),
+                    "subsections": chunk["sections"] if len(chunk["sections"]) > 1 else [],
+                    "tokens": count_tokens(content),
+                    "chunk_index": len(result),
+                },
+            }
+        )
+    return result
+
+
+def _fit_header(path: Tuple[Heading, ...], max_tokens: int, include_headings: bool) -> str:
+    """
+    Linhas de título do caminho que cabem no limite deixando espaço para o corpo:
+    o caminho completo, senão só o título da seção, senão nenhum.
+    """
+    if not include_headings or not path:
+        return ""
+    floor = min(MIN_BODY_TOKENS, max(max_tokens // 2, 1))
+    for header in ("\n".join(h[2] for h in path), path[-1][2]):
+        if max_tokens - count_tokens(_content(header, "")) >= floor:
+            return header
+    return ""
+
+
+def _content(header: str, body: str) -> str:
+    return f"{header}\n\n{body}" if header else body
+
+
+def _title_line(heading: Heading, include_headings: bool) -> str:
+    return heading[2] + "\n" if include_headings else ""
+
+
+def _body_tokens(chunk: Dict) -> int:
+    return count_tokens(chunk["body"])
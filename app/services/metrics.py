@@ -0,0 +1,358 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+Mantém contadores, gauges e histogramas em memória (thread-safe) e expõe
+tudo via `render()`, pronto para ser servido em um endpoint `/metrics`.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Buckets padrão (segundos) para latência de requisições HTTP e chamadas a LLMs.
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Buckets para scores de confiança do modelo QA (0 a 1).
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base comum: nome, ajuda, rótulos e lock"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Rótulos inválidos para {self.name}: esperado {self.labelnames}, recebido {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Contadores só podem ser incrementados")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo; pode ser definido diretamente ou via callback"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """Registra um callback avaliado no momento da coleta (ex.: tamanho de fila)"""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        with self._lock:
+            function = self._functions.get(key)
+            value = self._values.get(key, 0.0)
+        return float(function()) if function else value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, function in functions.items():
+            try:
+                values[key] = float(function())
+            except Exception:
+                # Um callback com erro não deve derrubar a coleta inteira
+                continue
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets cumulativos, soma e contagem"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or bounds[-1] != float("inf"):
+            bounds.append(float("inf"))
+        self.buckets = tuple(bounds)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager que observa a duração do bloco em segundos"""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._key(labels), []))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def get_process_rss_bytes() -> float:
+    """Memória residente (RSS) do processo atual, em bytes"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return float(resident_pages * os.sysconf("SC_PAGE_SIZE"))
+    except Exception:
+        pass
+    try:
+        import resource
+
+        # ru_maxrss é o pico (KB no Linux, bytes no macOS); melhor aproximação disponível
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return float(usage if usage > 1 << 32 else usage * 1024)
+    except Exception:
+        return 0.0
+
+
+class MetricsRegistry:
+    """Registro de métricas do processo"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_cls) or existing.labelnames != tuple(labelnames):
+                    raise ValueError(f"Métrica {name} já registrada com outro tipo ou rótulos")
+                return existing
+            metric = metric_cls(name, documentation, labelnames, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def register_queue(self, queue_name: str, depth_function: Callable[[], float]) -> None:
+        """Expõe o tamanho de uma fila interna como `queue_depth{queue=...}`"""
+        self.gauge("queue_depth", "Itens pendentes em filas internas", ["queue"]).set_function(
+            depth_function, queue=queue_name
+        )
+
+    def render(self) -> str:
+        """Serializa todas as métricas no formato de exposição texto 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Instância global do registro
+metrics_registry = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Retorna o registro de métricas do processo"""
+    global metrics_registry
+    if metrics_registry is None:
+        metrics_registry = MetricsRegistry()
+        metrics_registry.gauge(
+            "process_resident_memory_bytes", "Memória residente do processo em bytes"
+        ).set_function(get_process_rss_bytes)
+    return metrics_registry
+
+
+def instrument_flask_app(
+    app,
+    persona_getter: Optional[Callable[[], str]] = None,
+    known_personas: Sequence[str] = (),
+    registry: Optional[MetricsRegistry] = None,
+):
+    """
+    Registra contagem/latência por rota e persona e o endpoint `/metrics` numa app Flask.
+
+    Parâmetros:
+        app: Aplicação Flask.
+        persona_getter (callable, opcional): Extrai a persona da requisição atual.
+        known_personas (Sequence[str]): Personas válidas; outras viram "other" (limita cardinalidade).
+        registry (MetricsRegistry, opcional): Registro a usar; padrão é o global.
+
+    Retorna:
+        MetricsRegistry: Registro utilizado.
+    """
+    from flask import Response, g, request
+
+    registry = registry or get_metrics_registry()
+    requests_total = registry.counter(
+        "http_requests_total", "Total de requisições HTTP", ["route", "method", "persona", "status"]
+    )
+    request_duration = registry.histogram(
+        "http_request_duration_seconds", "Latência das requisições HTTP", ["route", "persona"]
+    )
+
+    def _persona() -> str:
+        if persona_getter is None:
+            return "none"
+        try:
+            persona = persona_getter() or "none"
+        except Exception:
+            return "none"
+        if known_personas and persona not in known_personas and persona != "none":
+            return "other"
+        return persona
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _metrics_record(response):
+        start = getattr(g, "_metrics_start", None)
+        if start is not None:
+            # Usa o padrão da rota (ex.: /api/upload/<job_id>) para não explodir a cardinalidade
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            persona = _persona()
+            requests_total.inc(
+                route=route, method=request.method, persona=persona, status=str(response.status_code)
+            )
+            request_duration.observe(time.perf_counter() - start, route=route, persona=persona)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """Métricas no formato Prometheus"""
+        return Response(registry.render(), mimetype="text/plain", content_type=PROMETHEUS_CONTENT_TYPE)
+
+    return registry
@@ -0,0 +1,302 @@
+"""
+Servidor local que imita a API do OpenRouter (formato OpenAI) para testes de carga.
+
+Aponte os clientes para ele com OPENROUTER_BASE_URL=http://localhost:8089/api/v1
+e nenhuma cota do OpenRouter é consumida. Latência, taxa de erro, rajadas de
+429 e streaming são configuráveis:
+
+    python -m app.services.mock_llm_server --port 8089 --latency lognormal \
+        --median-ms 800 --sigma 0.5 --error-rate 0.02 --burst-interval 60 --burst-duration 5
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from app.services.perf_utils import HashingEmbedder
+
+logger = logging.getLogger(__name__)
+
+
+class MockLLMConfig:
+    """Parâmetros de comportamento do servidor simulado"""
+
+    def __init__(
+        self,
+        latency: str = "lognormal",
+        median_ms: float = 600.0,
+        sigma: float = 0.4,
+        min_ms: float = 200.0,
+        max_ms: float = 1500.0,
+        error_rate: float = 0.0,
+        burst_interval_s: float = 0.0,
+        burst_duration_s: float = 0.0,
+        stream_token_ms: float = 20.0,
+        embedding_dimension: int = 1536,
+        seed: Optional[int] = None,
+    ):
+        if latency not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Distribuição de latência inválida: {latency}")
+        self.latency = latency
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.error_rate = error_rate
+        self.burst_interval_s = burst_interval_s
+        self.burst_duration_s = burst_duration_s
+        self.stream_token_ms = stream_token_ms
+        self.embedding_dimension = embedding_dimension
+        self.seed = seed
+
+
+class MockLLMServer:
+    """Servidor HTTP multithread com endpoints /chat/completions, /embeddings e /models"""
+
+    def __init__(self, config: Optional[MockLLMConfig] = None, host: str = "127.0.0.1", port: int = 8089):
+        self.config = config or MockLLMConfig()
+        self.host = host
+        self.port = port
+        self._random = random.Random(self.config.seed)
+        self._random_lock = threading.Lock()
+        self._embedder = HashingEmbedder(dimension=self.config.embedding_dimension)
+        self._started_at = time.monotonic()
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "streams": 0}
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    # --- comportamento -----------------------------------------------------
+
+    def sample_latency_s(self) -> float:
+        cfg = self.config
+        with self._random_lock:
+            if cfg.latency == "fixed":
+                value = cfg.median_ms
+            elif cfg.latency == "uniform":
+                value = self._random.uniform(cfg.min_ms, cfg.max_ms)
+            else:
+                value = cfg.median_ms * self._random.lognormvariate(0.0, cfg.sigma)
+        return max(value, 0.0) / 1000.0
+
+    def in_rate_limit_burst(self) -> bool:
+        cfg = self.config
+        if cfg.burst_interval_s <= 0 or cfg.burst_duration_s <= 0:
+            return False
+        elapsed = time.monotonic() - self._started_at
+        return (elapsed % cfg.burst_interval_s) < cfg.burst_duration_s
+
+    def should_fail(self) -> bool:
+        with self._random_lock:
+            return self._random.random() < self.config.error_rate
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def build_answer(self, payload: Dict) -> str:
+        messages = payload.get("messages") or []
+        question = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        return f"Resposta simulada ({payload.get('model', 'mock')}) para: {question[:200]}"
+
+    # --- ciclo de vida -------------------------------------------------------
+
+    def start(self) -> "MockLLMServer":
+        server = self
+
+        class Handler(_MockHandler):
+            mock = server
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        logger.info(f"Mock LLM disponível em {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def serve_forever(self) -> None:
+        self.start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            self.stop()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    mock: MockLLMServer = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("mock-llm: " + format % args)
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"data": [{"id": "mock/mock-llm", "object": "model"}]})
+        elif self.path.rstrip("/").endswith("/_stats"):
+            with self.mock._stats_lock:
+                self._send_json(200, dict(self.mock.stats))
+        else:
+            self._send_json(404, {"error": {"message": "Endpoint não encontrado"}})
+
+    def do_POST(self):
+        payload = self._read_json()
+        mock = self.mock
+        mock._count("requests")
+        path = self.path.rstrip("/")
+
+        if mock.in_rate_limit_burst():
+            mock._count("rate_limited")
+            self._send_json(
+                429,
+                {"error": {"message": "Rate limit exceeded (mock)", "code": 429}},
+                {"Retry-After": str(max(int(mock.config.burst_duration_s), 1))},
+            )
+            return
+
+        time.sleep(mock.sample_latency_s())
+
+        if mock.should_fail():
+            mock._count("errors")
+            self._send_json(500, {"error": {"message": "Erro simulado do provedor", "code": 500}})
+            return
+
+        if path.endswith("/embeddings"):
+            inputs = payload.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            vectors = mock._embedder.encode(inputs) if inputs else []
+            mock._count("ok")
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "model": payload.get("model", "mock-embedding"),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": [float(x) for x in vector]}
+                        for i, vector in enumerate(vectors)
+                    ],
+                    "usage": {"prompt_tokens": 0, "total_tokens": 0},
+                },
+            )
+        elif path.endswith("/chat/completions"):
+            if payload.get("stream"):
+                self._stream_completion(payload)
+            else:
+                self._send_completion(payload)
+            mock._count("ok")
+        else:
+            self._send_json(404, {"error": {"message": "Endpoint não encontrado"}})
+
+    def _send_completion(self, payload: Dict) -> None:
+        answer = self.mock.build_answer(payload)
+        self._send_json(
+            200,
+            {
+                "id": f"mock-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "mock"),
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(answer.split()), "total_tokens": 0},
+            },
+        )
+
+    def _stream_completion(self, payload: Dict) -> None:
+        """Envia a resposta como Server-Sent Events, um token por evento"""
+        self.mock._count("streams")
+        completion_id = f"mock-{uuid.uuid4().hex[:12]}"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for token in self.mock.build_answer(payload).split(" "):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "model": payload.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.mock.config.stream_token_ms / 1000.0)
+        final = {"id": completion_id, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor OpenRouter simulado para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--median-ms", type=float, default=600.0)
+    parser.add_argument("--sigma", type=float, default=0.4)
+    parser.add_argument("--min-ms", type=float, default=200.0)
+    parser.add_argument("--max-ms", type=float, default=1500.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-interval", type=float, default=0.0, help="Segundos entre rajadas de 429")
+    parser.add_argument("--burst-duration", type=float, default=0.0, help="Duração de cada rajada de 429")
+    parser.add_argument("--stream-token-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    config = MockLLMConfig(
+        latency=args.latency,
+        median_ms=args.median_ms,
+        sigma=args.sigma,
+        min_ms=args.min_ms,
+        max_ms=args.max_ms,
+        error_rate=args.error_rate,
+        burst_interval_s=args.burst_interval,
+        burst_duration_s=args.burst_duration,
+        stream_token_ms=args.stream_token_ms,
+        seed=args.seed,
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port)
+    print(f"Defina OPENROUTER_BASE_URL={server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
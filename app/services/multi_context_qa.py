@@ -0,0 +1,109 @@
+"""
+QA extrativo sobre vários trechos recuperados, sem truncar contexto.
+
+Em vez de concatenar os chunks numa string (que o modelo corta em 512
+tokens) ou cortá-la por caracteres, cada chunk vira uma entrada própria do
+pipeline de question-answering. O próprio tokenizer divide entradas longas
+em janelas sobrepostas (`max_seq_len`/`doc_stride`), e todas as janelas de
+todos os chunks vão numa única chamada ao pipeline, em lotes de
+`batch_size`. O melhor span entre todas as janelas é escolhido com o id do
+chunk de onde saiu.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from app.services.reindex import content_hash_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SEQ_LEN = 384
+DEFAULT_DOC_STRIDE = 128
+
+
+def as_passages(passages: Sequence[Any]) -> List[Tuple[str, str]]:
+    """Normaliza trechos (textos, pares (texto, score) ou dicts {'id', 'content'}) para (id, texto)"""
+    normalized = []
+    for passage in passages:
+        if isinstance(passage, str):
+            text, chunk_id = passage, None
+        elif isinstance(passage, dict):
+            text, chunk_id = passage.get("content", ""), passage.get("id")
+        else:
+            text, chunk_id = passage[0], None
+        if text and text.strip():
+            normalized.append((str(chunk_id) if chunk_id else content_hash_id(text), text))
+    return normalized
+
+
+def extract_best_answer(
+    qa_pipeline,
+    question: Union[str, Sequence[str]],
+    passages: Sequence[Any],
+    max_answer_len: int = 300,
+    max_seq_len: int = DEFAULT_MAX_SEQ_LEN,
+    doc_stride: int = DEFAULT_DOC_STRIDE,
+    batch_size: int = 16,
+) -> Dict[str, Any]:
+    """
+    Melhor resposta extrativa entre todos os trechos.
+
+    Parâmetros:
+        qa_pipeline: Pipeline transformers de question-answering.
+        question (str | Sequence[str]): Pergunta, ou variações dela (todas são
+            avaliadas contra todos os trechos na mesma chamada; repetidas contam uma vez).
+        passages (Sequence): Trechos recuperados (ver as_passages).
+        max_answer_len (int): Tamanho máximo do span, em tokens.
+        max_seq_len (int): Tokens por janela (pergunta + trecho).
+        doc_stride (int): Sobreposição entre janelas consecutivas de um trecho.
+        batch_size (int): Janelas por lote de inferência.
+
+    Retorna:
+        Dict[str, Any]: answer, score, chunk_id, chunk_index, start, end
+        (posições no texto do chunk) e context (texto do chunk); answer vazio
+        e chunk_id None se nenhum trecho contiver resposta.
+    """
+    # Variações iguais (ex.: pergunta sem "?") dobrariam a inferência sem mudar o resultado
+    questions = list(dict.fromkeys(q.strip() for q in ([question] if isinstance(question, str) else question) if q.strip()))
+    chunks = as_passages(passages)
+    empty = {"answer": "", "score": 0.0, "chunk_id": None, "chunk_index": None, "start": None, "end": None, "context": ""}
+    if not chunks or not questions:
+        return empty
+
+    inputs = [(q, index) for q in questions for index in range(len(chunks))]
+    results = qa_pipeline(
+        question=[q for q, _ in inputs],
+        context=[chunks[index][1] for _, index in inputs],
+        max_answer_len=max_answer_len,
+        max_seq_len=max_seq_len,
+        doc_stride=doc_stride,
+        handle_impossible_answer=True,
+        batch_size=batch_size,
+    )
+    if isinstance(results, dict):
+        results = [results]
+
+    best: Optional[Dict[str, Any]] = None
+    for (_, index), result in zip(inputs, results):
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        answer = (result.get("answer") or "").strip()
+        score = float(result.get("score", 0.0))
+        if not answer or (best is not None and score <= best["score"]):
+            continue
+        chunk_id, text = chunks[index]
+        best = {
+            "answer": answer,
+            "score": score,
+            "chunk_id": chunk_id,
+            "chunk_index": index,
+            "start": result.get("start"),
+            "end": result.get("end"),
+            "context": text,
+        }
+
+    if best is None:
+        logger.debug(f"QA: nenhum span em {len(chunks)} trechos")
+        return empty
+    logger.debug(f"QA: melhor span no trecho {best['chunk_id']} (score {best['score']:.3f}) entre {len(chunks)} trechos")
+    return best
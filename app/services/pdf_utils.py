@@ -2,9 +2,126 @@
 Funções utilitárias para extração de texto de arquivos PDF.
 """
 
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 
 from PyPDF2 import PdfReader
 
+logger = logging.getLogger(__name__)
+
+# Páginas por tarefa enviada ao pool: amortiza a reabertura do PDF em cada processo
+DEFAULT_PAGES_PER_TASK = 8
+
+
+def count_pdf_pages(pdf_path: str) -> int:
+    """Número de páginas do PDF"""
+    return len(PdfReader(pdf_path).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int, extractor: str = "pypdf2") -> List[Tuple[int, str]]:
+    """
+    Extrai as páginas [start, end) de um PDF (executado em processo separado).
+
+    Cada processo abre o arquivo por conta própria, já que leitores de PDF não
+    são serializáveis. Páginas com erro retornam texto vazio.
+    """
+    pages = []
+    if extractor == "pdfplumber":
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            for index in range(start, end):
+                page = pdf.pages[index]
+                try:
+                    pages.append((index + 1, page.extract_text() or ""))
+                except Exception as e:
+                    logger.warning(f"Erro ao extrair página {index + 1}: {e}")
+                    pages.append((index + 1, ""))
+                finally:
+                    # Libera objetos da página para manter a memória estável
+                    page.close()
+        return pages
+
+    reader = PdfReader(pdf_path)
+    for index in range(start, end):
+        try:
+            pages.append((index + 1, reader.pages[index].extract_text() or ""))
+        except Exception as e:
+            logger.warning(f"Erro ao extrair página {index + 1}: {e}")
+            pages.append((index + 1, ""))
+    return pages
+
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Gera (número da página, texto) sequencialmente, uma página por vez.
+
+    Parâmetros:
+        pdf_path (str): Caminho para o arquivo PDF.
+
+    Retorna:
+        Iterator[Tuple[int, str]]: Páginas numeradas a partir de 1.
+    """
+    reader = PdfReader(pdf_path)
+    for index, page in enumerate(reader.pages):
+        try:
+            yield index + 1, page.extract_text() or ""
+        except Exception as e:
+            logger.warning(f"Erro ao extrair página {index + 1}: {e}")
+            yield index + 1, ""
+
+
+def iter_pdf_pages_parallel(
+    pdf_path: str,
+    max_workers: Optional[int] = None,
+    pages_per_task: int = DEFAULT_PAGES_PER_TASK,
+    extractor: str = "pypdf2",
+) -> Iterator[Tuple[int, str]]:
+    """
+    Gera (número da página, texto) em ordem, extraindo em paralelo num pool de processos.
+
+    Apenas `2 * max_workers` lotes ficam em andamento ao mesmo tempo, então a
+    memória não cresce com o tamanho do PDF. PDFs pequenos (ou max_workers=1)
+    são lidos sequencialmente, sem o custo de subir processos.
+
+    Parâmetros:
+        pdf_path (str): Caminho para o arquivo PDF.
+        max_workers (int, opcional): Processos do pool (padrão: número de CPUs).
+        pages_per_task (int): Páginas extraídas por tarefa.
+        extractor (str): "pypdf2" ou "pdfplumber".
+
+    Retorna:
+        Iterator[Tuple[int, str]]: Páginas numeradas a partir de 1, em ordem.
+    """
+    if extractor == "pdfplumber":
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            total_pages = len(pdf.pages)
+    else:
+        total_pages = count_pdf_pages(pdf_path)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers <= 1 or total_pages <= pages_per_task:
+        yield from _extract_page_range(pdf_path, 0, total_pages, extractor)
+        return
+
+    ranges = iter((start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        for start, end in ranges:
+            in_flight.append(executor.submit(_extract_page_range, pdf_path, start, end, extractor))
+            if len(in_flight) >= 2 * max_workers:
+                break
+        while in_flight:
+            yield from in_flight.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                in_flight.append(executor.submit(_extract_page_range, pdf_path, *next_range, extractor))
+
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """
@@ -16,11 +133,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     Retorna:
         str: Texto extraído do PDF.
     """
-    text = ""
     try:
-        reader = PdfReader(pdf_path)
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        return "".join(text for _, text in iter_pdf_pages(pdf_path))
     except Exception as e:
-        text = f"Erro ao extrair texto do PDF: {e}"
-    return text
+        return f"Erro ao extrair texto do PDF: {e}"
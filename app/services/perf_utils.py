@@ -0,0 +1,136 @@
+"""
+Utilitários para benchmarks e testes de carga: percentis de latência,
+embedder determinístico e stubs para rodar os apps sem baixar modelos.
+"""
+
+import hashlib
+import math
+import re
+import sys
+import types
+import unicodedata
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """
+    Percentil com interpolação linear (mesma definição do numpy.percentile).
+
+    Parâmetros:
+        values (Sequence[float]): Amostras.
+        p (float): Percentil entre 0 e 100.
+
+    Retorna:
+        float: Valor do percentil (0.0 se não houver amostras).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * (p / 100.0)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    if lower == upper:
+        return float(ordered[lower])
+    return float(ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower))
+
+
+def latency_summary(latencies_s: Iterable[float]) -> Dict[str, float]:
+    """Resumo de latências (entrada em segundos, saída em milissegundos)"""
+    values = [v * 1000.0 for v in latencies_s]
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def _fold(text: str) -> str:
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+class HashingEmbedder:
+    """
+    Substituto determinístico do SentenceTransformer (bag-of-words com hashing).
+
+    Não captura semântica, mas é estável entre execuções e não faz download,
+    o que basta para medir latência e comparar retrievers offline.
+    """
+
+    def __init__(self, model_name_or_path: str = "hashing", dimension: int = 384, **kwargs):
+        self.model_name = model_name_or_path
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype="float32")
+        for token in re.findall(r"\w+", _fold(text)):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[index] += 1.0 if digest[4] % 2 == 0 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, str):
+            return self._embed(sentences)
+        if len(sentences) == 0:
+            return np.zeros((0, self.dimension), dtype="float32")
+        return np.vstack([self._embed(s) for s in sentences])
+
+
+def _stub_pipeline(task=None, *args, **kwargs):
+    """Pipeline transformers falso: QA sem resposta, geração devolvendo o prompt"""
+
+    def run(*call_args, **call_kwargs):
+        if task == "question-answering":
+            return {"answer": "", "score": 0.0, "start": 0, "end": 0}
+        prompt = call_args[0] if call_args else ""
+        return [{"generated_text": prompt}]
+
+    return run
+
+
+def install_offline_stubs() -> None:
+    """
+    Registra módulos falsos de torch/transformers/sentence_transformers.
+
+    Deve ser chamado antes de importar os apps (ex.: app_optimized) para que
+    benchmarks e testes de carga rodem offline, sem modelos nem GPU.
+    """
+    torch = types.ModuleType("torch")
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+
+    transformers = types.ModuleType("transformers")
+    transformers.pipeline = _stub_pipeline
+    transformers_pipelines = types.ModuleType("transformers.pipelines")
+    transformers_pipelines.pipeline = _stub_pipeline
+    transformers.pipelines = transformers_pipelines
+
+    sentence_transformers = types.ModuleType("sentence_transformers")
+    sentence_transformers.SentenceTransformer = HashingEmbedder
+
+    sys.modules["torch"] = torch
+    sys.modules["transformers"] = transformers
+    sys.modules["transformers.pipelines"] = transformers_pipelines
+    sys.modules["sentence_transformers"] = sentence_transformers
+
+
+def dedupe_preserving_order(items: Iterable) -> List:
+    """Remove repetições mantendo a ordem de primeira ocorrência"""
+    seen = set()
+    result = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
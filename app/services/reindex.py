@@ -0,0 +1,110 @@
+"""
+Reindexação incremental com ids derivados do conteúdo.
+
+O id de cada chunk é o hash do seu texto (e da fonte), então reprocessar o
+mesmo documento gera os mesmos ids. Comparando o conjunto novo com o que já
+está armazenado, só chunks novos ou alterados são embutidos e gravados, e os
+que sumiram do documento são removidos.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash_id(content: str, source: str = "", prefix: str = "chunk") -> str:
+    """
+    Id estável para um chunk: mesmo texto (ignorando espaços) e fonte, mesmo id.
+
+    Parâmetros:
+        content (str): Texto do chunk.
+        source (str): Fonte do documento (evita colisão de textos iguais em fontes diferentes).
+        prefix (str): Prefixo legível do id.
+
+    Retorna:
+        str: Id no formato `<prefix>_<16 hex>`.
+    """
+    normalized = re.sub(r"\s+", " ", content).strip()
+    digest = hashlib.sha256(f"{source}\x00{normalized}".encode("utf-8")).hexdigest()
+    return f"{prefix}_{digest[:16]}"
+
+
+def assign_content_ids(documents: Iterable[Dict], source: str = "", prefix: str = "chunk") -> List[Dict]:
+    """Define `id` por hash de conteúdo e descarta chunks repetidos (mantém o primeiro)"""
+    seen: Set[str] = set()
+    result = []
+    for document in documents:
+        doc_id = content_hash_id(document.get("content", ""), source, prefix)
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        result.append({**document, "id": doc_id})
+    return result
+
+
+def plan_reindex(documents: List[Dict], stored: Dict[str, Dict]) -> Dict[str, List]:
+    """
+    Compara o novo conjunto de chunks com o armazenado.
+
+    Parâmetros:
+        documents (List[Dict]): Chunks novos, já com `id` de conteúdo.
+        stored (Dict[str, Dict]): Id -> metadados do que está no índice.
+
+    Retorna:
+        Dict[str, List]: `add` (documentos a embutir), `update_metadata`
+        (mesmo texto, metadados diferentes), `keep` (ids intactos) e `delete` (ids removidos).
+    """
+    plan = {"add": [], "update_metadata": [], "keep": [], "delete": []}
+    new_ids = set()
+    for document in documents:
+        doc_id = document["id"]
+        new_ids.add(doc_id)
+        if doc_id not in stored:
+            plan["add"].append(document)
+        elif (stored[doc_id] or {}) != document.get("metadata", {}):
+            plan["update_metadata"].append(document)
+        else:
+            plan["keep"].append(doc_id)
+    plan["delete"] = sorted(set(stored) - new_ids)
+    return plan
+
+
+def reindex(store, documents: List[Dict], source: str, prefix: str = "chunk", dry_run: bool = False) -> Optional[Dict[str, int]]:
+    """
+    Sincroniza o índice com um documento, tocando apenas no que mudou.
+
+    `store` deve oferecer `list_documents(source) -> {id: metadados}`,
+    `upsert_documents(documents) -> bool`, `update_metadata(id, metadata)` e
+    `delete_documents(ids) -> bool` (ver backend/rag_service_openai.py).
+
+    Parâmetros:
+        store: Serviço de armazenamento vetorial.
+        documents (List[Dict]): Chunks {'content', 'metadata'} do documento inteiro.
+        source (str): Fonte do documento; só ids dessa fonte são comparados/removidos.
+        prefix (str): Prefixo dos ids.
+        dry_run (bool): Apenas calcula o plano, sem gravar.
+
+    Retorna:
+        Dict[str, int] | None: Contagens por operação, ou None se alguma escrita falhar.
+    """
+    documents = assign_content_ids(documents, source, prefix)
+    stored = store.list_documents(source)
+    plan = plan_reindex(documents, stored)
+    stats = {key: len(value) for key, value in plan.items()}
+    logger.info(
+        f"Reindexação de {source}: {stats['add']} novos, {stats['update_metadata']} com metadados "
+        f"alterados, {stats['keep']} inalterados, {stats['delete']} removidos"
+    )
+    if dry_run:
+        return stats
+
+    if plan["add"] and not store.upsert_documents(plan["add"]):
+        return None
+    for document in plan["update_metadata"]:
+        store.update_metadata(document["id"], document.get("metadata", {}))
+    if plan["delete"] and not store.delete_documents(plan["delete"]):
+        return None
+    return stats
@@ -0,0 +1,237 @@
+"""
+Reordenação dos candidatos recuperados com um cross-encoder.
+
+A busca barata (bi-encoder ou palavras-chave) traz muitos candidatos (ex.:
+top-50); o cross-encoder lê cada par (pergunta, trecho) junto e devolve os
+top-k realmente relevantes — é o que separa, por exemplo, a seção de PQT-U
+adulto da infantil.
+
+- Uma única passada em lote por pergunta: só os pares ainda sem score vão ao
+  modelo, todos no mesmo `predict`.
+- Scores em cache LRU por (hash da pergunta normalizada, id do chunk).
+- Orçamento de latência: pelo custo médio por par medido, só os primeiros
+  pares novos que cabem no orçamento vão ao modelo (os demais seguem, na
+  ordem da busca, depois dos reordenados). Se nem dois couberem — ou se já
+  houver reordenações demais em andamento — a etapa é pulada. Como uma
+  passada lenta isolada (aquecimento do modelo, pausa do GC, pico de carga)
+  pode estourar a estimativa, a cada `probe_interval_s` sem medição uma
+  passada de dois pares é liberada mesmo assim e substitui a estimativa.
+
+O modelo (sentence_transformers.CrossEncoder) é carregado no primeiro uso;
+sem a dependência, a etapa fica desativada e os candidatos passam direto.
+"""
+
+import hashlib
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from app.services.answer_bank import normalize_question
+from app.services.disease_registry import LRUCache
+from app.services.metrics import get_metrics_registry
+from app.services.reindex import content_hash_id
+
+logger = logging.getLogger(__name__)
+
+# Cross-encoder multilíngue (treinado no mMARCO, inclui português), ~120 MB
+DEFAULT_RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+PairScorer = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+_metrics = get_metrics_registry()
+rerank_requests_total = _metrics.counter(
+    "rerank_requests_total", "Reordenações por resultado (reranked, skipped_budget, skipped_load, unavailable, error)", ["result"]
+)
+rerank_cache_total = _metrics.counter("rerank_score_cache_total", "Consultas ao cache de scores do cross-encoder", ["result"])
+rerank_duration = _metrics.histogram("rerank_duration_seconds", "Duração das passadas do cross-encoder")
+
+
+def _default_text(candidate: Any) -> str:
+    if isinstance(candidate, str):
+        return candidate
+    if isinstance(candidate, dict):
+        return candidate.get("content", "")
+    return candidate[0]
+
+
+def _default_id(candidate: Any) -> str:
+    if isinstance(candidate, dict) and candidate.get("id"):
+        return str(candidate["id"])
+    return content_hash_id(_default_text(candidate))
+
+
+def query_hash(query: str) -> str:
+    """Hash curto da pergunta normalizada (chave do cache de scores)"""
+    return hashlib.sha1(normalize_question(query).encode("utf-8")).hexdigest()[:16]
+
+
+class Reranker:
+    """Cross-encoder com cache de scores e orçamento de latência"""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANK_MODEL,
+        score_pairs: Optional[PairScorer] = None,
+        batch_size: int = 64,
+        cache_size: int = 20000,
+        latency_budget_ms: float = 150.0,
+        max_concurrent: int = 2,
+        probe_interval_s: float = 30.0,
+    ):
+        """
+        Parâmetros:
+            model_name (str): Modelo do CrossEncoder carregado no primeiro uso.
+            score_pairs (Callable, opcional): Função pares -> scores no lugar do modelo (testes, outro backend).
+            batch_size (int): Tamanho do lote do `predict` (>= candidatos = uma única passada).
+            cache_size (int): Máximo de scores (pergunta, chunk) guardados.
+            latency_budget_ms (float): Tempo máximo estimado para os pares sem score; acima disso, pula.
+            max_concurrent (int): Reordenações simultâneas; as excedentes pulam a etapa.
+            probe_interval_s (float): Intervalo sem medições após o qual, mesmo com a etapa
+                fora do orçamento, uma passada de prova remede o custo por par.
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.probe_interval = probe_interval_s
+        self._score_pairs = score_pairs
+        self._load_lock = threading.Lock()
+        self._load_failed = False
+        self._probe_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._cache = LRUCache(cache_size)
+        # Custo médio por par (s), média móvel exponencial das passadas já feitas
+        self.seconds_per_pair: Optional[float] = None
+        self._last_measured = time.monotonic()
+
+    @property
+    def available(self) -> bool:
+        return self._ensure_model()
+
+    def _ensure_model(self) -> bool:
+        if self._score_pairs is not None:
+            return True
+        if self._load_failed:
+            return False
+        with self._load_lock:
+            if self._score_pairs is None and not self._load_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+
+                    model = CrossEncoder(self.model_name)
+                    self._score_pairs = lambda pairs: model.predict(pairs, batch_size=self.batch_size)
+                    logger.info(f"Cross-encoder carregado: {self.model_name}")
+                except Exception as e:
+                    self._load_failed = True
+                    logger.warning(f"Reordenação desativada; cross-encoder indisponível ({self.model_name}): {e}")
+        return self._score_pairs is not None
+
+    def affordable_pairs(self) -> int:
+        """Quantos pares novos cabem no orçamento pelo custo medido (sem limite antes da primeira medição)"""
+        if not self.seconds_per_pair:
+            return sys.maxsize
+        return int(self.latency_budget / self.seconds_per_pair)
+
+    def _probe_due(self) -> bool:
+        """Se a etapa, pulada por orçamento, deve medir o custo de novo (uma prova por intervalo)"""
+        now = time.monotonic()
+        with self._probe_lock:
+            if now - self._last_measured < self.probe_interval:
+                return False
+            self._last_measured = now
+            return True
+
+    def _observe(self, pairs: int, elapsed: float, probe: bool = False) -> None:
+        per_pair = elapsed / pairs
+        previous = self.seconds_per_pair
+        # A prova é a única medição desde que a etapa saiu do orçamento: vale sozinha
+        self.seconds_per_pair = per_pair if previous is None or probe else 0.8 * previous + 0.2 * per_pair
+        self._last_measured = time.monotonic()
+
+    def rerank(
+        self,
+        query: str,
+        candidates: Sequence[Any],
+        top_k: int,
+        text_of: Callable[[Any], str] = _default_text,
+        id_of: Callable[[Any], str] = _default_id,
+    ) -> List[Any]:
+        """
+        Os `top_k` candidatos mais relevantes segundo o cross-encoder.
+
+        Parâmetros:
+            query (str): Pergunta do usuário.
+            candidates (Sequence): Candidatos na ordem da busca — textos, pares
+                (texto, score) ou dicts {'id', 'content', ...}.
+            top_k (int): Quantos candidatos devolver.
+            text_of (Callable): Extrai o texto de um candidato.
+            id_of (Callable): Id estável do candidato (chave do cache).
+
+        Retorna:
+            List: Até `top_k` candidatos, do mais ao menos relevante; se a etapa
+            for pulada, os primeiros `top_k` na ordem original.
+        """
+        candidates = list(candidates)
+        if len(candidates) <= 1:
+            return candidates[:top_k]
+        if not self._ensure_model():
+            rerank_requests_total.inc(result="unavailable")
+            return candidates[:top_k]
+
+        qhash = query_hash(query)
+        keys = [(qhash, id_of(candidate)) for candidate in candidates]
+        scores: List[Optional[float]] = [self._cache.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        rerank_cache_total.inc(len(candidates) - len(missing), result="hit")
+        rerank_cache_total.inc(len(missing), result="miss")
+
+        if missing:
+            affordable = self.affordable_pairs()
+            probe = affordable < min(len(missing), 2)
+            if probe:
+                if not self._probe_due():
+                    rerank_requests_total.inc(result="skipped_budget")
+                    logger.debug(f"Reordenação pulada: {len(missing)} pares excedem o orçamento")
+                    return candidates[:top_k]
+                affordable = 2
+            if not self._slots.acquire(blocking=False):
+                rerank_requests_total.inc(result="skipped_load")
+                return candidates[:top_k]
+            # Só a cabeça da lista que cabe no orçamento; o resto fica na ordem da busca, depois
+            missing = missing[:affordable]
+            try:
+                pairs = [(query, text_of(candidates[i])) for i in missing]
+                started = time.perf_counter()
+                predicted = self._score_pairs(pairs)
+                elapsed = time.perf_counter() - started
+            except Exception as e:
+                logger.error(f"Erro no cross-encoder; mantendo a ordem da busca: {e}")
+                rerank_requests_total.inc(result="error")
+                return candidates[:top_k]
+            finally:
+                self._slots.release()
+            rerank_duration.observe(elapsed)
+            self._observe(len(pairs), elapsed, probe=probe)
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                self._cache.put(keys[i], scores[i])
+
+        rerank_requests_total.inc(result="reranked")
+        scored = sorted((i for i, score in enumerate(scores) if score is not None), key=lambda i: scores[i], reverse=True)
+        unscored = [i for i, score in enumerate(scores) if score is None]
+        return [candidates[i] for i in (scored + unscored)[:top_k]]
+
+# Instância global do reranker
+reranker = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker(**kwargs) -> Reranker:
+    """Retorna o reranker do processo (criado com `kwargs` na primeira chamada)"""
+    global reranker
+    if reranker is None:
+        with _reranker_lock:
+            if reranker is None:
+                reranker = Reranker(**kwargs)
+    return reranker
@@ -0,0 +1,182 @@
+"""
+Índice de frases para o fallback de extração de contexto.
+
+Montado uma vez, quando o corpus é carregado: cada chunk (ou parágrafo) é
+dividido em frases, guardando para cada uma o chunk dono, as posições no
+texto do chunk, o conjunto de termos já tokenizado e, se houver modelo, o
+embedding normalizado. Um índice invertido termo -> frases permite contar a
+sobreposição com a pergunta sem percorrer todas as frases.
+
+Na hora da pergunta, o fallback vira uma busca top-k: sobreposição de termos
+(como antes, |pergunta ∩ frase| / |pergunta|), combinada com a similaridade
+de cosseno quando há embeddings — em vez de dividir o contexto em '.' e
+intersectar conjuntos de palavras a cada requisição.
+"""
+
+import logging
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fim de frase seguido de espaço e início de nova frase, ou quebra de linha
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?;])\s+(?=[\"“(\[A-ZÀ-Ý0-9•*-])|\n+")
+_TERM = re.compile(r"\w+")
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos (minúsculos) de um texto, como na busca por palavras-chave dos apps"""
+    return _TERM.findall(text.lower())
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[Tuple[int, int]]:
+    """Posições (início, fim) das frases do texto com pelo menos `min_chars` caracteres"""
+    spans = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    result = []
+    for begin, end in spans:
+        while begin < end and text[begin].isspace():
+            begin += 1
+        while end > begin and text[end - 1].isspace():
+            end -= 1
+        if end - begin >= min_chars:
+            result.append((begin, end))
+    return result
+
+
+class SentenceIndex:
+    """Frases de um corpus com termos e embeddings pré-calculados"""
+
+    def __init__(
+        self,
+        chunks: Sequence[str],
+        embed: Optional[Embedder] = None,
+        min_chars: int = 20,
+        semantic_weight: float = 0.6,
+    ):
+        """
+        Parâmetros:
+            chunks (Sequence[str]): Textos donos das frases (chunks ou parágrafos).
+            embed (Callable, opcional): Função lista de textos -> matriz de embeddings.
+            min_chars (int): Frases menores que isso são ignoradas.
+            semantic_weight (float): Peso da similaridade de cosseno no score (o resto é sobreposição de termos).
+        """
+        self.chunks = list(chunks)
+        self.semantic_weight = semantic_weight
+        self._chunk_position = {chunk.strip(): i for i, chunk in enumerate(self.chunks)}
+        self.sentences: List[str] = []
+        self.spans: List[Tuple[int, int]] = []
+        owners: List[int] = []
+        self.terms: List[frozenset] = []
+        postings: Dict[str, List[int]] = {}
+
+        for chunk_index, chunk in enumerate(self.chunks):
+            for begin, end in split_sentences(chunk, min_chars):
+                sentence_id = len(self.sentences)
+                sentence = chunk[begin:end]
+                terms = frozenset(tokenize(sentence))
+                self.sentences.append(sentence)
+                self.spans.append((begin, end))
+                owners.append(chunk_index)
+                self.terms.append(terms)
+                for term in terms:
+                    postings.setdefault(term, []).append(sentence_id)
+
+        self.chunk_of = np.asarray(owners, dtype=np.int64)
+        self._postings = {term: np.asarray(ids, dtype=np.int64) for term, ids in postings.items()}
+        self.embeddings: Optional[np.ndarray] = None
+        if embed is not None and self.sentences:
+            matrix = np.asarray(embed(self.sentences), dtype="float32")
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.embeddings = matrix / norms
+        logger.info(
+            f"Índice de frases: {len(self.sentences)} frases de {len(self.chunks)} trechos"
+            f"{' (com embeddings)' if self.embeddings is not None else ''}"
+        )
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def chunk_indices(self, chunks: Iterable[str]) -> List[int]:
+        """Posições, no índice, dos trechos informados (trechos desconhecidos são ignorados)"""
+        positions = (self._chunk_position.get(chunk.strip()) for chunk in chunks)
+        return [position for position in positions if position is not None]
+
+    def search(
+        self,
+        question: str,
+        top_k: int = 3,
+        question_embedding: Optional[np.ndarray] = None,
+        restrict_chunks: Optional[Iterable[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Frases mais relevantes para a pergunta.
+
+        Parâmetros:
+            question (str): Pergunta do usuário.
+            top_k (int): Quantidade máxima de frases.
+            question_embedding (np.ndarray, opcional): Embedding da pergunta (usado se o índice tiver embeddings).
+            restrict_chunks (Iterable[str], opcional): Considera só frases destes trechos
+                (ex.: os recuperados); se nenhum for do índice, busca em todos.
+
+        Retorna:
+            List[Dict[str, Any]]: sentence, score, overlap, chunk_index, start e end
+            (posições no trecho), da mais para a menos relevante. Sem embeddings, só
+            frases com algum termo em comum entram.
+        """
+        if not self.sentences:
+            return []
+        question_terms = set(tokenize(question))
+        overlap = np.zeros(len(self.sentences), dtype="float32")
+        for term in question_terms:
+            ids = self._postings.get(term)
+            if ids is not None:
+                overlap[ids] += 1.0
+        if question_terms:
+            overlap /= len(question_terms)
+
+        use_semantic = self.embeddings is not None and question_embedding is not None
+        if use_semantic:
+            query = np.asarray(question_embedding, dtype="float32").reshape(-1)
+            norm = np.linalg.norm(query)
+            similarity = self.embeddings @ (query / norm if norm else query)
+            scores = self.semantic_weight * similarity + (1.0 - self.semantic_weight) * overlap
+            eligible = np.ones(len(self.sentences), dtype=bool)
+        else:
+            scores = overlap
+            eligible = overlap > 0
+
+        if restrict_chunks is not None:
+            allowed = self.chunk_indices(restrict_chunks)
+            if allowed:
+                eligible &= np.isin(self.chunk_of, allowed)
+
+        candidates = np.flatnonzero(eligible)
+        if not len(candidates):
+            return []
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        # Empates mantêm a ordem do texto
+        candidates = sorted(candidates, key=lambda i: (-scores[i], i))
+
+        results = []
+        for i in candidates:
+            begin, end = self.spans[i]
+            results.append({
+                "sentence": self.sentences[i],
+                "score": float(scores[i]),
+                "overlap": float(overlap[i]),
+                "chunk_index": int(self.chunk_of[i]),
+                "start": begin,
+                "end": end,
+            })
+        return results
@@ -0,0 +1,215 @@
+"""
+Histórico de conversa por sessão, em memória, com paginação por cursor.
+
+Cada sessão ativa tem um ring buffer com os últimos turnos (pergunta e
+resposta), limitado em quantidade (`max_turns`) e em bytes (`max_bytes`);
+as sessões ficam num LRUCache, então sessões inativas saem da memória. O
+banco só é lido quando uma sessão não está em memória (ex.: depois de um
+reinício), uma vez, para preencher o buffer — não a cada mensagem.
+
+Para os prompts, `window` devolve os turnos mais recentes que cabem num
+orçamento de tokens, em ordem cronológica, no formato de mensagens de chat.
+
+Os ids de sessão são emitidos pelo servidor (`new_session_id`): quem conhece
+o id lê e escreve na sessão, então ele precisa ser imprevisível. Ids vindos
+do cliente são conferidos com `is_valid_session_id` antes de tocar o cache.
+
+A paginação do histórico completo vai ao banco por keyset: o cursor é opaco
+(base64 de `[ts, _id]` do último item da página) e a próxima página busca os
+itens estritamente mais antigos que ele, sem `skip`.
+"""
+
+import base64
+import binascii
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.disease_registry import LRUCache
+from app.services.token_utils import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 32 bytes aleatórios em base64 url-safe (43 caracteres); aceita até 64 para não quebrar clientes
+SESSION_ID_BYTES = 32
+_SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{32,64}")
+
+# Carrega os `limit` turnos mais recentes de uma sessão (do mais novo para o mais antigo)
+RecentLoader = Callable[[str, int], List[Dict[str, Any]]]
+
+
+def new_session_id() -> str:
+    """Id de sessão opaco e imprevisível, emitido pelo servidor"""
+    return secrets.token_urlsafe(SESSION_ID_BYTES)
+
+
+def is_valid_session_id(session_id: Any) -> bool:
+    """Se `session_id` tem o formato de um id emitido por new_session_id"""
+    return isinstance(session_id, str) and _SESSION_ID_PATTERN.fullmatch(session_id) is not None
+
+
+def encode_cursor(ts: int, item_id: Any) -> str:
+    """Cursor opaco para a posição (ts, _id) de um item"""
+    raw = json.dumps([int(ts), str(item_id)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Posição (ts, _id) codificada no cursor.
+
+    Lança:
+        ValueError: Se o cursor não for válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, item_id = json.loads(raw)
+        return int(ts), str(item_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+def _turn_size(turn: Dict[str, Any]) -> int:
+    return len(turn.get("message", "").encode("utf-8")) + len(turn.get("response", "").encode("utf-8"))
+
+
+class _SessionBuffer:
+    """Últimos turnos de uma sessão, limitados em quantidade e bytes"""
+
+    def __init__(self, max_turns: int, max_bytes: int):
+        self.turns: deque = deque()
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def append(self, turn: Dict[str, Any]) -> None:
+        self.turns.append(turn)
+        self.size += _turn_size(turn)
+        # O turno mais recente fica sempre, mesmo que sozinho passe do limite de bytes
+        while len(self.turns) > 1 and (len(self.turns) > self.max_turns or self.size > self.max_bytes):
+            self.size -= _turn_size(self.turns.popleft())
+
+
+class SessionHistory:
+    """Ring buffer por sessão na frente do histórico gravado no banco"""
+
+    def __init__(
+        self,
+        load_recent: Optional[RecentLoader] = None,
+        max_turns: int = 20,
+        max_bytes: int = 16384,
+        max_sessions: int = 1000,
+    ):
+        """
+        Parâmetros:
+            load_recent (Callable, opcional): (session_id, limit) -> turnos mais recentes do banco,
+                usado quando a sessão não está em memória. Sem ele, só o que passou por este processo.
+            max_turns (int): Turnos guardados por sessão.
+            max_bytes (int): Bytes (pergunta + resposta) guardados por sessão.
+            max_sessions (int): Sessões em memória (as usadas há mais tempo saem primeiro).
+        """
+        self.load_recent = load_recent
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self._sessions = LRUCache(max_sessions)
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _buffer(self, session_id: str) -> _SessionBuffer:
+        buffer = self._sessions.get(session_id)
+        if buffer is not None:
+            return buffer
+        with self._load_lock:
+            # Outra thread pode ter carregado a sessão enquanto esperávamos
+            buffer = self._sessions.get(session_id)
+            if buffer is not None:
+                return buffer
+            buffer = _SessionBuffer(self.max_turns, self.max_bytes)
+            if self.load_recent is not None:
+                try:
+                    stored = self.load_recent(session_id, self.max_turns)
+                except Exception as e:
+                    logger.warning(f"Histórico da sessão {session_id} indisponível no banco: {e}")
+                    stored = []
+                for item in reversed(stored):
+                    buffer.append({
+                        "message": item.get("message") or "",
+                        "response": item.get("response") or "",
+                        "persona": item.get("persona") or "",
+                        "ts": item.get("ts"),
+                    })
+            self._sessions.put(session_id, buffer)
+            return buffer
+
+    def record(self, session_id: str, message: str, response: str, persona: str = "", ts: Optional[int] = None) -> None:
+        """Acrescenta um turno ao buffer da sessão (a gravação no banco é feita à parte)"""
+        turn = {
+            "message": message,
+            "response": response,
+            "persona": persona,
+            "ts": ts if ts is not None else int(time.time() * 1000),
+        }
+        buffer = self._buffer(session_id)
+        with self._lock:
+            buffer.append(turn)
+
+    def recent(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Últimos turnos da sessão, do mais antigo para o mais recente"""
+        buffer = self._buffer(session_id)
+        with self._lock:
+            turns = list(buffer.turns)
+        return turns[-limit:] if limit else turns
+
+    def window(
+        self,
+        session_id: str,
+        max_tokens: int,
+        count: Callable[[str], int] = estimate_tokens,
+    ) -> List[Dict[str, str]]:
+        """
+        Turnos mais recentes que cabem no orçamento, como mensagens de chat.
+
+        Parâmetros:
+            session_id (str): Sessão.
+            max_tokens (int): Orçamento de tokens para o histórico no prompt.
+            count (Callable): Contador de tokens (ex.: get_token_counter(modelo)).
+
+        Retorna:
+            List[Dict[str, str]]: Mensagens {'role': 'user'|'assistant', 'content'} em ordem
+            cronológica; um turno entra inteiro ou não entra.
+        """
+        selected: List[Dict[str, str]] = []
+        used = 0
+        for turn in reversed(self.recent(session_id)):
+            cost = count(turn["message"]) + count(turn["response"])
+            if used + cost > max_tokens:
+                break
+            used += cost
+            selected.append({"role": "assistant", "content": turn["response"]})
+            selected.append({"role": "user", "content": turn["message"]})
+        selected.reverse()
+        return selected
+
+    def forget(self, session_id: str) -> None:
+        """Descarta a sessão da memória"""
+        self._sessions.pop(session_id)
+
+
+# Instância global do histórico por sessão
+session_history = None
+_session_history_lock = threading.Lock()
+
+
+def get_session_history(**kwargs) -> SessionHistory:
+    """Retorna o histórico por sessão do processo (criado com `kwargs` na primeira chamada)"""
+    global session_history
+    if session_history is None:
+        with _session_history_lock:
+            if session_history is None:
+                session_history = SessionHistory(**kwargs)
+    return session_history
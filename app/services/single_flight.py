@@ -0,0 +1,86 @@
+"""
+Coalescência de requisições idênticas concorrentes ("single-flight").
+
+Quando várias threads pedem a mesma chave ao mesmo tempo, só a primeira
+(líder) executa a computação; as demais (seguidoras) esperam e recebem o
+mesmo resultado, ou a mesma exceção. Seguidoras podem ter um tempo máximo de
+espera, após o qual recebem SingleFlightTimeout e decidem o que fazer
+(ex.: responder com um fallback barato).
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(TimeoutError):
+    """A computação líder não terminou dentro do tempo de espera da seguidora"""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa chamadas simultâneas pela mesma chave numa única execução"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        Executa `function` uma única vez por chave entre as chamadas concorrentes.
+
+        Parâmetros:
+            key (Hashable): Chave de coalescência (ex.: chave do cache de respostas).
+            function (Callable): Computação sem argumentos; só a líder a executa.
+            timeout (float, opcional): Espera máxima das seguidoras, em segundos.
+
+        Retorna:
+            Tuple[Any, bool]: Resultado e se ele foi compartilhado (True para seguidoras).
+
+        Levanta:
+            SingleFlightTimeout: Se a seguidora esgotar o tempo de espera.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"Tempo de espera esgotado para a chave {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.debug(f"Single-flight: {call.waiters} requisição(ões) aguardaram a chave {key!r}")
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Número de chaves sendo computadas agora"""
+        with self._lock:
+            return len(self._calls)
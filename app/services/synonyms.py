@@ -0,0 +1,155 @@
+"""
+Expansão de consultas por sinônimos com autômato Aho-Corasick.
+
+O dicionário (termo -> sinônimos) é compilado uma vez por carga num autômato
+sobre texto sem acentos e em minúsculas; cada consulta é percorrida uma única
+vez, independentemente do número de termos. O resultado é o conjunto de termos
+equivalentes encontrados, não perguntas reescritas.
+
+Recargas constroem um matcher novo por completo e o publicam com uma troca
+atômica de referência; cada matcher tem uma `version` (hash do dicionário)
+que deve entrar nas chaves de cache.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas e sem acentos ("Hanseníase" -> "hanseniase")"""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+class AhoCorasick:
+    """Autômato de busca simultânea de vários padrões"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern: str) -> None:
+        if not pattern:
+            return
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                # Filhos da raiz falham para a própria raiz
+                self._fail[child] = candidate if candidate != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Gera (início, fim, índice do padrão) de todas as ocorrências, numa só passada"""
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for pattern_index in self._output[node]:
+                end = position + 1
+                yield end - len(self.patterns[pattern_index]), end, pattern_index
+
+
+def is_word_boundary(text: str, start: int, end: int) -> bool:
+    """Verdadeiro se text[start:end] não está colado a letras ou dígitos"""
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class SynonymMatcher:
+    """Dicionário de sinônimos compilado e imutável"""
+
+    def __init__(self, synonyms: Dict[str, List[str]]):
+        self.synonyms = {term: list(values) for term, values in synonyms.items()}
+        self.version = hashlib.sha1(
+            json.dumps(self.synonyms, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+
+        # Cada termo e cada sinônimo apontam para os grupos (termos canônicos) a que pertencem
+        groups: Dict[str, Set[str]] = {}
+        for term, values in self.synonyms.items():
+            for variant in [term] + list(values):
+                folded = fold_text(variant).strip()
+                if folded:
+                    groups.setdefault(folded, set()).add(term)
+        self._pattern_groups = groups
+        self._automaton = AhoCorasick(groups.keys())
+
+    def matched_terms(self, text: str) -> Set[str]:
+        """Termos canônicos do dicionário presentes no texto (por termo ou sinônimo)"""
+        folded = fold_text(text)
+        found: Set[str] = set()
+        for start, end, index in self._automaton.finditer(folded):
+            if is_word_boundary(folded, start, end):
+                found.update(self._pattern_groups[self._automaton.patterns[index]])
+        return found
+
+    def expand(self, text: str) -> Set[str]:
+        """
+        Conjunto de termos equivalentes aos encontrados no texto.
+
+        Parâmetros:
+            text (str): Pergunta do usuário.
+
+        Retorna:
+            Set[str]: Termos canônicos encontrados e todos os seus sinônimos.
+        """
+        expanded: Set[str] = set()
+        for term in self.matched_terms(text):
+            expanded.add(term)
+            expanded.update(self.synonyms[term])
+        return expanded
+
+
+class SynonymRegistry:
+    """Mantém o matcher vigente e troca-o atomicamente em recargas"""
+
+    def __init__(self, synonyms: Dict[str, List[str]]):
+        self._reload_lock = threading.Lock()
+        self._current = SynonymMatcher(synonyms)
+
+    @property
+    def current(self) -> SynonymMatcher:
+        """Snapshot do matcher: use a mesma instância durante toda a requisição"""
+        return self._current
+
+    def reload(self, synonyms: Dict[str, List[str]]) -> str:
+        """Compila o novo dicionário fora do caminho das requisições e publica; retorna a versão"""
+        with self._reload_lock:
+            matcher = SynonymMatcher(synonyms)
+            self._current = matcher
+        logger.info(f"Sinônimos recarregados: {len(matcher.synonyms)} termos, versão {matcher.version}")
+        return matcher.version
@@ -0,0 +1,133 @@
+"""
+Reescrita de texto por persona (ex.: termos técnicos -> linguagem do Gá).
+
+Cada tabela de substituições é compilada numa única regex de alternância,
+com os termos mais longos primeiro ("dose mensal" vence "dose") e respeitando
+fronteiras de palavra, e aplicada numa só passada sobre o texto. As tabelas
+ficam em data/rewrite_rules/<persona>.json; uma persona nova é só um arquivo.
+
+Formato do arquivo:
+
+    {
+      "persona": "ga",
+      "stages": [
+        {"name": "termos", "replacements": {"posologia": "como tomar o remédio"}},
+        {"name": "emojis", "replacements": {"remédio": "remédio 💊"}}
+      ]
+    }
+
+Opções por estágio: "word_boundary" (padrão true) e "ignore_case" (padrão
+false, como o `str.replace` que as tabelas substituíram: "Dose" não casa com
+"dose"; com true, a inicial maiúscula do trecho original é preservada).
+Estágios rodam em sequência, cada um numa única passada.
+"""
+
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "rewrite_rules"
+
+
+class CompiledReplacer:
+    """Tabela de substituições compilada em uma regex"""
+
+    def __init__(self, replacements: Dict[str, str], word_boundary: bool = True, ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self._lookup = {(k.lower() if ignore_case else k): v for k, v in replacements.items() if k}
+        terms = sorted((k for k in replacements if k), key=len, reverse=True)
+        if not terms:
+            self._pattern = None
+            return
+        alternation = "|".join(re.escape(term) for term in terms)
+        if word_boundary:
+            alternation = rf"(?<!\w)(?:{alternation})(?!\w)"
+        self._pattern = re.compile(alternation, re.IGNORECASE if ignore_case else 0)
+
+    def _replace(self, match: "re.Match") -> str:
+        original = match.group(0)
+        replacement = self._lookup[original.lower() if self.ignore_case else original]
+        if self.ignore_case and original[:1].isupper() and replacement:
+            replacement = replacement[0].upper() + replacement[1:]
+        return replacement
+
+    def rewrite(self, text: str) -> str:
+        if self._pattern is None or not text:
+            return text
+        return self._pattern.sub(self._replace, text)
+
+
+class PersonaRewriter:
+    """Sequência de estágios de substituição de uma persona"""
+
+    def __init__(self, persona: str, stages: List[Dict]):
+        self.persona = persona
+        self.stages = [
+            (
+                stage.get("name", f"stage_{i}"),
+                CompiledReplacer(
+                    stage.get("replacements", {}),
+                    word_boundary=stage.get("word_boundary", True),
+                    ignore_case=stage.get("ignore_case", False),
+                ),
+            )
+            for i, stage in enumerate(stages)
+        ]
+
+    @classmethod
+    def from_file(cls, path: Path) -> "PersonaRewriter":
+        with open(path, "r", encoding="utf-8") as f:
+            rules = json.load(f)
+        return cls(rules.get("persona", path.stem), rules.get("stages", []))
+
+    def rewrite(self, text: str, stages: Optional[Iterable[str]] = None) -> str:
+        """Aplica os estágios em ordem; `stages` restringe a um subconjunto pelo nome"""
+        selected = set(stages) if stages is not None else None
+        for name, replacer in self.stages:
+            if selected is None or name in selected:
+                text = replacer.rewrite(text)
+        return text
+
+
+_rewriters: Dict[str, PersonaRewriter] = {}
+_rewriters_lock = threading.Lock()
+
+
+def get_rewriter(rule_set: str, rules_dir: Optional[Path] = None) -> PersonaRewriter:
+    """
+    Retorna o reescritor compilado de uma tabela de regras (compilado uma vez por processo).
+
+    Parâmetros:
+        rule_set (str): Nome do arquivo de regras, sem extensão (ex.: "ga").
+        rules_dir (Path, opcional): Diretório das regras; padrão data/rewrite_rules.
+
+    Retorna:
+        PersonaRewriter: Reescritor pronto para uso.
+    """
+    path = Path(rules_dir or DEFAULT_RULES_DIR) / f"{rule_set}.json"
+    key = str(path)
+    rewriter = _rewriters.get(key)
+    if rewriter is None:
+        with _rewriters_lock:
+            rewriter = _rewriters.get(key)
+            if rewriter is None:
+                rewriter = PersonaRewriter.from_file(path)
+                _rewriters[key] = rewriter
+                logger.info(f"Regras de reescrita '{rule_set}' compiladas ({len(rewriter.stages)} estágios)")
+    return rewriter
+
+
+def rewrite_text(text: str, rule_set: str, stages: Optional[Iterable[str]] = None) -> str:
+    """Aplica a tabela de regras `rule_set` (data/rewrite_rules) ao texto"""
+    return get_rewriter(rule_set).rewrite(text, stages)
+
+
+def clear_rewriter_cache() -> None:
+    """Descarta reescritores compilados (após editar os arquivos de regras)"""
+    with _rewriters_lock:
+        _rewriters.clear()
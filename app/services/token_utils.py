@@ -0,0 +1,80 @@
+"""
+Contagem de tokens para dimensionar chunks e prompts.
+
+Usa o tokenizer do tiktoken quando instalado (o do modelo, se o tiktoken o
+conhecer; senão cl100k_base); caso contrário, aplica uma estimativa calibrada
+para português (≈4 caracteres por token).
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD_OR_SYMBOL = re.compile(r"\w+|[^\w\s]")
+
+_encoding = None
+_encoding_checked = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_checked
+    if not _encoding_checked:
+        _encoding_checked = True
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.info(f"tiktoken indisponível, usando estimativa de tokens: {e}")
+            _encoding = None
+    return _encoding
+
+
+@lru_cache(maxsize=32)
+def _get_model_encoding(model: str):
+    """Tokenizer do modelo (ex.: "openai/gpt-4o-mini"); None se o tiktoken não o conhecer"""
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model(model.split("/")[-1].split(":")[0])
+    except Exception:
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa de tokens sem tokenizer: palavras longas viram vários tokens,
+    cada pontuação conta como um.
+    """
+    total = 0
+    for piece in _WORD_OR_SYMBOL.findall(text):
+        total += max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() or piece[0] == "_" else 1
+    return total
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Conta os tokens de um texto.
+
+    Parâmetros:
+        text (str): Texto a medir.
+        model (str, opcional): Modelo de destino (nome OpenRouter/OpenAI), para usar o tokenizer dele.
+
+    Retorna:
+        int: Número de tokens (exato com tiktoken, estimado sem ele).
+    """
+    if not text:
+        return 0
+    encoding = (_get_model_encoding(model) if model else None) or _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return estimate_tokens(text)
+
+
+def get_token_counter(model: Optional[str] = None) -> Callable[[str], int]:
+    """Função de contagem de tokens fixada num modelo de destino"""
+    return lambda text: count_tokens(text, model)
@@ -0,0 +1,353 @@
+"""
+Índice vetorial persistente para busca por similaridade de cosseno.
+
+Os embeddings são normalizados (L2) antes de entrar no índice, então o
+produto interno é o cosseno. Cada vetor tem um id estável derivado do id do
+chunk (IndexIDMap), o que permite remover chunks e recarregar o índice do
+disco sem reconstruí-lo a partir dos documentos.
+
+O tipo do índice FAISS é escolhido pelo tamanho do corpus quando
+`index_type="auto"`:
+
+    < FLAT_MAX_VECTORS      Flat  (busca exata)
+    < HNSW_MAX_VECTORS      HNSW  (grafo; sem treino)
+    acima disso             IVF   (listas invertidas; treinado nos vetores)
+
+Sem faiss instalado, a busca exata é feita com NumPy (mesma interface).
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import faiss
+
+    FAISS_AVAILABLE = True
+except ImportError:
+    faiss = None
+    FAISS_AVAILABLE = False
+
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+FLAT_MAX_VECTORS = 20_000
+HNSW_MAX_VECTORS = 1_000_000
+
+_INDEX_FILE = "index.faiss"
+_VECTORS_FILE = "vectors.npy"
+_RECORDS_FILE = "records.json"
+_META_FILE = "meta.json"
+
+
+def int64_id(doc_id: str) -> int:
+    """Id numérico estável (63 bits) para o id textual de um chunk"""
+    digest = hashlib.sha256(doc_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") & 0x7FFF_FFFF_FFFF_FFFF
+
+
+def normalize_embeddings(embeddings: Any) -> np.ndarray:
+    """Converte para float32 (n, d) com norma L2 unitária por linha"""
+    matrix = np.asarray(embeddings, dtype="float32")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype="float32")
+
+
+def choose_index_type(vector_count: int) -> str:
+    """Tipo de índice adequado ao tamanho do corpus"""
+    if vector_count < FLAT_MAX_VECTORS:
+        return "flat"
+    if vector_count < HNSW_MAX_VECTORS:
+        return "hnsw"
+    return "ivf"
+
+
+class VectorIndex:
+    """Índice de chunks por id estável, com busca, remoção e persistência"""
+
+    def __init__(self, dimension: int, index_type: str = "auto", hnsw_m: int = 32, hnsw_ef_search: int = 64, ivf_nprobe: int = 16):
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"Tipo de índice inválido: {index_type} (use auto, {', '.join(INDEX_TYPES)})")
+        self.dimension = dimension
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.ivf_nprobe = ivf_nprobe
+
+        # Vetores normalizados e registros, alinhados por posição; ids numéricos -> posição
+        self._vectors = np.zeros((0, dimension), dtype="float32")
+        self._ids: List[int] = []
+        self._records: List[Dict[str, Any]] = []
+        self._positions: Dict[int, int] = {}
+
+        self._index = None
+        self._built_type: Optional[str] = None
+        self._trained_size = 0
+        self._needs_rebuild = True
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return int64_id(doc_id) in self._positions
+
+    @property
+    def active_type(self) -> str:
+        """Tipo efetivamente usado na busca ("numpy" sem faiss)"""
+        if not FAISS_AVAILABLE:
+            return "numpy"
+        return self.index_type if self.index_type != "auto" else choose_index_type(len(self))
+
+    def add(self, records: Sequence[Dict[str, Any]], embeddings: Any) -> int:
+        """
+        Adiciona chunks ao índice; ids já presentes são ignorados.
+
+        Parâmetros:
+            records (Sequence[Dict]): Chunks {'id', 'content', 'metadata'}; `id` é obrigatório.
+            embeddings: Matriz (n, d) com os embeddings dos chunks, na mesma ordem.
+
+        Retorna:
+            int: Quantidade de chunks efetivamente adicionados.
+        """
+        vectors = normalize_embeddings(embeddings)
+        if len(records) != len(vectors):
+            raise ValueError(f"{len(records)} registros para {len(vectors)} embeddings")
+
+        new_ids, new_rows, new_records = [], [], []
+        seen = set()
+        for row, record in enumerate(records):
+            numeric_id = int64_id(record["id"])
+            if numeric_id in self._positions or numeric_id in seen:
+                continue
+            seen.add(numeric_id)
+            new_ids.append(numeric_id)
+            new_rows.append(row)
+            new_records.append(dict(record))
+        if not new_ids:
+            return 0
+
+        added = vectors[new_rows]
+        start = len(self._ids)
+        self._vectors = np.vstack([self._vectors, added])
+        for offset, numeric_id in enumerate(new_ids):
+            self._positions[numeric_id] = start + offset
+        self._ids.extend(new_ids)
+        self._records.extend(new_records)
+
+        if self._index is not None and not self._needs_rebuild and self.active_type == self._built_type:
+            if self._built_type == "ivf" and len(self) > 2 * self._trained_size:
+                # Centroides treinados num corpus bem menor: retreina
+                self._needs_rebuild = True
+            else:
+                self._index.add_with_ids(added, np.asarray(new_ids, dtype="int64"))
+        else:
+            self._needs_rebuild = True
+        return len(new_ids)
+
+    def remove(self, doc_ids: Iterable[str]) -> int:
+        """Remove chunks pelo id textual; retorna quantos existiam"""
+        numeric_ids = [
+            numeric_id for numeric_id in dict.fromkeys(int64_id(doc_id) for doc_id in doc_ids)
+            if numeric_id in self._positions
+        ]
+        if not numeric_ids:
+            return 0
+
+        for numeric_id in numeric_ids:
+            # Troca com o último para remover em O(1) das estruturas paralelas
+            position = self._positions.pop(numeric_id)
+            last = len(self._ids) - 1
+            if position != last:
+                last_id = self._ids[last]
+                self._vectors[position] = self._vectors[last]
+                self._ids[position] = last_id
+                self._records[position] = self._records[last]
+                self._positions[last_id] = position
+            self._vectors = self._vectors[:last]
+            self._ids.pop()
+            self._records.pop()
+
+        if self._index is not None and not self._needs_rebuild and self._built_type in ("flat", "ivf"):
+            self._index.remove_ids(np.asarray(numeric_ids, dtype="int64"))
+        else:
+            # HNSW não suporta remoção: reconstrói na próxima busca
+            self._needs_rebuild = True
+        return len(numeric_ids)
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        position = self._positions.get(int64_id(doc_id))
+        return dict(self._records[position]) if position is not None else None
+
+    def _build(self) -> None:
+        index_type = self.active_type
+        count = len(self)
+        if index_type == "numpy" or count == 0:
+            self._index = None
+        else:
+            if index_type == "hnsw":
+                base = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+                base.hnsw.efSearch = self.hnsw_ef_search
+            elif index_type == "ivf":
+                nlist = max(1, min(int(4 * math.sqrt(count)), count // 39 or 1))
+                quantizer = faiss.IndexFlatIP(self.dimension)
+                base = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+                base.train(self._vectors)
+                base.nprobe = min(self.ivf_nprobe, nlist)
+                self._trained_size = count
+            else:
+                base = faiss.IndexFlatIP(self.dimension)
+            self._index = faiss.IndexIDMap(base)
+            self._index.add_with_ids(self._vectors, np.asarray(self._ids, dtype="int64"))
+            logger.info(f"Índice vetorial {index_type} construído com {count} vetores")
+        self._built_type = index_type
+        self._needs_rebuild = False
+
+    def search(self, query_embedding: Any, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Busca os k chunks mais similares (cosseno).
+
+        Parâmetros:
+            query_embedding: Embedding da consulta (d,) ou (1, d); é normalizado aqui.
+            k (int): Número de resultados.
+
+        Retorna:
+            List[Dict]: Cópias dos registros com `similarity_score`, do mais ao menos similar.
+        """
+        if not self._ids or k <= 0:
+            return []
+        if self._needs_rebuild or self._built_type != self.active_type:
+            self._build()
+        query = normalize_embeddings(query_embedding)[:1]
+        k = min(k, len(self))
+
+        if self._index is None:
+            scores = self._vectors @ query[0]
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            hits = [(self._ids[position], float(scores[position])) for position in top]
+        else:
+            scores, ids = self._index.search(query, k)
+            hits = [(int(numeric_id), float(score)) for numeric_id, score in zip(ids[0], scores[0]) if numeric_id != -1]
+
+        results = []
+        for numeric_id, score in hits:
+            position = self._positions.get(numeric_id)
+            if position is None:
+                continue
+            record = dict(self._records[position])
+            record["similarity_score"] = score
+            results.append(record)
+        return results
+
+    def save(self, directory: str) -> None:
+        """Grava índice, vetores e registros em `directory` (substituição atômica por arquivo)"""
+        os.makedirs(directory, exist_ok=True)
+        if self._needs_rebuild or self._built_type != self.active_type:
+            self._build()
+
+        def _atomic(name: str, write) -> None:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            os.close(fd)
+            try:
+                write(tmp_path)
+                os.replace(tmp_path, os.path.join(directory, name))
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+
+        def _write_json(data):
+            def write(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+            return write
+
+        def _write_vectors(path):
+            with open(path, "wb") as f:
+                np.save(f, self._vectors)
+
+        _atomic(_VECTORS_FILE, _write_vectors)
+        _atomic(_RECORDS_FILE, _write_json(self._records))
+        if self._index is not None:
+            _atomic(_INDEX_FILE, lambda path: faiss.write_index(self._index, path))
+        elif os.path.exists(os.path.join(directory, _INDEX_FILE)):
+            os.unlink(os.path.join(directory, _INDEX_FILE))
+        # meta.json por último: marca um conjunto completo
+        _atomic(_META_FILE, _write_json({
+            "dimension": self.dimension,
+            "index_type": self.index_type,
+            "built_type": self._built_type,
+            "count": len(self),
+        }))
+        logger.info(f"Índice vetorial salvo em {directory} ({len(self)} vetores, {self._built_type})")
+
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> "VectorIndex":
+        """
+        Carrega um índice salvo com `save`.
+
+        Parâmetros:
+            directory (str): Diretório do índice.
+            **kwargs: Parâmetros do construtor (ex.: index_type) que sobrepõem os salvos.
+
+        Retorna:
+            VectorIndex: Índice pronto para busca.
+
+        Lança:
+            ValueError: Se vetores, registros e meta.json não forem do mesmo conjunto
+                (ex.: gravação interrompida no meio de `save`).
+        """
+        with open(os.path.join(directory, _META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        kwargs.setdefault("index_type", meta["index_type"])
+        index = cls(meta["dimension"], **kwargs)
+        index._vectors = np.load(os.path.join(directory, _VECTORS_FILE)).astype("float32")
+        with open(os.path.join(directory, _RECORDS_FILE), "r", encoding="utf-8") as f:
+            index._records = json.load(f)
+        vectors_shape = index._vectors.shape
+        if len(vectors_shape) != 2 or vectors_shape[0] != len(index._records) or vectors_shape[1] != index.dimension \
+                or len(index._records) != meta.get("count", len(index._records)):
+            raise ValueError(
+                f"Índice em {directory} inconsistente: {len(index._records)} registros, vetores {vectors_shape}, "
+                f"meta.json com {meta.get('count')} vetores de dimensão {index.dimension}"
+            )
+        index._ids = [int64_id(record["id"]) for record in index._records]
+        index._positions = {numeric_id: position for position, numeric_id in enumerate(index._ids)}
+
+        index_path = os.path.join(directory, _INDEX_FILE)
+        if FAISS_AVAILABLE and os.path.exists(index_path) and meta.get("built_type") == index.active_type:
+            faiss_index = faiss.read_index(index_path)
+            if faiss_index.ntotal == len(index) and faiss_index.d == index.dimension:
+                index._index = faiss_index
+                index._built_type = meta["built_type"]
+                index._trained_size = len(index) if index._built_type == "ivf" else 0
+                index._needs_rebuild = False
+            else:
+                # index.faiss de outra gravação: reconstruído a partir dos vetores na primeira busca
+                logger.warning(
+                    f"index.faiss em {directory} tem {faiss_index.ntotal} vetores, esperado {len(index)}; reconstruindo"
+                )
+        logger.info(f"Índice vetorial carregado de {directory}: {len(index)} vetores")
+        return index
+
+    @classmethod
+    def load_or_create(cls, directory: str, dimension: int, **kwargs) -> "VectorIndex":
+        """Carrega de `directory` se houver um índice compatível salvo; senão cria um vazio"""
+        if os.path.exists(os.path.join(directory, _META_FILE)):
+            try:
+                index = cls.load(directory, **kwargs)
+                if index.dimension == dimension:
+                    return index
+                logger.warning(f"Índice em {directory} tem dimensão {index.dimension}, esperado {dimension}; recriando")
+            except Exception as e:
+                logger.error(f"Erro ao carregar índice vetorial de {directory}: {e}")
+        return cls(dimension, **kwargs)
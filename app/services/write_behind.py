@@ -0,0 +1,270 @@
+"""
+Buffer write-behind para gravações que não precisam bloquear a resposta.
+
+`add` só enfileira o registro em memória e retorna; uma thread de fundo grava
+em lotes (`write_batch`, ex.: `insert_many` do Astra DB) quando a fila
+atinge `max_batch` itens ou quando `flush_interval` segundos se passam desde
+o primeiro item pendente.
+
+Se o lote falhar (banco fora do ar, timeout), os registros são anexados a um
+arquivo local JSON Lines (`spill_path`) em vez de descartados. Na próxima
+gravação bem-sucedida, o arquivo é reenviado ao banco e apagado; linhas
+ilegíveis (ex.: a última, cortada por uma queda) vão para `<spill_path>.corrupt`
+em vez de travar o reenvio. Um lote pode falhar depois de gravar parte dos
+registros; com ids estáveis nos registros e `already_written` reconhecendo a
+falha de id duplicado, o reenvio é idempotente. Com a fila cheia, registros
+novos vão direto para o arquivo. Em `close` (registrado com atexit pelos
+getters) a fila é esvaziada antes de o processo sair.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.metrics import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+BatchWriter = Callable[[List[Dict[str, Any]]], Any]
+# Reconhece a exceção de um lote cujos registros já estão todos no banco
+WrittenCheck = Callable[[Exception], bool]
+
+_metrics = get_metrics_registry()
+write_behind_records_total = _metrics.counter(
+    "write_behind_records_total", "Registros do buffer write-behind por destino (written, spilled, replayed, corrupt)", ["queue", "result"]
+)
+write_behind_flush_duration = _metrics.histogram(
+    "write_behind_flush_duration_seconds", "Duração das gravações em lote do buffer write-behind", ["queue"]
+)
+
+
+class WriteBehindBuffer:
+    """Fila em memória gravada em lotes por uma thread de fundo, com transbordo em arquivo"""
+
+    def __init__(
+        self,
+        write_batch: BatchWriter,
+        spill_path: str,
+        name: str = "write_behind",
+        max_batch: int = 100,
+        flush_interval: float = 2.0,
+        max_queue: int = 10000,
+        already_written: Optional[WrittenCheck] = None,
+    ):
+        """
+        Parâmetros:
+            write_batch (Callable): Grava uma lista de registros; deve lançar exceção se falhar.
+            spill_path (str): Arquivo JSON Lines para os registros que não puderam ser gravados.
+            name (str): Nome da fila nas métricas e na thread.
+            max_batch (int): Registros por lote; uma fila desse tamanho dispara a gravação.
+            flush_interval (float): Espera máxima, em segundos, de um registro na fila.
+            max_queue (int): Registros em memória; acima disso, vão direto para o arquivo.
+            already_written (Callable, opcional): Exceção -> True se o lote já estava gravado
+                (ex.: todos os ids duplicados num reenvio); o lote conta como gravado.
+        """
+        self.write_batch = write_batch
+        self.already_written = already_written
+        self.spill_path = spill_path
+        self.name = name
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._closed = False
+        self._first_pending_at: Optional[float] = None
+        self._recover_interrupted_replay()
+        _metrics.register_queue(name, lambda: len(self._queue))
+        self._thread = threading.Thread(target=self._run, name=f"{name}-flusher", daemon=True)
+        self._thread.start()
+
+    @property
+    def _replaying_path(self) -> str:
+        return f"{self.spill_path}.replaying"
+
+    @property
+    def _corrupt_path(self) -> str:
+        return f"{self.spill_path}.corrupt"
+
+    def _read_spill(self, path: str) -> List[Dict[str, Any]]:
+        """Registros do arquivo; linhas ilegíveis (ex.: cortadas por uma queda) vão para `.corrupt`"""
+        records, corrupt = [], []
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict):
+                    records.append(record)
+                else:
+                    corrupt.append(line.rstrip("\n") + "\n")
+        if corrupt:
+            logger.error(f"{self.name}: {len(corrupt)} linhas ilegíveis em {path} movidas para {self._corrupt_path}")
+            try:
+                with open(self._corrupt_path, "a", encoding="utf-8") as f:
+                    f.writelines(corrupt)
+            except OSError as e:
+                logger.error(f"{self.name}: não foi possível gravar {self._corrupt_path}: {e}")
+            write_behind_records_total.inc(len(corrupt), queue=self.name, result="corrupt")
+        return records
+
+    def _recover_interrupted_replay(self) -> None:
+        # Processo encerrado no meio de um reenvio: os registros voltam para o transbordo
+        if not os.path.exists(self._replaying_path):
+            return
+        with open(self._replaying_path, "r", encoding="utf-8") as src, open(self.spill_path, "a", encoding="utf-8") as dst:
+            dst.write(src.read())
+        os.unlink(self._replaying_path)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """Enfileira um registro para gravação (não bloqueia em I/O, exceto com a fila cheia)"""
+        with self._condition:
+            if self._closed or len(self._queue) >= self.max_queue:
+                overflow = True
+            else:
+                overflow = False
+                self._queue.append(record)
+                # Acorda a thread no primeiro item (arma o prazo) e quando o lote enche
+                if self._first_pending_at is None:
+                    self._first_pending_at = time.monotonic()
+                    self._condition.notify()
+                elif len(self._queue) >= self.max_batch:
+                    self._condition.notify()
+        if overflow:
+            self._spill([record])
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._queue and len(batch) < self.max_batch:
+            batch.append(self._queue.popleft())
+        self._first_pending_at = time.monotonic() if self._queue else None
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            try:
+                with self._condition:
+                    while not self._closed:
+                        if len(self._queue) >= self.max_batch:
+                            break
+                        if self._first_pending_at is not None:
+                            remaining = self._first_pending_at + self.flush_interval - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            self._condition.wait(remaining)
+                        else:
+                            self._condition.wait()
+                    if self._closed and not self._queue:
+                        return
+                    batch = self._take_batch()
+                if batch:
+                    self._write(batch)
+            except Exception as e:
+                # A thread de fundo nunca morre: sem ela, a fila só cresceria em memória
+                logger.error(f"{self.name}: erro inesperado na thread de gravação: {e}", exc_info=True)
+                time.sleep(min(self.flush_interval, 1.0))
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            if self.already_written is None or not self.already_written(e):
+                raise
+            logger.info(f"{self.name}: lote de {len(batch)} registros já estava gravado")
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        try:
+            self._write_batch(batch)
+        except Exception as e:
+            logger.warning(f"{self.name}: falha ao gravar {len(batch)} registros, transbordando para {self.spill_path}: {e}")
+            self._spill(batch)
+            return False
+        finally:
+            write_behind_flush_duration.observe(time.perf_counter() - started, queue=self.name)
+        write_behind_records_total.inc(len(batch), queue=self.name, result="written")
+        # O banco voltou: reenvia o que ficou no arquivo
+        self.replay_spill()
+        return True
+
+    def _spill(self, records: List[Dict[str, Any]]) -> None:
+        with self._spill_lock:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.error(f"{self.name}: {len(records)} registros perdidos; não foi possível gravar {self.spill_path}: {e}")
+                return
+        write_behind_records_total.inc(len(records), queue=self.name, result="spilled")
+
+    def replay_spill(self) -> int:
+        """
+        Reenvia ao banco os registros do arquivo de transbordo.
+
+        Retorna:
+            int: Registros reenviados (os que falharem voltam para o arquivo).
+        """
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return 0
+            replaying_path = self._replaying_path
+            if os.path.exists(replaying_path):
+                # Outro reenvio em andamento
+                return 0
+            os.replace(self.spill_path, replaying_path)
+        records = self._read_spill(replaying_path)
+        replayed = 0
+        try:
+            for start in range(0, len(records), self.max_batch):
+                batch = records[start:start + self.max_batch]
+                self._write_batch(batch)
+                replayed += len(batch)
+        except Exception as e:
+            logger.warning(f"{self.name}: reenvio do transbordo interrompido após {replayed} registros: {e}")
+            self._spill(records[replayed:])
+        os.unlink(replaying_path)
+        if replayed:
+            write_behind_records_total.inc(replayed, queue=self.name, result="replayed")
+            logger.info(f"{self.name}: {replayed} registros do transbordo gravados")
+        return replayed
+
+    def flush(self) -> None:
+        """Grava agora tudo o que está na fila (na thread de quem chama)"""
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Para a thread de fundo depois de esvaziar a fila; o que sobrar vai para o arquivo"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join(timeout)
+        with self._condition:
+            leftover = list(self._queue)
+            self._queue.clear()
+        if leftover:
+            logger.warning(f"{self.name}: fila não esvaziada em {timeout}s; {len(leftover)} registros para {self.spill_path}")
+            self._spill(leftover)
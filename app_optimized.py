@@ -13,6 +13,21 @@ import numpy as np
 import hashlib
 import json
 import base64
+import time
+from app.services.metrics import CONFIDENCE_BUCKETS, instrument_flask_app
+from app.services.markdown_chunker import chunk_markdown
+from app.services.synonyms import SynonymRegistry
+from app.services.text_rewriter import DEFAULT_RULES_DIR, rewrite_text
+from app.services.single_flight import SingleFlight, SingleFlightTimeout
+from app.services.context_packer import pack_context
+from app.services.token_utils import get_token_counter
+from app.services.reranker import get_reranker
+from app.services.multi_context_qa import extract_best_answer
+from app.services.sentence_index import SentenceIndex
+from app.services.intent_classifier import get_intent_classifier
+from app.services.session_history import get_session_history, is_valid_session_id, new_session_id
+from app.services.answer_router import ROUTE_FALLBACK, ROUTE_LLM, AnswerRouter, retrieval_coverage, usage_tokens
+from app.services.answer_bank import AnswerBank, compute_fingerprint, load_answer_bank, normalize_question
 
 app = Flask(__name__)
 CORS(app)
@@ -31,6 +46,41 @@ tokenizer = None
 model = None
 embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
 response_cache = {}
+# Perguntas idênticas simultâneas compartilham uma única computação (ex.: turma inteira perguntando o mesmo)
+answer_flights = SingleFlight()
+SINGLE_FLIGHT_TIMEOUT = float(os.environ.get("SINGLE_FLIGHT_TIMEOUT", "30"))
+# Respostas pré-computadas (scripts/build_answer_bank.py); carregadas junto com o corpus
+ANSWER_BANK_PATH = os.environ.get("ANSWER_BANK_PATH", "data/answer_bank.json")
+answer_bank = AnswerBank()
+
+# Métricas expostas em /metrics (formato Prometheus)
+PERSONAS = ['dr_gasnelio', 'ga']
+PERSONA_SPEAKERS = {"dr_gasnelio": "Dr. Gasnelio", "ga": "Gá"}
+
+def _request_persona():
+    data = request.get_json(silent=True) if request.is_json else None
+    return data.get('personality_id', 'dr_gasnelio') if isinstance(data, dict) else None
+
+metrics = instrument_flask_app(app, persona_getter=_request_persona, known_personas=PERSONAS)
+cache_requests_total = metrics.counter('response_cache_requests_total', 'Consultas ao cache de respostas', ['result'])
+openrouter_duration = metrics.histogram('openrouter_request_duration_seconds', 'Latência das chamadas ao OpenRouter', ['model'])
+openrouter_errors_total = metrics.counter('openrouter_errors_total', 'Falhas nas chamadas ao OpenRouter', ['model', 'reason'])
+qa_confidence = metrics.histogram('qa_confidence', 'Distribuição da confiança do modelo QA', ['persona'], buckets=CONFIDENCE_BUCKETS)
+metrics.gauge('response_cache_size', 'Entradas no cache de respostas').set_function(lambda: len(response_cache))
+answer_bank_hits_total = metrics.counter('answer_bank_hits_total', 'Respostas servidas do banco pré-computado', ['persona'])
+coalesced_requests_total = metrics.counter('response_coalesced_requests_total', 'Requisições que aguardaram uma computação idêntica em andamento', ['result'])
+metrics.gauge('response_in_flight', 'Perguntas distintas sendo respondidas agora').set_function(answer_flights.in_flight)
+
+def _cache_hit_ratio():
+    hits = cache_requests_total.get(result='hit')
+    total = hits + cache_requests_total.get(result='miss')
+    return hits / total if total else 0.0
+
+metrics.gauge('response_cache_hit_ratio', 'Proporção de acertos no cache de respostas').set_function(_cache_hit_ratio)
+
+# Saudações e conversa fiada respondidas por template, antes do banco de respostas e do RAG
+intent_classifier = get_intent_classifier(embed=embedding_model.encode)
+metrics.gauge('intent_short_circuit_ratio', 'Proporção das mensagens respondidas por template de intenção').set_function(intent_classifier.short_circuit_ratio)
 
 # Três chaves e modelos
 OPENROUTER_API_KEY_LLAMA = os.environ.get("OPENROUTER_API_KEY_LLAMA", "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")
@@ -39,6 +89,37 @@ OPENROUTER_API_KEY_GEMINI = os.environ.get("OPENROUTER_API_KEY_GEMINI", "sk-or-v
 LLAMA3_MODEL = "meta-llama/llama-3.3-70b-instruct:free"
 QWEN_MODEL = "qwen/qwen3-14b:free"
 GEMINI_MODEL = "google/gemini-2.0-flash-exp:free"
+# Permite apontar para o servidor simulado (app/services/mock_llm_server.py) em testes de carga
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+# Orçamentos de contexto, em tokens: QA extrativo local e prompts enviados ao OpenRouter
+QA_CONTEXT_TOKENS = int(os.environ.get("QA_CONTEXT_TOKENS", "200"))
+LLM_CONTEXT_TOKENS = int(os.environ.get("LLM_CONTEXT_TOKENS", "1500"))
+# Reordenação opcional com cross-encoder: RERANK_CANDIDATES chunks por palavras-chave -> RERANK_TOP_K
+RERANK_ENABLED = os.environ.get("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", "50"))
+RERANK_TOP_K = int(os.environ.get("RERANK_TOP_K", "5"))
+RERANK_LATENCY_BUDGET_MS = float(os.environ.get("RERANK_LATENCY_BUDGET_MS", "150"))
+# Modelos locais: QA extrativo e geração que reescreve o span encontrado
+QA_MODEL = "deepset/roberta-base-squad2"
+GENERATION_MODEL = "microsoft/DialoGPT-medium"
+# Tamanho máximo (tokens) dos chunks por seção do Markdown
+MD_CHUNK_TOKENS = 200
+# Chunks inteiros avaliados pelo QA extrativo (cada um em janelas de tokens)
+QA_TOP_CHUNKS = int(os.environ.get("QA_TOP_CHUNKS", "5"))
+# Roteamento: QA local quando confiante, LLM remoto (OpenRouter) só quando necessário
+answer_router = AnswerRouter(
+    qa_threshold=float(os.environ.get("ROUTER_QA_THRESHOLD", "0.5")),
+    retrieval_threshold=float(os.environ.get("ROUTER_RETRIEVAL_THRESHOLD", "0.5")),
+    llm_enabled=os.environ.get("LLM_ROUTING_ENABLED", "true").lower() in ("1", "true", "yes"),
+    cost_per_1k_tokens=float(os.environ.get("LLM_COST_PER_1K_TOKENS", "0")),
+)
+# Últimos turnos de cada sessão em memória; os mais recentes que cabem no orçamento vão ao LLM
+HISTORY_TOKEN_BUDGET = int(os.environ.get("HISTORY_TOKEN_BUDGET", "600"))
+session_history = get_session_history(
+    max_turns=int(os.environ.get("HISTORY_MAX_TURNS", "20")),
+    max_bytes=int(os.environ.get("HISTORY_MAX_BYTES", "16384")),
+    max_sessions=int(os.environ.get("HISTORY_MAX_SESSIONS", "1000")),
+)
 
 # Templates de linguagem natural para cada persona
 NATURAL_TEMPLATES = {
@@ -67,6 +148,17 @@ NATURAL_TEMPLATES = {
             "Essa questão é interessante, mas não encontrei dados específicos na tese. Sugiro consultar:",
             "Não tenho informações detalhadas sobre isso na pesquisa, mas posso orientar para:",
             "Essa área não foi coberta especificamente na tese, mas posso sugerir:"
+        ],
+        "thanks": [
+            "Por nada. Fico à disposição para outras dúvidas sobre a dispensação na hanseníase.",
+            "Disponha. Se surgir outra questão sobre o roteiro de dispensação, é só perguntar."
+        ],
+        "farewell": [
+            "Até breve. Bons estudos e boa prática na farmácia clínica.",
+            "Foi um prazer auxiliá-lo. Até a próxima consulta."
+        ],
+        "capabilities": [
+            "Posso esclarecer dúvidas sobre o roteiro de dispensação para hanseníase: esquemas de poliquimioterapia (PQT-U), doses, reações adversas, interações e orientações ao paciente. Qual é a sua dúvida?"
         ]
     },
     "ga": {
@@ -94,6 +186,17 @@ NATURAL_TEMPLATES = {
             "Ih, essa eu não sei certinho, mas posso te ajudar a procurar!",
             "Não achei essa informação específica, mas posso te orientar!",
             "Essa parte não tá muito clara na tese, mas vamos ver o que tem!"
+        ],
+        "thanks": [
+            "Imagina! Tô aqui pra isso. Se pintar outra dúvida, é só chamar! 😊",
+            "De nada! Qualquer coisa sobre os remédios, fala comigo!"
+        ],
+        "farewell": [
+            "Tchau! Se cuida e toma o remédio direitinho, hein! 😊",
+            "Até mais! Volta sempre que precisar!"
+        ],
+        "capabilities": [
+            "Eu te ajudo a entender o tratamento da hanseníase: como tomar os remédios, o que é normal sentir, o que não pode misturar... Pode perguntar!"
         ]
     }
 }
@@ -111,31 +214,30 @@ DEFAULT_SYNONYMS = {
 
 # Carrega sinônimos do arquivo externo ou usa padrão
 
-def load_synonyms():
+def load_synonyms(strict=False):
     try:
         with open(SYNONYM_PATH, 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception as e:
+        if strict:
+            raise
         logger.warning(f'Não foi possível carregar {SYNONYM_PATH}: {e}. Usando dicionário padrão.')
         return DEFAULT_SYNONYMS.copy()
 
-synonyms = load_synonyms()
+# Matcher compilado (Aho-Corasick); recargas trocam a instância atomicamente
+synonym_registry = SynonymRegistry(load_synonyms())
 
-# Função para recarregar manualmente (pode ser chamada por endpoint futuro)
 def reload_synonyms():
-    global synonyms
-    synonyms = load_synonyms()
+    """Recarrega o arquivo de sinônimos e retorna a nova versão"""
+    # strict: um arquivo inválido gera erro e mantém o dicionário vigente
+    version = synonym_registry.reload(load_synonyms(strict=True))
     logger.info('Dicionário de sinônimos recarregado.')
+    return version
 
-def expand_query_with_synonyms(question):
-    expanded_terms = [question.lower()]
-    for term, syns in synonyms.items():
-        if term in question.lower():
-            for synonym in syns:
-                expanded_question = question.lower().replace(term, synonym)
-                if expanded_question not in expanded_terms:
-                    expanded_terms.append(expanded_question)
-    return expanded_terms
+def expand_query_with_synonyms(question, matcher=None):
+    """Termos equivalentes (termos do dicionário e sinônimos) encontrados na pergunta"""
+    matcher = matcher or synonym_registry.current
+    return matcher.expand(question)
 
 def extract_md_text(md_path):
     """Extrai texto do arquivo Markdown"""
@@ -154,7 +256,7 @@ def load_ai_models():
     global qa_pipeline, text_generation_pipeline, sentiment_pipeline, tokenizer, model
     try:
         # Modelo principal para QA (mais robusto)
-        model_name = "deepset/roberta-base-squad2"
+        model_name = QA_MODEL
         logger.info(f"Carregando modelo QA: {model_name}")
         
         qa_pipeline = pipeline(
@@ -165,7 +267,7 @@ def load_ai_models():
         )
         
         # Modelo para geração de texto (mais natural)
-        generation_model = "microsoft/DialoGPT-medium"
+        generation_model = GENERATION_MODEL
         logger.info(f"Carregando modelo de geração: {generation_model}")
         
         text_generation_pipeline = pipeline(
@@ -196,7 +298,7 @@ def load_ai_models():
         try:
             qa_pipeline = pipeline(
                 "question-answering",
-                model="deepset/roberta-base-squad2",
+                model=QA_MODEL,
                 device=-1 if not torch.cuda.is_available() else 0
             )
         except Exception as e2:
@@ -216,23 +318,38 @@ def get_natural_phrase(persona, category, confidence_level="medium"):
         return random.choice(category_templates)
     return ""
 
-def find_relevant_context_enhanced(question, full_text, max_length=800):
-    """Encontra contexto mais relevante usando múltiplas estratégias"""
-    # Divide o texto em chunks menores com overlap
-    chunks = []
-    chunk_size = 1000  # Aumentado para pegar mais contexto
-    overlap = 300      # Aumentado o overlap
-    
-    for i in range(0, len(full_text), chunk_size - overlap):
-        chunk = full_text[i:i + chunk_size]
-        if chunk.strip():
-            chunks.append(chunk)
-    
-    if len(chunks) <= 2:
-        return full_text[:max_length]
-    
+# Chunks estruturais do Markdown, recalculados só quando o texto muda
+_md_chunks_cache = {'text': None, 'chunks': []}
+
+def get_md_chunks(full_text):
+    """Retorna os chunks (por seção) do texto, calculando uma única vez por conteúdo"""
+    if _md_chunks_cache['text'] is not full_text and _md_chunks_cache['text'] != full_text:
+        chunks = [chunk['content'] for chunk in chunk_markdown(full_text, max_tokens=MD_CHUNK_TOKENS)]
+        _md_chunks_cache['chunks'] = chunks
+        _md_chunks_cache['text'] = full_text
+        logger.info(f"Markdown dividido em {len(chunks)} chunks por seção")
+    return _md_chunks_cache['chunks']
+
+_sentence_index_cache = {'text': None, 'index': None}
+
+def get_sentence_index(full_text):
+    """Índice de frases dos parágrafos do texto (fallback), montado uma única vez por conteúdo"""
+    if _sentence_index_cache['text'] is not full_text and _sentence_index_cache['text'] != full_text:
+        paragraphs = [paragraph for paragraph in full_text.split('\n\n') if len(paragraph.strip()) >= 50]
+        embed = embedding_model.encode if embedding_model is not None else None
+        _sentence_index_cache['index'] = SentenceIndex(paragraphs, embed=embed)
+        _sentence_index_cache['text'] = full_text
+    return _sentence_index_cache['index']
+
+def rank_relevant_chunks(question, chunks, synonym_matcher=None):
+    """Chunks relevantes para a pergunta, do mais ao menos relevante (palavras-chave + sinônimos, reordenação opcional)"""
     # Busca por palavras-chave na pergunta
     question_words = set(re.findall(r'\w+', question.lower()))
+    # Palavras de sinônimos dos termos encontrados contam com meio peso
+    synonym_words = set()
+    for term in expand_query_with_synonyms(question, synonym_matcher):
+        synonym_words.update(re.findall(r'\w+', term.lower()))
+    synonym_words -= question_words
     
     chunk_scores = []
     
@@ -240,6 +357,8 @@ def find_relevant_context_enhanced(question, full_text, max_length=800):
         chunk_words = set(re.findall(r'\w+', chunk.lower()))
         common_words = question_words.intersection(chunk_words)
         score = len(common_words) / len(question_words) if question_words else 0
+        if synonym_words and question_words:
+            score += 0.5 * len(synonym_words.intersection(chunk_words)) / len(question_words)
         
         # Bônus para chunks que contêm termos médicos específicos
         medical_terms = ['medicamento', 'dose', 'tratamento', 'reação', 'efeito', 'hanseníase', 'clofazimina', 'rifampicina', 'dapsona', 'acompanhamento', 'dispensação', 'paciente']
@@ -249,16 +368,32 @@ def find_relevant_context_enhanced(question, full_text, max_length=800):
         
         chunk_scores.append((chunk, score))
     
-    # Ordena por score e pega os melhores
-    chunk_scores.sort(key=lambda x: x[1], reverse=True)
+    relevant = [(chunk, score) for chunk, score in chunk_scores if score > 0.05]  # Threshold mínimo
+    relevant.sort(key=lambda item: item[1], reverse=True)
+    if RERANK_ENABLED and len(relevant) > 1:
+        reranker = get_reranker(latency_budget_ms=RERANK_LATENCY_BUDGET_MS)
+        relevant = reranker.rerank(question, relevant[:RERANK_CANDIDATES], RERANK_TOP_K)
+    return [chunk for chunk, _ in relevant]
+
+def find_relevant_chunks(question, full_text, top_k=QA_TOP_CHUNKS, synonym_matcher=None):
+    """Os `top_k` chunks mais relevantes, inteiros (o QA percorre cada um em janelas)"""
+    # Chunks alinhados a títulos/parágrafos/listas, sem overlap
+    chunks = get_md_chunks(full_text)
+    if len(chunks) <= 2:
+        return chunks
+    return (rank_relevant_chunks(question, chunks, synonym_matcher) or chunks[:1])[:top_k]
+
+def find_relevant_context_enhanced(question, full_text, max_tokens=QA_CONTEXT_TOKENS, synonym_matcher=None):
+    """Encontra contexto mais relevante usando múltiplas estratégias"""
+    # Chunks alinhados a títulos/parágrafos/listas, sem overlap
+    chunks = get_md_chunks(full_text)
     
-    # Combina os 2 melhores chunks
-    combined_context = ""
-    for chunk, score in chunk_scores[:2]:
-        if score > 0.05:  # Threshold mínimo
-            combined_context += chunk + "\n\n"
+    if len(chunks) <= 2:
+        return pack_context([full_text], max_tokens)
     
-    return combined_context[:max_length] if combined_context else chunks[0][:max_length]
+    # Preenche o orçamento de tokens com os melhores chunks, sem cortar frases
+    relevant = rank_relevant_chunks(question, chunks, synonym_matcher)
+    return pack_context(relevant or [chunks[0]], max_tokens)
 
 def enhance_response_with_generation(base_answer, question, persona):
     """Melhora a resposta usando geração de texto natural"""
@@ -293,63 +428,129 @@ def enhance_response_with_generation(base_answer, question, persona):
         logger.error(f"Erro na geração de texto: {e}")
         return base_answer
 
+def small_talk_response(intent, persona):
+    """Resposta por template para saudações e conversa fiada (sem busca nem modelos)"""
+    # "Quem é você?" é respondido pela apresentação da persona
+    category = "greeting" if intent in ("greeting", "identity") else intent
+    phrase = get_natural_phrase(persona, category) or get_natural_phrase(persona, "greeting")
+    speaker = PERSONA_SPEAKERS.get(persona)
+    return {
+        "answer": f"{speaker} responde:\n\n{phrase}" if speaker else phrase,
+        "persona": persona if speaker else "default",
+        "confidence": "high",
+        "intent": intent
+    }
+
 def answer_question_optimized(question, persona, conversation_history=None):
-    cache_key = f"{persona}_{hashlib.md5(question.encode()).hexdigest()}"
+    intent = intent_classifier.classify(question)
+    if intent is not None:
+        return small_talk_response(intent['intent'], persona)
+
+    banked = answer_bank.lookup(question, persona)
+    if banked is not None:
+        answer_bank_hits_total.inc(persona=persona if persona in PERSONAS else 'other')
+        return banked
+    
+    # Snapshot do dicionário: a mesma versão vale para a chave de cache e a busca
+    matcher = synonym_registry.current
+    cache_key = f"{persona}_{matcher.version}_{hashlib.md5(normalize_question(question).encode()).hexdigest()}"
+    
+    if conversation_history:
+        # Seguimento de conversa: a chave não cobre o histórico, então nem cache nem voo compartilhado
+        # (outra sessão receberia uma resposta montada com o histórico desta, e vice-versa).
+        # Respostas locais não dependem do histórico e ainda podem servir às perguntas sem ele.
+        resposta = _compute_answer(question, persona, matcher, conversation_history)
+        if resposta.get("route") != ROUTE_LLM:
+            response_cache[cache_key] = resposta
+        return resposta
+    
     if cache_key in response_cache:
+        cache_requests_total.inc(result='hit')
         return response_cache[cache_key]
+    cache_requests_total.inc(result='miss')
+    
+    def compute():
+        # A líder anterior pode ter terminado entre a consulta ao cache e a entrada no voo
+        if cache_key in response_cache:
+            return response_cache[cache_key]
+        resposta = _compute_answer(question, persona, matcher)
+        response_cache[cache_key] = resposta
+        return resposta
     
+    try:
+        resposta, shared = answer_flights.do(cache_key, compute, timeout=SINGLE_FLIGHT_TIMEOUT)
+    except SingleFlightTimeout:
+        # Não empilha outra computação cara: responde com o trecho da tese, sem cachear
+        coalesced_requests_total.inc(result='timeout')
+        logger.warning(f"Espera por pergunta idêntica excedeu {SINGLE_FLIGHT_TIMEOUT}s; usando fallback")
+        return enhanced_fallback_response(question, persona, "")
+    if shared:
+        coalesced_requests_total.inc(result='shared')
+    return resposta
+
+def _compute_answer(question, persona, matcher, conversation_history=None):
+    """Executa QA e, se a confiança for baixa, o LLM remoto (com o histórico da conversa); formata a resposta (sem cache)"""
     global qa_pipeline, md_text
     
+    start = time.perf_counter()
+    route, reason, tokens = ROUTE_FALLBACK, "qa_unavailable", 0
     if not qa_pipeline or not md_text:
         resposta = enhanced_fallback_response(question, persona, "")
     else:
         try:
-            # Encontra contexto relevante
-            context = find_relevant_context_enhanced(question, md_text)
-            
-            # Faz a pergunta ao modelo QA
-            result = qa_pipeline(
-                question=question,
-                context=context,
-                max_answer_len=300,
-                handle_impossible_answer=True
-            )
+            # Encontra os chunks relevantes
+            chunks = find_relevant_chunks(question, md_text, synonym_matcher=matcher)
+            context = "\n\n".join(chunks)
             
-            # Acessa os resultados de forma segura
-            if isinstance(result, dict):
-                answer = result.get('answer', '').strip()
-                confidence = result.get('score', 0.0)
-            else:
-                answer = ''
-                confidence = 0.0
+            # QA sobre cada chunk inteiro (janelas com doc_stride), numa única chamada ao modelo
+            result = extract_best_answer(qa_pipeline, question, chunks, max_answer_len=300)
+            answer = result['answer']
+            confidence = result['score']
             
             logger.info(f"Pergunta: {question}")
-            logger.info(f"Confiança QA: {confidence}")
+            logger.info(f"Confiança QA: {confidence} (chunk {result['chunk_id']})")
+            qa_confidence.observe(confidence, persona=persona if persona in PERSONAS else 'other')
             logger.info(f"Resposta base: {answer}")
             
-            # Determina o nível de confiança
-            if confidence > 0.6:
-                confidence_level = "high"
-            elif confidence > 0.3:
-                confidence_level = "medium"
-            else:
-                confidence_level = "low"
+            route, reason = answer_router.decide(confidence, retrieval_coverage(question, chunks), bool(answer))
+            if route == ROUTE_LLM:
+                usage = {}
+                llm_result = call_llm_chain(question, context, persona, usage=usage, history=conversation_history)
+                tokens = usage_tokens(usage)
+                if llm_result is not None:
+                    llm_answer, llm_model = llm_result
+                    resposta = format_llm_answer(llm_answer, persona, llm_model)
+                else:
+                    # Todos os modelos falharam: fica com o que o QA local tem
+                    route, reason = ROUTE_FALLBACK, "llm_failed"
             
-            # Se a confiança for baixa ou resposta vazia, usa fallback aprimorado
-            if not answer or confidence < 0.2:
-                logger.info("Usando fallback aprimorado - confiança baixa")
-                resposta = enhanced_fallback_response(question, persona, context)
-            else:
-                # Melhora a resposta com geração de texto
-                enhanced_answer = enhance_response_with_generation(answer, question, persona)
+            if route != ROUTE_LLM:
+                # Determina o nível de confiança
+                if confidence > 0.6:
+                    confidence_level = "high"
+                elif confidence > 0.3:
+                    confidence_level = "medium"
+                else:
+                    confidence_level = "low"
                 
-                # Formata com linguagem natural
-                resposta = format_persona_answer_enhanced(enhanced_answer, persona, confidence_level)
+                # Se a confiança for baixa ou resposta vazia, usa fallback aprimorado
+                if not answer or confidence < 0.2:
+                    logger.info("Usando fallback aprimorado - confiança baixa")
+                    resposta = enhanced_fallback_response(question, persona, context)
+                else:
+                    # Melhora a resposta com geração de texto
+                    enhanced_answer = enhance_response_with_generation(answer, question, persona)
+                    
+                    # Formata com linguagem natural
+                    resposta = format_persona_answer_enhanced(enhanced_answer, persona, confidence_level)
+                    resposta["source_chunk"] = result['chunk_id']
         except Exception as e:
             logger.error(f"Erro ao processar pergunta: {e}")
+            route, reason = ROUTE_FALLBACK, "error"
             resposta = enhanced_fallback_response(question, persona, "")
     
-    response_cache[cache_key] = resposta
+    answer_router.record(route, reason, time.perf_counter() - start, tokens)
+    resposta["route"] = route
     return resposta
 
 def format_persona_answer_enhanced(answer, persona, confidence_level):
@@ -392,43 +593,8 @@ def format_persona_answer_enhanced(answer, persona, confidence_level):
 
 def transform_for_ga(text):
     """Transforma o texto técnico em linguagem descontraída e explicativa para o Gá"""
-    # Remove aspas e formatações técnicas
-    text = text.replace('"', '').replace('"', '').replace('"', '')
-    
-    # Simplifica termos técnicos
-    replacements = {
-        "dispensação": "entrega do remédio na farmácia",
-        "medicamentos": "remédios",
-        "posologia": "como tomar o remédio",
-        "administração": "como usar o remédio",
-        "reação adversa": "efeito colateral",
-        "interação medicamentosa": "mistura de remédios que pode dar problema",
-        "protocolo": "guia de cuidados",
-        "orientação": "explicação",
-        "adesão": "seguir direitinho o tratamento",
-        "tratamento": "tratamento",
-        "hanseníase": "hanseníase",
-        "paciente": "pessoa que está tratando",
-        "supervisionada": "com alguém olhando junto",
-        "autoadministrada": "a própria pessoa toma sozinha",
-        "prescrição": "receita do médico",
-        "dose": "quantidade do remédio",
-        "contraindicação": "quando não pode usar",
-        "indicação": "quando é recomendado usar",
-        "poliquimioterapia": "mistura de remédios",
-        "rifampicina": "rifampicina",
-        "clofazimina": "clofazimina",
-        "dapsona": "dapsona",
-        "mg": "miligramas",
-        "dose mensal": "remédio que toma uma vez por mês",
-        "dose diária": "remédio que toma todo dia",
-        "supervisionada": "com alguém olhando",
-        "autoadministrada": "a pessoa toma sozinha"
-    }
-    
-    # Aplica as substituições
-    for technical, simple in replacements.items():
-        text = text.replace(technical, simple)
+    # Remove aspas e simplifica termos técnicos (data/rewrite_rules/ga.json), numa passada por estágio
+    text = rewrite_text(text, "ga", stages=("aspas", "termos"))
     
     # Adiciona expressões descontraídas
     casual_expressions = [
@@ -455,20 +621,7 @@ def transform_for_ga(text):
     transformed_text = '. '.join(sentences)
     
     # Adiciona emojis e expressões informais
-    emoji_replacements = {
-        "importante": "importante ⚠️",
-        "cuidado": "cuidado ⚠️",
-        "atenção": "atenção 👀",
-        "lembre": "lembre 💡",
-        "consulte": "consulte 👨‍⚕️",
-        "médico": "médico 👨‍⚕️",
-        "farmacêutico": "farmacêutico 💊",
-        "remédio": "remédio 💊",
-        "tratamento": "tratamento 🏥"
-    }
-    
-    for word, replacement in emoji_replacements.items():
-        transformed_text = transformed_text.replace(word, replacement)
+    transformed_text = rewrite_text(transformed_text, "ga", stages=("emojis",))
     
     return transformed_text
 
@@ -476,29 +629,21 @@ def enhanced_fallback_response(question, persona, context):
     """Fallback aprimorado que retorna trecho relevante do PDF"""
     logger.info("Executando fallback aprimorado")
     
-    # Busca por palavras-chave na pergunta
-    question_words = set(re.findall(r'\w+', question.lower()))
+    if not md_text:
+        return fallback_response(persona, "Informação não encontrada na tese")
     
-    # Divide o contexto em parágrafos
-    paragraphs = context.split('\n\n') if context else md_text.split('\n\n')
-    
-    best_paragraph = None
-    best_score = 0.0
-    
-    for paragraph in paragraphs:
-        if len(paragraph.strip()) < 50:  # Ignora parágrafos muito pequenos
-            continue
-            
-        paragraph_words = set(re.findall(r'\w+', paragraph.lower()))
-        common_words = question_words.intersection(paragraph_words)
-        score = len(common_words) / len(question_words) if question_words else 0
-        
-        if score > best_score:
-            best_score = score
-            best_paragraph = paragraph
+    # Frases mais próximas da pergunta (índice pré-calculado), de preferência nos trechos recuperados
+    index = get_sentence_index(md_text)
+    question_embedding = embedding_model.encode(question) if index.embeddings is not None else None
+    hits = index.search(question, top_k=5, question_embedding=question_embedding,
+                        restrict_chunks=context.split('\n\n') if context else None)
+    # Mesmo critério de antes: a frase precisa ter mais de 10% dos termos da pergunta
+    hits = [hit for hit in hits if hit['overlap'] > 0.1]
+    best_paragraph = index.chunks[hits[0]['chunk_index']] if hits else None
+    best_score = hits[0]['score'] if hits else 0.0
     
     # Se encontrou um parágrafo relevante
-    if best_paragraph and best_score > 0.1:
+    if best_paragraph:
         logger.info(f"Parágrafo relevante encontrado com score: {best_score}")
         
         if persona == "dr_gasnelio":
@@ -507,11 +652,12 @@ def enhanced_fallback_response(question, persona, context):
             
             # Se o parágrafo parece estar cortado, tenta encontrar o contexto completo
             if complete_paragraph.endswith('...') or len(complete_paragraph) < 100:
-                # Busca por parágrafos relacionados
+                # Parágrafos donos das frases mais relevantes
                 related_paragraphs = []
-                for para in paragraphs:
-                    if any(word in para.lower() for word in question_words):
-                        related_paragraphs.append(para.strip())
+                for hit in hits:
+                    paragraph = index.chunks[hit['chunk_index']].strip()
+                    if paragraph not in related_paragraphs:
+                        related_paragraphs.append(paragraph)
                 
                 if related_paragraphs:
                     complete_paragraph = '\n\n'.join(related_paragraphs[:2])  # Pega até 2 parágrafos relacionados
@@ -640,55 +786,109 @@ def fallback_response(persona, reason=""):
             "confidence": "low"
         }
 
-def call_openrouter_model(question, context, persona, model, api_key):
-    url = "https://openrouter.ai/api/v1/chat/completions"
+SYSTEM_PROMPTS = {
+    "dr_gasnelio": "Você é o Dr. Gasnelio, farmacêutico pesquisador, responde de forma técnica, formal e baseada em evidências. Use o contexto abaixo para responder de forma precisa e objetiva.",
+    "ga": "Você é a Gá, uma assistente amigável e didática. Explique de forma simples, acessível e acolhedora, usando o contexto abaixo.",
+}
+
+def answer_bank_fingerprint(corpus):
+    """Corpus e tudo que molda as respostas da rota local (as únicas guardadas no banco): templates das
+    personas, regras do Gá, modelos locais, chunking, busca, reordenação e limiares do roteamento"""
+    with open(DEFAULT_RULES_DIR / 'ga.json', 'r', encoding='utf-8') as f:
+        ga_rules = json.load(f)
+    prompts = {
+        "natural_templates": NATURAL_TEMPLATES,
+        "ga_rules": ga_rules,
+        "models": {"qa": QA_MODEL, "generation": GENERATION_MODEL},
+        "retrieval": {
+            "chunk_max_tokens": MD_CHUNK_TOKENS,
+            "qa_top_chunks": QA_TOP_CHUNKS,
+            "rerank_enabled": RERANK_ENABLED,
+            "rerank_candidates": RERANK_CANDIDATES,
+            "rerank_top_k": RERANK_TOP_K,
+            "rerank_latency_budget_ms": RERANK_LATENCY_BUDGET_MS,
+        },
+        # Outros limiares mudam quais perguntas a rota local responde
+        "router": {
+            "qa_threshold": answer_router.qa_threshold,
+            "retrieval_threshold": answer_router.retrieval_threshold,
+        },
+    }
+    return compute_fingerprint(corpus, prompts)
+
+def call_openrouter_model(question, context, persona, model, api_key, usage=None, history=None):
+    """Resposta do modelo via OpenRouter, ou None em caso de erro; `usage` (dict) acumula os tokens informados
+    e `history` são mensagens de turnos anteriores da conversa"""
+    url = f"{OPENROUTER_BASE_URL}/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
         "HTTP-Referer": "http://localhost:5000",
         "X-Title": "Chatbot Tese Hanseniase"
     }
-    if persona == "dr_gasnelio":
-        system_prompt = (
-            "Você é o Dr. Gasnelio, farmacêutico pesquisador, responde de forma técnica, formal e baseada em evidências. Use o contexto abaixo para responder de forma precisa e objetiva."
-        )
-    else:
-        system_prompt = (
-            "Você é a Gá, uma assistente amigável e didática. Explique de forma simples, acessível e acolhedora, usando o contexto abaixo."
-        )
+    system_prompt = SYSTEM_PROMPTS.get(persona, SYSTEM_PROMPTS["ga"])
+    # Parágrafos do contexto chegam em ordem de relevância; corta repetições e excesso
+    context = pack_context(context.split("\n\n") if context else [], LLM_CONTEXT_TOKENS, count=get_token_counter(model))
     payload = {
         "model": model,
         "messages": [
             {"role": "system", "content": f"{system_prompt}\n\nContexto:\n{context}"},
+            *(history or []),
             {"role": "user", "content": question}
         ]
     }
+    start = time.perf_counter()
     try:
         response = requests.post(url, headers=headers, json=payload, timeout=60)
         if response.status_code != 200:
-            raise Exception(f"Erro OpenRouter: {response.status_code} - {response.text}")
+            openrouter_errors_total.inc(model=model, reason=str(response.status_code))
+            print(f"Erro ao chamar OpenRouter ({model}): Erro OpenRouter: {response.status_code} - {response.text}")
+            return None
         data = response.json()
+        if usage is not None:
+            for key, value in (data.get('usage') or {}).items():
+                if isinstance(value, (int, float)):
+                    usage[key] = usage.get(key, 0) + value
         return data['choices'][0]['message']['content']
     except Exception as e:
+        openrouter_errors_total.inc(model=model, reason=type(e).__name__)
         print(f"Erro ao chamar OpenRouter ({model}): {e}\nResposta: {getattr(e, 'response', None)}")
         return None
+    finally:
+        openrouter_duration.observe(time.perf_counter() - start, model=model)
+
+# Cadeia de modelos remotos, na ordem de preferência
+LLM_CHAIN = [
+    (LLAMA3_MODEL, OPENROUTER_API_KEY_LLAMA),
+    (QWEN_MODEL, OPENROUTER_API_KEY_QWEN),
+    (GEMINI_MODEL, OPENROUTER_API_KEY_GEMINI),
+]
+
+def call_llm_chain(question, context, persona, usage=None, history=None):
+    """Tenta os modelos da cadeia em ordem; retorna (resposta, modelo) ou None se todos falharem"""
+    for model_name, api_key in LLM_CHAIN:
+        resposta = call_openrouter_model(question, context, persona, model_name, api_key, usage=usage, history=history)
+        if resposta:
+            return resposta, model_name
+    return None
 
 # Função principal com fallback (Llama -> Qwen -> Gemini)
 def call_chatbot_with_fallback(question, context, persona):
-    # 1. Llama
-    resposta = call_openrouter_model(question, context, persona, LLAMA3_MODEL, OPENROUTER_API_KEY_LLAMA)
-    if resposta:
-        return resposta
-    # 2. Qwen
-    resposta = call_openrouter_model(question, context, persona, QWEN_MODEL, OPENROUTER_API_KEY_QWEN)
-    if resposta:
-        return resposta
-    # 3. Gemini
-    resposta = call_openrouter_model(question, context, persona, GEMINI_MODEL, OPENROUTER_API_KEY_GEMINI)
-    if resposta:
-        return resposta
+    result = call_llm_chain(question, context, persona)
+    if result:
+        return result[0]
     return "[Erro ao consultar os modelos OpenRouter. Por favor, tente novamente mais tarde.]"
 
+def format_llm_answer(answer, persona, model_name):
+    """Formata a resposta do LLM remoto (o prompt de sistema já aplica o tom da persona)"""
+    speaker = PERSONA_SPEAKERS.get(persona)
+    return {
+        "answer": f"{speaker} responde:\n\n{answer.strip()}" if speaker else answer.strip(),
+        "persona": persona if speaker else "default",
+        "confidence": "medium",
+        "model": model_name
+    }
+
 # Senha de administração (NÃO DEIXAR APARENTE NO CÓDIGO)
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', None) or ''.join([chr(int(x)) for x in ['56','114','49','115','116','48','108']])  # "8r1st0l"
 
@@ -891,7 +1091,14 @@ def chat_api():
             return jsonify({"error": "Pergunta não fornecida"}), 400
         if personality_id not in ['dr_gasnelio', 'ga']:
             return jsonify({"error": "Personalidade inválida"}), 400
-        resposta = answer_question_optimized(question, personality_id, None)
+        # Histórico opcional: sem session_id, cada pergunta é independente; com ele, só ids emitidos por /api/session
+        session_id = data.get('session_id')
+        if session_id is not None and not is_valid_session_id(session_id):
+            return jsonify({"error": "session_id inválido; obtenha um em /api/session"}), 400
+        history = session_history.window(session_id, HISTORY_TOKEN_BUDGET) if session_id else None
+        resposta = answer_question_optimized(question, personality_id, history)
+        if session_id and isinstance(resposta, dict):
+            session_history.record(session_id, question, resposta.get('answer', ''), personality_id)
         # Atualiza analytics
         had_answer = isinstance(resposta, dict) and resposta.get('answer') and resposta.get('answer').strip() != ''
         update_analytics(personality_id, had_answer)
@@ -900,6 +1107,11 @@ def chat_api():
         logger.error(f"Erro na API de chat: {e}")
         return jsonify({"error": "Erro interno do servidor"}), 500
 
+@app.route('/api/session', methods=['POST'])
+def session_api():
+    """Emite um id de sessão opaco para o histórico de conversa do /api/chat"""
+    return jsonify({"session_id": new_session_id()}), 201
+
 # Endpoint protegido para visualizar analytics
 @app.route('/admin/analytics', methods=['GET'])
 def admin_analytics():
@@ -1011,8 +1223,8 @@ def api_info():
             "ga": "Amigo descontraído que explica de forma simples"
         },
         "models": {
-            "qa_model": "deepset/roberta-base-squad2",
-            "generation_model": "microsoft/DialoGPT-medium",
+            "qa_model": QA_MODEL,
+            "generation_model": GENERATION_MODEL,
             "sentiment_model": "cardiffnlp/twitter-roberta-base-sentiment"
         },
         "source": "Roteiro de Dispensação para Hanseníase (Markdown)",
@@ -1034,8 +1246,8 @@ def api_info():
 def api_reload_synonyms():
     """Endpoint para recarregar o dicionário de sinônimos sem reiniciar o app"""
     try:
-        reload_synonyms()
-        return jsonify({"status": "success", "message": "Dicionário de sinônimos recarregado com sucesso."})
+        version = reload_synonyms()
+        return jsonify({"status": "success", "message": "Dicionário de sinônimos recarregado com sucesso.", "version": version})
     except Exception as e:
         logger.error(f"Erro ao recarregar sinônimos: {e}")
         return jsonify({"status": "error", "message": f"Erro ao recarregar sinônimos: {e}"}), 500
@@ -1047,6 +1259,9 @@ if __name__ == '__main__':
     # Carrega o arquivo Markdown
     if os.path.exists(MD_PATH):
         md_text = extract_md_text(MD_PATH)
+        get_md_chunks(md_text)
+        get_sentence_index(md_text)
+        answer_bank = load_answer_bank(ANSWER_BANK_PATH, expected_fingerprint=answer_bank_fingerprint(md_text))
     else:
         logger.warning(f"Arquivo Markdown não encontrado: {MD_PATH}")
         md_text = "Arquivo Markdown não disponível"
@@ -10,6 +10,7 @@ import re
 import logging
 from datetime import datetime
 import requests
+from app.services.text_rewriter import rewrite_text
 
 app = Flask(__name__)
 CORS(app)
@@ -224,22 +225,7 @@ class SimpleHanseniaseChatbot:
     
     def _simplify_text(self, text: str) -> str:
         """Simplifica o texto para o Gá"""
-        replacements = {
-            "dispensação": "entrega de remédios",
-            "medicamentos": "remédios",
-            "posologia": "como tomar",
-            "administração": "como tomar",
-            "reação adversa": "efeito colateral",
-            "interação medicamentosa": "mistura de remédios",
-            "protocolo": "guia",
-            "orientação": "explicação",
-            "adesão": "seguir o tratamento"
-        }
-        
-        for complex_term, simple_term in replacements.items():
-            text = text.replace(complex_term, simple_term)
-        
-        return text
+        return rewrite_text(text, "ga_basico")
     
     def _fallback_response(self, question: str, personality: str) -> dict:
         """Resposta de fallback"""
@@ -22,6 +22,7 @@ from transformers.pipelines import pipeline
 import torch
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from app.services.text_rewriter import rewrite_text
 
 app = Flask(__name__)
 CORS(app)
@@ -259,22 +260,7 @@ class HanseniaseChatbotAdvanced:
     
     def _simplify_text(self, text: str) -> str:
         """Simplifica o texto para o Gá"""
-        replacements = {
-            "dispensação": "entrega de remédios",
-            "medicamentos": "remédios",
-            "posologia": "como tomar",
-            "administração": "como tomar",
-            "reação adversa": "efeito colateral",
-            "interação medicamentosa": "mistura de remédios",
-            "protocolo": "guia",
-            "orientação": "explicação",
-            "adesão": "seguir o tratamento"
-        }
-        
-        for complex_term, simple_term in replacements.items():
-            text = text.replace(complex_term, simple_term)
-        
-        return text
+        return rewrite_text(text, "ga_basico")
     
     def _fallback_response(self, question: str, personality: str) -> dict:
         """Resposta de fallback quando não encontra informação"""
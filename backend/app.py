@@ -28,14 +28,24 @@ app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Raiz do projeto primeiro, para que `app` resolva para o pacote app/ (e não este arquivo)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from chatbot import ChatbotService
 from personas import PersonaManager
+from app.services.metrics import instrument_flask_app
 
 # Inicializa serviços
 chatbot_service = ChatbotService()
 persona_manager = PersonaManager()
 
+# Métricas por rota/persona em /metrics (formato Prometheus)
+instrument_flask_app(
+    app,
+    persona_getter=lambda: (request.get_json(silent=True) or {}).get('persona'),
+    known_personas=['dr_gasnelio', 'ga'],
+)
+
 @app.route('/')
 def index():
     """Página inicial do site"""
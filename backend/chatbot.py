@@ -7,6 +7,7 @@ import logging
 from openai import OpenAI
 from personas import PersonaManager
 from rag_service_openai import RAGService
+from app.services.intent_classifier import get_intent_classifier
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +17,13 @@ class ChatbotService:
     def __init__(self):
         self.persona_manager = PersonaManager()
         self.rag_service = RAGService()
+        # Saudações e conversa fiada não passam pelo RAG nem pelo OpenRouter
+        self.intent_classifier = get_intent_classifier()
         
         # Configuração do cliente OpenRouter
         self.openrouter_client = OpenAI(
             api_key=os.getenv('OPENROUTER_API_KEY'),
-            base_url="https://openrouter.ai/api/v1"
+            base_url=os.getenv('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1")
         )
         
         # Modelo Kimie K2 Free via OpenRouter
@@ -36,6 +39,10 @@ class ChatbotService:
         3. Gera resposta via OpenRouter/Kimie K2
         """
         try:
+            intent = self.intent_classifier.classify(message)
+            if intent is not None:
+                return self.persona_manager.get_persona_small_talk(persona, intent['intent'])
+            
             # 1. Recupera contexto relevante da base de conhecimento
             logger.info(f"Buscando contexto RAG para: {message[:50]}...")
             context = self.rag_service.retrieve_context(message)
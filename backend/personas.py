@@ -12,6 +12,11 @@ class PersonaManager:
                 'type': 'técnica',
                 'description': 'Especialista em farmácia clínica, linguagem culta e profissional',
                 'greeting': 'Saudações! Sou o Dr. Gasnelio. Minha pesquisa foca no roteiro de dispensação para a prática da farmácia clínica. Como posso auxiliá-lo hoje?',
+                'small_talk': {
+                    'thanks': 'Por nada. Fico à disposição para outras dúvidas sobre a dispensação na hanseníase.',
+                    'farewell': 'Até breve. Bons estudos e boa prática na farmácia clínica.',
+                    'capabilities': 'Posso esclarecer dúvidas sobre o roteiro de dispensação para hanseníase: esquemas de poliquimioterapia, doses, reações adversas, interações e orientações ao paciente. Qual é a sua dúvida?'
+                },
                 'system_prompt': '''Você é o Dr. Gasnelio, um especialista em farmácia clínica com foco em roteiros de dispensação. 
                 
 Características da sua personalidade:
@@ -36,6 +41,11 @@ Instruções:
                 'type': 'leiga',
                 'description': 'Amigo virtual, linguagem simples e empática',
                 'greeting': 'Oi! Sou o Gá, seu amigo virtual para tirar dúvidas sobre saúde. Vou tentar explicar as coisas de um jeito bem fácil, tá bom? O que você gostaria de saber?',
+                'small_talk': {
+                    'thanks': 'Imagina! Tô aqui pra isso. Se pintar outra dúvida, é só chamar! 😊',
+                    'farewell': 'Tchau! Se cuida e toma o remédio direitinho, hein! 😊',
+                    'capabilities': 'Eu te ajudo a entender o tratamento da hanseníase: como tomar os remédios, o que é normal sentir, o que não pode misturar... Pode perguntar!'
+                },
                 'system_prompt': '''Você é o Gá, um amigo virtual amigável e empático que explica conceitos de saúde de forma simples.
 
 Características da sua personalidade:
@@ -72,6 +82,14 @@ Instruções:
         
         return self.personas[persona_id]['greeting']
     
+    def get_persona_small_talk(self, persona_id: str, intent: str) -> str:
+        """Retorna a resposta pronta da persona para uma intenção de conversa (saudação, agradecimento...)"""
+        if persona_id not in self.personas:
+            raise ValueError(f"Persona '{persona_id}' não encontrada")
+        
+        # Saudações e "quem é você?" são respondidas pela apresentação da persona
+        return self.personas[persona_id]['small_talk'].get(intent, self.personas[persona_id]['greeting'])
+    
     def get_personas_info(self) -> dict:
         """Retorna informações sobre todas as personas disponíveis"""
         return {
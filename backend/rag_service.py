@@ -4,7 +4,7 @@ Serviço RAG (Retrieval-Augmented Generation) para recuperação de contexto usa
 
 import os
 import logging
-from typing import List
+from typing import Dict, List, Optional
 from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
@@ -92,12 +92,13 @@ class RAGService:
             logger.error(f"Erro ao conectar com Astra DB: {str(e)}")
             return False
     
-    def build_index(self, documents: List[str]) -> bool:
+    def build_index(self, documents: List[str], metadatas: Optional[List[Dict]] = None) -> bool:
         """
         Constrói o índice no Astra DB a partir de uma lista de documentos
         
         Args:
             documents: Lista de strings (chunks da tese)
+            metadatas: Metadados extras por documento (ex.: página de origem)
         """
         try:
             logger.info(f"Construindo índice no Astra DB para {len(documents)} documentos...")
@@ -119,7 +120,8 @@ class RAGService:
                     "metadata": {
                         "chunk_id": i,
                         "length": len(doc),
-                        "source": "tese_doutorado"
+                        "source": "tese_doutorado",
+                        **(metadatas[i] if metadatas else {})
                     }
                 }
                 documents_to_insert.append(doc_data)
@@ -5,9 +5,11 @@ Versão otimizada que usa OpenAI embeddings em vez de SentenceTransformers
 
 import os
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 import openai
 
+from app.services.reindex import content_hash_id
+
 logger = logging.getLogger(__name__)
 
 class RAGService:
@@ -22,7 +24,7 @@ class RAGService:
         
         # Configurações OpenAI
         self.openai_api_key = os.getenv('OPENROUTER_API_KEY')  # Usando OpenRouter
-        self.openai_base_url = "https://openrouter.ai/api/v1"
+        self.openai_base_url = os.getenv('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1")
         
         # Configurações Astra DB
         self.astra_db_token = os.getenv('ASTRA_DB_TOKEN')
@@ -136,7 +138,7 @@ class RAGService:
             docs_to_insert = []
             for i, doc in enumerate(documents):
                 doc_with_embedding = {
-                    "_id": doc.get('id', f"doc_{i}"),
+                    "_id": doc.get('id') or content_hash_id(doc.get('content', '')),
                     "content": doc.get('content', ''),
                     "metadata": doc.get('metadata', {}),
                     "$vector": embeddings[i]
@@ -153,6 +155,68 @@ class RAGService:
             logger.error(f"Erro ao adicionar documentos: {str(e)}")
             return False
     
+    def list_documents(self, source: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Retorna {id: metadados} dos documentos armazenados (opcionalmente de uma fonte)"""
+        try:
+            filter_ = {"metadata.source": source} if source else {}
+            cursor = self.collection.find(filter_, projection={"metadata": True})
+            return {doc["_id"]: doc.get("metadata", {}) for doc in cursor}
+        except Exception as e:
+            logger.error(f"Erro ao listar documentos: {str(e)}")
+            return {}
+    
+    def upsert_documents(self, documents: List[Dict[str, Any]]) -> bool:
+        """Embute e grava documentos, substituindo os que já existem com o mesmo id"""
+        try:
+            if not self.is_initialized:
+                logger.error("RAG Service não inicializado")
+                return False
+            
+            embeddings = self.get_embeddings([doc.get('content', '') for doc in documents])
+            if len(embeddings) != len(documents):
+                logger.error("Falha ao gerar embeddings")
+                return False
+            
+            for doc, embedding in zip(documents, embeddings):
+                doc_id = doc.get('id') or content_hash_id(doc.get('content', ''))
+                self.collection.replace_one(
+                    {"_id": doc_id},
+                    {
+                        "_id": doc_id,
+                        "content": doc.get('content', ''),
+                        "metadata": doc.get('metadata', {}),
+                        "$vector": embedding
+                    },
+                    upsert=True
+                )
+            logger.info(f"Gravados {len(documents)} documentos (upsert)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro no upsert de documentos: {str(e)}")
+            return False
+    
+    def update_metadata(self, doc_id: str, metadata: Dict[str, Any]) -> bool:
+        """Atualiza só os metadados de um documento (sem reembutir o texto)"""
+        try:
+            self.collection.update_one({"_id": doc_id}, {"$set": {"metadata": metadata}})
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao atualizar metadados de {doc_id}: {str(e)}")
+            return False
+    
+    def delete_documents(self, ids: Iterable[str]) -> bool:
+        """Remove documentos pelos ids"""
+        try:
+            ids = list(ids)
+            if ids:
+                self.collection.delete_many({"_id": {"$in": ids}})
+                logger.info(f"Removidos {len(ids)} documentos")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao remover documentos: {str(e)}")
+            return False
+    
     def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Busca documentos relevantes para a query"""
         try:
@@ -262,6 +326,15 @@ class RAGService:
             logger.error(f"Erro ao resetar collection: {str(e)}")
             return False
     
+    def ping(self) -> bool:
+        """Faz uma leitura mínima no Astra DB para confirmar que a conexão responde"""
+        try:
+            self.collection.find_one({})
+            return True
+        except Exception as e:
+            logger.warning(f"Astra DB não respondeu: {str(e)}")
+            return False
+    
     def is_ready(self) -> bool:
         """Verifica se o serviço está pronto para uso"""
         return (self.is_initialized and 
@@ -2,7 +2,7 @@
 Configurações do sistema de chatbot com RAG
 """
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -28,6 +28,9 @@ class Settings(BaseSettings):
     LANGFLOW_API_KEY: Optional[str] = None
     LANGFLOW_BASE_URL: str = "https://api.langflow.astra.datastax.com"
     LANGFLOW_FLOW_ID: Optional[str] = None
+
+    # Cálculo de dispersão: "local" (pluma gaussiana em NumPy) ou "langflow"
+    DISPERSION_BACKEND: Literal["local", "langflow"] = "local"
     
     # Configurações do modelo
     DEFAULT_MODEL: str = "anthropic/claude-3-haiku"
@@ -37,8 +40,31 @@ class Settings(BaseSettings):
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
     MAX_TOKENS: int = 4000
+    RAG_TOP_K: int = 5
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    VECTOR_INDEX_DIR: str = "data/vector_index"
+    VECTOR_INDEX_TYPE: str = "auto"  # auto, flat, hnsw ou ivf
+    # Uploads processados em segundo plano (/api/upload devolve o id do job)
+    UPLOAD_DIR: str = "data/uploads"
+    INGESTION_WORKERS: int = 2
+    INGESTION_BATCH_SIZE: int = 64
+    # Reordenação com cross-encoder: RERANK_CANDIDATES da busca -> RAG_TOP_K
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_CANDIDATES: int = 50
+    RERANK_LATENCY_BUDGET_MS: float = 150.0
     TEMPERATURE: float = 0.7
     
+    # Histórico de chat gravado em lotes (write-behind), com transbordo local se o banco cair
+    CHAT_HISTORY_BATCH_SIZE: int = 100
+    CHAT_HISTORY_FLUSH_SECONDS: float = 2.0
+    CHAT_HISTORY_SPILL_PATH: str = "data/chat_history_spill.jsonl"
+    # Histórico em memória por sessão e janela de histórico nos prompts
+    HISTORY_MAX_TURNS: int = 20
+    HISTORY_MAX_BYTES: int = 16384
+    HISTORY_MAX_SESSIONS: int = 1000
+    HISTORY_TOKEN_BUDGET: int = 600
+    
     # Configurações do Streamlit
     STREAMLIT_PORT: int = 8501
     STREAMLIT_HOST: str = "0.0.0.0"
@@ -6,12 +6,15 @@ Script para carregar o conteúdo da tese na base de dados Astra DB
 import os
 import sys
 import logging
+import argparse
 from pathlib import Path
 
 # Adiciona o diretório backend ao path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from rag_service_openai import RAGService
+from app.services.markdown_chunker import chunk_markdown
+from app.services.reindex import reindex
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente
@@ -21,38 +24,15 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def split_text_into_chunks(text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
-    """Divide o texto em chunks para processamento"""
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        # Define o fim do chunk
-        end = start + chunk_size
-        
-        # Se não chegamos ao fim do texto, procura quebra de parágrafo
-        if end < len(text):
-            # Procura por quebra de parágrafo mais próxima
-            paragraph_break = text.rfind('\n\n', start, end)
-            if paragraph_break != -1:
-                end = paragraph_break
-            else:
-                # Se não encontrou parágrafo, procura por quebra de linha
-                line_break = text.rfind('\n', start, end)
-                if line_break != -1:
-                    end = line_break
-        
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        
-        # Move o início considerando o overlap
-        start = end - overlap if end < len(text) else end
-    
-    return chunks
+THESIS_SOURCE = 'roteiro_hanseniase_thesis'
 
-def load_knowledge_base():
-    """Carrega o conteúdo da tese na base de dados"""
+def load_knowledge_base(dry_run: bool = False, full: bool = False):
+    """Carrega o conteúdo da tese na base de dados
+    
+    Incremental: ids derivam do conteúdo de cada chunk, então apenas chunks
+    novos ou alterados são embutidos e os que sumiram da tese são removidos.
+    Com `full=True`, apaga os chunks da tese e reindexa tudo.
+    """
     try:
         # Localiza o arquivo da tese
         thesis_path = Path("/app/PDFs/Roteiro de Dsispensação - Hanseníase.md")
@@ -68,9 +48,9 @@ def load_knowledge_base():
         
         logger.info(f"Conteúdo carregado: {len(content)} caracteres")
         
-        # Divide em chunks
+        # Divide em chunks por seção (títulos, parágrafos, listas e tabelas)
         logger.info("Dividindo conteúdo em chunks...")
-        chunks = split_text_into_chunks(content, chunk_size=800, overlap=100)
+        chunks = chunk_markdown(content, max_tokens=256)
         logger.info(f"Criados {len(chunks)} chunks")
         
         # Inicializa o serviço RAG
@@ -81,25 +61,30 @@ def load_knowledge_base():
             logger.error("Serviço RAG não está pronto")
             return False
         
-        # Prepara documentos para inserção
+        # Prepara documentos (o id é atribuído por hash de conteúdo no reindex)
         documents = []
         for i, chunk in enumerate(chunks):
             documents.append({
-                'id': f'thesis_chunk_{i}',
-                'content': chunk,
+                'content': chunk['content'],
                 'metadata': {
-                    'source': 'roteiro_hanseniase_thesis',
+                    'source': THESIS_SOURCE,
                     'chunk_index': i,
-                    'total_chunks': len(chunks)
+                    'section': chunk['metadata']['section'],
+                    'heading_path': chunk['metadata']['heading_path'],
+                    'tokens': chunk['metadata']['tokens']
                 }
             })
         
-        # Adiciona documentos à base de dados
-        logger.info("Adicionando documentos à base de dados...")
-        success = rag_service.add_documents(documents)
+        if full and not dry_run:
+            logger.info("Reindexação completa: removendo chunks existentes da tese...")
+            rag_service.delete_documents(rag_service.list_documents(THESIS_SOURCE))
         
-        if success:
-            logger.info("✅ Base de conhecimento carregada com sucesso!")
+        # Sincroniza apenas o que mudou
+        logger.info("Sincronizando documentos com a base de dados...")
+        stats = reindex(rag_service, documents, source=THESIS_SOURCE, prefix='thesis', dry_run=dry_run)
+        
+        if stats is not None:
+            logger.info(f"✅ Base de conhecimento sincronizada: {stats}")
             return True
         else:
             logger.error("❌ Falha ao carregar base de conhecimento")
@@ -133,10 +118,15 @@ def test_rag_service():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carrega/reindexa a tese na base de conhecimento")
+    parser.add_argument("--dry-run", action="store_true", help="Mostra o que mudaria, sem gravar")
+    parser.add_argument("--full", action="store_true", help="Apaga e reindexa todos os chunks da tese")
+    args = parser.parse_args()
+    
     logger.info("=== Iniciando carregamento da base de conhecimento ===")
     
     # Carrega a base de conhecimento
-    if load_knowledge_base():
+    if load_knowledge_base(dry_run=args.dry_run, full=args.full):
         logger.info("=== Base de conhecimento carregada ===")
         
         # Testa o serviço
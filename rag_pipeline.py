@@ -5,41 +5,101 @@ Usa OpenAI embeddings em vez de SentenceTransformers para evitar dependência do
 
 import os
 import logging
+import threading
+import time
 import openai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from backend.rag_service_openai import RAGService
+from app.services.answer_bank import compute_fingerprint
 
 logger = logging.getLogger(__name__)
 
 
+CHAT_MODEL = "anthropic/claude-3.5-sonnet"
+
+SYSTEM_PROMPTS = {
+    "amigavel": """Você é Gá, um assistente amigável e acessível especializado em roteiro de dispensação farmacêutica. 
+                
+Características:
+- Use linguagem simples e acessível
+- Seja empático e acolhedor
+- Use emojis quando apropriado
+- Explique termos técnicos de forma clara
+- Mantenha tom conversacional e amigável
+
+Responda sempre em português brasileiro.""",
+    "professor": """Você é Dr. Gasnelio, um professor especialista em roteiro de dispensação farmacêutica.
+
+Características:
+- Use linguagem técnica e acadêmica
+- Seja preciso e detalhado
+- Cite evidências quando possível
+- Mantenha tom professoral e educativo
+- Forneça explicações aprofundadas
+
+Responda sempre em português brasileiro.""",
+}
+
+# Contextos devolvidos por search_context quando a busca falha
+CONTEXT_NOT_INITIALIZED = "Pipeline não inicializado."
+CONTEXT_ERROR = "Erro ao buscar contexto."
+
+USER_PROMPT_TEMPLATE = """Contexto relevante:
+{context}
+
+Pergunta do usuário: {query}
+
+Por favor, responda baseando-se no contexto fornecido. Se a informação não estiver no contexto, indique isso claramente."""
+
+
+
+def answer_bank_fingerprint(corpus: str) -> Dict[str, str]:
+    """Impressão digital do banco de respostas pré-computadas deste pipeline (corpus, prompts e modelo)"""
+    prompts = {"system_prompts": SYSTEM_PROMPTS, "user_prompt": USER_PROMPT_TEMPLATE, "model": CHAT_MODEL}
+    return compute_fingerprint(corpus, prompts)
+
+
 class RAGPipeline:
-    """Pipeline RAG principal para o chatbot"""
+    """Pipeline RAG principal para o chatbot
+    
+    Uma instância pode ser compartilhada entre threads (sessões Streamlit,
+    workers Flask): a inicialização é protegida por lock e a saúde da conexão
+    é reavaliada periodicamente em `ensure_ready`.
+    """
     
-    def __init__(self):
+    def __init__(self, lazy: bool = False):
         self.rag_service = None
         self.openai_client = None
         self.is_initialized = False
         
         # Configurações
         self.openai_api_key = os.getenv('OPENROUTER_API_KEY')
-        self.openai_base_url = "https://openrouter.ai/api/v1"
-        self.chat_model = "anthropic/claude-3.5-sonnet"
+        self.openai_base_url = os.getenv('OPENROUTER_BASE_URL', "https://openrouter.ai/api/v1")
+        self.chat_model = CHAT_MODEL
         
-        self._initialize()
+        # Intervalo entre checagens de saúde (e entre tentativas de reinicialização)
+        self.health_check_interval = float(os.getenv('RAG_HEALTH_CHECK_INTERVAL', '60'))
+        self._lock = threading.RLock()
+        self._next_health_check = 0.0
+        
+        if not lazy:
+            with self._lock:
+                self._initialize()
     
     def _initialize(self):
-        """Inicializa o pipeline RAG"""
+        """Inicializa o pipeline RAG (chamado com o lock adquirido)"""
         try:
             logger.info("Inicializando RAG Pipeline...")
             
-            # Inicializa RAG Service
-            self.rag_service = RAGService()
-            
-            # Configura cliente OpenAI para chat
-            self.openai_client = openai.OpenAI(
+            # Cria os clientes antes de publicá-los, para que threads concorrentes
+            # nunca vejam um pipeline pela metade
+            rag_service = RAGService()
+            openai_client = openai.OpenAI(
                 api_key=self.openai_api_key,
                 base_url=self.openai_base_url
             )
+            self.rag_service = rag_service
+            self.openai_client = openai_client
             
             if self.rag_service.is_initialized:
                 self.is_initialized = True
@@ -49,11 +109,37 @@ class RAGPipeline:
                 
         except Exception as e:
             logger.error(f"Erro ao inicializar RAG Pipeline: {str(e)}")
+        finally:
+            self._next_health_check = time.monotonic() + self.health_check_interval
+    
+    def _is_healthy(self) -> bool:
+        """Verifica se os clientes continuam utilizáveis"""
+        return bool(self.rag_service and self.rag_service.is_ready() and self.rag_service.ping())
+    
+    def ensure_ready(self) -> bool:
+        """Inicializa na primeira chamada e reinicializa se a checagem de saúde falhar
+        
+        Entre checagens, a resposta vem do estado em memória, sem I/O nem lock.
+        """
+        if self.is_initialized and time.monotonic() < self._next_health_check:
+            return True
+        with self._lock:
+            if time.monotonic() < self._next_health_check:
+                # Outra thread acabou de checar (ou de falhar ao inicializar)
+                return self.is_initialized
+            if self.is_initialized and self._is_healthy():
+                self._next_health_check = time.monotonic() + self.health_check_interval
+                return True
+            if self.is_initialized:
+                logger.warning("Checagem de saúde do RAG Pipeline falhou; reinicializando...")
+            self.is_initialized = False
+            self._initialize()
+            return self.is_initialized
     
     def add_documents(self, documents: List[Dict[str, Any]]) -> bool:
         """Adiciona documentos à base de conhecimento"""
         try:
-            if not self.is_initialized:
+            if not self.ensure_ready():
                 logger.error("Pipeline não inicializado")
                 return False
             
@@ -66,56 +152,31 @@ class RAGPipeline:
     def search_context(self, query: str, max_context_length: int = 2000) -> str:
         """Busca contexto relevante para a query"""
         try:
-            if not self.is_initialized:
+            if not self.ensure_ready():
                 logger.error("Pipeline não inicializado")
-                return "Pipeline não inicializado."
+                return CONTEXT_NOT_INITIALIZED
             
-            return self.rag_service.get_context(query, max_context_length)
+            return self.rag_service.retrieve_context(query)[:max_context_length]
             
         except Exception as e:
             logger.error(f"Erro na busca de contexto: {str(e)}")
-            return "Erro ao buscar contexto."
+            return CONTEXT_ERROR
     
     def generate_response(self, query: str, persona: str = "professor") -> str:
         """Gera resposta usando RAG + LLM"""
+        return self._generate(query, persona)[0]
+    
+    def _generate(self, query: str, persona: str) -> Tuple[str, bool]:
+        """Resposta e se ela veio do pipeline completo (contexto recuperado + LLM), sem erro"""
         try:
-            if not self.is_initialized:
-                return "❌ Sistema não inicializado. Verifique as configurações."
+            if not self.ensure_ready():
+                return "❌ Sistema não inicializado. Verifique as configurações.", False
             
             # Busca contexto relevante
             context = self.search_context(query)
             
-            # Define persona
-            if persona.lower() == "amigavel":
-                system_prompt = """Você é Gá, um assistente amigável e acessível especializado em roteiro de dispensação farmacêutica. 
-                
-Características:
-- Use linguagem simples e acessível
-- Seja empático e acolhedor
-- Use emojis quando apropriado
-- Explique termos técnicos de forma clara
-- Mantenha tom conversacional e amigável
-
-Responda sempre em português brasileiro."""
-            else:
-                system_prompt = """Você é Dr. Gasnelio, um professor especialista em roteiro de dispensação farmacêutica.
-
-Características:
-- Use linguagem técnica e acadêmica
-- Seja preciso e detalhado
-- Cite evidências quando possível
-- Mantenha tom professoral e educativo
-- Forneça explicações aprofundadas
-
-Responda sempre em português brasileiro."""
-            
-            # Monta prompt com contexto
-            user_prompt = f"""Contexto relevante:
-{context}
-
-Pergunta do usuário: {query}
-
-Por favor, responda baseando-se no contexto fornecido. Se a informação não estiver no contexto, indique isso claramente."""
+            system_prompt = SYSTEM_PROMPTS["amigavel" if persona.lower() == "amigavel" else "professor"]
+            user_prompt = USER_PROMPT_TEMPLATE.format(context=context, query=query)
             
             # Gera resposta
             response = self.openai_client.chat.completions.create(
@@ -131,16 +192,25 @@ Por favor, responda baseando-se no contexto fornecido. Se a informação não es
             answer = response.choices[0].message.content
             logger.info(f"Resposta gerada para query: {query[:50]}...")
             
-            return answer
+            # Sem contexto da tese o LLM ainda responde, mas de forma genérica
+            return answer, context not in (CONTEXT_NOT_INITIALIZED, CONTEXT_ERROR)
             
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {str(e)}")
-            return f"❌ Erro ao gerar resposta: {str(e)}"
+            return f"❌ Erro ao gerar resposta: {str(e)}", False
+    
+    def query(self, query: str, persona: str = "professor") -> Dict[str, Any]:
+        """Resposta no formato usado pelos frontends Streamlit (com `error: True` se algo falhou no caminho)"""
+        answer, ok = self._generate(query, persona)
+        response = {"answer": answer, "sources": []}
+        if not ok:
+            response["error"] = True
+        return response
     
     def reset_knowledge_base(self) -> bool:
         """Reseta a base de conhecimento"""
         try:
-            if not self.is_initialized:
+            if not self.ensure_ready():
                 return False
             
             return self.rag_service.reset_collection()
@@ -161,12 +231,15 @@ Por favor, responda baseando-se no contexto fornecido. Se a informação não es
 
 # Função de conveniência para criar instância global
 _pipeline_instance = None
+_pipeline_lock = threading.Lock()
 
 def get_rag_pipeline() -> RAGPipeline:
-    """Retorna instância singleton do pipeline RAG"""
+    """Retorna instância singleton do pipeline RAG (criada sob lock, inicializada no primeiro uso)"""
     global _pipeline_instance
     if _pipeline_instance is None:
-        _pipeline_instance = RAGPipeline()
+        with _pipeline_lock:
+            if _pipeline_instance is None:
+                _pipeline_instance = RAGPipeline(lazy=True)
     return _pipeline_instance
 
 
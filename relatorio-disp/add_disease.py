@@ -1,11 +1,57 @@
 #!/usr/bin/env python3
 """
 Script para adicionar novas doenças ao chatbot multi-doenças
+
+Grava o manifesto da doença em diseases/<id>.json; o app_consolidado.py
+detecta o arquivo novo sozinho, sem reiniciar o servidor.
+
+    python add_disease.py                       # menu interativo
+    python add_disease.py --list
+    python add_disease.py --id tuberculose --name Tuberculose \\
+        --description "Doença infecciosa..." --keywords "tuberculose, bacilo de koch"
 """
 
-import json
+import argparse
 import os
-import re
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(APP_DIR))
+
+from app.services.disease_registry import (  # noqa: E402
+    DEFAULT_CHUNKING,
+    DiseaseManifestError,
+    default_personalities,
+    load_manifests,
+    write_manifest,
+)
+
+DISEASES_DIR = os.getenv("DISEASES_DIR", os.path.join(APP_DIR, "diseases"))
+
+
+def build_manifest(disease_name, description, keywords, pdf_path, chunk_size, overlap):
+    """Monta o manifesto de uma doença com as personalidades padrão"""
+    return {
+        "name": disease_name,
+        "pdf_path": pdf_path,
+        "description": description,
+        "keywords": [kw.strip() for kw in keywords.split(",") if kw.strip()],
+        "chunking": {"chunk_size": chunk_size, "overlap": overlap},
+        "personalities": default_personalities(disease_name)
+    }
+
+
+def save_disease(disease_id, manifest):
+    """Grava o manifesto; retorna False se ele for inválido"""
+    try:
+        path = write_manifest(disease_id, manifest, DISEASES_DIR)
+    except DiseaseManifestError as e:
+        print(f"\n❌ Manifesto inválido: {e}")
+        return False
+    print(f"\n✅ Doença registrada em: {path}")
+    print("O servidor carrega a doença na próxima requisição; não é preciso reiniciar.")
+    return True
+
 
 def add_new_disease():
     """Interface para adicionar nova doença"""
@@ -13,46 +59,24 @@ def add_new_disease():
     print("    ADICIONAR NOVA DOENÇA AO CHATBOT")
     print("=" * 50)
     print()
-    
+
     # Coletar informações da doença
     disease_id = input("ID da doença (ex: cancer, tuberculose): ").strip().lower()
     disease_name = input("Nome da doença (ex: Câncer, Tuberculose): ").strip()
     description = input("Descrição da doença: ").strip()
     keywords = input("Palavras-chave (separadas por vírgula): ").strip()
-    
-    # Verificar se PDF existe
+
     pdf_path = f"PDFs/{disease_id}.pdf"
-    pdf_exists = os.path.exists(pdf_path)
-    
+    manifest = build_manifest(
+        disease_name, description, keywords, pdf_path,
+        DEFAULT_CHUNKING["chunk_size"], DEFAULT_CHUNKING["overlap"]
+    )
+    pdf_exists = os.path.exists(os.path.join(APP_DIR, pdf_path))
+
     if not pdf_exists:
         print(f"\n⚠️  AVISO: PDF não encontrado em {pdf_path}")
         print("O chatbot funcionará apenas com respostas padrão para esta doença")
-    
-    # Personalidades padrão
-    personalities = {
-        "dr_gasnelio": {
-            "name": "Dr. Gasnelio",
-            "style": "sério e técnico",
-            "greeting": f"Olá! Sou o Dr. Gasnelio, especialista em {disease_name.lower()}. Como posso ajudá-lo hoje?",
-            "fallback": f"Baseado na literatura médica sobre {disease_name.lower()}, posso orientar que esta condição requer avaliação médica especializada. Recomendo consultar um médico para diagnóstico adequado."
-        },
-        "ga": {
-            "name": "Gá",
-            "style": "descontraído e simples",
-            "greeting": f"Oi! Sou o Gá! 😊 Vou te ajudar a entender sobre {disease_name.lower()} de um jeito bem simples!",
-            "fallback": f"Olha, sobre isso eu não tenho certeza no material que tenho aqui. Mas posso te dizer que é sempre bom procurar um médico quando temos dúvidas sobre saúde, certo? 😊"
-        }
-    }
-    
-    # Criar estrutura da doença
-    new_disease = {
-        "name": disease_name,
-        "pdf_path": pdf_path,
-        "description": description,
-        "keywords": [kw.strip() for kw in keywords.split(",")],
-        "personalities": personalities
-    }
-    
+
     # Mostrar resumo
     print("\n" + "=" * 50)
     print("    RESUMO DA NOVA DOENÇA")
@@ -60,89 +84,57 @@ def add_new_disease():
     print(f"ID: {disease_id}")
     print(f"Nome: {disease_name}")
     print(f"Descrição: {description}")
-    print(f"Palavras-chave: {', '.join(new_disease['keywords'])}")
+    print(f"Palavras-chave: {', '.join(manifest['keywords'])}")
     print(f"PDF: {pdf_path} {'✅' if pdf_exists else '❌'}")
-    print(f"Personalidades: Dr. Gasnelio, Gá")
-    
+    print("Personalidades: Dr. Gasnelio, Gá")
+
     # Confirmar
     confirm = input("\nConfirma a adição desta doença? (s/n): ").strip().lower()
     if confirm != 's':
         print("Operação cancelada.")
         return
-    
-    # Gerar código Python
-    python_code = generate_python_code(disease_id, new_disease)
-    
-    # Salvar em arquivo
-    filename = f"disease_{disease_id}.py"
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(python_code)
-    
-    print(f"\n✅ Código gerado em: {filename}")
-    print("\nPara adicionar ao sistema:")
-    print("1. Abra o arquivo app_multi_disease.py")
-    print("2. Localize a seção 'diseases'")
-    print("3. Adicione o código gerado")
-    print("4. Reinicie o servidor")
-    
-    # Mostrar código
-    print(f"\n{'='*50}")
-    print("    CÓDIGO PARA ADICIONAR AO app_multi_disease.py")
-    print("="*50)
-    print(python_code)
-
-def generate_python_code(disease_id, disease_data):
-    """Gera código Python para adicionar a doença"""
-    code = f'''                "{disease_id}": {{
-                    "name": "{disease_data['name']}",
-                    "pdf_path": "{disease_data['pdf_path']}",
-                    "description": "{disease_data['description']}",
-                    "keywords": {json.dumps(disease_data['keywords'], ensure_ascii=False)},
-                    "personalities": {{
-                        "dr_gasnelio": {{
-                            "name": "Dr. Gasnelio",
-                            "style": "sério e técnico",
-                            "greeting": "{disease_data['personalities']['dr_gasnelio']['greeting']}",
-                            "fallback": "{disease_data['personalities']['dr_gasnelio']['fallback']}"
-                        }},
-                        "ga": {{
-                            "name": "Gá",
-                            "style": "descontraído e simples",
-                            "greeting": "{disease_data['personalities']['ga']['greeting']}",
-                            "fallback": "{disease_data['personalities']['ga']['fallback']}"
-                        }}
-                    }}
-                }},'''
-    return code
+
+    save_disease(disease_id, manifest)
+
 
 def list_existing_diseases():
     """Lista doenças já configuradas"""
     print("=" * 50)
     print("    DOENÇAS JÁ CONFIGURADAS")
     print("=" * 50)
-    
-    # Ler app_multi_disease.py para extrair doenças
-    try:
-        with open('app_multi_disease.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Extrair doenças usando regex
-        disease_pattern = r'"([^"]+)":\s*{\s*"name":\s*"([^"]+)"'
-        diseases = re.findall(disease_pattern, content)
-        
-        for disease_id, disease_name in diseases:
-            pdf_path = f"PDFs/{disease_id}.pdf"
-            pdf_exists = os.path.exists(pdf_path)
-            status = "✅" if pdf_exists else "❌"
-            print(f"{disease_id}: {disease_name} {status}")
-            
-    except FileNotFoundError:
-        print("Arquivo app_multi_disease.py não encontrado")
-    except Exception as e:
-        print(f"Erro ao ler arquivo: {e}")
+
+    diseases = load_manifests(DISEASES_DIR, base_dir=APP_DIR)
+    if not diseases:
+        print(f"Nenhuma doença cadastrada em {DISEASES_DIR}")
+    for disease_id, disease in diseases.items():
+        status = "✅" if os.path.exists(disease["pdf_path"]) else "❌"
+        print(f"{disease_id}: {disease['name']} {status}")
+
 
 def main():
     """Menu principal"""
+    parser = argparse.ArgumentParser(description="Gerencia as doenças do chatbot multi-doenças")
+    parser.add_argument("--list", action="store_true", help="Lista as doenças cadastradas")
+    parser.add_argument("--id", help="ID da doença (cadastro sem perguntas)")
+    parser.add_argument("--name", help="Nome da doença")
+    parser.add_argument("--description", default="", help="Descrição da doença")
+    parser.add_argument("--keywords", default="", help="Palavras-chave separadas por vírgula")
+    parser.add_argument("--pdf", help="Caminho do PDF (padrão: PDFs/<id>.pdf)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNKING["chunk_size"])
+    parser.add_argument("--overlap", type=int, default=DEFAULT_CHUNKING["overlap"])
+    args = parser.parse_args()
+
+    if args.list:
+        list_existing_diseases()
+        return
+    if args.id:
+        disease_id = args.id.strip().lower()
+        manifest = build_manifest(
+            args.name or disease_id.capitalize(), args.description, args.keywords,
+            args.pdf or f"PDFs/{disease_id}.pdf", args.chunk_size, args.overlap
+        )
+        sys.exit(0 if save_disease(disease_id, manifest) else 1)
+
     while True:
         print("\n" + "=" * 50)
         print("    GERENCIADOR DE DOENÇAS")
@@ -151,9 +143,9 @@ def main():
         print("2. Adicionar nova doença")
         print("3. Sair")
         print()
-        
+
         choice = input("Escolha uma opção (1-3): ").strip()
-        
+
         if choice == '1':
             list_existing_diseases()
         elif choice == '2':
@@ -165,4 +157,4 @@ def main():
             print("Opção inválida!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -4,12 +4,18 @@ import os
 import hashlib
 from datetime import datetime
 import logging
+import threading
 import numpy as np
 from transformers import pipeline
 import torch
 from sentence_transformers import SentenceTransformer
 from app.services.text_utils import chunk_text, expand_query_with_synonyms
 from app.services.pdf_utils import extract_text_from_pdf
+from app.services.text_rewriter import rewrite_text
+from app.services.disease_router import DiseaseRouter
+from app.services.disease_registry import DiseaseRegistry, LRUCache
+from app.services.multi_context_qa import extract_best_answer
+from app.services.sentence_index import SentenceIndex
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,149 +23,18 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-class MultiDiseaseChatbot:
-    def __init__(self):
-        self.diseases = {}
-        self.qa_pipeline = None
-        self.embedding_model = None
-        self.cache = {}
-        self.load_models()
-        self.load_diseases()
-
-    def load_models(self):
-        try:
-            logger.info("Carregando modelos de IA...")
-            self.qa_pipeline = pipeline(
-                "question-answering",
-                model="deepset/roberta-base-squad2",
-                device=-1 if not torch.cuda.is_available() else 0
-            )
-            self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("Modelos carregados com sucesso!")
-        except Exception as e:
-            logger.error(f"Erro ao carregar modelos: {e}")
-            raise
-
-    def load_diseases(self):
-        try:
-            self.diseases = {
-                "hanseniase": {
-                    "name": "Hanseníase",
-                    "pdf_path": "PDFs/Roteiro de Dsispensação - Hanseníase F.docx.pdf",
-                    "description": "Doença infecciosa crônica causada pela bactéria Mycobacterium leprae",
-                    "keywords": ["hanseníase", "lepra", "mycobacterium", "bacilo de hansen"],
-                    "personalities": {
-                        "dr_gasnelio": {
-                            "name": "Dr. Gasnelio",
-                            "style": "sério e técnico",
-                            "greeting": "Olá! Sou o Dr. Gasnelio, especialista em hanseníase. Como posso ajudá-lo hoje?",
-                            "fallback": "Baseado na literatura médica sobre hanseníase, posso orientar que esta condição requer avaliação médica especializada. Recomendo consultar um dermatologista ou infectologista para diagnóstico adequado."
-                        },
-                        "ga": {
-                            "name": "Gá",
-                            "style": "descontraído e simples",
-                            "greeting": "Oi! Sou o Gá! 😊 Vou te ajudar a entender sobre hanseníase de um jeito bem simples!",
-                            "fallback": "Olha, sobre isso eu não tenho certeza no material que tenho aqui. Mas posso te dizer que é sempre bom procurar um médico quando temos dúvidas sobre saúde, certo? 😊"
-                        }
-                    }
-                },
-                # Outras doenças podem ser adicionadas aqui
-            }
-            os.makedirs("PDFs", exist_ok=True)
-            logger.info(f"Carregadas {len(self.diseases)} doenças configuradas")
-        except Exception as e:
-            logger.error(f"Erro ao carregar doenças: {e}")
-            raise
-
-    def get_available_diseases(self):
-        return [
-            {
-                "id": disease_id,
-                "name": disease["name"],
-                "description": disease["description"],
-                "pdf_exists": os.path.exists(disease["pdf_path"])
-            }
-            for disease_id, disease in self.diseases.items()
-        ]
-
-    def get_disease_personalities(self, disease_id):
-        if disease_id not in self.diseases:
-            return []
-        return [
-            {
-                "id": personality_id,
-                "name": personality["name"],
-                "style": personality["style"],
-                "greeting": personality["greeting"]
-            }
-            for personality_id, personality in self.diseases[disease_id]["personalities"].items()
-        ]
-
-    def get_relevant_chunks(self, question, disease_id, top_k=5):
-        if disease_id not in self.diseases:
-            return []
-        pdf_path = self.diseases[disease_id]["pdf_path"]
-        if not os.path.exists(pdf_path):
-            logger.warning(f"PDF não encontrado: {pdf_path}")
-            return []
-        text = extract_text_from_pdf(pdf_path)
-        if not text:
-            return []
-        chunks = chunk_text(text)
-        if not chunks or self.embedding_model is None:
-            return []
-        try:
-            keyword_scores = np.zeros(len(chunks))
-            question_words = set(question.lower().split())
-            for i, chunk in enumerate(chunks):
-                chunk_words = set(chunk.lower().split())
-                common_words = question_words.intersection(chunk_words)
-                if common_words:
-                    keyword_scores[i] = len(common_words) / len(question_words)
-            keyword_chunks = [i for i, score in enumerate(keyword_scores) if score > 0.1]
-            if keyword_chunks:
-                selected_chunks = [chunks[i] for i in keyword_chunks]
-                question_embedding = self.embedding_model.encode(question)
-                chunk_embeddings = self.embedding_model.encode(selected_chunks)
-                similarities = np.dot(chunk_embeddings, question_embedding) / (
-                    np.linalg.norm(chunk_embeddings, axis=1) * np.linalg.norm(question_embedding)
-                )
-                final_scores = 0.6 * similarities + 0.4 * keyword_scores[keyword_chunks]
-                top_indices = np.argsort(final_scores)[-top_k:][::-1]
-                relevant_chunks = [selected_chunks[i] for i in top_indices if final_scores[i] > 0.05]
-            else:
-                question_embedding = self.embedding_model.encode(question)
-                chunk_embeddings = self.embedding_model.encode(chunks)
-                similarities = np.dot(chunk_embeddings, question_embedding) / (
-                    np.linalg.norm(chunk_embeddings, axis=1) * np.linalg.norm(question_embedding)
-                )
-                top_indices = np.argsort(similarities)[-top_k:][::-1]
-                relevant_chunks = [chunks[i] for i in top_indices if similarities[i] > 0.1]
-            return relevant_chunks
-        except Exception as e:
-            logger.error(f"Erro ao calcular similaridade: {e}")
-            return []
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Manifestos das doenças (um JSON por doença); novos arquivos entram sem reiniciar os workers
+DISEASES_DIR = os.getenv("DISEASES_DIR", os.path.join(APP_DIR, "diseases"))
+DISEASES_REFRESH_SECONDS = float(os.getenv("DISEASES_REFRESH_SECONDS", "5"))
+# Quantos corpora (chunks + embeddings) de doenças ficam residentes em memória
+MAX_RESIDENT_DISEASES = int(os.getenv("MAX_RESIDENT_DISEASES", "3"))
 
 def simplify_text(text: str) -> str:
     """
     Simplifica o texto para respostas amigáveis (persona Gá).
     """
-    replacements = {
-        "dispensação": "entrega de remédios",
-        "medicamentos": "remédios",
-        "posologia": "como tomar",
-        "administração": "como tomar",
-        "via de administração": "como tomar",
-        "reação adversa": "efeito colateral",
-        "interação medicamentosa": "mistura de remédios",
-        "protocolo": "guia",
-        "orientação": "explicação",
-        "adesão": "seguir o tratamento"
-    }
-    simplified = text
-    for technical, simple in replacements.items():
-        simplified = simplified.replace(technical, simple)
-    return simplified
+    return rewrite_text(text, "ga_basico")
 
 
 def format_persona_answer(answer: str, persona: str, confidence: float, disease: str) -> dict:
@@ -229,6 +104,11 @@ class MultiDiseaseChatbot:
         self.qa_pipeline = None
         self.embedding_model = None
         self.cache = {}
+        self.registry = DiseaseRegistry(DISEASES_DIR, base_dir=APP_DIR, refresh_interval=DISEASES_REFRESH_SECONDS)
+        # Corpus de cada doença (chunks + embeddings normalizados), montado no primeiro uso
+        self.corpora = LRUCache(MAX_RESIDENT_DISEASES)
+        self._corpora_lock = threading.Lock()
+        self.router = None
         self.load_models()
         self.load_diseases()
 
@@ -248,35 +128,35 @@ class MultiDiseaseChatbot:
 
     def load_diseases(self):
         try:
-            self.diseases = {
-                "hanseniase": {
-                    "name": "Hanseníase",
-                    "pdf_path": "PDFs/Roteiro de Dsispensação - Hanseníase F.docx.pdf",
-                    "description": "Doença infecciosa crônica causada pela bactéria Mycobacterium leprae",
-                    "keywords": ["hanseníase", "lepra", "mycobacterium", "bacilo de hansen"],
-                    "personalities": {
-                        "dr_gasnelio": {
-                            "name": "Dr. Gasnelio",
-                            "style": "sério e técnico",
-                            "greeting": "Olá! Sou o Dr. Gasnelio, especialista em hanseníase. Como posso ajudá-lo hoje?",
-                            "fallback": "Baseado na literatura médica sobre hanseníase, posso orientar que esta condição requer avaliação médica especializada. Recomendo consultar um dermatologista ou infectologista para diagnóstico adequado."
-                        },
-                        "ga": {
-                            "name": "Gá",
-                            "style": "descontraído e simples",
-                            "greeting": "Oi! Sou o Gá! 😊 Vou te ajudar a entender sobre hanseníase de um jeito bem simples!",
-                            "fallback": "Olha, sobre isso eu não tenho certeza no material que tenho aqui. Mas posso te dizer que é sempre bom procurar um médico quando temos dúvidas sobre saúde, certo? 😊"
-                        }
-                    }
-                },
-                # Outras doenças podem ser adicionadas aqui
-            }
-            os.makedirs("PDFs", exist_ok=True)
+            self.registry.refresh(force=True)
+            self.apply_registry()
+            os.makedirs(os.path.join(APP_DIR, "PDFs"), exist_ok=True)
             logger.info(f"Carregadas {len(self.diseases)} doenças configuradas")
         except Exception as e:
             logger.error(f"Erro ao carregar doenças: {e}")
             raise
 
+    def apply_registry(self):
+        """Publica o registro vigente: roteador atualizado e corpora de manifestos alterados descartados"""
+        diseases = self.registry.diseases
+        for disease_id in self.corpora.keys():
+            corpus = self.corpora.get(disease_id)
+            if corpus is not None and diseases.get(disease_id) != corpus["manifest"]:
+                self.corpora.pop(disease_id)
+        if self.router is None:
+            embed = self.embedding_model.encode if self.embedding_model is not None else None
+            self.router = DiseaseRouter(diseases, embed=embed)
+        else:
+            self.router.update_diseases(diseases)
+        self.diseases = diseases
+        # Respostas em cache podem ter vindo de um manifesto que mudou
+        self.cache = {}
+
+    def refresh_diseases(self):
+        """Incorpora manifestos novos, alterados ou removidos desde a última verificação"""
+        if self.registry.refresh():
+            self.apply_registry()
+
     def get_available_diseases(self):
         return [
             {
@@ -301,19 +181,49 @@ class MultiDiseaseChatbot:
             for personality_id, personality in self.diseases[disease_id]["personalities"].items()
         ]
 
-    def get_relevant_chunks(self, question, disease_id, top_k=5):
+    def get_corpus(self, disease_id):
+        """Chunks e embeddings de uma doença, extraídos e calculados uma única vez"""
+        corpus = self.corpora.get(disease_id)
+        if corpus is not None:
+            return corpus
+        with self._corpora_lock:
+            corpus = self.corpora.get(disease_id)
+            if corpus is not None:
+                return corpus
+            manifest = self.diseases[disease_id]
+            pdf_path = manifest["pdf_path"]
+            if not os.path.exists(pdf_path):
+                logger.warning(f"PDF não encontrado: {pdf_path}")
+                return None
+            text = extract_text_from_pdf(pdf_path)
+            chunks = chunk_text(text, **manifest["chunking"]) if text else []
+            if not chunks or self.embedding_model is None:
+                return None
+            embeddings = np.asarray(self.embedding_model.encode(chunks), dtype="float32")
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            corpus = {
+                "chunks": chunks,
+                "embeddings": embeddings / norms,
+                # Frases com termos e embeddings prontos para o fallback de baixa confiança
+                "sentences": SentenceIndex(chunks, embed=self.embedding_model.encode),
+                "manifest": manifest,
+            }
+            self.corpora.put(disease_id, corpus)
+            # O centroide do corpus substitui o da descrição no roteamento
+            if self.router is not None:
+                self.router.set_centroid(disease_id, corpus["embeddings"])
+            logger.info(f"Corpus de {disease_id} carregado: {len(chunks)} chunks")
+            return corpus
+
+    def score_chunks(self, question, disease_id, question_embedding, top_k=5):
+        """Melhores chunks (texto, score) de uma doença: palavras-chave + similaridade de cosseno"""
         if disease_id not in self.diseases:
             return []
-        pdf_path = self.diseases[disease_id]["pdf_path"]
-        if not os.path.exists(pdf_path):
-            logger.warning(f"PDF não encontrado: {pdf_path}")
-            return []
-        text = extract_text_from_pdf(pdf_path)
-        if not text:
-            return []
-        chunks = chunk_text(text)
-        if not chunks or self.embedding_model is None:
+        corpus = self.get_corpus(disease_id)
+        if corpus is None:
             return []
+        chunks = corpus["chunks"]
         try:
             keyword_scores = np.zeros(len(chunks))
             question_words = set(question.lower().split())
@@ -322,31 +232,48 @@ class MultiDiseaseChatbot:
                 common_words = question_words.intersection(chunk_words)
                 if common_words:
                     keyword_scores[i] = len(common_words) / len(question_words)
+            similarities = corpus["embeddings"] @ question_embedding
             keyword_chunks = [i for i, score in enumerate(keyword_scores) if score > 0.1]
             if keyword_chunks:
-                selected_chunks = [chunks[i] for i in keyword_chunks]
-                question_embedding = self.embedding_model.encode(question)
-                chunk_embeddings = self.embedding_model.encode(selected_chunks)
-                similarities = np.dot(chunk_embeddings, question_embedding) / (
-                    np.linalg.norm(chunk_embeddings, axis=1) * np.linalg.norm(question_embedding)
-                )
-                final_scores = 0.6 * similarities + 0.4 * keyword_scores[keyword_chunks]
+                final_scores = 0.6 * similarities[keyword_chunks] + 0.4 * keyword_scores[keyword_chunks]
                 top_indices = np.argsort(final_scores)[-top_k:][::-1]
-                relevant_chunks = [selected_chunks[i] for i in top_indices if final_scores[i] > 0.05]
-            else:
-                question_embedding = self.embedding_model.encode(question)
-                chunk_embeddings = self.embedding_model.encode(chunks)
-                similarities = np.dot(chunk_embeddings, question_embedding) / (
-                    np.linalg.norm(chunk_embeddings, axis=1) * np.linalg.norm(question_embedding)
-                )
-                top_indices = np.argsort(similarities)[-top_k:][::-1]
-                relevant_chunks = [chunks[i] for i in top_indices if similarities[i] > 0.1]
-            return relevant_chunks
+                return [(chunks[keyword_chunks[i]], float(final_scores[i])) for i in top_indices if final_scores[i] > 0.05]
+            top_indices = np.argsort(similarities)[-top_k:][::-1]
+            return [(chunks[i], float(similarities[i])) for i in top_indices if similarities[i] > 0.1]
         except Exception as e:
             logger.error(f"Erro ao calcular similaridade: {e}")
             return []
 
+    def encode_question(self, question):
+        embedding = np.asarray(self.embedding_model.encode(question), dtype="float32").reshape(-1)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def get_relevant_chunks(self, question, disease_id, top_k=5):
+        if disease_id not in self.diseases or self.embedding_model is None:
+            return []
+        return [chunk for chunk, _ in self.score_chunks(question, disease_id, self.encode_question(question), top_k)]
+
+    def route_question(self, question, question_embedding=None):
+        """Doenças (id, score) cujo corpus deve ser consultado para a pergunta"""
+        if self.router is None:
+            return []
+        return self.router.route(question, question_embedding=question_embedding)
+
     def answer_question(self, question, disease_id, personality_id):
+        self.refresh_diseases()
+        routed_ids = None
+        if not disease_id:
+            # Pergunta sem doença informada: o roteador escolhe quais corpora consultar
+            question_embedding = self.encode_question(question) if self.embedding_model is not None else None
+            routed = self.route_question(question, question_embedding)
+            if not routed:
+                return {
+                    "error": "Não foi possível identificar a doença da pergunta; informe disease_id",
+                    "available_diseases": self.get_available_diseases()
+                }
+            routed_ids = [routed_id for routed_id, _ in routed]
+            disease_id = routed_ids[0]
         if disease_id not in self.diseases:
             return {
                 "error": "Doença não encontrada",
@@ -357,57 +284,50 @@ class MultiDiseaseChatbot:
                 "error": "Personalidade não encontrada",
                 "available_personalities": self.get_disease_personalities(disease_id)
             }
-        cache_key = f"{disease_id}_{personality_id}_{hashlib.md5(question.encode()).hexdigest()}"
+        searched_ids = routed_ids or [disease_id]
+        cache_key = f"{'+'.join(searched_ids)}_{personality_id}_{hashlib.md5(question.encode()).hexdigest()}"
         if cache_key in self.cache:
             return self.cache[cache_key]
-        relevant_chunks = self.get_relevant_chunks(question, disease_id, top_k=5)
+        if routed_ids:
+            # Só os índices das doenças roteadas, com os melhores chunks entre elas
+            scored = []
+            for routed_id in routed_ids:
+                scored.extend(self.score_chunks(question, routed_id, question_embedding, top_k=5))
+            scored.sort(key=lambda item: item[1], reverse=True)
+            relevant_chunks = [chunk for chunk, _ in scored[:5]]
+        else:
+            relevant_chunks = self.get_relevant_chunks(question, disease_id, top_k=5)
+        response = self.generate_answer(question, disease_id, personality_id, relevant_chunks)
+        if routed_ids:
+            response = dict(response, routed_diseases=routed_ids)
+        self.cache[cache_key] = response
+        return response
+
+    def generate_answer(self, question, disease_id, personality_id, relevant_chunks):
         personality = self.diseases[disease_id]["personalities"][personality_id]
         disease_name = self.diseases[disease_id]["name"]
         if not relevant_chunks:
-            response = fallback_response(personality_id, disease_name)
-            self.cache[cache_key] = response
-            return response
-        context = " ".join(relevant_chunks)
+            return fallback_response(personality_id, disease_name)
         try:
             if self.qa_pipeline is None:
                 raise Exception("Pipeline de QA não disponível")
-            question_variations = [question, question.replace("?", "").strip()]
-            best_result = None
-            best_confidence = 0.0
-            for q_var in question_variations:
-                try:
-                    result = self.qa_pipeline(
-                        question=q_var,
-                        context=context,
-                        max_answer_len=200,
-                        handle_impossible_answer=True
-                    )
-                    if isinstance(result, dict):
-                        confidence = result.get('score', 0.0)
-                        if confidence > best_confidence:
-                            best_confidence = confidence
-                            best_result = result
-                except Exception as e:
-                    logger.debug(f"Erro com variação da pergunta: {e}")
-                    continue
-            if best_result is None:
-                raise Exception("Nenhuma resposta válida encontrada")
-            confidence = best_confidence
+            # Cada chunk inteiro, em janelas de tokens, e as variações distintas da pergunta numa só chamada
+            question_variations = list(dict.fromkeys([question.strip(), question.replace("?", "").strip()]))
+            best_result = extract_best_answer(self.qa_pipeline, question_variations, relevant_chunks, max_answer_len=200)
+            confidence = best_result["score"]
+            logger.info(f"QA {disease_id}: confiança {confidence:.3f} (chunk {best_result['chunk_id']})")
             if confidence < 0.3:
-                if len(context) > 100:
-                    sentences = context.split('.')
-                    relevant_sentences = []
-                    question_words = set(question.lower().split())
-                    for sentence in sentences:
-                        sentence_words = set(sentence.lower().split())
-                        if question_words.intersection(sentence_words):
-                            relevant_sentences.append(sentence.strip())
-                    if relevant_sentences:
-                        answer = relevant_sentences[0] + "."
-                        source = "context_extraction"
-                    else:
-                        answer = personality["fallback"]
-                        source = "no_answer"
+                # Melhor frase dos chunks recuperados, pelo índice de frases do corpus
+                corpus = self.get_corpus(disease_id)
+                hits = []
+                if corpus is not None:
+                    hits = corpus["sentences"].search(
+                        question, top_k=1, question_embedding=self.encode_question(question),
+                        restrict_chunks=relevant_chunks
+                    )
+                if hits and hits[0]["overlap"] > 0:
+                    answer = hits[0]["sentence"]
+                    source = "context_extraction"
                 else:
                     answer = personality["fallback"]
                     source = "no_answer"
@@ -415,13 +335,11 @@ class MultiDiseaseChatbot:
             else:
                 answer = best_result.get('answer', '')
                 response = format_persona_answer(answer, personality_id, confidence, disease_name)
-            self.cache[cache_key] = response
+                response["source_chunk"] = best_result["chunk_id"]
             return response
         except Exception as e:
             logger.error(f"Erro ao processar pergunta: {e}")
-            response = fallback_response(personality_id, disease_name, reason="Erro técnico")
-            self.cache[cache_key] = response
-            return response
+            return fallback_response(personality_id, disease_name, reason="Erro técnico")
 
 chatbot = MultiDiseaseChatbot()
 
@@ -446,10 +364,12 @@ def index():
 
 @app.route('/api/diseases', methods=['GET'])
 def get_diseases():
+    chatbot.refresh_diseases()
     return jsonify(chatbot.get_available_diseases())
 
 @app.route('/api/diseases/<disease_id>/personalities', methods=['GET'])
 def get_personalities(disease_id):
+    chatbot.refresh_diseases()
     return jsonify(chatbot.get_disease_personalities(disease_id))
 
 @app.route('/api/chat', methods=['POST'])
@@ -461,8 +381,8 @@ def chat_api():
         personality_id = data.get('personality_id')
         if not question:
             return jsonify({"error": "Pergunta não fornecida"}), 400
-        if not disease_id or not personality_id:
-            return jsonify({"error": "Doença ou personalidade não fornecida"}), 400
+        if not personality_id:
+            return jsonify({"error": "Personalidade não fornecida"}), 400
         response = chatbot.answer_question(question, disease_id, personality_id)
         return jsonify(response)
     except Exception as e:
@@ -474,6 +394,7 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "diseases_loaded": len(chatbot.diseases),
+        "corpora_resident": chatbot.corpora.keys(),
         "models_loaded": chatbot.qa_pipeline is not None and chatbot.embedding_model is not None,
         "timestamp": datetime.now().isoformat()
     })
@@ -10,6 +10,9 @@ import json
 from typing import Dict
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.services.pdf_utils import iter_pdf_pages_parallel
+
 class PDFAnalyzer:
     def __init__(self, pdf_path: str):
         self.pdf_path = pdf_path
@@ -27,35 +30,35 @@ class PDFAnalyzer:
             with pdfplumber.open(self.pdf_path) as pdf:
                 # Informações básicas
                 self.analysis["total_pages"] = len(pdf.pages)
-                self.analysis["file_size_mb"] = os.path.getsize(self.pdf_path) / (1024 * 1024)
-                
-                # Extrair texto
-                full_text = ""
-                page_texts = []
-                
-                for page_num, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        full_text += f"\n--- Página {page_num + 1} ---\n{page_text}\n"
-                        page_texts.append({
-                            "page": page_num + 1,
-                            "text": page_text,
-                            "char_count": len(page_text),
-                            "word_count": len(page_text.split())
-                        })
-                
-                self.analysis["total_characters"] = len(full_text)
-                self.analysis["total_words"] = len(full_text.split())
-                self.analysis["page_texts"] = page_texts
-                self.analysis["full_text"] = full_text
-                
-                # Análise de complexidade
-                self.analyze_complexity(full_text)
-                
-                # Análise de compatibilidade
-                self.analyze_compatibility()
-                
-                return self.analysis
+            self.analysis["file_size_mb"] = os.path.getsize(self.pdf_path) / (1024 * 1024)
+            
+            # Extrair texto: páginas em paralelo, montagem única no final
+            text_parts = []
+            page_texts = []
+            
+            for page_number, page_text in iter_pdf_pages_parallel(self.pdf_path, extractor="pdfplumber"):
+                if page_text:
+                    text_parts.append(f"\n--- Página {page_number} ---\n{page_text}\n")
+                    page_texts.append({
+                        "page": page_number,
+                        "text": page_text,
+                        "char_count": len(page_text),
+                        "word_count": len(page_text.split())
+                    })
+            full_text = "".join(text_parts)
+            
+            self.analysis["total_characters"] = len(full_text)
+            self.analysis["total_words"] = len(full_text.split())
+            self.analysis["page_texts"] = page_texts
+            self.analysis["full_text"] = full_text
+            
+            # Análise de complexidade
+            self.analyze_complexity(full_text)
+            
+            # Análise de compatibilidade
+            self.analyze_compatibility()
+            
+            return self.analysis
                 
         except Exception as e:
             print(f"❌ Erro ao analisar PDF: {e}")
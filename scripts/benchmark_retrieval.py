@@ -0,0 +1,287 @@
+"""
+Benchmark de recuperação sobre o conjunto de perguntas de referência (golden set).
+
+Mede recall@k, MRR e latência (p50/p95/p99) de cada retriever do projeto e
+grava um relatório JSON que pode ser comparado entre versões:
+
+    python scripts/benchmark_retrieval.py --offline --output benchmark_report.json
+    python scripts/benchmark_retrieval.py --offline --compare benchmark_anterior.json
+
+Com --offline, torch/transformers/sentence_transformers são substituídos por
+stubs (embedder determinístico por hashing, QA/LLM sem chamadas externas).
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.perf_utils import (  # noqa: E402
+    HashingEmbedder,
+    dedupe_preserving_order,
+    install_offline_stubs,
+    latency_summary,
+)
+from app.services.text_utils import chunk_text  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_GOLDEN_PATH = PROJECT_ROOT / 'data' / 'golden_questions.json'
+K_VALUES = (1, 3, 5)
+SHINGLE_SIZE = 40
+
+
+class CanonicalCorpus:
+    """Segmentação canônica do corpus, usada para comparar retrievers com chunkings diferentes"""
+
+    def __init__(self, text: str, chunk_size: int, overlap: int):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.segments = chunk_text(text, chunk_size=chunk_size, overlap=overlap)
+        self.ids = [f"chunk_{i:03d}" for i in range(len(self.segments))]
+        # Shingles de cada segmento: um trecho recuperado "acerta" o segmento se contiver algum deles
+        self.shingles = [
+            [seg[j:j + SHINGLE_SIZE] for j in range(0, max(len(seg) - SHINGLE_SIZE, 0) + 1, SHINGLE_SIZE)]
+            for seg in self.segments
+        ]
+
+    def map_passages(self, passages: List[str]) -> List[str]:
+        """Converte trechos recuperados (em ordem de relevância) em ids canônicos ordenados"""
+        ranked = []
+        for passage in passages:
+            hits = []
+            for segment_id, shingles in zip(self.ids, self.shingles):
+                positions = [passage.find(s) for s in shingles if s.strip()]
+                positions = [p for p in positions if p >= 0]
+                if positions:
+                    hits.append((min(positions), segment_id))
+            ranked.extend(segment_id for _, segment_id in sorted(hits))
+        return dedupe_preserving_order(ranked)
+
+    def ids_for_anchor(self, anchor: str) -> List[str]:
+        """Ids canônicos cujo intervalo de caracteres contém a âncora"""
+        position = self.text.find(anchor)
+        if position < 0:
+            return []
+        end = position + len(anchor)
+        step = self.chunk_size - self.overlap
+        return [
+            segment_id
+            for i, segment_id in enumerate(self.ids)
+            if i * step < end and position < i * step + len(self.segments[i])
+        ]
+
+
+def build_retrievers(corpus_text: str, embedder) -> Tuple[Dict[str, Callable[[str, int], List[str]]], Dict[str, str]]:
+    """Adapta cada retriever do projeto para a assinatura (pergunta, k) -> trechos ordenados.
+
+    Retriever cujo módulo não pode ser importado (dependência ausente) é listado em `skipped`.
+    """
+    retrievers: Dict[str, Callable[[str, int], List[str]]] = {}
+    skipped: Dict[str, str] = {}
+
+    # text_utils.find_best_chunk: melhor chunk por interseção de palavras
+    from app.services.text_utils import find_best_chunk
+
+    default_chunks = chunk_text(corpus_text)
+    retrievers['find_best_chunk'] = lambda q, k: [find_best_chunk(q, default_chunks)]
+
+    # app_optimized.find_relevant_context_enhanced: contexto combinado dos melhores chunks
+    try:
+        import app_optimized
+
+        app_optimized.md_text = corpus_text
+        retrievers['find_relevant_context_enhanced'] = lambda q, k: [
+            app_optimized.find_relevant_context_enhanced(q, app_optimized.md_text)
+        ]
+        # Chunks inteiros entregues ao QA extrativo (multi-contexto)
+        retrievers['find_relevant_chunks'] = lambda q, k: app_optimized.find_relevant_chunks(
+            q, app_optimized.md_text, top_k=k
+        )
+    except Exception as e:
+        skipped['find_relevant_context_enhanced'] = f"{type(e).__name__}: {e}"
+        skipped['find_relevant_chunks'] = f"{type(e).__name__}: {e}"
+
+    # functions/api.py HanseniaseChatbot.get_relevant_chunks: palavras-chave + embeddings
+    try:
+        sys.path.insert(0, str(PROJECT_ROOT / 'functions'))
+        import api as functions_api
+
+        chatbot = functions_api.HanseniaseChatbot.__new__(functions_api.HanseniaseChatbot)
+        chatbot.cache = {}
+        chatbot.chunks = default_chunks
+        chatbot.embedding_model = embedder
+        retrievers['get_relevant_chunks'] = lambda q, k: chatbot.get_relevant_chunks(q, top_k=k)
+    except Exception as e:
+        skipped['get_relevant_chunks'] = f"{type(e).__name__}: {e}"
+
+    # app.rag_system.RAGSystem.search_relevant_chunks: busca vetorial (cosseno) no VectorIndex
+    try:
+        from app.rag_system import RAGSystem
+        from app.services.vector_index import VectorIndex
+
+        rag = RAGSystem.__new__(RAGSystem)
+        rag.embedding_model = embedder
+        rag.vector_index = VectorIndex(embedder.get_sentence_embedding_dimension())
+        records = [{'id': f'chunk_{i}', 'content': c, 'metadata': {}} for i, c in enumerate(default_chunks)]
+        rag.vector_index.add(records, embedder.encode(default_chunks))
+        retrievers['RAGSystem.search_relevant_chunks'] = lambda q, k: [
+            chunk['content'] for chunk in rag.search_relevant_chunks(q, k=k)
+        ]
+    except Exception as e:
+        skipped['RAGSystem.search_relevant_chunks'] = f"{type(e).__name__}: {e}"
+
+    for name, reason in skipped.items():
+        logger.warning(f"Retriever {name} ignorado: {reason}")
+    return retrievers, skipped
+
+
+def evaluate_retriever(
+    retrieve: Callable[[str, int], List[str]],
+    questions: List[Dict],
+    corpus: CanonicalCorpus,
+    repeat: int,
+) -> Dict:
+    """Executa o golden set num retriever e calcula recall@k, MRR e latências"""
+    max_k = max(K_VALUES)
+    latencies = []
+    recalls = {k: [] for k in K_VALUES}
+    reciprocal_ranks = []
+    per_question = []
+
+    # Aquecimento (carregamento preguiçoso, caches de tokenização etc.)
+    retrieve(questions[0]['question'], max_k)
+
+    for item in questions:
+        passages: List[str] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            passages = retrieve(item['question'], max_k) or []
+            latencies.append(time.perf_counter() - start)
+
+        ranked_ids = corpus.map_passages([p for p in passages if p])
+        expected = set(item['expected_chunk_ids'])
+        for k in K_VALUES:
+            found = expected.intersection(ranked_ids[:k])
+            recalls[k].append(len(found) / len(expected) if expected else 0.0)
+        rank = next((i + 1 for i, cid in enumerate(ranked_ids) if cid in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+        per_question.append({'id': item['id'], 'retrieved_chunk_ids': ranked_ids[:max_k], 'first_hit_rank': rank})
+
+    result = {f'recall@{k}': round(sum(v) / len(v), 4) for k, v in recalls.items()}
+    result['mrr'] = round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4)
+    result['latency_ms'] = latency_summary(latencies)
+    result['per_question'] = per_question
+    return result
+
+
+def compare_reports(previous: Dict, current: Dict) -> List[str]:
+    """Linhas legíveis com a variação de cada métrica entre dois relatórios"""
+    lines = []
+    for name, metrics in current.get('retrievers', {}).items():
+        old = previous.get('retrievers', {}).get(name)
+        if not old:
+            lines.append(f"{name}: novo retriever")
+            continue
+        for key in [f'recall@{k}' for k in K_VALUES] + ['mrr']:
+            lines.append(f"{name} {key}: {old.get(key, 0):.4f} -> {metrics[key]:.4f} ({metrics[key] - old.get(key, 0):+.4f})")
+        for key in ('p50', 'p95', 'p99'):
+            before = old.get('latency_ms', {}).get(key, 0.0)
+            after = metrics['latency_ms'][key]
+            lines.append(f"{name} latency {key}: {before:.3f}ms -> {after:.3f}ms ({after - before:+.3f}ms)")
+    return lines
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main() -> bool:
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Benchmark de recuperação com golden set')
+    parser.add_argument('--golden', default=str(DEFAULT_GOLDEN_PATH), help='Arquivo JSON do golden set')
+    parser.add_argument('--output', default='benchmark_report.json', help='Relatório JSON de saída')
+    parser.add_argument('--compare', help='Relatório anterior para comparação')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por pergunta (latência)')
+    parser.add_argument('--offline', action='store_true', help='Usa stubs em vez de modelos reais')
+    args = parser.parse_args()
+
+    if args.offline:
+        install_offline_stubs()
+        embedder = HashingEmbedder()
+    else:
+        from sentence_transformers import SentenceTransformer
+
+        embedder = SentenceTransformer('all-MiniLM-L6-v2')
+
+    with open(args.golden, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+
+    corpus_path = PROJECT_ROOT / golden['corpus']
+    corpus_text = corpus_path.read_text(encoding='utf-8')
+    canonical = CanonicalCorpus(corpus_text, **golden['canonical_chunking'])
+
+    # Detecta golden set desatualizado em relação ao corpus
+    for item in golden['questions']:
+        anchor_ids = canonical.ids_for_anchor(item['anchor'])
+        if not set(item['expected_chunk_ids']).issubset(anchor_ids):
+            logger.warning(f"Pergunta {item['id']}: âncora mapeia para {anchor_ids}, esperado {item['expected_chunk_ids']}")
+
+    os.chdir(PROJECT_ROOT)
+    retrievers, skipped = build_retrievers(corpus_text, embedder)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'offline': args.offline,
+        'corpus': {
+            'path': golden['corpus'],
+            'sha256': hashlib.sha256(corpus_text.encode('utf-8')).hexdigest(),
+            'canonical_chunks': len(canonical.segments),
+        },
+        'golden_set': {'path': args.golden, 'version': golden.get('version'), 'questions': len(golden['questions'])},
+        'repeat': args.repeat,
+        'retrievers': {},
+        'skipped': skipped,
+    }
+
+    for name, retrieve in retrievers.items():
+        logger.info(f"Avaliando {name}...")
+        report['retrievers'][name] = evaluate_retriever(retrieve, golden['questions'], canonical, args.repeat)
+        summary = report['retrievers'][name]
+        logger.info(
+            f"{name}: recall@3={summary['recall@3']} mrr={summary['mrr']} "
+            f"p50={summary['latency_ms']['p50']}ms p95={summary['latency_ms']['p95']}ms"
+        )
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Relatório salvo em {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        for line in compare_reports(previous, report):
+            print(line)
+
+    return bool(report['retrievers'])
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,181 @@
+"""
+Gera o banco de respostas pré-computadas (data/answer_bank*.json).
+
+Responde, com o pipeline real, as perguntas de exemplo das interfaces
+(data/example_questions.json) e as N perguntas mais frequentes dos logs de
+chat, para cada persona. Rode de novo sempre que o corpus ou os prompts
+mudarem; os servidores ignoram um banco desatualizado.
+
+    python scripts/build_answer_bank.py --logs conversas.jsonl --top-n 30
+    python scripts/build_answer_bank.py --target streamlit --astra
+    python scripts/build_answer_bank.py --check   # sai com código 1 se o banco estiver desatualizado
+
+Logs aceitos: JSONL com campo `question` ou `message` (exportação do
+chat_history), ou logs de texto do servidor com linhas "Pergunta: ...".
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.answer_bank import (  # noqa: E402
+    build_answer_bank,
+    load_example_questions,
+    mine_frequent_questions,
+    save_answer_bank,
+)
+from app.services.answer_router import ROUTE_LOCAL  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+CORPUS_PATH = PROJECT_ROOT / 'PDFs' / 'Roteiro de Dsispensação - Hanseníase.md'
+TARGETS = {
+    # alvo: (artefato padrão, personas)
+    'optimized': (PROJECT_ROOT / 'data' / 'answer_bank.json', ['dr_gasnelio', 'ga']),
+    'streamlit': (PROJECT_ROOT / 'data' / 'answer_bank_streamlit.json', ['professor', 'amigavel']),
+}
+LOG_LINE_PATTERN = re.compile(r'Pergunta:\s*(.+?)\s*$')
+
+
+def iter_logged_questions(path: str) -> Iterator[str]:
+    """Perguntas de um arquivo de log (JSONL ou texto do servidor)"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                question = record.get('question') or record.get('message')
+                if isinstance(question, str):
+                    yield question
+                continue
+            match = LOG_LINE_PATTERN.search(line)
+            if match:
+                yield match.group(1)
+
+
+def iter_astra_questions(limit: int) -> Iterator[str]:
+    """Mensagens dos usuários gravadas na coleção chat_history do Astra DB"""
+    from app.database import get_db_connection
+
+    collection = get_db_connection().collection
+    for document in collection.find({}, projection={'message': True}, limit=limit):
+        if document.get('message'):
+            yield document['message']
+
+
+def optimized_answerer(corpus: str) -> Tuple[Callable[[str, str], object], Dict[str, str]]:
+    """
+    Responde com o pipeline de app_optimized (QA + geração + formatação por persona).
+
+    O LLM remoto fica desligado durante a geração: o banco não gasta tokens nem
+    guarda respostas não determinísticas. Perguntas que o roteador mandaria ao
+    LLM ficam fora do banco e seguem sendo respondidas ao vivo.
+    """
+    os.chdir(PROJECT_ROOT)
+    import app_optimized
+
+    app_optimized.md_text = corpus
+    app_optimized.get_md_chunks(corpus)
+    app_optimized.load_ai_models()
+    app_optimized.answer_router.llm_enabled = False
+
+    def answer(question: str, persona: str):
+        response = app_optimized._compute_answer(question, persona, app_optimized.synonym_registry.current)
+        return response if response.get('route') == ROUTE_LOCAL else None
+
+    return answer, app_optimized.answer_bank_fingerprint(corpus)
+
+
+def streamlit_answerer(corpus: str) -> Tuple[Callable[[str, str], object], Dict[str, str]]:
+    """
+    Responde com o RAGPipeline usado pela interface Streamlit.
+
+    Respostas de erro (pipeline fora do ar, falha na busca ou no LLM) ficam fora
+    do banco: senão seriam servidas para sempre, sem nova tentativa.
+    """
+    from rag_pipeline import answer_bank_fingerprint, get_rag_pipeline
+
+    pipeline = get_rag_pipeline()
+    if not pipeline.ensure_ready():
+        raise RuntimeError("RAGPipeline não inicializou; verifique OPENROUTER_API_KEY e o Astra DB")
+
+    def answer(question: str, persona: str):
+        response = pipeline.query(question, persona)
+        if response.get('error'):
+            logger.warning(f"Pergunta fora do banco ({persona}), resposta com erro: {question[:50]}")
+            return None
+        return response
+
+    return answer, answer_bank_fingerprint(corpus)
+
+
+def collect_questions(args) -> List[str]:
+    questions = [example['question'] for example in load_example_questions()]
+    logged: List[str] = []
+    for path in args.logs:
+        logged.extend(iter_logged_questions(path))
+    if args.astra:
+        logged.extend(iter_astra_questions(args.astra_limit))
+    frequent = mine_frequent_questions(logged, top_n=args.top_n, min_count=args.min_count)
+    logger.info(f"{len(questions)} perguntas de exemplo + {len(frequent)} frequentes (de {len(logged)} registros)")
+    return questions + frequent
+
+
+def main() -> bool:
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Gera o banco de respostas pré-computadas')
+    parser.add_argument('--target', choices=sorted(TARGETS), default='optimized', help='Aplicação que servirá o banco')
+    parser.add_argument('--output', help='Artefato de saída (padrão depende do alvo)')
+    parser.add_argument('--logs', nargs='*', default=[], help='Arquivos de log de onde minerar perguntas frequentes')
+    parser.add_argument('--astra', action='store_true', help='Minera perguntas da coleção chat_history do Astra DB')
+    parser.add_argument('--astra-limit', type=int, default=10000, help='Máximo de mensagens lidas do Astra DB')
+    parser.add_argument('--top-n', type=int, default=20, help='Quantidade de perguntas frequentes incluídas')
+    parser.add_argument('--min-count', type=int, default=2, help='Ocorrências mínimas de uma pergunta frequente')
+    parser.add_argument('--check', action='store_true', help='Apenas verifica se o banco existente está atualizado')
+    args = parser.parse_args()
+
+    default_output, personas = TARGETS[args.target]
+    output = args.output or str(default_output)
+    corpus = CORPUS_PATH.read_text(encoding='utf-8')
+
+    if args.check:
+        if args.target == 'optimized':
+            os.chdir(PROJECT_ROOT)
+            from app_optimized import answer_bank_fingerprint
+        else:
+            from rag_pipeline import answer_bank_fingerprint
+        try:
+            with open(output, 'r', encoding='utf-8') as f:
+                stored = json.load(f).get('fingerprint')
+        except (OSError, ValueError):
+            stored = None
+        current = stored == answer_bank_fingerprint(corpus)
+        logger.info(f"Banco {output}: {'atualizado' if current else 'desatualizado ou ausente'}")
+        return current
+
+    questions = collect_questions(args)
+    answerer = optimized_answerer if args.target == 'optimized' else streamlit_answerer
+    answer, fingerprint = answerer(corpus)
+    artifact = build_answer_bank(questions, personas, answer, fingerprint)
+    save_answer_bank(artifact, output)
+    logger.info(f"Banco versão {artifact['version']} salvo em {output}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
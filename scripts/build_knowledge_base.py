@@ -6,8 +6,7 @@ import os
 import sys
 import logging
 from pathlib import Path
-from typing import List
-import PyPDF2
+from typing import Dict, Iterator, List
 import re
 
 # Adiciona o diretório backend ao path
@@ -15,6 +14,10 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
 from rag_service import RAGService
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from app.services.ingestion import iter_pdf_chunks
+from app.services.markdown_chunker import chunk_markdown
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -28,34 +31,21 @@ class DocumentProcessor:
     
     def process_pdf(self, pdf_path: str) -> List[str]:
         """Processa um arquivo PDF e retorna lista de chunks"""
+        return [document['content'] for document in self.iter_pdf_documents(pdf_path)]
+    
+    def iter_pdf_documents(self, pdf_path: str) -> Iterator[Dict]:
+        """Gera chunks do PDF com metadados de página, extraindo as páginas em paralelo"""
         try:
             logger.info(f"Processando PDF: {pdf_path}")
-            
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        text += page_text + "\n"
-                        logger.info(f"Processada página {page_num + 1}")
-                    except Exception as e:
-                        logger.warning(f"Erro ao processar página {page_num + 1}: {str(e)}")
-                        continue
-            
-            # Limpa e processa o texto
-            cleaned_text = self._clean_text(text)
-            
-            # Divide em chunks
-            chunks = self._create_chunks(cleaned_text)
-            
-            logger.info(f"PDF processado: {len(chunks)} chunks criados")
-            return chunks
-            
+            total = 0
+            for document in iter_pdf_chunks(pdf_path, max_tokens=max(self.chunk_size // 4, 64)):
+                document['content'] = self._clean_text(document['content'])
+                if len(document['content']) > 100:
+                    total += 1
+                    yield document
+            logger.info(f"PDF processado: {total} chunks criados")
         except Exception as e:
             logger.error(f"Erro ao processar PDF: {str(e)}")
-            return []
     
     def process_markdown(self, md_path: str) -> List[str]:
         """Processa um arquivo Markdown e retorna lista de chunks"""
@@ -65,11 +55,10 @@ class DocumentProcessor:
             with open(md_path, 'r', encoding='utf-8') as file:
                 text = file.read()
             
-            # Limpa e processa o texto
-            cleaned_text = self._clean_text(text)
-            
-            # Divide em chunks
-            chunks = self._create_chunks(cleaned_text)
+            # Divide pela estrutura do Markdown antes de limpar (a limpeza remove '#' e '|')
+            sections = chunk_markdown(text, max_tokens=max(self.chunk_size // 4, 64))
+            chunks = [self._clean_text(section['content']) for section in sections]
+            chunks = [chunk for chunk in chunks if chunk]
             
             logger.info(f"Markdown processado: {len(chunks)} chunks criados")
             return chunks
@@ -90,51 +79,6 @@ class DocumentProcessor:
         text = re.sub(r'[^\w\s\.\,\;\:\!\?\-\(\)\[\]\{\}\"\'\/\\\n]', '', text)
         
         return text.strip()
-    
-    def _create_chunks(self, text: str) -> List[str]:
-        """Divide o texto em chunks com sobreposição"""
-        chunks = []
-        
-        # Divide por parágrafos primeiro
-        paragraphs = text.split('\n\n')
-        
-        current_chunk = ""
-        
-        for paragraph in paragraphs:
-            # Se adicionar este parágrafo não exceder o tamanho máximo
-            if len(current_chunk) + len(paragraph) <= self.chunk_size:
-                current_chunk += paragraph + "\n\n"
-            else:
-                # Salva chunk atual se não estiver vazio
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                
-                # Inicia novo chunk
-                if len(paragraph) <= self.chunk_size:
-                    current_chunk = paragraph + "\n\n"
-                else:
-                    # Parágrafo muito grande, divide por sentenças
-                    sentences = paragraph.split('. ')
-                    temp_chunk = ""
-                    
-                    for sentence in sentences:
-                        if len(temp_chunk) + len(sentence) <= self.chunk_size:
-                            temp_chunk += sentence + ". "
-                        else:
-                            if temp_chunk.strip():
-                                chunks.append(temp_chunk.strip())
-                            temp_chunk = sentence + ". "
-                    
-                    current_chunk = temp_chunk
-        
-        # Adiciona último chunk se não estiver vazio
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
-        
-        # Remove chunks muito pequenos
-        chunks = [chunk for chunk in chunks if len(chunk) > 100]
-        
-        return chunks
 
 def main():
     """Função principal"""
@@ -150,14 +94,16 @@ def main():
     # Processa documentos
     processor = DocumentProcessor()
     all_chunks = []
+    all_metadata = []
     
     # Procura por arquivos PDF na pasta data
     pdf_files = list(data_dir.glob('*.pdf'))
     if pdf_files:
         logger.info(f"Encontrados {len(pdf_files)} arquivos PDF")
         for pdf_file in pdf_files:
-            chunks = processor.process_pdf(str(pdf_file))
-            all_chunks.extend(chunks)
+            for document in processor.iter_pdf_documents(str(pdf_file)):
+                all_chunks.append(document['content'])
+                all_metadata.append(document['metadata'])
     
     # Procura por arquivos Markdown na pasta data
     md_files = list(data_dir.glob('*.md'))
@@ -167,6 +113,7 @@ def main():
             if md_file.name != 'README.md':  # Ignora README
                 chunks = processor.process_markdown(str(md_file))
                 all_chunks.extend(chunks)
+                all_metadata.extend({'source': md_file.name} for _ in chunks)
     
     if not all_chunks:
         logger.error("Nenhum documento encontrado para processar!")
@@ -179,7 +126,7 @@ def main():
     logger.info("Construindo índice no Astra DB...")
     rag_service = RAGService()
     
-    if rag_service.build_index(all_chunks):
+    if rag_service.build_index(all_chunks, metadatas=all_metadata):
         logger.info("✅ Base de conhecimento construída com sucesso no Astra DB!")
         
         # Mostra estatísticas
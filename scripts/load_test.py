@@ -0,0 +1,180 @@
+"""
+Teste de carga do /api/chat: reproduz um corpus de perguntas numa taxa alvo (RPS)
+e reporta vazão e percentis de latência.
+
+O gerador é de laço aberto: cada requisição é agendada em t0 + i/RPS,
+independentemente da conclusão das anteriores, para que a fila do servidor
+apareça na latência em vez de reduzir silenciosamente a carga. Para não gastar
+cota do OpenRouter, suba o app com OPENROUTER_BASE_URL apontando para o
+servidor simulado (ou use --mock-port para iniciá-lo junto com o driver):
+
+    python scripts/load_test.py --url http://localhost:5000/api/chat --rps 10 --duration 60
+    python scripts/load_test.py --api modular --url http://localhost:5000/api/chat --rps 5 --requests 200
+"""
+
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.perf_utils import latency_summary  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = PROJECT_ROOT / 'data' / 'golden_questions.json'
+
+# Formato do corpo de /api/chat em cada app
+PAYLOAD_BUILDERS = {
+    'optimized': lambda question, persona: {'question': question, 'personality_id': persona or 'dr_gasnelio'},
+    'modular': lambda question, persona: {'message': question, 'persona': persona or 'Dr. Gasnelio'},
+    'backend': lambda question, persona: {'message': question, 'persona': persona or 'dr_gasnelio'},
+}
+
+
+def load_questions(path: str) -> List[str]:
+    """Lê perguntas de um JSON do golden set, de uma lista JSON ou de um texto (uma por linha)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.json'):
+        data = json.loads(content)
+        items = data.get('questions', []) if isinstance(data, dict) else data
+        return [item['question'] if isinstance(item, dict) else str(item) for item in items]
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+def run_load(
+    url: str,
+    questions: List[str],
+    rps: float,
+    total_requests: int,
+    api: str = 'optimized',
+    personas: Optional[List[str]] = None,
+    max_workers: int = 64,
+    timeout: float = 60.0,
+) -> Dict:
+    """
+    Dispara `total_requests` requisições em laço aberto na taxa `rps`.
+
+    Retorna:
+        dict: Vazão alcançada, contagem por status, latências e atraso de agendamento.
+    """
+    build_payload = PAYLOAD_BUILDERS[api]
+    personas = personas or [None]
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    lock = threading.Lock()
+    latencies: List[float] = []
+    ok_latencies: List[float] = []
+    lags: List[float] = []
+    statuses: Counter = Counter()
+
+    def send(index: int, scheduled: float) -> None:
+        question = questions[index % len(questions)]
+        persona = personas[index % len(personas)]
+        start = time.perf_counter()
+        try:
+            response = session.post(url, json=build_payload(question, persona), timeout=timeout)
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            lags.append(start - scheduled)
+            statuses[status] += 1
+            if status == '200':
+                ok_latencies.append(elapsed)
+
+    interval = 1.0 / rps
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(total_requests):
+            scheduled = t0 + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, i, scheduled)
+    elapsed_total = time.perf_counter() - t0
+
+    completed = sum(statuses.values())
+    return {
+        'url': url,
+        'api': api,
+        'target_rps': rps,
+        'requests': total_requests,
+        'completed': completed,
+        'duration_s': round(elapsed_total, 3),
+        'throughput_rps': round(completed / elapsed_total, 3) if elapsed_total else 0.0,
+        'success_rps': round(statuses.get('200', 0) / elapsed_total, 3) if elapsed_total else 0.0,
+        'status_counts': dict(statuses),
+        'latency_ms': latency_summary(latencies),
+        'latency_ok_ms': latency_summary(ok_latencies),
+        # Atraso entre o horário agendado e o envio: se crescer, o driver (não o servidor) saturou
+        'schedule_lag_ms': latency_summary(lags),
+    }
+
+
+def main() -> bool:
+    """Função principal"""
+    parser = argparse.ArgumentParser(description='Teste de carga do /api/chat')
+    parser.add_argument('--url', default='http://localhost:5000/api/chat', help='Endpoint de chat')
+    parser.add_argument('--api', choices=sorted(PAYLOAD_BUILDERS), default='optimized', help='Formato do corpo')
+    parser.add_argument('--corpus', default=str(DEFAULT_CORPUS), help='Perguntas (.json ou .txt)')
+    parser.add_argument('--rps', type=float, default=5.0, help='Taxa alvo de requisições por segundo')
+    parser.add_argument('--duration', type=float, default=30.0, help='Duração em segundos (se --requests ausente)')
+    parser.add_argument('--requests', type=int, help='Número total de requisições')
+    parser.add_argument('--persona', action='append', help='Persona(s) a alternar; padrão do app se omitido')
+    parser.add_argument('--workers', type=int, default=64, help='Máximo de requisições simultâneas')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--output', help='Grava o relatório JSON neste arquivo')
+    parser.add_argument('--mock-port', type=int, help='Sobe o servidor OpenRouter simulado nesta porta')
+    args = parser.parse_args()
+
+    mock = None
+    if args.mock_port:
+        from app.services.mock_llm_server import MockLLMServer
+
+        mock = MockLLMServer(port=args.mock_port).start()
+        logger.info(f"Inicie o app com OPENROUTER_BASE_URL={mock.base_url}")
+
+    questions = load_questions(args.corpus)
+    if not questions:
+        logger.error(f"Nenhuma pergunta em {args.corpus}")
+        return False
+    total = args.requests or max(int(args.rps * args.duration), 1)
+
+    logger.info(f"Enviando {total} requisições a {args.rps} RPS para {args.url}")
+    report = run_load(
+        args.url, questions, args.rps, total,
+        api=args.api, personas=args.persona, max_workers=args.workers, timeout=args.timeout,
+    )
+    if mock is not None:
+        report['mock_stats'] = dict(mock.stats)
+        mock.stop()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Relatório salvo em {args.output}")
+    return report['status_counts'].get('200', 0) > 0
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -17,7 +17,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Importar pipeline RAG
-from rag_pipeline import RAGPipeline
+from rag_pipeline import RAGPipeline, answer_bank_fingerprint, get_rag_pipeline
+from app.services.answer_bank import AnswerBank, load_answer_bank, load_example_questions
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -337,24 +338,36 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource(show_spinner="🚀 Inicializando Dr. Gasnelio...")
+def get_shared_pipeline() -> RAGPipeline:
+    """Pipeline único por processo, compartilhado entre todas as sessões do navegador"""
+    pipeline = get_rag_pipeline()
+    pipeline.ensure_ready()
+    return pipeline
+
+
+@st.cache_resource
+def get_shared_answer_bank() -> AnswerBank:
+    """Respostas pré-computadas (scripts/build_answer_bank.py --target streamlit), válidas para o corpus atual"""
+    md_path = os.path.join("PDFs", "Roteiro de Dsispensação - Hanseníase.md")
+    if not os.path.exists(md_path):
+        return AnswerBank()
+    with open(md_path, "r", encoding="utf-8") as f:
+        fingerprint = answer_bank_fingerprint(f.read())
+    return load_answer_bank(
+        os.getenv("STREAMLIT_ANSWER_BANK_PATH", os.path.join("data", "answer_bank_streamlit.json")),
+        expected_fingerprint=fingerprint,
+    )
+
+
 def initialize_session_state():
-    """Inicializa variáveis de sessão"""
+    """Inicializa variáveis de sessão (só dados leves; o pipeline é compartilhado)"""
     if 'session_id' not in st.session_state:
         st.session_state.session_id = str(uuid.uuid4())
     
     if 'messages' not in st.session_state:
         st.session_state.messages = []
     
-    if 'rag_pipeline' not in st.session_state:
-        with st.spinner("🚀 Inicializando Dr. Gasnelio..."):
-            try:
-                st.session_state.rag_pipeline = RAGPipeline()
-                st.success("✅ Dr. Gasnelio está pronto para conversar!")
-                time.sleep(1)
-            except Exception as e:
-                st.error(f"❌ Erro ao inicializar: {e}")
-                st.session_state.rag_pipeline = None
-    
     if 'current_persona' not in st.session_state:
         st.session_state.current_persona = "Professor"
     
@@ -421,38 +434,7 @@ def display_example_questions():
     """Exibe exemplos de perguntas"""
     st.markdown("### 💡 Exemplos de Perguntas")
     
-    examples = [
-        {
-            "title": "Sobre o Roteiro",
-            "question": "O que é roteiro de dispensação?",
-            "description": "Entenda os conceitos fundamentais"
-        },
-        {
-            "title": "Metodologia",
-            "question": "Como foi validado o roteiro?",
-            "description": "Processo de validação por especialistas"
-        },
-        {
-            "title": "Aplicação Prática",
-            "question": "Como aplicar o roteiro na prática?",
-            "description": "Orientações para implementação"
-        },
-        {
-            "title": "Resultados",
-            "question": "Quais foram os principais resultados?",
-            "description": "Descobertas e conclusões da pesquisa"
-        },
-        {
-            "title": "Farmácia Clínica",
-            "question": "Como melhorar o cuidado farmacêutico?",
-            "description": "Estratégias para otimização"
-        },
-        {
-            "title": "Adesão ao Tratamento",
-            "question": "Como aumentar a adesão dos pacientes?",
-            "description": "Técnicas de comunicação eficaz"
-        }
-    ]
+    examples = load_example_questions("streamlit")
     
     # Criar grid de exemplos
     cols = st.columns(3)
@@ -474,16 +456,22 @@ def display_example_questions():
 
 
 def generate_response(query: str) -> Dict[str, Any]:
-    """Gera resposta usando o pipeline RAG"""
-    if not st.session_state.rag_pipeline:
-        return {
-            "answer": "Desculpe, o Dr. Gasnelio não está disponível no momento. Tente novamente mais tarde.",
-            "sources": []
-        }
+    """Gera resposta usando o banco pré-computado ou o pipeline RAG"""
+    persona = "amigavel" if st.session_state.current_persona == "Amigável" else "professor"
+    result = get_shared_answer_bank().lookup(query, persona)
+    
+    if result is None:
+        pipeline = get_shared_pipeline()
+        if not pipeline.ensure_ready():
+            return {
+                "answer": "Desculpe, o Dr. Gasnelio não está disponível no momento. Tente novamente mais tarde.",
+                "sources": []
+            }
     
     try:
         # Buscar no pipeline RAG
-        result = st.session_state.rag_pipeline.query(query)
+        if result is None:
+            result = pipeline.query(query, persona)
         
         # Personalizar resposta baseada na persona
         if st.session_state.current_persona == "Amigável":
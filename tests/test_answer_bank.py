@@ -0,0 +1,58 @@
+from app.services.answer_bank import (
+    build_answer_bank,
+    compute_fingerprint,
+    load_answer_bank,
+    load_example_questions,
+    mine_frequent_questions,
+    save_answer_bank,
+)
+
+
+def test_minera_perguntas_frequentes_normalizadas():
+    log = ["Qual a dose?", "qual a  dose?", "Qual a dose?", "O que é PQT-U?", "O que é PQT-U?", "Rara?"]
+    assert mine_frequent_questions(log, top_n=5) == ["Qual a dose?", "O que é PQT-U?"]
+    assert mine_frequent_questions(log, top_n=1) == ["Qual a dose?"]
+
+
+def test_banco_serve_da_memoria_sem_chamar_o_pipeline(tmp_path):
+    chamadas = []
+
+    def responder(pergunta, persona):
+        chamadas.append((pergunta, persona))
+        return {"answer": f"{persona}: {pergunta}"}
+
+    fingerprint = compute_fingerprint("tese", {"ga": "prompt"})
+    artifact = build_answer_bank(["Qual a dose?", "qual a dose? "], ["ga", "dr_gasnelio"], responder, fingerprint)
+    assert len(chamadas) == 2
+    path = tmp_path / "banco.json"
+    save_answer_bank(artifact, str(path))
+
+    bank = load_answer_bank(str(path), expected_fingerprint=fingerprint)
+    assert bank.version == artifact["version"]
+    assert bank.lookup("  QUAL a dose?", "ga") == {"answer": "ga: Qual a dose?"}
+    assert bank.lookup("Outra pergunta", "ga") is None
+    assert len(chamadas) == 2
+
+
+def test_banco_desatualizado_e_ignorado(tmp_path):
+    path = tmp_path / "banco.json"
+    fingerprint = compute_fingerprint("tese v1", {})
+    save_answer_bank(build_answer_bank(["Qual a dose?"], ["ga"], lambda q, p: "r", fingerprint), str(path))
+    assert len(load_answer_bank(str(path), expected_fingerprint=compute_fingerprint("tese v2", {}))) == 0
+    assert len(load_answer_bank(str(tmp_path / "ausente.json"))) == 0
+
+
+def test_resposta_none_fica_fora_do_banco():
+    fingerprint = compute_fingerprint("tese", {})
+    artifact = build_answer_bank(
+        ["Qual a dose?", "Por que a clofazimina escurece a pele?"],
+        ["ga"],
+        lambda pergunta, persona: {"answer": "600 mg"} if "dose" in pergunta else None,
+        fingerprint,
+    )
+    assert list(artifact["personas"]["ga"]) == ["qual a dose?"]
+
+
+def test_perguntas_de_exemplo_das_interfaces():
+    assert {e["question"] for e in load_example_questions("web")} <= {e["question"] for e in load_example_questions()}
+    assert all("title" in e for e in load_example_questions("streamlit"))
@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.answer_router import (
+    ROUTE_FALLBACK,
+    ROUTE_LLM,
+    ROUTE_LOCAL,
+    AnswerRouter,
+    answer_route_cost_total,
+    answer_route_total,
+    retrieval_coverage,
+    usage_tokens,
+)
+
+
+def test_cobertura_da_busca():
+    trechos = ["A rifampicina é tomada uma vez por mês.", "A dapsona é diária."]
+    assert retrieval_coverage("Qual a dose da rifampicina?", trechos) == pytest.approx(0.5)
+    assert retrieval_coverage("rifampicina e dapsona", trechos) == 1.0
+    assert retrieval_coverage("e a?", trechos) == 1.0
+
+
+@pytest.mark.parametrize("qa,busca,span,rota,motivo", [
+    (0.9, 0.8, True, ROUTE_LOCAL, "confident"),
+    (0.2, 0.8, True, ROUTE_LLM, "low_qa_confidence"),
+    (0.9, 0.1, True, ROUTE_LLM, "low_retrieval"),
+    (0.0, 1.0, False, ROUTE_LLM, "no_span"),
+])
+def test_decisao(qa, busca, span, rota, motivo):
+    assert AnswerRouter().decide(qa, busca, span) == (rota, motivo)
+
+
+def test_llm_desativado_vira_fallback():
+    assert AnswerRouter(llm_enabled=False).decide(0.1, 0.9) == (ROUTE_FALLBACK, "llm_disabled")
+    assert AnswerRouter(llm_enabled=False).decide(0.9, 0.9) == (ROUTE_LOCAL, "confident")
+
+
+def test_registro_de_custo():
+    antes = answer_route_cost_total.get(route=ROUTE_LLM)
+    total_antes = answer_route_total.get(route=ROUTE_LLM, reason="no_span")
+    AnswerRouter(cost_per_1k_tokens=0.5).record(ROUTE_LLM, "no_span", 1.2, tokens=2000)
+    assert answer_route_cost_total.get(route=ROUTE_LLM) - antes == pytest.approx(1.0)
+    assert answer_route_total.get(route=ROUTE_LLM, reason="no_span") == total_antes + 1
+
+
+def test_tokens_de_uso():
+    assert usage_tokens({"prompt_tokens": 100, "completion_tokens": 20}) == 120
+    assert usage_tokens({"total_tokens": 7, "prompt_tokens": 5}) == 7
+    assert usage_tokens(None) == 0
@@ -0,0 +1,33 @@
+from app.services.context_packer import pack_context
+from app.services.text_utils import chunk_text
+from app.services.token_utils import count_tokens
+
+FRASES = [f"A frase número {i} fala sobre a dose supervisionada de rifampicina." for i in range(40)]
+
+
+def test_respeita_orcamento_e_corta_em_fim_de_frase():
+    texto = " ".join(FRASES)
+    contexto = pack_context([texto], max_tokens=60)
+    assert count_tokens(contexto) <= 60
+    assert contexto.endswith(".")
+    assert texto.startswith(contexto)
+
+
+def test_ordena_por_relevancia_e_descarta_repeticoes():
+    trechos = [("menos relevante.", 0.1), ("mais relevante.", 0.9), ("Mais  relevante.", 0.5)]
+    assert pack_context(trechos, max_tokens=100) == "mais relevante.\n\nmenos relevante."
+    dicts = [{"content": "b.", "similarity_score": 0.2}, {"content": "a.", "similarity_score": 0.7}]
+    assert pack_context(dicts, max_tokens=100) == "a.\n\nb."
+
+
+def test_remove_sobreposicao_de_chunks_vizinhos():
+    texto = " ".join(FRASES[:10])
+    chunks = chunk_text(texto, chunk_size=300, overlap=100)
+    contexto = pack_context(chunks, max_tokens=10_000, separator=" ")
+    assert contexto == texto
+
+
+def test_trecho_que_nao_cabe_nao_impede_os_menores():
+    grande = " ".join(FRASES)
+    contexto = pack_context([("curto.", 1.0), (grande, 0.9), ("outro curto.", 0.1)], max_tokens=30, min_fragment_tokens=100)
+    assert contexto == "curto.\n\noutro curto."
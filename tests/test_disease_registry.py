@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+from app.services.disease_registry import (
+    DiseaseManifestError,
+    DiseaseRegistry,
+    LRUCache,
+    default_personalities,
+    load_manifests,
+    validate_manifest,
+    write_manifest,
+)
+
+
+def _manifesto(nome="Tuberculose", **extra):
+    manifesto = {
+        "name": nome,
+        "pdf_path": f"PDFs/{nome.lower()}.pdf",
+        "keywords": [nome.lower(), " bacilo "],
+        "personalities": default_personalities(nome),
+    }
+    manifesto.update(extra)
+    return manifesto
+
+
+def test_validar_completa_opcionais():
+    manifesto = validate_manifest(_manifesto(), "tuberculose")
+    assert manifesto["description"] == ""
+    assert manifesto["keywords"] == ["tuberculose", "bacilo"]
+    assert manifesto["chunking"] == {"chunk_size": 1500, "overlap": 300}
+
+
+@pytest.mark.parametrize("alteracao", [
+    {"name": ""},
+    {"personalities": {"ga": {"name": "Gá"}}},
+    {"keywords": "tuberculose"},
+    {"chunking": {"chunk_size": 200, "overlap": 200}},
+    {"chunking": []},
+    {"chunking": {"chunk_size": 800, "tamanho": 10}},
+    {"chunking": {"chunk_size": True, "overlap": 0}},
+])
+def test_validar_rejeita_manifesto_invalido(alteracao):
+    with pytest.raises(DiseaseManifestError):
+        validate_manifest(_manifesto(**alteracao), "tuberculose")
+
+
+def test_gravar_e_carregar(tmp_path):
+    write_manifest("tuberculose", _manifesto(chunking={"chunk_size": 800, "overlap": 100}), str(tmp_path))
+    (tmp_path / "quebrado.json").write_text("{", encoding="utf-8")
+    (tmp_path / "sem_chunking.json").write_text(json.dumps(_manifesto(chunking=[])), encoding="utf-8")
+    doencas = load_manifests(str(tmp_path), base_dir="/app")
+    assert list(doencas) == ["tuberculose"]
+    assert doencas["tuberculose"]["pdf_path"] == os.path.join("/app", "PDFs/tuberculose.pdf")
+    assert doencas["tuberculose"]["chunking"]["chunk_size"] == 800
+
+
+def test_gravar_rejeita_id_invalido(tmp_path):
+    with pytest.raises(DiseaseManifestError):
+        write_manifest("../fora", _manifesto(), str(tmp_path))
+
+
+def test_registro_detecta_doenca_nova_sem_reinicio(tmp_path):
+    registro = DiseaseRegistry(str(tmp_path), refresh_interval=0)
+    assert registro.refresh() is True
+    assert registro.diseases == {}
+    assert registro.refresh() is False
+
+    write_manifest("malaria", _manifesto("Malária"), str(tmp_path))
+    assert registro.refresh() is True
+    assert list(registro.diseases) == ["malaria"]
+
+    os.remove(tmp_path / "malaria.json")
+    assert registro.refresh() is True
+    assert registro.diseases == {}
+
+
+def test_registro_respeita_intervalo(tmp_path):
+    registro = DiseaseRegistry(str(tmp_path), refresh_interval=3600)
+    registro.refresh(force=True)
+    (tmp_path / "malaria.json").write_text(json.dumps(_manifesto("Malária")), encoding="utf-8")
+    assert registro.refresh() is False
+    assert registro.refresh(force=True) is True
+
+
+def test_lru_descarta_menos_usado():
+    descartados = []
+    cache = LRUCache(2, on_evict=lambda chave, valor: descartados.append(chave))
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert descartados == ["b"]
+    assert cache.keys() == ["a", "c"]
+    assert cache.pop("a") == 1
+    assert "a" not in cache and len(cache) == 1
@@ -0,0 +1,94 @@
+import numpy as np
+
+from app.services.disease_router import DiseaseRouter
+
+DOENCAS = {
+    "hanseniase": {
+        "name": "Hanseníase",
+        "description": "Roteiro de dispensação da poliquimioterapia",
+        "keywords": ["rifampicina", "clofazimina", "PQT"],
+    },
+    "tuberculose": {
+        "name": "Tuberculose",
+        "description": "Esquema básico do tratamento",
+        "keywords": ["isoniazida", "pirazinamida"],
+    },
+    "malaria": {
+        "name": "Malária",
+        "description": "Tratamento antimalárico",
+        "keywords": ["cloroquina", "primaquina"],
+    },
+}
+
+# Embedding de brinquedo: um eixo por doença, ativado pelas palavras do tema
+EIXOS = {
+    "hanseniase": ["mancha", "pele", "dispensação", "poliquimioterapia"],
+    "tuberculose": ["tosse", "pulmão", "esquema"],
+    "malaria": ["febre", "mosquito", "antimalárico"],
+}
+
+
+def embed_falso(textos):
+    vetores = []
+    for texto in textos:
+        texto = texto.lower()
+        vetores.append([sum(palavra in texto for palavra in palavras) for palavras in EIXOS.values()] + [0.1])
+    return np.asarray(vetores, dtype="float32")
+
+
+def test_palavra_chave_decide_sem_embedding():
+    chamadas = []
+
+    def embed(textos):
+        chamadas.append(textos)
+        return embed_falso(textos)
+
+    router = DiseaseRouter(DOENCAS, embed=embed)
+    chamadas.clear()
+    assert router.route("Qual a dose de RIFAMPICINA?") == [("hanseniase", 1.0)]
+    assert router.route("Como tomar a primaquina") == [("malaria", 1.0)]
+    assert chamadas == []
+
+
+def test_palavra_chave_ignora_acentos_e_fronteiras():
+    router = DiseaseRouter(DOENCAS)
+    assert router.keyword_matches("o que é malaria?") == {"malaria": 1}
+    assert router.keyword_matches("pqtx não é sigla") == {}
+
+
+def test_varias_doencas_citadas():
+    router = DiseaseRouter(DOENCAS, embed=embed_falso)
+    rota = router.route("Posso usar rifampicina e isoniazida com clofazimina?")
+    assert [doenca for doenca, _ in rota] == ["hanseniase", "tuberculose"]
+
+
+def test_roteamento_por_centroide():
+    router = DiseaseRouter(DOENCAS, embed=embed_falso)
+    rota = router.route("Tenho tosse e dor no pulmão")
+    assert rota[0][0] == "tuberculose"
+    assert all(doenca != "hanseniase" for doenca, _ in rota)
+
+
+def test_centroide_do_corpus_substitui_descricao():
+    router = DiseaseRouter(DOENCAS, embed=embed_falso)
+    router.set_centroid("malaria", embed_falso(["tosse no pulmão", "pulmão e tosse"]))
+    rota = router.route("tosse no pulmão", question_embedding=embed_falso(["tosse no pulmão"])[0])
+    assert {doenca for doenca, _ in rota} == {"tuberculose", "malaria"}
+
+
+def test_sem_doenca_plausivel():
+    router = DiseaseRouter(DOENCAS, embed=embed_falso, min_similarity=0.5)
+    assert router.route("qual o horário de funcionamento?") == []
+    assert DiseaseRouter(DOENCAS).route("pergunta genérica") == []
+
+
+def test_doenca_unica_sempre_roteada():
+    router = DiseaseRouter({"hanseniase": DOENCAS["hanseniase"]})
+    assert router.route("qualquer coisa") == [("hanseniase", 1.0)]
+
+
+def test_atualizar_registro():
+    router = DiseaseRouter(DOENCAS)
+    router.update_diseases({k: v for k, v in DOENCAS.items() if k != "malaria"})
+    assert "malaria" not in router.disease_ids
+    assert router.keyword_matches("cloroquina") == {}
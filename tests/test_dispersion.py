@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.dispersion import (
+    DispersionParameterError,
+    calculate_batch,
+    calculate_dispersion,
+    dispersion_coefficients,
+    expand_scenarios,
+    plume_concentration,
+    stability_class_for,
+    validate_params,
+)
+
+BASE = {"wind_speed": 4.0, "temperature": 25.0, "emission_rate": 100.0}
+
+
+def test_fonte_ao_nivel_do_solo_bate_com_formula_fechada():
+    sigma_y, sigma_z = dispersion_coefficients(np.array([1000.0]), "D")
+    esperado = 100.0 / (math.pi * 4.0 * sigma_y[0] * sigma_z[0])
+    obtido = plume_concentration(1000.0, 0.0, 0.0, 100.0, 4.0, 0.0, "D")
+    assert obtido == pytest.approx(esperado)
+
+
+def test_coeficientes_de_briggs_classe_d_rural():
+    sigma_y, sigma_z = dispersion_coefficients(np.array([1000.0]), "D")
+    assert sigma_y[0] == pytest.approx(0.08 * 1000 / math.sqrt(1.1))
+    assert sigma_z[0] == pytest.approx(0.06 * 1000 / math.sqrt(2.5))
+
+
+def test_simetria_lateral_e_zero_a_montante():
+    campo = plume_concentration(
+        np.array([[-100.0, 500.0, 500.0]]), np.array([[0.0, 80.0, -80.0]]), 0.0, 50.0, 3.0, 30.0, "C"
+    )
+    assert campo[0, 0] == 0.0
+    assert campo[0, 1] == pytest.approx(campo[0, 2])
+
+
+def test_estavel_concentra_mais_que_instavel_no_eixo():
+    estavel = plume_concentration(2000.0, 0.0, 0.0, 10.0, 3.0, 0.0, "F")
+    instavel = plume_concentration(2000.0, 0.0, 0.0, 10.0, 3.0, 0.0, "A")
+    assert estavel > instavel
+
+
+@pytest.mark.parametrize("vento,insolacao,classe", [
+    (1.5, "strong", "A"),
+    (4.0, "moderate", "B"),
+    (5.5, "slight", "D"),
+    (2.5, "night_clear", "F"),
+    (8.0, "night_cloudy", "D"),
+])
+def test_tabela_de_turner(vento, insolacao, classe):
+    assert stability_class_for(vento, insolacao) == classe
+
+
+def test_calculo_completo():
+    resultado = calculate_dispersion(dict(BASE, stack_height=40, stability_class="d", grid={"nx": 50, "ny": 21}))
+    assert resultado["stability_class"] == "D"
+    assert resultado["effective_height"] == 40
+    assert len(resultado["grid"]["concentration"]) == 21
+    assert len(resultado["grid"]["concentration"][0]) == 50
+    assert resultado["max_location"]["y"] == 0.0
+    assert resultado["max_concentration"] == pytest.approx(max(resultado["centerline"]["concentration"]))
+
+
+def test_elevacao_da_pluma_com_chamine_quente():
+    fria = calculate_dispersion(dict(BASE, stack_height=40))
+    quente = calculate_dispersion(dict(BASE, stack_height=40, stack_temperature=180, stack_diameter=2))
+    assert quente["plume_rise"] > 0
+    assert quente["max_concentration"] < fria["max_concentration"]
+
+
+@pytest.mark.parametrize("parametros", [
+    {"wind_speed": 3.0, "temperature": 20.0},
+    dict(BASE, wind_speed=0.2),
+    dict(BASE, emission_rate="muito"),
+    dict(BASE, stability_class="G"),
+    dict(BASE, terrain="montanha"),
+    dict(BASE, grid={"x_min": 100, "x_max": 50}),
+    dict(BASE, grid={"nx": 1000, "ny": 1000}),
+    dict(BASE, grid=[100, 200]),
+    dict(BASE, grid="malha"),
+    dict(BASE, grid={"nx": float("nan")}),
+    dict(BASE, grid={"ny": float("inf")}),
+])
+def test_parametros_invalidos(parametros):
+    with pytest.raises(DispersionParameterError):
+        validate_params(parametros)
+
+
+def test_varredura_cartesiana():
+    cenarios = expand_scenarios(BASE, sweep={"wind_speed": [2, 4, 8], "stability_class": ["B", "D"]})
+    assert len(cenarios) == 6
+    assert cenarios[1] == dict(BASE, wind_speed=2, stability_class="D")
+
+
+def test_cenarios_em_colunas():
+    cenarios = expand_scenarios({"temperature": 20}, scenarios={"wind_speed": [2, 3], "emission_rate": [5, 6]})
+    assert cenarios == [
+        {"temperature": 20, "wind_speed": 2, "emission_rate": 5},
+        {"temperature": 20, "wind_speed": 3, "emission_rate": 6},
+    ]
+
+
+def test_lote_igual_ao_calculo_individual_em_qualquer_bloco():
+    cenarios = expand_scenarios(
+        dict(BASE, stack_height=25, stack_temperature=120),
+        sweep={"wind_speed": [1, 3, 6], "insolation": ["strong", "night_clear"], "terrain": ["rural", "urban"]},
+    )
+    grade = {"nx": 30, "ny": 11}
+    inteiro = list(calculate_batch(cenarios, grid=grade, receptors=[[800, 0], [1500, 40, 2]]))
+    em_blocos = list(calculate_batch(cenarios, grid=grade, receptors=[[800, 0], [1500, 40, 2]], max_cells=700))
+    assert [r["index"] for r in inteiro] == list(range(len(cenarios)))
+    assert inteiro == em_blocos
+    for cenario, resultado in zip(cenarios, inteiro):
+        individual = calculate_dispersion(dict(cenario, grid=grade))
+        assert resultado["stability_class"] == individual["stability_class"]
+        assert resultado["max_concentration"] == pytest.approx(individual["max_concentration"])
+        assert len(resultado["receptors"]) == 2
+
+
+def test_validacao_do_lote_aponta_cenarios():
+    cenarios = expand_scenarios(BASE, sweep={"wind_speed": [3, 0.1, 5, 0.2]})
+    with pytest.raises(DispersionParameterError, match="cenários 1, 3"):
+        calculate_batch(cenarios)
+    with pytest.raises(DispersionParameterError, match="cenários 1"):
+        calculate_batch([BASE, dict(BASE, stability_class="Z")])
+
+
+def test_varredura_limitada():
+    with pytest.raises(DispersionParameterError):
+        expand_scenarios(BASE, sweep={"wind_speed": list(range(1, 1001)), "temperature": list(range(200))})
+
+
+@pytest.mark.parametrize("entrada", [
+    {"scenarios": [1, 2]},
+    {"scenarios": "abc"},
+    {"scenarios": {"wind_speed": 3}},
+    {"sweep": {"wind_speed": 5}},
+    {"sweep": [{"wind_speed": 5}]},
+    {"base": [BASE]},
+    {"base": dict(BASE, wind_speed=[3])},
+    {"scenarios": [{"wind_speed": [3]}, {"wind_speed": [4]}]},
+    {"scenarios": [{"wind_speed": 3}, {"wind_speed": [4, 5]}]},
+    {"scenarios": {"wind_speed": [[3], [4]]}},
+])
+def test_formato_invalido_do_lote(entrada):
+    with pytest.raises(DispersionParameterError):
+        list(calculate_batch(expand_scenarios(entrada.get("base", BASE), entrada.get("scenarios"), entrada.get("sweep"))))
+
+
+def test_valor_nao_escalar_em_cenario_unico():
+    with pytest.raises(DispersionParameterError, match="wind_speed deve ser numérico"):
+        validate_params(dict(BASE, wind_speed=[3]))
@@ -0,0 +1,60 @@
+from app.services.ingestion import clean_page_text, iter_pdf_chunks
+from app.services.pdf_utils import extract_text_from_pdf, iter_pdf_pages, iter_pdf_pages_parallel
+
+
+def _write_pdf(path, page_texts):
+    """Gera um PDF mínimo com uma linha de texto (Helvetica) por página"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        stream = f"BT /F1 10 Tf 20 100 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 600 200] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(body)
+
+
+def test_paginas_em_ordem_sequencial_e_paralela(tmp_path):
+    pdf_path = tmp_path / "doenca.pdf"
+    textos = [f"Pagina {i} sobre tratamento." for i in range(1, 13)]
+    _write_pdf(pdf_path, textos)
+
+    sequencial = list(iter_pdf_pages(str(pdf_path)))
+    paralelo = list(iter_pdf_pages_parallel(str(pdf_path), max_workers=2, pages_per_task=3))
+    assert [n for n, _ in paralelo] == list(range(1, 13))
+    assert paralelo == sequencial
+    assert "Pagina 7" in paralelo[6][1]
+    assert extract_text_from_pdf(str(pdf_path)) == "".join(t for _, t in sequencial)
+
+
+def test_chunks_registram_paginas(tmp_path):
+    pdf_path = tmp_path / "doenca.pdf"
+    _write_pdf(pdf_path, [f"Pagina {i} descreve a dose mensal supervisionada." for i in range(1, 7)])
+
+    chunks = list(iter_pdf_chunks(str(pdf_path), max_tokens=20, max_workers=1))
+    assert len(chunks) > 1
+    assert chunks[0]["metadata"]["page"] == 1
+    assert chunks[-1]["metadata"]["page_end"] == 6
+    assert all(c["metadata"]["source"] == "doenca.pdf" for c in chunks)
+    assert all(c["metadata"]["tokens"] <= 20 for c in chunks)
+    paginas = [c["metadata"]["page"] for c in chunks]
+    assert paginas == sorted(paginas)
+
+
+def test_limpeza_de_pagina():
+    assert clean_page_text("trata-\nmento  da\nhanseníase\n\n\nNovo") == "tratamento da hanseníase\n\nNovo"
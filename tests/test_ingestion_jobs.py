@@ -0,0 +1,82 @@
+import io
+import time
+
+import pytest
+
+from app.services.ingestion_jobs import IngestionJobQueue, UnsupportedUploadError, upload_kind
+from tests.test_ingestion import _write_pdf
+
+
+def _aguardar(fila, job_id, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        job = fila.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+class Indice:
+    def __init__(self):
+        self.lotes = []
+        self.finalizacoes = 0
+
+    def adicionar(self, lote):
+        self.lotes.append(lote)
+        return len(lote)
+
+    def salvar(self):
+        self.finalizacoes += 1
+
+
+def test_tipos_suportados():
+    assert upload_kind("Tese.PDF") == "pdf"
+    assert upload_kind("notas.md") == "text"
+    with pytest.raises(UnsupportedUploadError):
+        upload_kind("planilha.xlsx")
+
+
+def test_texto_em_lotes(tmp_path):
+    indice = Indice()
+    fila = IngestionJobQueue(indice.adicionar, str(tmp_path), finalize=indice.salvar, batch_size=2, max_tokens=12)
+    texto = "\n\n".join(f"Parágrafo {i} fala sobre a dose supervisionada mensal." for i in range(5))
+    job_id = fila.submit(io.BytesIO(texto.encode("utf-8")), "roteiro.txt")
+
+    job = _aguardar(fila, job_id)
+    assert job["status"] == "done" and job["progress"] == 1.0
+    assert job["chunks_processed"] == job["chunks_added"] == sum(len(lote) for lote in indice.lotes)
+    assert all(len(lote) <= 2 for lote in indice.lotes) and len(indice.lotes) >= 3
+    assert indice.lotes[0][0]["metadata"]["source"] == "roteiro.txt"
+    assert indice.finalizacoes == 1
+    # O arquivo temporário é removido ao fim do job
+    assert list(tmp_path.iterdir()) == []
+    fila.shutdown()
+
+
+def test_pdf_registra_paginas(tmp_path):
+    pdf = tmp_path / "doenca.pdf"
+    _write_pdf(pdf, [f"Pagina {i} descreve a dose mensal supervisionada." for i in range(1, 5)])
+    indice = Indice()
+    fila = IngestionJobQueue(indice.adicionar, str(tmp_path / "uploads"), batch_size=3, max_tokens=20)
+    with open(pdf, "rb") as f:
+        job_id = fila.submit(f, "doenca.pdf")
+
+    job = _aguardar(fila, job_id)
+    assert job["status"] == "done"
+    assert job["pages_total"] == job["pages_processed"] == 4
+    assert indice.lotes[-1][-1]["metadata"]["page_end"] == 4
+    fila.shutdown()
+
+
+def test_falha_no_lote_marca_o_job(tmp_path):
+    def quebrar(lote):
+        raise RuntimeError("banco indisponível")
+
+    fila = IngestionJobQueue(quebrar, str(tmp_path))
+    job_id = fila.submit(io.BytesIO("Texto qualquer com conteúdo suficiente.".encode("utf-8")), "a.md")
+    job = _aguardar(fila, job_id)
+    assert job["status"] == "failed" and "banco indisponível" in job["error"]
+    assert fila.get("inexistente") is None
+    assert fila.pending() == 0
+    fila.shutdown()
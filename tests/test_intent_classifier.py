@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app.services.intent_classifier import IntentClassifier, normalize_message
+
+
+@pytest.mark.parametrize("mensagem,intencao", [
+    ("Oi!", "greeting"),
+    ("Bom dia, doutor", "greeting"),
+    ("olá gá, tudo bem?", "greeting"),
+    ("Muito obrigado!!", "thanks"),
+    ("valeu mesmo", "thanks"),
+    ("tchau, até mais", "farewell"),
+    ("Quem é você?", "identity"),
+    ("oi, quem é vc?", "identity"),
+    ("O que você sabe fazer?", "capabilities"),
+])
+def test_regras_reconhecem_conversa(mensagem, intencao):
+    resultado = IntentClassifier().classify(mensagem)
+    assert resultado == {"intent": intencao, "score": 1.0, "method": "rule"}
+
+
+@pytest.mark.parametrize("mensagem", [
+    "Oi, qual a dose da rifampicina?",
+    "obrigado, mas e a clofazimina?",
+    "O que é hanseníase?",
+    "sim",
+    "",
+    "socorro",
+    "ajuda",
+    "me ajuda, por favor",
+])
+def test_perguntas_do_dominio_seguem_para_o_rag(mensagem):
+    assert IntentClassifier().classify(mensagem) is None
+
+
+def test_pedido_de_socorro_nunca_vai_para_os_embeddings():
+    classificador = IntentClassifier(embed=lambda textos: np.ones((len(textos), 2)), threshold=0.5)
+    assert classificador.classify("ajuda") is None
+    assert classificador.classify("socorro!!") is None
+    assert classificador.classify("obrigado pela ajuda")["intent"] == "thanks"
+
+
+def test_normalizacao():
+    assert normalize_message("  Olá,   TUDO bem?! ") == "ola tudo bem"
+
+
+def test_vizinho_mais_proximo_por_embeddings():
+    def embed(textos):
+        # "saudação" é tudo que tem "ola"; o resto aponta para outro eixo
+        return np.array([[1.0, 0.0] if "ola" in normalize_message(t) else [0.0, 1.0] for t in textos])
+
+    classificador = IntentClassifier(examples={"greeting": ["olá"], "thanks": ["valeu"]}, embed=embed)
+    resultado = classificador.classify("olaaa, olá pessoal do chat")
+    assert resultado["intent"] == "greeting" and resultado["method"] == "embedding"
+    # Mensagens longas não vão para os embeddings
+    assert classificador.classify("olá " + "pergunta " * 10) is None
+    assert classificador.short_circuit_ratio() == pytest.approx(0.5)
@@ -0,0 +1,75 @@
+from app.services.markdown_chunker import chunk_markdown
+from app.services.token_utils import count_tokens, estimate_tokens
+
+DOCUMENTO = """# Roteiro
+
+## ETAPA 02
+
+### POSOLOGIA
+
+Adultos recebem a dose mensal supervisionada. A dose diária é autoadministrada.
+
+| Medicamento | Dose |
+|---|---|
+| Rifampicina | 600 mg |
+| Clofazimina | 300 mg |
+| Dapsona | 100 mg |
+
+### ARMAZENAMENTO
+
+Manter em local seco.
+
+### DESCARTE
+
+Devolver sobras à unidade.
+"""
+
+
+def test_chunks_preservam_caminho_de_titulos_e_tabela():
+    chunks = chunk_markdown(DOCUMENTO, max_tokens=200, min_tokens=0)
+    posologia = chunks[0]
+    assert posologia["metadata"]["heading_path"] == ["Roteiro", "ETAPA 02", "POSOLOGIA"]
+    assert posologia["content"].startswith("# Roteiro\n## ETAPA 02\n### POSOLOGIA")
+    assert "| Dapsona | 100 mg |" in posologia["content"]
+    assert [c["metadata"]["chunk_index"] for c in chunks] == list(range(len(chunks)))
+
+
+def test_tabela_grande_repete_cabecalho_e_respeita_limite():
+    linhas = "\n".join(f"| Medicamento {i} | {i * 10} mg |" for i in range(60))
+    texto = f"## Doses\n\n| Medicamento | Dose |\n|---|---|\n{linhas}\n"
+    chunks = chunk_markdown(texto, max_tokens=80)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["metadata"]["tokens"] <= 80
+        assert "| Medicamento | Dose |\n|---|---|" in chunk["content"]
+
+
+def test_secoes_pequenas_irmas_sao_unidas():
+    separados = chunk_markdown(DOCUMENTO, max_tokens=200, min_tokens=0)
+    chunks = chunk_markdown(DOCUMENTO, max_tokens=200, min_tokens=48)
+    assert len(chunks) < len(separados)
+    unido = chunks[-1]
+    assert unido["metadata"]["heading_path"] == ["Roteiro", "ETAPA 02"]
+    assert unido["metadata"]["subsections"][-2:] == ["ARMAZENAMENTO", "DESCARTE"]
+    assert "### DESCARTE" in unido["content"]
+
+
+def test_contagem_de_tokens():
+    assert count_tokens("") == 0
+    assert estimate_tokens("Clofazimina 50 mg.") == 3 + 1 + 1 + 1
+
+
+def test_limite_inclui_titulos_repetidos():
+    titulos = "# Roteiro de dispensação farmacêutica\n## ETAPA 02: avaliação e orientação do paciente\n### POSOLOGIA E ADMINISTRAÇÃO\n\n"
+    frases = " ".join(f"A dose {i} é tomada após a refeição com água." for i in range(30))
+    url = "https://www.gov.br/saude/" + "publicacoes-" * 40
+    chunks = chunk_markdown(titulos + frases + "\n\n" + url, max_tokens=40)
+    assert all(c["metadata"]["tokens"] <= 40 for c in chunks)
+    assert chunks[0]["metadata"]["heading_path"][-1] == "POSOLOGIA E ADMINISTRAÇÃO"
+    assert "POSOLOGIA" in chunks[0]["content"]
+
+
+def test_uniao_de_irmas_conta_as_linhas_de_titulo():
+    for limite in (30, 40, 60):
+        for chunk in chunk_markdown(DOCUMENTO, max_tokens=limite, min_tokens=48):
+            assert chunk["metadata"]["tokens"] <= limite
@@ -0,0 +1,52 @@
+from flask import Flask, jsonify, request
+
+from app.services.metrics import MetricsRegistry, instrument_flask_app
+
+
+def test_counter_e_histograma_renderizados():
+    registry = MetricsRegistry()
+    counter = registry.counter("chat_total", "Total", ["persona"])
+    histogram = registry.histogram("latencia_seconds", "Latência", ["route"], buckets=(0.1, 1.0))
+
+    counter.inc(persona="ga")
+    counter.inc(2, persona="ga")
+    histogram.observe(0.05, route="/api/chat")
+    histogram.observe(0.5, route="/api/chat")
+
+    texto = registry.render()
+    assert '# TYPE chat_total counter' in texto
+    assert 'chat_total{persona="ga"} 3' in texto
+    assert 'latencia_seconds_bucket{route="/api/chat",le="0.1"} 1' in texto
+    assert 'latencia_seconds_bucket{route="/api/chat",le="+Inf"} 2' in texto
+    assert 'latencia_seconds_count{route="/api/chat"} 2' in texto
+
+
+def test_gauge_com_callback_de_fila():
+    registry = MetricsRegistry()
+    fila = [1, 2, 3]
+    registry.register_queue("chat_history", lambda: len(fila))
+    assert 'queue_depth{queue="chat_history"} 3' in registry.render()
+
+
+def test_instrumentacao_flask_por_rota_e_persona():
+    app = Flask(__name__)
+    registry = MetricsRegistry()
+    instrument_flask_app(
+        app,
+        persona_getter=lambda: (request.get_json(silent=True) or {}).get("persona"),
+        known_personas=["ga"],
+        registry=registry,
+    )
+
+    @app.route("/api/chat", methods=["POST"])
+    def chat():
+        return jsonify({"ok": True})
+
+    client = app.test_client()
+    client.post("/api/chat", json={"persona": "ga"})
+    client.post("/api/chat", json={"persona": "desconhecida"})
+
+    texto = client.get("/metrics").get_data(as_text=True)
+    assert 'http_requests_total{route="/api/chat",method="POST",persona="ga",status="200"} 1' in texto
+    assert 'persona="other"' in texto
+    assert "http_request_duration_seconds_count" in texto
@@ -0,0 +1,54 @@
+import requests
+
+from app.services.mock_llm_server import MockLLMConfig, MockLLMServer
+
+
+def _server(**kwargs):
+    config = MockLLMConfig(latency="fixed", median_ms=1, stream_token_ms=0, seed=1, **kwargs)
+    return MockLLMServer(config, port=0).start()
+
+
+def test_chat_completion_e_streaming():
+    server = _server()
+    try:
+        payload = {"model": "mock", "messages": [{"role": "user", "content": "O que é PQT-U?"}]}
+        response = requests.post(f"{server.base_url}/chat/completions", json=payload, timeout=5)
+        assert response.status_code == 200
+        assert "PQT-U" in response.json()["choices"][0]["message"]["content"]
+
+        payload["stream"] = True
+        stream = requests.post(f"{server.base_url}/chat/completions", json=payload, timeout=5)
+        events = [line for line in stream.text.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "data: [DONE]"
+        assert len(events) > 3
+    finally:
+        server.stop()
+
+
+def test_rajada_de_429_e_taxa_de_erro():
+    server = _server(burst_interval_s=3600, burst_duration_s=3600)
+    try:
+        response = requests.post(f"{server.base_url}/chat/completions", json={}, timeout=5)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+    finally:
+        server.stop()
+
+    server = _server(error_rate=1.0)
+    try:
+        response = requests.post(f"{server.base_url}/chat/completions", json={}, timeout=5)
+        assert response.status_code == 500
+        assert server.stats["errors"] == 1
+    finally:
+        server.stop()
+
+
+def test_embeddings_deterministicos():
+    server = _server(embedding_dimension=16)
+    try:
+        body = {"model": "text-embedding-3-small", "input": ["hanseníase", "hanseníase"]}
+        data = requests.post(f"{server.base_url}/embeddings", json=body, timeout=5).json()["data"]
+        assert len(data[0]["embedding"]) == 16
+        assert data[0]["embedding"] == data[1]["embedding"]
+    finally:
+        server.stop()
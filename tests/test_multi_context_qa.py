@@ -0,0 +1,70 @@
+from app.services.multi_context_qa import as_passages, extract_best_answer
+from app.services.reindex import content_hash_id
+
+
+class PipelineFalso:
+    """Imita o pipeline de QA: uma resposta por (pergunta, contexto), registrando as chamadas"""
+
+    def __init__(self, respostas):
+        self.respostas = respostas
+        self.chamadas = []
+
+    def __call__(self, question, context, **kwargs):
+        self.chamadas.append((question, context, kwargs))
+        return [dict(self.respostas.get((q, c), {"answer": "", "score": 0.9})) for q, c in zip(question, context)]
+
+
+TRECHOS = [
+    "A clofazimina pode causar pigmentação da pele.",
+    {"id": "pqt-u-adulto", "content": "Adultos tomam rifampicina 600 mg uma vez por mês."},
+]
+
+
+def test_melhor_span_entre_trechos_em_uma_chamada():
+    pipeline = PipelineFalso({
+        ("dose?", TRECHOS[0]): {"answer": "pigmentação", "score": 0.2, "start": 30, "end": 41},
+        ("dose?", TRECHOS[1]["content"]): {"answer": "600 mg", "score": 0.8, "start": 32, "end": 38},
+    })
+    resultado = extract_best_answer(pipeline, "dose?", TRECHOS, doc_stride=64, max_seq_len=256)
+    assert resultado["answer"] == "600 mg"
+    assert resultado["chunk_id"] == "pqt-u-adulto"
+    assert resultado["chunk_index"] == 1
+    assert resultado["context"] == TRECHOS[1]["content"]
+    assert len(pipeline.chamadas) == 1
+    _, contextos, kwargs = pipeline.chamadas[0]
+    assert len(contextos) == 2
+    assert kwargs["doc_stride"] == 64 and kwargs["max_seq_len"] == 256
+
+
+def test_variacoes_da_pergunta_no_mesmo_lote():
+    pipeline = PipelineFalso({("dose", TRECHOS[0]): {"answer": "pele", "score": 0.7}})
+    resultado = extract_best_answer(pipeline, ["dose?", "dose"], TRECHOS[:1])
+    assert resultado["answer"] == "pele"
+    assert resultado["chunk_id"] == content_hash_id(TRECHOS[0])
+    perguntas, _, _ = pipeline.chamadas[0]
+    assert perguntas == ["dose?", "dose"]
+
+
+def test_respostas_vazias_nao_vencem():
+    pipeline = PipelineFalso({})
+    resultado = extract_best_answer(pipeline, "x", TRECHOS)
+    assert resultado["answer"] == ""
+    assert resultado["chunk_id"] is None
+    assert resultado["score"] == 0.0
+
+
+def test_sem_trechos_nao_chama_modelo():
+    pipeline = PipelineFalso({})
+    assert extract_best_answer(pipeline, "x", ["", "  "])["answer"] == ""
+    assert pipeline.chamadas == []
+
+
+def test_as_passages_aceita_pares():
+    assert as_passages([("texto", 0.5)]) == [(content_hash_id("texto"), "texto")]
+
+
+def test_variacoes_repetidas_avaliadas_uma_vez():
+    pipeline = PipelineFalso({})
+    extract_best_answer(pipeline, ["dose", "dose ", "dose"], TRECHOS)
+    perguntas, contextos, _ = pipeline.chamadas[0]
+    assert perguntas == ["dose", "dose"] and len(contextos) == 2
@@ -0,0 +1,24 @@
+from app.services.perf_utils import HashingEmbedder, latency_summary, percentile
+
+
+def test_percentile_interpolado():
+    valores = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert percentile(valores, 50) == 5.5
+    assert percentile(valores, 100) == 10
+    assert percentile([], 95) == 0.0
+
+
+def test_latency_summary_em_ms():
+    resumo = latency_summary([0.010, 0.020, 0.030])
+    assert resumo["count"] == 3
+    assert resumo["p50"] == 20.0
+    assert resumo["max"] == 30.0
+
+
+def test_hashing_embedder_deterministico():
+    embedder = HashingEmbedder()
+    a = embedder.encode("Dose de rifampicina")
+    b = embedder.encode(["Dose de rifampicina", "armazenamento"])
+    assert a.shape == (384,)
+    assert b.shape == (2, 384)
+    assert (a == b[0]).all()
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+pytest.importorskip("openai")
+
+import rag_pipeline  # noqa: E402
+
+
+class _FakeRAGService:
+    instances = 0
+
+    def __init__(self):
+        type(self).instances += 1
+        self.is_initialized = True
+        self.healthy = True
+
+    def is_ready(self):
+        return True
+
+    def ping(self):
+        return self.healthy
+
+
+def test_pipeline_compartilhado_inicializa_uma_vez(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "teste")
+    monkeypatch.setattr(rag_pipeline, "RAGService", _FakeRAGService)
+    monkeypatch.setattr(rag_pipeline, "_pipeline_instance", None)
+    _FakeRAGService.instances = 0
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(rag_pipeline.get_rag_pipeline())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(p) for p in results}) == 1
+    assert _FakeRAGService.instances == 0  # inicialização preguiçosa
+    assert all(p.ensure_ready() for p in results)
+    assert _FakeRAGService.instances == 1
+
+
+def test_reinicializa_quando_checagem_de_saude_falha(monkeypatch):
+    monkeypatch.setattr(rag_pipeline, "RAGService", _FakeRAGService)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "teste")
+    monkeypatch.setenv("RAG_HEALTH_CHECK_INTERVAL", "0")
+    pipeline = rag_pipeline.RAGPipeline(lazy=True)
+    assert pipeline.ensure_ready()
+    first = pipeline.rag_service
+
+    first.healthy = False
+    assert pipeline.ensure_ready()
+    assert pipeline.rag_service is not first
+
+
+class _FakeCompletions:
+    def create(self, **kwargs):
+        message = type("Message", (), {"content": "resposta genérica"})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+
+def _pipeline_pronto(monkeypatch, retrieve_context):
+    pipeline = rag_pipeline.RAGPipeline(lazy=True)
+    monkeypatch.setattr(pipeline, "ensure_ready", lambda: True)
+    pipeline.rag_service = type("Service", (), {"retrieve_context": staticmethod(retrieve_context)})()
+    pipeline.openai_client = type("Client", (), {"chat": type("Chat", (), {"completions": _FakeCompletions()})()})()
+    return pipeline
+
+
+def test_query_marca_erro_de_busca_e_de_inicializacao(monkeypatch):
+    def quebrar(query):
+        raise ConnectionError("Astra DB fora do ar")
+
+    ok = _pipeline_pronto(monkeypatch, lambda query: "A dose mensal é supervisionada.")
+    assert ok.query("dose?") == {"answer": "resposta genérica", "sources": []}
+
+    sem_contexto = _pipeline_pronto(monkeypatch, quebrar)
+    assert sem_contexto.query("dose?")["error"] is True
+    assert sem_contexto.generate_response("dose?") == "resposta genérica"
+
+    fora_do_ar = rag_pipeline.RAGPipeline(lazy=True)
+    monkeypatch.setattr(fora_do_ar, "ensure_ready", lambda: False)
+    assert fora_do_ar.query("dose?")["error"] is True
+
+
+def test_banco_do_streamlit_ignora_respostas_de_erro(monkeypatch):
+    from pathlib import Path
+
+    monkeypatch.syspath_prepend(str(Path(__file__).resolve().parent.parent / "scripts"))
+    import build_answer_bank
+
+    respostas = {"dose?": {"answer": "600 mg", "sources": []}, "pele?": {"answer": "❌ Erro", "sources": [], "error": True}}
+    pipeline = type("Pipeline", (), {
+        "ensure_ready": lambda self: True,
+        "query": lambda self, pergunta, persona: respostas[pergunta],
+    })()
+    monkeypatch.setattr(rag_pipeline, "get_rag_pipeline", lambda: pipeline)
+    responder, _ = build_answer_bank.streamlit_answerer("tese")
+    assert responder("dose?", "professor") == {"answer": "600 mg", "sources": []}
+    assert responder("pele?", "professor") is None
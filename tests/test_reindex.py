@@ -0,0 +1,57 @@
+from app.services.reindex import assign_content_ids, content_hash_id, reindex
+
+
+class _MemoryStore:
+    def __init__(self):
+        self.docs = {}
+        self.embedded = 0
+
+    def list_documents(self, source):
+        return {i: d["metadata"] for i, d in self.docs.items() if d["metadata"].get("source") == source}
+
+    def upsert_documents(self, documents):
+        self.embedded += len(documents)
+        for doc in documents:
+            self.docs[doc["id"]] = doc
+        return True
+
+    def update_metadata(self, doc_id, metadata):
+        self.docs[doc_id]["metadata"] = metadata
+
+    def delete_documents(self, ids):
+        for doc_id in ids:
+            del self.docs[doc_id]
+        return True
+
+
+def _chunks(*texts):
+    return [{"content": t, "metadata": {"source": "tese", "chunk_index": i}} for i, t in enumerate(texts)]
+
+
+def test_id_estavel_e_independente_de_espacos():
+    assert content_hash_id("Dose  mensal\n", "tese") == content_hash_id("Dose mensal", "tese")
+    assert content_hash_id("Dose mensal", "tese") != content_hash_id("Dose mensal", "outra")
+    assert len(assign_content_ids(_chunks("a", "a", "b"), "tese")) == 2
+
+
+def test_reindexacao_embute_apenas_o_que_mudou():
+    store = _MemoryStore()
+    reindex(store, _chunks("Etapa 1", "Etapa 2", "Etapa 3"), source="tese")
+    assert store.embedded == 3
+
+    stats = reindex(store, _chunks("Etapa 1", "Etapa 2 revisada", "Etapa 3"), source="tese")
+    assert stats == {"add": 1, "update_metadata": 0, "keep": 2, "delete": 1}
+    assert store.embedded == 4
+    assert sorted(d["content"] for d in store.docs.values()) == ["Etapa 1", "Etapa 2 revisada", "Etapa 3"]
+
+    # Inserir uma seção no início só desloca chunk_index: nenhum novo embedding para os antigos
+    stats = reindex(store, _chunks("Nova", "Etapa 1", "Etapa 2 revisada", "Etapa 3"), source="tese")
+    assert stats["add"] == 1 and stats["update_metadata"] == 3
+    assert store.embedded == 5
+
+
+def test_dry_run_nao_grava():
+    store = _MemoryStore()
+    stats = reindex(store, _chunks("Etapa 1"), source="tese", dry_run=True)
+    assert stats["add"] == 1
+    assert store.docs == {}
@@ -0,0 +1,97 @@
+import threading
+
+from app.services.reranker import Reranker
+
+
+def pontuador_por_palavra(palavra, chamadas):
+    def pontuar(pares):
+        chamadas.append(len(pares))
+        return [texto.lower().count(palavra) for _, texto in pares]
+    return pontuar
+
+
+CANDIDATOS = [
+    "Dose infantil da PQT-U para crianças",
+    "PQT-U adulto: rifampicina 600 mg mensal supervisionada",
+    "Orientações gerais de armazenamento",
+]
+
+
+def test_reordena_em_uma_unica_passada():
+    chamadas = []
+    reranker = Reranker(score_pairs=pontuador_por_palavra("adulto", chamadas))
+    resultado = reranker.rerank("dose PQT-U adulto", CANDIDATOS, top_k=2)
+    assert resultado[0] == CANDIDATOS[1]
+    assert len(resultado) == 2
+    assert chamadas == [3]
+
+
+def test_cache_por_pergunta_e_chunk():
+    chamadas = []
+    reranker = Reranker(score_pairs=pontuador_por_palavra("adulto", chamadas))
+    reranker.rerank("Dose PQT-U adulto", CANDIDATOS, top_k=2)
+    reranker.rerank("  dose pqt-u ADULTO ", CANDIDATOS, top_k=2)
+    assert chamadas == [3]
+    reranker.rerank("outra pergunta", CANDIDATOS, top_k=2)
+    assert chamadas == [3, 3]
+
+
+def test_dicts_usam_id_e_content():
+    chamadas = []
+    reranker = Reranker(score_pairs=pontuador_por_palavra("rifampicina", chamadas))
+    candidatos = [{"id": f"c{i}", "content": texto} for i, texto in enumerate(CANDIDATOS)]
+    assert reranker.rerank("rifampicina", candidatos, top_k=1) == [candidatos[1]]
+
+
+def test_orcamento_limita_pares_novos():
+    chamadas = []
+    reranker = Reranker(score_pairs=pontuador_por_palavra("adulto", chamadas), latency_budget_ms=10)
+    reranker.seconds_per_pair = 0.004  # cabem 2 pares em 10 ms
+    resultado = reranker.rerank("adulto", CANDIDATOS, top_k=3)
+    assert chamadas == [2]
+    assert resultado == [CANDIDATOS[1], CANDIDATOS[0], CANDIDATOS[2]]
+
+    reranker.seconds_per_pair = 1.0
+    assert reranker.rerank("outra", CANDIDATOS, top_k=2) == CANDIDATOS[:2]
+    assert chamadas == [2]
+
+
+def test_pula_sob_carga():
+    liberar = threading.Event()
+    dentro = threading.Event()
+
+    def lento(pares):
+        dentro.set()
+        liberar.wait(2)
+        return [1.0] * len(pares)
+
+    reranker = Reranker(score_pairs=lento, max_concurrent=1)
+    thread = threading.Thread(target=reranker.rerank, args=("a", CANDIDATOS, 2))
+    thread.start()
+    dentro.wait(2)
+    assert reranker.rerank("b", CANDIDATOS, top_k=2) == CANDIDATOS[:2]
+    liberar.set()
+    thread.join()
+
+
+def test_sem_modelo_mantem_ordem():
+    reranker = Reranker(model_name="modelo/inexistente")
+    reranker._load_failed = True
+    assert reranker.rerank("x", CANDIDATOS, top_k=2) == CANDIDATOS[:2]
+    assert reranker.available is False
+
+
+def test_passada_lenta_isolada_nao_desliga_a_etapa():
+    chamadas = []
+    reranker = Reranker(score_pairs=pontuador_por_palavra("adulto", chamadas), latency_budget_ms=10, probe_interval_s=3600)
+    reranker.seconds_per_pair = 1.0  # estimativa estourada por uma passada lenta
+    assert reranker.rerank("a", CANDIDATOS, top_k=2) == CANDIDATOS[:2]
+    assert chamadas == []
+
+    # Passado o intervalo, uma prova de dois pares remede o custo e a etapa volta
+    reranker.probe_interval = 0
+    reranker.rerank("b", CANDIDATOS, top_k=2)
+    assert chamadas == [2]
+    assert reranker.seconds_per_pair < 0.005
+    reranker.rerank("adulto", CANDIDATOS, top_k=3)
+    assert chamadas == [2, 3]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from app.services.sentence_index import SentenceIndex, split_sentences
+
+CHUNKS = [
+    "A hanseníase é uma doença infecciosa crônica. O tratamento usa poliquimioterapia por seis meses.",
+    "A rifampicina pode deixar a urina avermelhada. Esse efeito é esperado e não é grave.",
+]
+
+
+def test_divide_frases_e_ignora_curtas():
+    texto = "Primeira frase completa aqui. Ok. Segunda frase também longa!\nTerceira linha com texto suficiente"
+    frases = [texto[a:b] for a, b in split_sentences(texto)]
+    assert frases == [
+        "Primeira frase completa aqui.",
+        "Segunda frase também longa!",
+        "Terceira linha com texto suficiente",
+    ]
+
+
+def test_busca_por_sobreposicao_de_termos():
+    indice = SentenceIndex(CHUNKS)
+    assert len(indice) == 4
+    resultados = indice.search("a urina fica avermelhada com rifampicina?", top_k=2)
+    assert resultados[0]["sentence"] == "A rifampicina pode deixar a urina avermelhada."
+    assert resultados[0]["chunk_index"] == 1
+    inicio, fim = resultados[0]["start"], resultados[0]["end"]
+    assert CHUNKS[1][inicio:fim] == resultados[0]["sentence"]
+    assert indice.search("palavras inexistentes") == []
+
+
+def test_restricao_aos_trechos_recuperados():
+    indice = SentenceIndex(CHUNKS)
+    resultados = indice.search("a doença e o efeito", top_k=5, restrict_chunks=[CHUNKS[0]])
+    assert resultados and all(r["chunk_index"] == 0 for r in resultados)
+    # Trechos fora do índice não restringem a busca
+    assert indice.search("efeito esperado", restrict_chunks=["outro texto"])[0]["chunk_index"] == 1
+
+
+def test_embeddings_entram_no_score():
+    vocabulario = ["tratamento", "urina"]
+
+    def embed(textos):
+        return np.array([[float(palavra in t.lower()) for palavra in vocabulario] + [0.1] for t in textos])
+
+    indice = SentenceIndex(CHUNKS, embed=embed, semantic_weight=0.9)
+    resultados = indice.search("quanto tempo dura?", top_k=1, question_embedding=embed(["tratamento"])[0])
+    assert resultados[0]["sentence"] == "O tratamento usa poliquimioterapia por seis meses."
+    assert resultados[0]["overlap"] == 0.0
@@ -0,0 +1,68 @@
+import pytest
+
+from app.services.session_history import (
+    SessionHistory,
+    decode_cursor,
+    encode_cursor,
+    is_valid_session_id,
+    new_session_id,
+)
+
+
+def test_ring_buffer_limita_turnos_e_bytes():
+    historico = SessionHistory(max_turns=3, max_bytes=1000)
+    for i in range(5):
+        historico.record("s1", f"pergunta {i}", f"resposta {i}")
+    assert [t["message"] for t in historico.recent("s1")] == ["pergunta 2", "pergunta 3", "pergunta 4"]
+
+    historico = SessionHistory(max_turns=10, max_bytes=25)
+    historico.record("s2", "a" * 10, "b" * 10)
+    historico.record("s2", "c" * 10, "d" * 10)
+    assert [t["message"] for t in historico.recent("s2")] == ["c" * 10]
+    # O turno mais recente fica mesmo acima do limite
+    historico.record("s2", "e" * 30, "f")
+    assert [t["message"] for t in historico.recent("s2")] == ["e" * 30]
+
+
+def test_banco_lido_uma_vez_por_sessao():
+    leituras = []
+
+    def carregar(session_id, limit):
+        leituras.append((session_id, limit))
+        return [{"message": "segunda", "response": "r2", "ts": 2}, {"message": "primeira", "response": "r1", "ts": 1}]
+
+    historico = SessionHistory(load_recent=carregar, max_turns=5)
+    historico.record("s1", "terceira", "r3")
+    historico.recent("s1")
+    historico.window("s1", 100)
+    assert leituras == [("s1", 5)]
+    assert [t["message"] for t in historico.recent("s1")] == ["primeira", "segunda", "terceira"]
+
+
+def test_janela_respeita_orcamento_de_tokens():
+    historico = SessionHistory()
+    historico.record("s1", "um dois", "tres")
+    historico.record("s1", "quatro", "cinco seis")
+    contar = lambda texto: len(texto.split())
+    assert historico.window("s1", 3, count=contar) == [
+        {"role": "user", "content": "quatro"},
+        {"role": "assistant", "content": "cinco seis"},
+    ]
+    assert len(historico.window("s1", 6, count=contar)) == 4
+    assert historico.window("s1", 2, count=contar) == []
+    assert historico.window("outra", 100) == []
+
+
+def test_cursor_ida_e_volta():
+    cursor = encode_cursor(1700000000123, "abc-1")
+    assert decode_cursor(cursor) == (1700000000123, "abc-1")
+    with pytest.raises(ValueError):
+        decode_cursor("não é cursor")
+
+
+def test_ids_de_sessao_emitidos_pelo_servidor():
+    ids = {new_session_id() for _ in range(100)}
+    assert len(ids) == 100
+    assert all(is_valid_session_id(session_id) for session_id in ids)
+    for invalido in [None, 123, ["a" * 43], {"id": "x"}, "", "sessao1", "a" * 65, "a" * 42 + "/"]:
+        assert not is_valid_session_id(invalido)
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight, SingleFlightTimeout
+
+
+def _concorrentes(n, alvo):
+    threads = [threading.Thread(target=alvo) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_uma_computacao_para_chamadas_identicas():
+    flights = SingleFlight()
+    execucoes = []
+    resultados = []
+    barreira = threading.Barrier(8)
+
+    def computar():
+        execucoes.append(1)
+        time.sleep(0.2)
+        return "resposta"
+
+    def chamar():
+        barreira.wait()
+        resultados.append(flights.do("dose_rifampicina", computar))
+
+    _concorrentes(8, chamar)
+    assert len(execucoes) == 1
+    assert [r for r, _ in resultados] == ["resposta"] * 8
+    assert sum(1 for _, compartilhado in resultados if not compartilhado) == 1
+    assert flights.in_flight() == 0
+
+
+def test_erro_da_lider_propaga_e_chave_e_liberada():
+    flights = SingleFlight()
+    erros = []
+    iniciou = threading.Event()
+
+    def falhar():
+        iniciou.set()
+        time.sleep(0.1)
+        raise RuntimeError("falhou")
+
+    def lider():
+        with pytest.raises(RuntimeError):
+            flights.do("k", falhar)
+
+    def seguidora():
+        iniciou.wait()
+        try:
+            flights.do("k", lambda: "não deveria rodar")
+        except RuntimeError as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=lider), threading.Thread(target=seguidora)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(erros) == 1
+    assert flights.do("k", lambda: "ok") == ("ok", False)
+
+
+def test_seguidora_desiste_apos_timeout():
+    flights = SingleFlight()
+    iniciou = threading.Event()
+    liberar = threading.Event()
+
+    def lenta():
+        iniciou.set()
+        liberar.wait()
+        return "tarde"
+
+    lider = threading.Thread(target=lambda: flights.do("k", lenta))
+    lider.start()
+    iniciou.wait()
+    with pytest.raises(SingleFlightTimeout):
+        flights.do("k", lambda: "outra", timeout=0.05)
+    liberar.set()
+    lider.join()
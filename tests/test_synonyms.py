@@ -0,0 +1,52 @@
+import threading
+
+from app.services.synonyms import AhoCorasick, SynonymMatcher, SynonymRegistry, fold_text
+
+DICIONARIO = {
+    "hanseníase": ["lepra", "doença de hansen"],
+    "medicamento": ["remédio", "fármaco"],
+    "cura": ["recuperação"],
+}
+
+
+def test_automato_encontra_padroes_sobrepostos():
+    automato = AhoCorasick(["he", "she", "his", "hers"])
+    encontrados = sorted((inicio, automato.patterns[i]) for inicio, _, i in automato.finditer("ushers"))
+    assert encontrados == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_expansao_sem_acentos_e_por_sinonimo():
+    matcher = SynonymMatcher(DICIONARIO)
+    assert fold_text("Hanseníase") == "hanseniase"
+    assert matcher.matched_terms("Qual REMEDIO para a Doenca de Hansen?") == {"medicamento", "hanseníase"}
+    assert matcher.expand("lepra") == {"hanseníase", "lepra", "doença de hansen"}
+
+
+def test_respeita_fronteira_de_palavra():
+    matcher = SynonymMatcher(DICIONARIO)
+    assert matcher.matched_terms("procura de informações") == set()
+
+
+def test_recarga_troca_versao_atomicamente():
+    registry = SynonymRegistry(DICIONARIO)
+    antes = registry.current
+    versoes = set()
+
+    def leitor():
+        for _ in range(200):
+            matcher = registry.current
+            versoes.add(matcher.version)
+            assert matcher.expand("lepra")
+
+    threads = [threading.Thread(target=leitor) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    nova_versao = registry.reload({**DICIONARIO, "dose": ["posologia"]})
+    for thread in threads:
+        thread.join()
+
+    assert nova_versao != antes.version
+    assert registry.current.version == nova_versao
+    assert versoes <= {antes.version, nova_versao}
+    assert "posologia" in registry.current.expand("qual a dose?")
+    assert SynonymMatcher(DICIONARIO).version == antes.version
@@ -0,0 +1,48 @@
+import json
+
+from app.services.text_rewriter import CompiledReplacer, PersonaRewriter, get_rewriter, rewrite_text
+
+
+def test_termo_mais_longo_vence_e_sem_encadeamento():
+    replacer = CompiledReplacer({
+        "dose": "quantidade do remédio",
+        "dose mensal": "remédio que toma uma vez por mês",
+        "remédio": "remédio 💊",
+    })
+    assert replacer.rewrite("A dose mensal e a dose diária") == (
+        "A remédio que toma uma vez por mês e a quantidade do remédio diária"
+    )
+
+
+def test_fronteira_de_palavra_e_maiuscula_inicial():
+    replacer = CompiledReplacer({"mg": "miligramas", "dose": "quantidade"}, ignore_case=True)
+    assert replacer.rewrite("600 mg, amgdala, Dose e doses") == "600 miligramas, amgdala, Quantidade e doses"
+
+
+def test_padrao_diferencia_maiusculas_como_str_replace():
+    replacer = CompiledReplacer({"dose": "quantidade"})
+    assert replacer.rewrite("Dose e dose") == "Dose e quantidade"
+    assert rewrite_text("Posologia e posologia", "ga_basico") == "Posologia e como tomar"
+
+
+def test_estagios_em_ordem_e_subconjunto(tmp_path):
+    rules = {
+        "persona": "teste",
+        "stages": [
+            {"name": "termos", "replacements": {"medicamentos": "remédios"}},
+            {"name": "emojis", "replacements": {"remédios": "remédios 💊"}},
+        ],
+    }
+    path = tmp_path / "teste.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    rewriter = PersonaRewriter.from_file(path)
+    assert rewriter.rewrite("Os medicamentos") == "Os remédios 💊"
+    assert rewriter.rewrite("Os medicamentos", stages=("termos",)) == "Os remédios"
+    assert get_rewriter("teste", tmp_path) is get_rewriter("teste", tmp_path)
+
+
+def test_regras_do_ga_carregam_dos_arquivos():
+    texto = rewrite_text("Siga a posologia. Procure o farmacêutico", "ga_explicativo")
+    assert texto == "Siga a como tomar o remédio.\nProcure o farmacêutico (quem trabalha na farmácia)"
+    assert rewrite_text("A via de administração", "ga_basico") == "A como tomar"
+    assert rewrite_text('O "remédio" e os remédios', "ga") == "O remédio 💊 e os remédios 💊"
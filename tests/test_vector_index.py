@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import VectorIndex, choose_index_type
+
+
+def _dados(n=50, d=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vetores = rng.normal(size=(n, d)).astype("float32")
+    registros = [{"id": f"chunk_{i}", "content": f"texto {i}", "metadata": {"i": i}} for i in range(n)]
+    return registros, vetores
+
+
+def test_busca_por_cosseno_independe_da_escala():
+    registros, vetores = _dados()
+    index = VectorIndex(16)
+    index.add(registros, vetores * 10.0)
+    resultados = index.search(vetores[7] * 0.01, k=3)
+    assert resultados[0]["id"] == "chunk_7"
+    assert resultados[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+    assert index.add(registros[:5], vetores[:5]) == 0
+
+
+def test_remocao_e_persistencia(tmp_path):
+    registros, vetores = _dados()
+    index = VectorIndex(16)
+    index.add(registros, vetores)
+    assert index.remove(["chunk_7", "chunk_7", "inexistente"]) == 1
+    assert "chunk_7" not in index and len(index) == 49
+    assert all(r["id"] != "chunk_7" for r in index.search(vetores[7], k=5))
+
+    index.save(str(tmp_path))
+    carregado = VectorIndex.load_or_create(str(tmp_path), 16)
+    assert len(carregado) == 49
+    assert carregado.search(vetores[3], k=1)[0]["id"] == "chunk_3"
+    assert carregado.get("chunk_3")["metadata"] == {"i": 3}
+    assert len(VectorIndex.load_or_create(str(tmp_path), 32)) == 0
+
+
+def test_tipo_por_tamanho_do_corpus():
+    assert choose_index_type(1_000) == "flat"
+    assert choose_index_type(100_000) == "hnsw"
+    assert choose_index_type(5_000_000) == "ivf"
+    with pytest.raises(ValueError):
+        VectorIndex(16, index_type="lsh")
+
+
+@pytest.mark.parametrize("tipo", ["flat", "hnsw", "ivf"])
+def test_tipos_faiss(tmp_path, tipo):
+    pytest.importorskip("faiss")
+    registros, vetores = _dados(n=400)
+    index = VectorIndex(16, index_type=tipo)
+    index.add(registros, vetores)
+    assert index.search(vetores[11], k=1)[0]["id"] == "chunk_11"
+    index.remove(["chunk_11"])
+    assert index.search(vetores[11], k=1)[0]["id"] != "chunk_11"
+    index.save(str(tmp_path))
+    assert VectorIndex.load(str(tmp_path)).search(vetores[12], k=1)[0]["id"] == "chunk_12"
+
+
+def test_conjunto_inconsistente_nao_carrega(tmp_path):
+    registros, vetores = _dados()
+    index = VectorIndex(16)
+    index.add(registros, vetores)
+    index.save(str(tmp_path))
+    # Gravação interrompida: records.json de um conjunto menor
+    VectorIndex(16).save(str(tmp_path / "menor"))
+    (tmp_path / "records.json").write_text((tmp_path / "menor" / "records.json").read_text())
+    with pytest.raises(ValueError, match="inconsistente"):
+        VectorIndex.load(str(tmp_path))
+    assert len(VectorIndex.load_or_create(str(tmp_path), 16)) == 0
+
+
+def test_index_faiss_de_outra_gravacao_e_reconstruido(tmp_path):
+    pytest.importorskip("faiss")
+    registros, vetores = _dados(n=400)
+    index = VectorIndex(16, index_type="flat")
+    index.add(registros, vetores)
+    index.save(str(tmp_path))
+    menor = VectorIndex(16, index_type="flat")
+    menor.add(registros[:300], vetores[:300])
+    menor.save(str(tmp_path / "menor"))
+    (tmp_path / "index.faiss").write_bytes((tmp_path / "menor" / "index.faiss").read_bytes())
+    carregado = VectorIndex.load(str(tmp_path))
+    assert carregado.search(vetores[350], k=1)[0]["id"] == "chunk_350"
@@ -0,0 +1,160 @@
+import json
+import threading
+
+from app.services.write_behind import WriteBehindBuffer
+
+
+class Banco:
+    def __init__(self):
+        self.lotes = []
+        self.fora_do_ar = False
+        self.gravou = threading.Event()
+
+    def insert_many(self, documentos):
+        if self.fora_do_ar:
+            raise ConnectionError("Astra DB indisponível")
+        self.lotes.append(list(documentos))
+        self.gravou.set()
+
+
+def test_lote_disparado_pelo_tamanho(tmp_path):
+    banco = Banco()
+    buffer = WriteBehindBuffer(banco.insert_many, str(tmp_path / "spill.jsonl"), max_batch=3, flush_interval=60)
+    for i in range(3):
+        buffer.add({"i": i})
+    assert banco.gravou.wait(2)
+    assert banco.lotes == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+    buffer.close()
+
+
+def test_lote_disparado_pelo_tempo(tmp_path):
+    banco = Banco()
+    buffer = WriteBehindBuffer(banco.insert_many, str(tmp_path / "spill.jsonl"), max_batch=100, flush_interval=0.05)
+    buffer.add({"i": 1})
+    assert banco.gravou.wait(2)
+    assert banco.lotes == [[{"i": 1}]]
+    buffer.close()
+
+
+def test_close_esvazia_a_fila(tmp_path):
+    banco = Banco()
+    buffer = WriteBehindBuffer(banco.insert_many, str(tmp_path / "spill.jsonl"), max_batch=2, flush_interval=60)
+    for i in range(5):
+        buffer.add({"i": i})
+    buffer.close()
+    assert [doc["i"] for lote in banco.lotes for doc in lote] == [0, 1, 2, 3, 4]
+    assert len(buffer) == 0
+
+
+def test_transbordo_e_reenvio(tmp_path):
+    banco = Banco()
+    banco.fora_do_ar = True
+    spill = tmp_path / "spill.jsonl"
+    buffer = WriteBehindBuffer(banco.insert_many, str(spill), max_batch=10, flush_interval=60)
+    buffer.add({"i": 1, "texto": "ação"})
+    buffer.add({"i": 2})
+    buffer.flush()
+    assert [json.loads(linha) for linha in spill.read_text(encoding="utf-8").splitlines()] == [
+        {"i": 1, "texto": "ação"}, {"i": 2}
+    ]
+
+    # Banco de volta: a próxima gravação reenvia o arquivo e o apaga
+    banco.fora_do_ar = False
+    buffer.add({"i": 3})
+    buffer.flush()
+    assert [doc["i"] for lote in banco.lotes for doc in lote] == [3, 1, 2]
+    assert not spill.exists()
+    buffer.close()
+
+
+def test_fila_cheia_vai_para_o_arquivo(tmp_path):
+    banco = Banco()
+    spill = tmp_path / "spill.jsonl"
+    buffer = WriteBehindBuffer(banco.insert_many, str(spill), max_batch=100, flush_interval=60, max_queue=1)
+    buffer.add({"i": 1})
+    buffer.add({"i": 2})
+    assert json.loads(spill.read_text(encoding="utf-8")) == {"i": 2}
+    buffer.close()
+
+
+def test_reenvio_interrompido_e_recuperado(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    (tmp_path / "spill.jsonl.replaying").write_text('{"i": 1}\n', encoding="utf-8")
+    banco = Banco()
+    buffer = WriteBehindBuffer(banco.insert_many, str(spill), max_batch=10, flush_interval=60)
+    assert buffer.replay_spill() == 1
+    assert banco.lotes == [[{"i": 1}]]
+    buffer.close()
+
+
+class IdDuplicado(Exception):
+    pass
+
+
+def test_reenvio_de_lote_parcial_nao_duplica(tmp_path):
+    gravados = {}
+    falhar_no_meio = [True]
+
+    def insert_many(documentos):
+        duplicados = [doc["_id"] for doc in documentos if doc["_id"] in gravados]
+        for doc in documentos:
+            gravados.setdefault(doc["_id"], doc)
+            if falhar_no_meio[0]:
+                falhar_no_meio[0] = False
+                raise TimeoutError("timeout depois do primeiro documento")
+        if duplicados:
+            raise IdDuplicado(duplicados)
+
+    spill = tmp_path / "spill.jsonl"
+    buffer = WriteBehindBuffer(
+        insert_many, str(spill), max_batch=10, flush_interval=60,
+        already_written=lambda erro: isinstance(erro, IdDuplicado),
+    )
+    buffer.add({"_id": "a"})
+    buffer.add({"_id": "b"})
+    buffer.flush()
+    assert spill.exists() and list(gravados) == ["a"]
+
+    assert buffer.replay_spill() == 2
+    assert list(gravados) == ["a", "b"]
+    assert not spill.exists()
+    buffer.close()
+
+
+def test_linha_cortada_no_transbordo_vai_para_corrupt(tmp_path):
+    banco = Banco()
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text('{"i": 1}\n{"i": 2}\n{"i": 3, "tex', encoding="utf-8")
+    buffer = WriteBehindBuffer(banco.insert_many, str(spill), max_batch=10, flush_interval=60)
+    assert buffer.replay_spill() == 2
+    assert banco.lotes == [[{"i": 1}, {"i": 2}]]
+    assert (tmp_path / "spill.jsonl.corrupt").read_text(encoding="utf-8") == '{"i": 3, "tex\n'
+    assert not spill.exists() and not (tmp_path / "spill.jsonl.replaying").exists()
+
+    # A thread de fundo segue gravando depois do reenvio
+    banco.gravou.clear()
+    buffer.add({"i": 4})
+    buffer.close()
+    assert banco.lotes[-1] == [{"i": 4}]
+
+
+def test_thread_sobrevive_a_erro_inesperado(tmp_path):
+    banco = Banco()
+    buffer = WriteBehindBuffer(banco.insert_many, str(tmp_path / "spill.jsonl"), max_batch=1, flush_interval=0.01)
+    chamadas = []
+
+    def replay_quebrado():
+        chamadas.append(1)
+        if len(chamadas) == 1:
+            raise OSError("disco indisponível")
+        return 0
+
+    buffer.replay_spill = replay_quebrado
+    buffer.add({"i": 1})
+    assert banco.gravou.wait(2)
+    banco.gravou.clear()
+    buffer.add({"i": 2})
+    assert banco.gravou.wait(3)
+    assert buffer._thread.is_alive()
+    buffer.close()
+    assert banco.lotes == [[{"i": 1}], [{"i": 2}]]